@@ -0,0 +1,404 @@
+# battle_odds.py
+"""战斗结果估算：不走场景机制，直接给出玩家对某只怪物一直选择「攻击」时的胜率、期望回合数与掉血分布。
+
+逐回合规则与 BattleScene.handle_choice(0) 一致：
+- 玩家出手：max(1, 攻击力 - randint(0, 1))，攻击力含 ATK_UP、虚弱 -2 与 ATK_MULTIPLIER 倍率；怪物 DAMAGE_REDUCTION 按比例减伤；
+- 怪物出手（未晕眩时）：max(1, atk - randint(0, 1))，乘怪物 ATK_MULTIPLIER；玩家 BARRIER 按受击次数 90%、80%…递减减伤，
+  玩家 DAMAGE_REDUCTION 再按比例减伤；之后以 effect_probability 附带 WEAK / POISON / STUN（1~2 回合，免疫时无效）；
+- 回合末状态计时：玩家本回合开始时晕眩、或出手后仍未被晕眩时推进；中毒按当前生命 10% 扣血，虚弱、晕眩、巨大化递减；
+- 生命归零时若有复活卷轴，恢复到初始生命并清除战斗状态，否则判负。
+门 / 剧情声明的战斗扩展（current_battle_extensions）与战斗中使用道具不在模型内。
+
+两种算法共用同一个向量化的单回合推进（_step）：
+- exact：每回合把每个状态按全部随机分支（出手浮动、怪物浮动、附带效果与持续时间）展开，合并相同状态，得到精确分布；
+- monte_carlo：每行只抽一个分支，用 NumPy 批量模拟 trials 场战斗。
+method="auto" 时先尝试精确计算，状态数超过 max_states 再退回蒙特卡洛。
+
+用法：python battle_odds.py --player-hp 120 --player-atk 14 --monster-hp 90 --monster-atk 9 --effect 0.3
+"""
+import argparse
+from dataclasses import dataclass, field, fields, replace
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from models.game_config import GameConfig
+from models.items import ItemType
+from models.status import StatusName
+
+# 附带效果的编号与 Monster.attack 中 random.choice([WEAK, POISON, STUN]) 的顺序一致
+_PROC_WEAK, _PROC_POISON, _PROC_STUN = 0, 1, 2
+_NO_PROC = -1
+_NO_BARRIER = -1
+# 结界第 10 次受击起减伤为 0，之后的次数不再区分（exact 模式据此合并状态）
+_BARRIER_SPENT = 10
+
+# 随战斗推进变化的状态列（exact 模式按这些列合并相同状态）
+_STATE_COLUMNS = (
+    "monster_hp",
+    "player_hp",
+    "weak",
+    "poison",
+    "stun",
+    "player_multiplier_turns",
+    "barrier_hits",
+    "revives",
+    "monster_stun",
+    "monster_multiplier_turns",
+    "monster_reduction_turns",
+)
+
+
+@dataclass(frozen=True)
+class BattleSetup:
+    """一场战斗的初始局面。持续时间为剩余回合数，0 表示没有该状态；barrier_hits 为 -1 表示没有结界。"""
+
+    player_hp: int
+    player_atk: int
+    monster_hp: int
+    monster_atk: int
+    effect_probability: float = 0.0
+    atk_up: int = 0
+    weak: int = 0
+    poison: int = 0
+    stun: int = 0
+    player_multiplier: int = 1
+    player_multiplier_turns: int = 0
+    barrier_hits: int = _NO_BARRIER
+    damage_reduction: Optional[float] = None
+    immune: bool = False
+    revives: int = 0
+    revive_hp: int = GameConfig.START_PLAYER_HP
+    monster_stun: int = 0
+    monster_multiplier: int = 1
+    monster_multiplier_turns: int = 0
+    monster_reduction: Optional[float] = None
+    monster_reduction_turns: int = 0
+
+    @classmethod
+    def from_combatants(cls, player, monster) -> "BattleSetup":
+        """从 Player / Monster 的当前属性与状态构造初始局面。"""
+
+        def duration(owner, status_name):
+            return int(owner.statuses[status_name].duration) if owner.has_status(status_name) else 0
+
+        def value(owner, status_name, default):
+            return owner.statuses[status_name].value if owner.has_status(status_name) else default
+
+        passive = player.inventory.get(ItemType.PASSIVE, []) if isinstance(player.inventory, dict) else []
+        barrier = player.statuses.get(StatusName.BARRIER) if player.has_status(StatusName.BARRIER) else None
+        return cls(
+            player_hp=int(player.hp),
+            player_atk=int(player._atk),
+            monster_hp=int(monster.hp),
+            monster_atk=int(monster.atk),
+            effect_probability=float(monster.effect_probability),
+            atk_up=int(value(player, StatusName.ATK_UP, 0)),
+            weak=duration(player, StatusName.WEAK),
+            poison=duration(player, StatusName.POISON),
+            stun=duration(player, StatusName.STUN),
+            player_multiplier=int(value(player, StatusName.ATK_MULTIPLIER, 1)),
+            player_multiplier_turns=duration(player, StatusName.ATK_MULTIPLIER),
+            barrier_hits=int(barrier.trigger_count) if barrier is not None else _NO_BARRIER,
+            damage_reduction=value(player, StatusName.DAMAGE_REDUCTION, None),
+            immune=player.has_status(StatusName.IMMUNE),
+            revives=sum(1 for item in passive if item.name == "复活卷轴"),
+            monster_stun=duration(monster, StatusName.STUN),
+            monster_multiplier=int(value(monster, StatusName.ATK_MULTIPLIER, 1)),
+            monster_multiplier_turns=duration(monster, StatusName.ATK_MULTIPLIER),
+            monster_reduction=value(monster, StatusName.DAMAGE_REDUCTION, None),
+            monster_reduction_turns=duration(monster, StatusName.DAMAGE_REDUCTION),
+        )
+
+
+@dataclass
+class BattleEstimate:
+    """估算结果。hp_loss 为获胜时的掉血分布 {掉血量: 概率}（概率之和为 win_probability）。"""
+
+    win_probability: float
+    loss_probability: float
+    unresolved_probability: float
+    expected_turns: float
+    hp_loss: Dict[int, float] = field(default_factory=dict)
+    method: str = "exact"
+
+    @property
+    def expected_hp_loss(self) -> float:
+        """获胜条件下的期望掉血。"""
+        if self.win_probability <= 0:
+            return 0.0
+        return sum(loss * p for loss, p in self.hp_loss.items()) / self.win_probability
+
+    def hp_loss_quantile(self, q: float) -> int:
+        """获胜条件下掉血的 q 分位数。"""
+        if not self.hp_loss:
+            return 0
+        target = q * self.win_probability
+        acc = 0.0
+        for loss in sorted(self.hp_loss):
+            acc += self.hp_loss[loss]
+            if acc >= target - 1e-12:
+                return loss
+        return max(self.hp_loss)
+
+    def format(self) -> str:
+        return (
+            f"[{self.method}] 胜率 {self.win_probability:.1%}  败率 {self.loss_probability:.1%}  "
+            f"未分胜负 {self.unresolved_probability:.1%}  期望回合 {self.expected_turns:.2f}  "
+            f"获胜掉血 均值 {self.expected_hp_loss:.1f} / 中位 {self.hp_loss_quantile(0.5)} / 90% {self.hp_loss_quantile(0.9)}"
+        )
+
+
+class _Rows:
+    """一批战斗状态：每列一个数组，weight 为每行的概率质量。"""
+
+    __slots__ = _STATE_COLUMNS + ("weight",)
+
+    def __init__(self, **columns):
+        for name, values in columns.items():
+            setattr(self, name, values)
+
+    @classmethod
+    def initial(cls, setup: BattleSetup, count: int, weight: float) -> "_Rows":
+        columns = {name: np.full(count, getattr(setup, name), dtype=np.int64) for name in _STATE_COLUMNS}
+        return cls(weight=np.full(count, weight), **columns)
+
+    def take(self, index) -> "_Rows":
+        return _Rows(**{name: getattr(self, name)[index] for name in self.__slots__})
+
+    def __len__(self):
+        return len(self.weight)
+
+
+def _player_attack_value(setup: BattleSetup, rows: _Rows) -> np.ndarray:
+    # Player.atk：先加 ATK_UP 与虚弱 -2，再乘巨大化倍率，int() 截断后至少为 1
+    total = setup.player_atk + setup.atk_up - 2 * (rows.weak > 0)
+    total = np.where(rows.player_multiplier_turns > 0, total * setup.player_multiplier, total)
+    return np.maximum(1, total)
+
+
+def _reduce(damage: np.ndarray, ratio: Optional[float], active) -> np.ndarray:
+    if ratio is None:
+        return damage
+    return np.where(active, np.maximum(1, np.trunc(damage * ratio).astype(np.int64)), damage)
+
+
+def _hit_player(setup: BattleSetup, rows: _Rows, hit: np.ndarray, damage: np.ndarray) -> np.ndarray:
+    """对 hit 行造成伤害（Player.take_damage）；返回阵亡（无复活卷轴）的行掩码。"""
+    damage = _reduce(damage, setup.damage_reduction, True)
+    rows.player_hp = np.where(hit, rows.player_hp - damage, rows.player_hp)
+    down = hit & (rows.player_hp <= 0)
+    revived = down & (rows.revives > 0)
+    if revived.any():
+        rows.player_hp[revived] = setup.revive_hp
+        rows.revives[revived] -= 1
+        # 复活时清除战斗状态（中毒、晕眩、巨大化、结界）；虚弱与减伤保留
+        rows.poison[revived] = 0
+        rows.stun[revived] = 0
+        rows.player_multiplier_turns[revived] = 0
+        rows.barrier_hits[revived] = _NO_BARRIER
+    return down & ~revived
+
+
+def _step(setup: BattleSetup, rows: _Rows, player_roll, monster_roll, proc, proc_turns):
+    """按给定随机分支推进一回合（原地修改 rows），返回 (胜, 负) 行掩码。"""
+    stunned = rows.stun > 0
+    acting = ~stunned
+
+    # 玩家出手
+    damage = np.maximum(1, _player_attack_value(setup, rows) - player_roll)
+    damage = _reduce(damage, setup.monster_reduction, rows.monster_reduction_turns > 0)
+    rows.monster_hp = np.where(acting, rows.monster_hp - damage, rows.monster_hp)
+    won = acting & (rows.monster_hp <= 0)
+
+    # 怪物出手
+    attacking = ~won & (rows.monster_stun <= 0)
+    hit = np.maximum(1, setup.monster_atk - monster_roll)
+    hit = np.where(rows.monster_multiplier_turns > 0, hit * setup.monster_multiplier, hit)
+    shielded = attacking & (rows.barrier_hits >= 0)
+    rows.barrier_hits = np.where(shielded, np.minimum(rows.barrier_hits + 1, _BARRIER_SPENT), rows.barrier_hits)
+    ratio = np.maximum(0.0, 1.0 - 0.1 * rows.barrier_hits)
+    hit = np.where(shielded, hit - np.trunc(hit * ratio).astype(np.int64), hit)
+    lost = _hit_player(setup, rows, attacking, hit)
+
+    if not setup.immune:
+        procs = attacking & ~lost & (proc != _NO_PROC)
+        for code, column in ((_PROC_WEAK, "weak"), (_PROC_POISON, "poison"), (_PROC_STUN, "stun")):
+            mask = procs & (proc == code)
+            values = getattr(rows, column)
+            setattr(rows, column, np.where(mask, np.maximum(values, proc_turns), values))
+
+    # 回合末计时：本回合开始时晕眩，或出手后仍未被晕眩
+    ticking = ~won & ~lost & (stunned | (rows.stun <= 0))
+    poisoned = ticking & (rows.poison > 0) & (not setup.immune)
+    if poisoned.any():
+        lost = lost | _hit_player(setup, rows, poisoned, np.maximum(1, np.trunc(rows.player_hp * 0.1).astype(np.int64)))
+    for column in ("weak", "poison", "stun", "player_multiplier_turns",
+                   "monster_stun", "monster_multiplier_turns", "monster_reduction_turns"):
+        values = getattr(rows, column)
+        setattr(rows, column, np.where(ticking & ~lost, np.maximum(0, values - 1), values))
+    return won, lost
+
+
+def _branches(setup: BattleSetup):
+    """全部随机分支：(玩家浮动, 怪物浮动, 附带效果, 效果持续回合, 概率)。"""
+    procs = [(_NO_PROC, 0, 1.0 - setup.effect_probability)]
+    if setup.effect_probability > 0:
+        procs += [(code, turns, setup.effect_probability / 6.0) for code in (0, 1, 2) for turns in (1, 2)]
+    return [
+        (player_roll, monster_roll, proc, turns, 0.25 * p)
+        for player_roll in (0, 1)
+        for monster_roll in (0, 1)
+        for proc, turns, p in procs
+        if p > 0
+    ]
+
+
+def _state_keys(rows: _Rows):
+    """把各状态列按混合进制压成一个 int64 键；取值范围过大时返回 None。"""
+    keys = np.zeros(len(rows), dtype=np.int64)
+    span = 1
+    for name in _STATE_COLUMNS:
+        values = getattr(rows, name)
+        low = int(values.min())
+        width = int(values.max()) - low + 1
+        if span * width >= 1 << 62:
+            return None
+        keys += (values - low) * span
+        span *= width
+    return keys
+
+
+def _merge(rows: _Rows) -> _Rows:
+    """合并相同状态的行（概率相加）。"""
+    if len(rows) == 0:
+        return rows
+    keys = _state_keys(rows)
+    if keys is None:
+        matrix = np.stack([getattr(rows, name) for name in _STATE_COLUMNS], axis=1)
+        _, first, inverse = np.unique(matrix, axis=0, return_index=True, return_inverse=True)
+    else:
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    merged = rows.take(first)
+    merged.weight = np.bincount(inverse.ravel(), weights=rows.weight, minlength=len(first))
+    return merged
+
+
+class _StateLimitExceeded(Exception):
+    pass
+
+
+def _run(setup, rows, expand, max_turns, max_states=None):
+    win = loss = turns_mass = 0.0
+    hp_loss: Dict[int, float] = {}
+    for turn in range(1, max_turns + 1):
+        if len(rows) == 0:
+            break
+        rows, args = expand(rows)
+        won, lost = _step(setup, rows, *args)
+        win_mass = rows.weight[won]
+        win += win_mass.sum()
+        loss += rows.weight[lost].sum()
+        turns_mass += turn * (win_mass.sum() + rows.weight[lost].sum())
+        losses = setup.player_hp - rows.player_hp[won]
+        for value, mass in zip(*_group_sum(losses, win_mass)):
+            hp_loss[value] = hp_loss.get(value, 0.0) + mass
+        rows = rows.take(~(won | lost))
+        if max_states is not None:
+            rows = _merge(rows)
+            if len(rows) > max_states:
+                raise _StateLimitExceeded
+    remaining = float(rows.weight.sum()) if len(rows) else 0.0
+    resolved = win + loss
+    return BattleEstimate(
+        win_probability=float(win),
+        loss_probability=float(loss),
+        unresolved_probability=remaining,
+        expected_turns=float(turns_mass / resolved) if resolved > 0 else 0.0,
+        hp_loss={int(k): float(v) for k, v in sorted(hp_loss.items())},
+    )
+
+
+def _group_sum(values, weights):
+    if len(values) == 0:
+        return [], []
+    keys, inverse = np.unique(values, return_inverse=True)
+    return keys.tolist(), np.bincount(inverse.ravel(), weights=weights).tolist()
+
+
+def _exact(setup: BattleSetup, max_turns: int, max_states: int) -> BattleEstimate:
+    branches = _branches(setup)
+    columns = [np.array(column) for column in zip(*branches)]
+
+    def expand(rows):
+        n, b = len(rows), len(branches)
+        expanded = rows.take(np.repeat(np.arange(n), b))
+        expanded.weight = expanded.weight * np.tile(columns[4], n)
+        return expanded, tuple(np.tile(column, n) for column in columns[:4])
+
+    estimate = _run(setup, _Rows.initial(setup, 1, 1.0), expand, max_turns, max_states=max_states)
+    estimate.method = "exact"
+    return estimate
+
+
+def _monte_carlo(setup: BattleSetup, trials: int, max_turns: int, seed) -> BattleEstimate:
+    rng = np.random.default_rng(seed)
+
+    def expand(rows):
+        n = len(rows)
+        proc = np.where(rng.random(n) < setup.effect_probability, rng.integers(0, 3, n), _NO_PROC)
+        return rows, (rng.integers(0, 2, n), rng.integers(0, 2, n), proc, rng.integers(1, 3, n))
+
+    estimate = _run(setup, _Rows.initial(setup, trials, 1.0 / trials), expand, max_turns)
+    estimate.method = "monte_carlo"
+    return estimate
+
+
+def estimate_battle(
+    player=None,
+    monster=None,
+    setup: Optional[BattleSetup] = None,
+    method: str = "auto",
+    trials: int = 20000,
+    seed: Optional[int] = None,
+    max_turns: int = 300,
+    max_states: int = 50000,
+) -> BattleEstimate:
+    """估算 player 对 monster 一直攻击的战斗结果；也可直接传入 setup。
+
+    method：exact / monte_carlo / auto（先精确计算，状态数超过 max_states 时改用蒙特卡洛）；
+    exact 超过 max_states 时抛出 ValueError。
+    """
+    if setup is None:
+        if player is None or monster is None:
+            raise ValueError("需要提供 player 与 monster，或直接提供 setup")
+        setup = BattleSetup.from_combatants(player, monster)
+    if method not in ("auto", "exact", "monte_carlo"):
+        raise ValueError(f"未知的估算方法：{method}")
+    if method != "monte_carlo":
+        try:
+            return _exact(setup, max_turns, max_states)
+        except _StateLimitExceeded:
+            if method == "exact":
+                raise ValueError(f"精确计算的状态数超过 {max_states}，请改用 monte_carlo 或调大 max_states") from None
+    return _monte_carlo(setup, trials, max_turns, seed)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="战斗结果估算：胜率、期望回合与获胜掉血分布")
+    defaults = BattleSetup(player_hp=0, player_atk=0, monster_hp=0, monster_atk=0)
+    for item in fields(BattleSetup):
+        if item.type in ("int", int):
+            parser.add_argument(f"--{item.name.replace('_', '-')}", type=int, default=getattr(defaults, item.name))
+    parser.add_argument("--effect", type=float, default=0.0)
+    parser.add_argument("--method", default="auto", choices=["auto", "exact", "monte_carlo"])
+    parser.add_argument("--trials", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    values = {item.name: getattr(args, item.name) for item in fields(BattleSetup) if hasattr(args, item.name)}
+    setup = replace(defaults, effect_probability=args.effect, **values)
+    print(estimate_battle(setup=setup, method=args.method, trials=args.trials, seed=args.seed).format())
+
+
+if __name__ == "__main__":
+    main()
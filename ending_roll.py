@@ -1,5 +1,6 @@
 # ending_roll.py
 """结局滚动画面文案生成：玩家状态、长事件选择摘要、结局综述。"""
+import json
 
 # 长事件选择 flag -> 结局摘要中的一句剧情描述（用于“根据玩家在各长事件中的选择”部分）
 CHOICE_NARRATIVE = {
@@ -182,7 +183,8 @@ def build_ending_roll_lines(controller) -> list:
     # ---------- 2. 长事件选择摘要 ----------
     choice_flags = set()
     if story is not None:
-        choice_flags = getattr(story, "choice_flags", set()) or set()
+        # 复制后合并，避免把 story_tags 写回 story.choice_flags（会推进 flag_version 使评分缓存失效）
+        choice_flags = set(getattr(story, "choice_flags", set()) or ())
         choice_flags |= getattr(story, "story_tags", set()) or set()
     for flag, narrative in CHOICE_NARRATIVE.items():
         if flag in choice_flags:
@@ -230,3 +232,12 @@ def build_ending_roll_lines(controller) -> list:
     lines.append("感谢游玩。")
 
     return lines
+
+
+def build_ending_roll_payload(controller) -> dict:
+    """生成结局滚动字幕及其预序列化 JSON 片段；通关后结局已固定，供控制器缓存复用。"""
+    lines = build_ending_roll_lines(controller)
+    return {
+        "lines": lines,
+        "json": json.dumps(lines, ensure_ascii=False),
+    }
@@ -0,0 +1,228 @@
+# event_odds.py
+"""随机事件门出现概率分析：用 NumPy 在大量虚拟对局上批量模拟事件门抽取，给出每个起始事件
+「到第 R 回合为止至少出现过一次」的概率曲线（如飞贼 / 木偶起始能否赶在第 185 回合结局前窗口之前出现）。
+
+模型与假设：
+- 每回合以 event_door_rate 的概率走进随机事件门。默认 1/6：三扇门中除怪物门外的两扇从四种非怪物门型中
+  无放回抽取（事件门出现率 1/2），玩家等概率选门。剧情后果改写门型、强制剧情事件门不计入。
+- 各事件在每个回合的资格与基础概率直接调用事件类自己的 is_trigger_condition_met / get_trigger_probability，
+  输入是按 PlayerProfile 设定属性的代表性控制器（攻击、生命、金币随回合线性增长，可调）；剧情状态保持开局默认。
+- 权重（长线首发加成、偏好倍率、重复衰减）、单次事件用尽、长线起始回合门槛、候选回退梯度与最近窗口去重
+  与 models.events.get_random_event 一致，在 (虚拟对局数, 事件数) 的数组上逐回合批量计算。
+
+用法：python event_odds.py --games 20000 --rounds 200 --checkpoints 21 50 100 185
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from models.game_config import GameConfig
+
+# 默认事件门进入率：P(两扇非怪物门里有事件门) × P(选中它) = 1/2 × 1/3
+DEFAULT_EVENT_DOOR_RATE = 1.0 / 6.0
+
+
+@dataclass(frozen=True)
+class PlayerProfile:
+    """代表性玩家成长曲线：第 r 回合的数值 = 初始值 + r × 每回合增量。"""
+
+    atk_start: int = GameConfig.START_PLAYER_ATK
+    atk_per_round: float = 0.15
+    hp_start: int = GameConfig.START_PLAYER_HP
+    hp_per_round: float = 1.5
+    gold_start: int = 20
+    gold_per_round: float = 1.0
+
+    def apply(self, controller, round_count: int) -> None:
+        player = controller.player
+        controller.round_count = round_count
+        player._atk = int(self.atk_start + round_count * self.atk_per_round)
+        player.hp = int(self.hp_start + round_count * self.hp_per_round)
+        player.gold = int(self.gold_start + round_count * self.gold_per_round)
+        controller.player_peak_hp = max(controller.player_peak_hp, player.hp)
+        controller.player_peak_atk = max(controller.player_peak_atk, player.atk)
+
+
+@dataclass
+class EventOddsReport:
+    """curves[r, k]：第 k 个事件在 round_count ≤ start_round + r 时已至少出现一次的概率。"""
+
+    event_names: List[str]
+    start_round: int
+    curves: np.ndarray
+    expected_counts: np.ndarray
+    games: int
+    elapsed: float = 0.0
+    event_door_rate: Union[float, Sequence[float]] = DEFAULT_EVENT_DOOR_RATE
+    checkpoints: List[int] = field(default_factory=lambda: [21, 50, 100, 150, 185])
+
+    def curve(self, event_name: str) -> np.ndarray:
+        return self.curves[:, self.event_names.index(event_name)]
+
+    def probability_by(self, event_name: str, round_count: int) -> float:
+        """到 round_count（含）为止至少出现一次的概率。"""
+        offset = round_count - self.start_round
+        if offset < 0:
+            return 0.0
+        offset = min(offset, len(self.curves) - 1)
+        return float(self.curves[offset, self.event_names.index(event_name)])
+
+    def format(self) -> str:
+        checkpoints = [r for r in self.checkpoints if r >= self.start_round]
+        header = f"{'事件':<26}" + "".join(f"{'≤' + str(r):>8}" for r in checkpoints) + f"{'期望次数':>10}"
+        lines = [f"{self.games} 局虚拟对局，用时 {self.elapsed:.2f}s", header]
+        order = np.argsort(-self.curves[-1])
+        for k in order:
+            name = self.event_names[k]
+            cells = "".join(f"{self.probability_by(name, r):>8.1%}" for r in checkpoints)
+            lines.append(f"{name:<26}{cells}{self.expected_counts[k]:>10.2f}")
+        return "\n".join(lines)
+
+
+def _round_tables(pool, start_round: int, rounds: int, profile: PlayerProfile):
+    """逐回合调用事件类自身的条件与概率公式，得到 eligible[r, k] 与 base[r, k]。
+
+    构造代表性控制器会消耗全局随机源，这里保存并恢复其状态，分析不影响同进程内的对局随机序列。
+    """
+    from server import GameController
+    from models.events.eligibility import _clamp_probability
+
+    random_state = random.getstate()
+    try:
+        controller = GameController()
+    finally:
+        random.setstate(random_state)
+    span = rounds - start_round
+    eligible = np.zeros((span, len(pool)), dtype=bool)
+    base = np.zeros((span, len(pool)), dtype=np.float64)
+    for offset in range(span):
+        profile.apply(controller, start_round + offset)
+        for k, event_cls in enumerate(pool):
+            eligible[offset, k] = bool(event_cls.is_trigger_condition_met(controller))
+            base[offset, k] = _clamp_probability(event_cls.get_trigger_probability(controller))
+    return eligible, base
+
+
+def _door_rates(event_door_rate, span: int) -> np.ndarray:
+    rates = np.asarray(event_door_rate, dtype=np.float64)
+    if rates.ndim == 0:
+        return np.full(span, float(rates))
+    if len(rates) < span:
+        raise ValueError("event_door_rate 数组长度不足以覆盖模拟回合数")
+    return rates[:span]
+
+
+def simulate_event_odds(
+    games: int = 20000,
+    rounds: int = 200,
+    start_round: int = 0,
+    seed: Optional[int] = 0,
+    event_door_rate: Union[float, Sequence[float]] = DEFAULT_EVENT_DOOR_RATE,
+    profile: Optional[PlayerProfile] = None,
+    pool: Optional[Sequence[type]] = None,
+) -> EventOddsReport:
+    """模拟 round_count 从 start_round 到 rounds - 1 的事件门抽取，返回各起始事件的首现概率曲线。"""
+    import models.events as ev
+
+    started = time.perf_counter()
+    pool = list(pool if pool is not None else ev.STARTER_EVENT_POOL)
+    profile = profile or PlayerProfile()
+    span = max(0, rounds - start_round)
+    rates = _door_rates(event_door_rate, span)
+    eligible, base = _round_tables(pool, start_round, rounds, profile)
+
+    k_count = len(pool)
+    long_starter = np.array([cls in ev.LONG_EVENT_STARTER_CLASSES for cls in pool])
+    preferred = np.array([cls in ev.PREFERRED_LONG_EVENT_STARTERS for cls in pool])
+    once_only = np.array([bool(getattr(cls, "ONLY_TRIGGER_ONCE", False)) for cls in pool])
+    preferred_mult = np.where(preferred, ev.PREFERRED_LONG_EVENT_WEIGHT_MULTIPLIER, 1.0)
+    window = max(1, int(ev.RECENT_EVENT_WINDOW))
+
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((games, k_count), dtype=np.int32)
+    seen = np.zeros((games, k_count), dtype=bool)
+    recent = np.full((games, window), -1, dtype=np.int64)
+    first_hits = np.zeros((span, k_count), dtype=np.int64)
+
+    for offset in range(span):
+        round_count = start_round + offset
+        rows = np.flatnonzero(rng.random(games) < rates[offset])
+        n = len(rows)
+        if n == 0:
+            continue
+        row_counts = counts[rows]
+
+        # 候选回退梯度：条件满足且可用 -> 可用 -> 长线起始未被回合封锁 -> 整个池子
+        long_ok = ~(long_starter & (round_count < ev.LONG_EVENT_STARTER_EARLIEST_ROUND))
+        if not long_ok.any():
+            long_ok = np.ones(k_count, dtype=bool)
+        available = long_ok & ~(once_only & (row_counts > 0))
+        candidates = eligible[offset] & available
+        empty = ~candidates.any(axis=1)
+        candidates[empty] = available[empty]
+        empty = ~candidates.any(axis=1)
+        candidates[empty] = long_ok
+
+        # 最近窗口去重：有新鲜候选时只在新鲜候选中抽
+        row_recent = recent[rows]
+        recent_mask = np.zeros((n, k_count), dtype=bool)
+        filled = row_recent >= 0
+        recent_mask[np.nonzero(filled)[0], row_recent[filled]] = True
+        fresh = candidates & ~recent_mask
+        has_fresh = fresh.any(axis=1)
+        candidates[has_fresh] = fresh[has_fresh]
+
+        first_time = np.where(long_starter & (row_counts <= 0), ev.LONG_EVENT_STARTER_FIRST_TIME_BONUS, 1.0)
+        divisor = np.where(once_only, 1.0, 1.0 + row_counts)
+        weights = np.where(candidates, base[offset] * first_time * preferred_mult / divisor, 0.0)
+        zero = weights.sum(axis=1) <= 0
+        weights[zero] = candidates[zero]
+
+        cumulative = np.cumsum(weights, axis=1)
+        rolls = rng.random(n) * cumulative[:, -1]
+        picks = (cumulative > rolls[:, None]).argmax(axis=1)
+
+        counts[rows, picks] += 1
+        new = ~seen[rows, picks]
+        seen[rows[new], picks[new]] = True
+        first_hits[offset] = np.bincount(picks[new], minlength=k_count)
+        recent[rows, :-1] = row_recent[:, 1:]
+        recent[rows, -1] = picks
+
+    curves = np.cumsum(first_hits, axis=0) / float(max(1, games))
+    return EventOddsReport(
+        event_names=[cls.__name__ for cls in pool],
+        start_round=start_round,
+        curves=curves,
+        expected_counts=counts.mean(axis=0) if games else np.zeros(k_count),
+        games=games,
+        elapsed=time.perf_counter() - started,
+        event_door_rate=event_door_rate,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="随机事件门出现概率：批量模拟各起始事件的首现概率曲线")
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--event-door-rate", type=float, default=DEFAULT_EVENT_DOOR_RATE)
+    parser.add_argument("--checkpoints", type=int, nargs="+", default=None)
+    args = parser.parse_args(argv)
+    report = simulate_event_odds(
+        games=args.games,
+        rounds=args.rounds,
+        seed=args.seed,
+        event_door_rate=args.event_door_rate,
+    )
+    if args.checkpoints:
+        report.checkpoints = list(args.checkpoints)
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# memory_bench.py
+"""对局内存基准：用 tracemalloc 统计「一局存活对局」占用的字节数，以及其中状态 / 物品 / 门三类对象的数量与单个大小。
+
+每局新建一个 GameController，用固定种子随机点击按钮推进若干步（与 test_game 的随机点击一致，结束界面不点退出），
+全部对局保持存活后做一次 gc，取 tracemalloc 的当前占用减去开局前的基线，按局数平均。
+三类对象从 gc 可达对象中按基类筛出，单个大小 = 实例本身 + 实例 __dict__（slotted 类没有 __dict__）。
+另外按类别批量构造同一组代表性对象（全部状态、宝物门物品、全部门型），用 tracemalloc 给出每个实例的分配字节数。
+
+用法：python memory_bench.py --games 20 --clicks 400 --seed 0
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.door import Door
+from models.items import Item
+from models.status import Status
+
+TRACKED_BASES: Tuple[Tuple[str, type], ...] = (("Status", Status), ("Item", Item), ("Door", Door))
+
+# 结束界面的「退出游戏」按钮会关停服务器，自动点击时跳过
+_GAME_OVER_EXIT_INDEX = 2
+
+
+@dataclass
+class ObjectStats:
+    """某一类对象的存活数量与总字节数。"""
+
+    count: int = 0
+    total_bytes: int = 0
+
+    @property
+    def bytes_each(self) -> float:
+        return self.total_bytes / self.count if self.count else 0.0
+
+
+@dataclass
+class MemoryReport:
+    games: int
+    clicks: int
+    total_bytes: int
+    objects: Dict[str, ObjectStats] = field(default_factory=dict)
+    # 类别 -> 批量构造时每个实例的 tracemalloc 字节数
+    construct_bytes: Dict[str, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def bytes_per_game(self) -> float:
+        return self.total_bytes / self.games if self.games else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"{self.games} 局存活对局（每局 {self.clicks} 次点击），用时 {self.elapsed:.2f}s",
+            f"每局占用 {self.bytes_per_game / 1024:.1f} KiB（tracemalloc）",
+            f"{'类别':<8}{'每局数量':>10}{'单个字节':>10}{'每局字节':>12}",
+        ]
+        for name, stats in self.objects.items():
+            per_game = stats.count / float(max(1, self.games))
+            lines.append(
+                f"{name:<8}{per_game:>10.1f}{stats.bytes_each:>10.1f}{stats.total_bytes / max(1, self.games):>12.0f}"
+            )
+        if self.construct_bytes:
+            cells = "，".join(f"{name} {value:.0f}" for name, value in self.construct_bytes.items())
+            lines.append(f"批量构造每实例字节：{cells}")
+        return "\n".join(lines)
+
+
+def _object_size(obj) -> int:
+    size = sys.getsizeof(obj)
+    attrs = getattr(obj, "__dict__", None)
+    if attrs is not None:
+        size += sys.getsizeof(attrs)
+    return size
+
+
+def play_game(clicks: int, seed: int):
+    """新建一局并用 seed 播种的随机点击推进 clicks 步，返回控制器。"""
+    from scenes import GameOverScene
+    from server import GameController
+
+    random.seed(seed)
+    controller = GameController()
+    for _ in range(clicks):
+        controller.clear_messages()
+        scene = controller.scene_manager.current_scene
+        texts = getattr(scene, "button_texts", None) or []
+        choices = [index for index, text in enumerate(texts) if text.strip()]
+        if isinstance(scene, GameOverScene):
+            choices = [index for index in choices if index != _GAME_OVER_EXIT_INDEX]
+        if choices:
+            scene.handle_choice(random.choice(choices))
+    return controller
+
+
+def count_objects() -> Dict[str, ObjectStats]:
+    stats = {name: ObjectStats() for name, _ in TRACKED_BASES}
+    for obj in gc.get_objects():
+        for name, base in TRACKED_BASES:
+            if isinstance(obj, base):
+                entry = stats[name]
+                entry.count += 1
+                entry.total_bytes += _object_size(obj)
+                break
+    return stats
+
+
+def _build_samples(controller) -> Dict[str, List[object]]:
+    """每个类别一组代表性对象：全部状态、宝物门物品、全部门型（门需要控制器）。"""
+    from models.door import DoorEnum
+    from models.items import create_reward_door_item
+    from models.status import StatusName
+
+    player = controller.player
+    return {
+        "Status": [name.create_instance(target=player) for name in StatusName],
+        "Item": [create_reward_door_item() for _ in range(10)],
+        "Door": [door_enum.create_instance(controller=controller) for door_enum in DoorEnum],
+    }
+
+
+def measure_construct_bytes(controller, repeat: int = 200) -> Dict[str, float]:
+    """按类别重复构造 repeat 组代表性对象并保持存活，返回每个实例的 tracemalloc 字节数。
+
+    门的提示文案、怪物门里的怪物等附带对象一并计入，所以各类别的数值只用于前后对比。
+    """
+    result = {}
+    for name in ("Status", "Item", "Door"):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            kept = [_build_samples(controller)[name] for _ in range(repeat)]
+            used = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        result[name] = used / float(max(1, sum(len(group) for group in kept)))
+        del kept
+    return result
+
+
+def measure_live_games(games: int = 20, clicks: int = 400, seed: int = 0) -> MemoryReport:
+    """推进 games 局并让它们同时存活，返回每局字节数与三类对象的统计。
+
+    运行会重新播种全局随机源，结束后恢复原状态。
+    """
+    started = time.perf_counter()
+    random_state = random.getstate()
+    # 先建一局再丢弃：模块级缓存（事件表、怪物原型等）不计入对局占用
+    play_game(1, seed)
+    gc.collect()
+    baseline_objects = count_objects()
+    tracemalloc.start()
+    try:
+        gc.collect()
+        baseline = tracemalloc.get_traced_memory()[0]
+        live: List[object] = [play_game(clicks, seed + index) for index in range(games)]
+        gc.collect()
+        total = tracemalloc.get_traced_memory()[0] - baseline
+        objects = count_objects()
+    finally:
+        tracemalloc.stop()
+    try:
+        construct_bytes = measure_construct_bytes(live[0] if live else play_game(0, seed))
+    finally:
+        random.setstate(random_state)
+    for name, entry in objects.items():
+        base = baseline_objects[name]
+        entry.count -= base.count
+        entry.total_bytes -= base.total_bytes
+    del live
+    return MemoryReport(
+        games=games,
+        clicks=clicks,
+        total_bytes=total,
+        objects=objects,
+        construct_bytes=construct_bytes,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="对局内存基准：每局存活对局的字节数与状态 / 物品 / 门对象的大小")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--clicks", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(measure_live_games(games=args.games, clicks=args.clicks, seed=args.seed).format())
+
+
+if __name__ == "__main__":
+    main()
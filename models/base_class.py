@@ -7,7 +7,10 @@ class BaseClass(ABC):
     """
     游戏实体的抽象基类，定义了所有游戏实体必须实现的基本接口。
     """
-    
+
+    # 子类各自声明 __slots__ 时实例不带 __dict__（如各类门）
+    __slots__ = ("controller",)
+
     def __init__(self, **kwargs):
         """
         初始化基类实例。
@@ -1,6 +1,6 @@
 """门类型与门实例：陷阱/奖励/怪物/商店/事件门及提示配置。"""
 import random
-from .monster import get_random_monster
+from .monster import get_random_monster, sample_monster_hints
 from typing import Optional, Dict, Any, List
 from models.base_class import BaseClass
 from models.monster import Monster
@@ -44,6 +44,10 @@ class DoorEnum(Enum):
 
 class Door(BaseClass):
     """门的基类"""
+
+    # story_forced_event_key：剧情把事件门 / 商店门改写为指定剧情事件时写入，未写入时按属性不存在处理
+    __slots__ = ("enum", "hint", "texture_key", "door_extensions", "story_forced_event_key")
+
     def _initialize(self, **kwargs) -> None:
         super()._initialize(**kwargs)
         self.controller = kwargs.get('controller', None)
@@ -75,12 +79,12 @@ class Door(BaseClass):
         fake_door_enum = random.choice([enum for enum in DoorEnum if enum != self.enum])
         self.hint = get_mixed_door_hint(frozenset([self.enum, fake_door_enum]))
         if fake_door_enum == DoorEnum.MONSTER:
-            fake_monster = get_random_monster(
+            # 伪装提示只需要提示文本：不构造怪物与掉落
+            tier_hint, type_hint = sample_monster_hints(
                 current_round=self.controller.round_count,
                 player=getattr(self.controller, "player", None),
                 unlocked_tier=getattr(self.controller, "unlocked_monster_tier", 1),
             )
-            tier_hint, type_hint = fake_monster.get_hints()
             self.hint = f"{self.hint}, {tier_hint}, {type_hint}"
 
     def enter(self) -> bool:
@@ -117,6 +121,8 @@ from models.status import StatusName
 
 class TrapDoor(Door):
     """陷阱门"""
+
+    __slots__ = ("damage",)
     
     def _initialize(self, **kwargs) -> None:
         self.enum = DoorEnum.TRAP
@@ -174,6 +180,9 @@ class TrapDoor(Door):
 
 class RewardDoor(Door):
     """奖励门"""
+
+    # elf_side_reward：飞贼支线标记过的宝物门，未标记时按属性不存在处理
+    __slots__ = ("reward", "elf_side_reward")
     
     def _initialize(self, **kwargs) -> None:
         self.enum = DoorEnum.REWARD
@@ -210,7 +219,7 @@ class RewardDoor(Door):
         self.run_door_extensions(hook="before_enter")
         if getattr(self, "elf_side_reward", False):
             story = getattr(self.controller, "story", None)
-            rel = int(getattr(story, "elf_relation", 0)) if story else 0
+            rel = story.elf.relation if story else 0
             if rel >= 0:
                 self.controller.add_message(
                     "一抹银影从门缝里闪出，与你擦肩而过时往你怀里塞了把东西：'顺来的，懒得拿。' 你低头一看，正是门里该有的那份。"
@@ -255,6 +264,8 @@ class RewardDoor(Door):
 
 class MonsterDoor(Door):
     """怪物门"""
+
+    __slots__ = ("battle_extensions", "monster")
     
     def _initialize(self, **kwargs) -> None:
         self.enum = DoorEnum.MONSTER
@@ -299,6 +310,8 @@ class MonsterDoor(Door):
 
 class ShopDoor(Door):
     """商店门"""
+
+    __slots__ = ("shop",)
     
     def _initialize(self, **kwargs) -> None:
         self.enum = DoorEnum.SHOP
@@ -326,6 +339,8 @@ class ShopDoor(Door):
 
 class EventDoor(Door):
     """事件门"""
+
+    __slots__ = ()
     
     def _initialize(self, **kwargs) -> None:
         self.enum = DoorEnum.EVENT
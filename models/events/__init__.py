@@ -2,6 +2,7 @@
 
 实现拆分为子模块（`base`、`short_random`、`puppet_chain` 等），本包对外 API 与旧版单文件 `events.py` 保持一致。
 """
+import importlib
 import random
 
 from models.items import create_random_item, create_reward_door_item
@@ -13,7 +14,8 @@ from models.story_gates import (
     PRE_FINAL_GATE_STORY_CONFIG,
 )
 
-from models.events.base import Event, EventChoice
+from models.events.base import ChoiceSpec, Event, EventChoice, EventSpec, ScaledValue
+from models.events.preview import EffectLog, preview_choice
 
 from models.events.short_random import (
     AncientShrineEvent,
@@ -54,25 +56,6 @@ from models.events.elf_chain import (
     ElfTrapRescueEvent,
     _adjust_elf_relation,
 )
-from models.events.stage_curtain import (
-    DreamMirrorPreludeEvent,
-    EndingFinalFirstGateEvent,
-    EndingFinalSecondGateEvent,
-    EndingPowerCurtainChoiceEvent,
-    EndingPowerCurtainDirectEvent,
-    EndingPuppetEchoAftermathEvent,
-    EndingStageCurtainGateEvent,
-    EndingStageKindPuppetDialogueEvent,
-    StageCurtainKindPuppetDialogueMidEvent,
-    _build_stage_epilogue_lines,
-    _collect_stage_curtain_scores,
-    _resolve_stage_curtain_outcome,
-    _should_trigger_dream_mirror_prelude,
-    _should_trigger_elf_rival_pre_final,
-    _should_trigger_puppet_pre_final_gate,
-    run_script_vault_recovery,
-    schedule_next_pre_final_gate,
-)
 from models.events.dispatch import (
     LONG_EVENT_CLASSES,
     LONG_EVENT_STARTER_CLASSES,
@@ -87,12 +70,47 @@ from models.events.dispatch import (
     get_story_event_by_key,
 )
 
+from models.events.registry import STORY_EVENT_SOURCES, resolve_story_event_class, story_event
+
+# 终局剧情模块（舞台谢幕、终局门）体量大且只在后期用到：首次访问下列符号时才导入
+_LAZY_EXPORTS = {
+    "DreamMirrorPreludeEvent": "models.events.stage_curtain",
+    "EndingFinalFirstGateEvent": "models.events.stage_curtain",
+    "EndingFinalSecondGateEvent": "models.events.stage_curtain",
+    "EndingPowerCurtainChoiceEvent": "models.events.stage_curtain",
+    "EndingPowerCurtainDirectEvent": "models.events.stage_curtain",
+    "EndingPuppetEchoAftermathEvent": "models.events.stage_curtain",
+    "EndingStageCurtainGateEvent": "models.events.stage_curtain",
+    "EndingStageKindPuppetDialogueEvent": "models.events.stage_curtain",
+    "StageCurtainKindPuppetDialogueMidEvent": "models.events.stage_curtain",
+    "_build_stage_epilogue_lines": "models.events.stage_curtain",
+    "_collect_stage_curtain_scores": "models.events.stage_curtain",
+    "_resolve_stage_curtain_outcome": "models.events.stage_curtain",
+    "_should_trigger_dream_mirror_prelude": "models.events.stage_curtain",
+    "_should_trigger_elf_rival_pre_final": "models.events.stage_curtain",
+    "_should_trigger_puppet_pre_final_gate": "models.events.stage_curtain",
+    "run_script_vault_recovery": "models.events.stage_curtain",
+    "schedule_next_pre_final_gate": "models.events.stage_curtain",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
 __all__ = [
     "ALL_PRE_FINAL_DOOR_TYPES",
     "ELF_THIEF_NAME",
     "ENDING_EVENT_GATE_KEYS",
+    "ChoiceSpec",
+    "EffectLog",
     "Event",
     "EventChoice",
+    "EventSpec",
     "LONG_EVENT_CLASSES",
     "LONG_EVENT_STARTER_CLASSES",
     "LONG_EVENT_STARTER_EARLIEST_ROUND",
@@ -103,11 +121,16 @@ __all__ = [
     "PRE_FINAL_GATE_STORY_CONFIG",
     "RECENT_EVENT_WINDOW",
     "STARTER_EVENT_POOL",
+    "ScaledValue",
     "create_random_item",
     "create_reward_door_item",
     "random",
     "get_random_event",
     "get_story_event_by_key",
+    "preview_choice",
+    "resolve_story_event_class",
+    "story_event",
+    "STORY_EVENT_SOURCES",
     "build_puppet_final_boss_payload",
     "schedule_next_pre_final_gate",
     "run_script_vault_recovery",
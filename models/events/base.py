@@ -1,36 +1,151 @@
-"""剧情事件基类与 EventChoice。"""
+"""剧情事件基类与 EventChoice。
+
+事件的静态部分（标题、描述、选项文案模板、处理方法名、按阶段缩放的数值）可声明为类属性 SPEC（EventSpec），
+在类定义时编译一次：无参数的选项直接编成共享的 EventChoice 元组挂在类上；带参数的文案按参数取值缓存。
+实例只保存 controller 与少量参数，选项按处理方法名回调，事件可直接 pickle。
+"""
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Dict, Mapping, Tuple
+
+from models.events.preview import preview_choice
+
 
 class EventChoice:
-    """单个事件选项：展示文案与选中时的回调。"""
+    """单个事件选项：展示文案与选中时的回调；由 SPEC 编译的选项只记处理方法名，在事件实例上解析。"""
 
-    def __init__(self, text, callback):
+    def __init__(self, text, callback=None, handler=None):
         self.text = text
         self.callback = callback
+        self.handler = handler
+
+
+@dataclass(frozen=True)
+class ChoiceSpec:
+    """选项声明：label 可含 {参数名} 占位；handler 为事件类上的方法名。"""
+
+    label: str
+    handler: str
+
+
+@dataclass(frozen=True)
+class ScaledValue:
+    """按玩家阶段缩放的数值参数，取值同 Event.scale_value。"""
+
+    base: int
+    positive: bool = True
+    aggressive: bool = False
+    minimum: int = 1
+
+
+@dataclass(frozen=True)
+class EventSpec:
+    """事件声明：title / description / choices 为静态文本；scaled 为文案中按阶段缩放的参数。"""
+
+    title: str
+    description: str
+    choices: Tuple[ChoiceSpec, ...]
+    scaled: Mapping[str, ScaledValue] = field(default_factory=dict)
+
+
+_LABEL_CACHE_LIMIT = 256
+
+
+class CompiledEventSpec:
+    """EventSpec 的编译结果：静态选项元组 + 带参文案的按参数缓存。"""
+
+    def __init__(self, event_cls, spec):
+        for choice in spec.choices:
+            if not callable(getattr(event_cls, choice.handler, None)):
+                raise TypeError(f"{event_cls.__name__}.SPEC 的选项「{choice.label}」指向不存在的方法 {choice.handler!r}")
+        self.spec = spec
+        self.param_names = tuple(
+            sorted({name for choice in spec.choices for _, name, _, _ in Formatter().parse(choice.label) if name})
+        )
+        self.scaled = tuple(sorted(spec.scaled.items()))
+        # 文案参数全部来自 scaled 时，基类构造即可生成选项；否则由子类备好参数后调用 build_choices
+        self.auto_build = set(self.param_names) <= set(spec.scaled)
+        self.static_choices = None
+        if not self.param_names:
+            self.static_choices = tuple(EventChoice(c.label, handler=c.handler) for c in spec.choices)
+        self._formatted: Dict[Tuple[Any, ...], Tuple[EventChoice, ...]] = {}
+
+    def choices_for(self, params):
+        if self.static_choices is not None:
+            return self.static_choices
+        key = tuple(params[name] for name in self.param_names)
+        choices = self._formatted.get(key)
+        if choices is None:
+            if len(self._formatted) >= _LABEL_CACHE_LIMIT:
+                self._formatted.clear()
+            choices = tuple(
+                EventChoice(c.label.format(**params), handler=c.handler) for c in self.spec.choices
+            )
+            self._formatted[key] = choices
+        return choices
 
 
 class Event:
     """剧情事件基类：标题、描述、选项及触发条件（回合、概率等）。"""
     TRIGGER_BASE_PROBABILITY = 0.1
     MIN_TRIGGER_ROUND = 0
+    MIN_TRIGGER_STAGE = 0
     MAX_TRIGGER_ROUND = None
     POSITIVE_STAGE_SCALE = (1.0, 1.12, 1.27, 1.45)
     NEGATIVE_STAGE_SCALE = (1.0, 1.1, 1.22, 1.35)
     ONLY_TRIGGER_ONCE = False
+    SPEC = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        spec = cls.__dict__.get("SPEC")
+        if spec is None:
+            return
+        compiled = CompiledEventSpec(cls, spec)
+        cls._compiled_spec = compiled
+        cls.title = spec.title
+        cls.description = spec.description
+        if compiled.static_choices is not None:
+            cls.choices = compiled.static_choices
 
     def __init__(self, controller):
         self.controller = controller
-        self.title = "Event"
-        self.description = "Something happens."
-        self.choices = []
+        if self.SPEC is None:
+            self.title = "Event"
+            self.description = "Something happens."
+            self.choices = []
+        elif self._compiled_spec.static_choices is None and self._compiled_spec.auto_build:
+            self.choices = self.build_choices()
+
+    def build_choices(self, **params):
+        """按 SPEC 生成本实例的选项：scaled 参数按当前阶段缩放，其余参数由调用方传入。"""
+        compiled = self._compiled_spec
+        for name, rule in compiled.scaled:
+            if name not in params:
+                params[name] = self.scale_value(
+                    rule.base, positive=rule.positive, aggressive=rule.aggressive, minimum=rule.minimum
+                )
+        return compiled.choices_for(params)
 
     def get_choices(self):
         return [c.text for c in self.choices]
 
     def resolve_choice(self, index):
         if 0 <= index < len(self.choices):
-            return self.choices[index].callback()
+            choice = self.choices[index]
+            if choice.callback is not None:
+                return choice.callback()
+            return getattr(self, choice.handler)()
         return "Invalid choice."
 
+    def preview_choice(self, index, seed=None):
+        """预演第 index 个选项而不改动对局，返回 EffectLog（见 models.events.preview）。"""
+        return preview_choice(self, index, seed=seed)
+
+    def preview_choices(self, seed=None):
+        """逐个预演全部选项；给定 seed 时各选项使用同一条随机序列，便于横向比较。"""
+        return [preview_choice(self, index, seed=seed) for index in range(len(self.choices))]
+
     def add_message(self, msg):
         self.controller.add_message(msg)
     
@@ -52,6 +167,7 @@ class Event:
         return cls.is_unlocked(
             controller,
             min_round=getattr(cls, "MIN_TRIGGER_ROUND", 0),
+            min_stage=getattr(cls, "MIN_TRIGGER_STAGE", 0),
         ) and cls._is_within_round_window(controller)
 
     @classmethod
@@ -15,31 +15,30 @@ from models.story_gates import (
     PRE_FINAL_DISPATCH_ORDER,
     PRE_FINAL_GATE_STORY_CONFIG,
 )
-from models.events.base import Event, EventChoice
+from models.events.base import ChoiceSpec, Event, EventSpec
+from models.events.registry import story_event
 from models.events._pkg import rng, mk_random_item, mk_reward_item
 
 class ClockworkBazaarEvent(Event):
     """长链2：齿轮黑市"""
     TRIGGER_BASE_PROBABILITY = 0.06
-
-    @classmethod
-    def is_trigger_condition_met(cls, controller):
-        return cls.is_unlocked(controller, min_round=14, min_stage=2)
+    MIN_TRIGGER_ROUND = 14
+    MIN_TRIGGER_STAGE = 2
 
     @classmethod
     def get_trigger_probability(cls, controller):
         round_count = max(0, getattr(controller, "round_count", 0))
         return min(0.17, cls.TRIGGER_BASE_PROBABILITY + min(0.11, round_count * 0.004))
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "齿轮售票亭"
-        self.description = "一列会自行换轨的列车停在岔路口，这是自动售票摊位，但系统已经故障：修好它可换取正规入场券，偷看优惠码能白嫖漏票，砸掉它则立刻树敌，但可能抢到材料。你需要马上选一种做法。"
-        self.choices = [
-            EventChoice("校准售票机关，换取正规入场券", self.calibrate),
-            EventChoice("偷看优惠码，白嫖入场票", self.hack_coupon),
-            EventChoice("破坏摊位，抢走材料", self.sabotage),
-        ]
+    SPEC = EventSpec(
+        title="齿轮售票亭",
+        description="一列会自行换轨的列车停在岔路口，这是自动售票摊位，但系统已经故障：修好它可换取正规入场券，偷看优惠码能白嫖漏票，砸掉它则立刻树敌，但可能抢到材料。你需要马上选一种做法。",
+        choices=(
+            ChoiceSpec("校准售票机关，换取正规入场券", "calibrate"),
+            ChoiceSpec("偷看优惠码，白嫖入场票", "hack_coupon"),
+            ChoiceSpec("破坏摊位，抢走材料", "sabotage"),
+        ),
+    )
 
     def calibrate(self):
         self.register_story_choice(
@@ -238,6 +237,7 @@ class ClockworkBazaarEvent(Event):
         ]
 
 
+@story_event("cog_audit_event")
 class CogAuditEvent(Event):
     """齿轮链中继：宝物门被审计。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -246,15 +246,15 @@ class CogAuditEvent(Event):
     def is_trigger_condition_met(cls, controller):
         return False
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "查票清算"
-        self.description = "你在售票终端留下的每一步操作都被总账追踪，如今正式触发查票清算。计价员把票务记录摊到你面前：要么补款认账、要么伪造通行证硬闯、要么贿赂计价员买断风声。你必须当场给出结算方案。"
-        self.choices = [
-            EventChoice("补款结清票务", self.pay_tax),
-            EventChoice("伪造通行证硬闯", self.fake_ledger),
-            EventChoice("贿赂计价员买断风声", self.buy_silence),
-        ]
+    SPEC = EventSpec(
+        title="查票清算",
+        description="你在售票终端留下的每一步操作都被总账追踪，如今正式触发查票清算。计价员把票务记录摊到你面前：要么补款认账、要么伪造通行证硬闯、要么贿赂计价员买断风声。你必须当场给出结算方案。",
+        choices=(
+            ChoiceSpec("补款结清票务", "pay_tax"),
+            ChoiceSpec("伪造通行证硬闯", "fake_ledger"),
+            ChoiceSpec("贿赂计价员买断风声", "buy_silence"),
+        ),
+    )
 
     def pay_tax(self):
         self.register_story_choice(
@@ -4,11 +4,21 @@ from models.story_gates import (
     ALL_PRE_FINAL_DOOR_TYPES,
     ELF_THIEF_NAME,
     ENDING_EVENT_GATE_KEYS,
+    LONG_STORY_STARTER_EVENT_NAMES,
     PRE_FINAL_DISPATCH_ORDER,
     PRE_FINAL_GATE_STORY_CONFIG,
 )
 from models.events.base import Event, EventChoice
 from models.events._pkg import rng
+from models.events.eligibility import (
+    EventEligibilityIndex,
+    EventTriggerCounts,
+    _clamp_probability,
+    prewarm_event_metadata,
+)
+from models.events.registry import resolve_story_event_class
+from models.events.telemetry import REJECT_RECENT
+from models.weighted_sampling import CumulativeTable
 from .short_random import (
     AncientShrineEvent,
     CursedChestEvent,
@@ -40,58 +50,13 @@ from .elf_chain import (
     ElfNightCampEvent,
     ElfRooftopDuelEvent,
     ElfShadowMarkEvent,
-    ElfSideMerchantDisguisedEvent,
-    ElfSideMerchantEvent,
-    ElfSideMonsterEvent,
     ElfThiefIntroEvent,
     ElfTrapRescueEvent,
 )
-from .stage_curtain import (
-    DreamMirrorPreludeEvent,
-    EndingFinalFirstGateEvent,
-    EndingFinalSecondGateEvent,
-    EndingPowerCurtainChoiceEvent,
-    EndingPowerCurtainDirectEvent,
-    EndingPuppetEchoAftermathEvent,
-    EndingStageCurtainGateEvent,
-    EndingStageKindPuppetDialogueEvent,
-    StageCurtainKindPuppetDialogueMidEvent,
-    schedule_next_pre_final_gate,
-)
 
 
 def get_story_event_by_key(event_key, controller):
-    event_map = {
-        "moon_verdict_event": MoonVerdictEvent,
-        "cog_audit_event": CogAuditEvent,
-        "echo_court_event": EchoCourtEvent,
-        "puppet_signal_event": PuppetSignalEvent,
-        "puppet_kind_echo_event": PuppetKindEchoEvent,
-        "puppet_persona_rift_event": PuppetPersonaRiftEvent,
-        "puppet_core_descent_event": PuppetCoreDescentEvent,
-        "elf_shadow_mark_event": ElfShadowMarkEvent,
-        "elf_rooftop_duel_event": ElfRooftopDuelEvent,
-        "elf_fake_map_event": ElfFakeMapEvent,
-        "elf_monster_stage_event": ElfMonsterStageEvent,
-        "elf_night_camp_event": ElfNightCampEvent,
-        "elf_trap_rescue_event": ElfTrapRescueEvent,
-        "elf_hunter_gate_event": ElfHunterGateEvent,
-        "elf_final_heist_event": ElfFinalHeistEvent,
-        "elf_epilogue_event": ElfEpilogueEvent,
-        "elf_side_monster_event": ElfSideMonsterEvent,
-        "elf_side_merchant_disguised_event": ElfSideMerchantDisguisedEvent,
-        "elf_side_merchant_event": ElfSideMerchantEvent,
-        "dream_mirror_prelude_event": DreamMirrorPreludeEvent,
-        "ending_stage_kind_puppet_dialogue_event": EndingStageKindPuppetDialogueEvent,
-        "stage_curtain_kind_puppet_dialogue_mid_event": StageCurtainKindPuppetDialogueMidEvent,
-        "ending_stage_curtain_gate_event": EndingStageCurtainGateEvent,
-        "ending_power_curtain_direct_event": EndingPowerCurtainDirectEvent,
-        "ending_power_curtain_choice_event": EndingPowerCurtainChoiceEvent,
-        "ending_puppet_echo_aftermath_event": EndingPuppetEchoAftermathEvent,
-        "ending_final_first_gate_event": EndingFinalFirstGateEvent,
-        "ending_final_second_gate_event": EndingFinalSecondGateEvent,
-    }
-    event_cls = event_map.get(event_key)
+    event_cls = resolve_story_event_class(event_key)
     if not event_cls or not _is_event_available(controller, event_cls):
         return None
     return event_cls(controller)
@@ -117,14 +82,9 @@ STARTER_EVENT_POOL = [
 ]
 
 
+# 名单唯一来源为 models.story_gates.LONG_STORY_STARTER_EVENT_NAMES（终局门的「已开启长线」判定共用）
 LONG_EVENT_STARTER_CLASSES = {
-    TimePawnshopEvent,
-    MirrorTheaterEvent,
-    MoonBountyEvent,
-    ClockworkBazaarEvent,
-    DreamWellEvent,
-    PuppetAbandonmentEvent,
-    ElfThiefIntroEvent,
+    event_cls for event_cls in STARTER_EVENT_POOL if event_cls.__name__ in LONG_STORY_STARTER_EVENT_NAMES
 }
 
 # 随机事件门：长线起始最早可出现于该 round_count（含）；此前只从短线池抽，避免开局即进长线。
@@ -138,27 +98,13 @@ PREFERRED_LONG_EVENT_STARTERS = {
 }
 
 
-def _clamp_probability(value):
-    try:
-        return max(0.0, min(1.0, float(value)))
-    except (TypeError, ValueError):
-        return 0.0
-
-
 def _weighted_pick(event_classes, weights):
     if not event_classes:
         return None
-    safe_weights = [max(0.0, float(w)) for w in weights]
-    total = sum(safe_weights)
-    if total <= 0:
+    table = CumulativeTable(event_classes, weights)
+    if table.total <= 0:
         return rng().choice(event_classes)
-    roll = rng().random() * total
-    acc = 0.0
-    for event_cls, weight in zip(event_classes, safe_weights):
-        acc += weight
-        if roll <= acc:
-            return event_cls
-    return event_classes[-1]
+    return table.pick(rng().random() * table.total)
 
 
 RECENT_EVENT_WINDOW = 4  # 最近 N 次事件门内尽量不重复
@@ -166,8 +112,9 @@ RECENT_EVENT_WINDOW = 4  # 最近 N 次事件门内尽量不重复
 
 def _get_event_trigger_counts(controller):
     counts = getattr(controller, "event_trigger_counts", None)
-    if counts is None:
-        counts = {}
+    if not isinstance(counts, EventTriggerCounts):
+        # 旧存档 / 外部直接赋值的普通 dict：升级为可追踪变动的计数表
+        counts = EventTriggerCounts(counts or {})
         setattr(controller, "event_trigger_counts", counts)
     return counts
 
@@ -179,6 +126,7 @@ def _get_event_trigger_count(controller, event_cls):
 def _mark_event_triggered(controller, event_cls):
     counts = _get_event_trigger_counts(controller)
     name = event_cls.__name__
+    # 首次触发会推进计数表的 presence_version，剧情系统据此作废订阅该计数的终局门条件
     counts[name] = int(counts.get(name, 0)) + 1
 
 
@@ -188,70 +136,90 @@ def _is_event_available(controller, event_cls):
     return _get_event_trigger_count(controller, event_cls) <= 0
 
 
-def _build_event_weight(controller, event_cls):
-    base = _clamp_probability(event_cls.get_trigger_probability(controller))
-    trigger_count = _get_event_trigger_count(controller, event_cls)
-    weight = base
-
+def _event_weight_terms(event_cls, trigger_count):
+    """权重中只依赖触发次数的部分：(依次相乘的倍率, 衰减除数)；基础概率随玩家状态变化，每次实时读取。"""
+    multipliers = []
     # 还未触发过的长线起始事件优先级更高。
     if event_cls in LONG_EVENT_STARTER_CLASSES and trigger_count <= 0:
-        weight *= LONG_EVENT_STARTER_FIRST_TIME_BONUS
+        multipliers.append(LONG_EVENT_STARTER_FIRST_TIME_BONUS)
 
     # 指定长线起始事件（精灵飞贼/黑暗木偶）在随机池中提升到其他长事件的约 3 倍权重。
     if event_cls in PREFERRED_LONG_EVENT_STARTERS:
-        weight *= PREFERRED_LONG_EVENT_WEIGHT_MULTIPLIER
+        multipliers.append(PREFERRED_LONG_EVENT_WEIGHT_MULTIPLIER)
 
     # 可重复事件按触发次数衰减：weight / (1 + 次数)
+    divisor = None
     if not getattr(event_cls, "ONLY_TRIGGER_ONCE", False):
-        weight /= (1 + max(0, trigger_count))
+        divisor = 1 + max(0, trigger_count)
+    return tuple(multipliers), divisor
 
+
+def _apply_event_weight_terms(base, terms):
+    multipliers, divisor = terms
+    weight = base
+    for multiplier in multipliers:
+        weight *= multiplier
+    if divisor is not None:
+        weight /= divisor
     return max(0.0, weight)
 
 
-def get_random_event(controller):
-    import models.events as ev
+def _build_event_weight(controller, event_cls):
+    base = _clamp_probability(event_cls.get_trigger_probability(controller))
+    terms = _event_weight_terms(event_cls, _get_event_trigger_count(controller, event_cls))
+    return _apply_event_weight_terms(base, terms)
 
-    starter_pool = ev.STARTER_EVENT_POOL
-    rc = max(0, int(getattr(controller, "round_count", 0)))
-    block_long_starters = rc < LONG_EVENT_STARTER_EARLIEST_ROUND
 
-    def _long_starter_ok(event_cls):
-        if block_long_starters and event_cls in LONG_EVENT_STARTER_CLASSES:
-            return False
-        return True
+def _get_eligibility_index(controller, starter_pool):
+    """取本局的资格索引；事件池被替换、计数表被重置或事件条件被 patch 时重建。"""
+    counts = _get_event_trigger_counts(controller)
+    index = getattr(controller, "event_eligibility_index", None)
+    if index is None or not index.is_current(starter_pool, counts):
+        index = EventEligibilityIndex(
+            starter_pool,
+            counts,
+            LONG_EVENT_STARTER_CLASSES,
+            LONG_EVENT_STARTER_EARLIEST_ROUND,
+            _event_weight_terms,
+            PREFERRED_LONG_EVENT_STARTERS,
+        )
+        setattr(controller, "event_eligibility_index", index)
+    return index
 
-    candidates = [
-        event_cls
-        for event_cls in starter_pool
-        if _long_starter_ok(event_cls)
-        and event_cls.is_trigger_condition_met(controller)
-        and _is_event_available(controller, event_cls)
-    ]
-    if not candidates:
-        candidates = [
-            event_cls
-            for event_cls in starter_pool
-            if _long_starter_ok(event_cls) and _is_event_available(controller, event_cls)
-        ]
 
-    if not candidates:
-        candidates = [event_cls for event_cls in starter_pool if _long_starter_ok(event_cls)]
+def get_random_event(controller):
+    import models.events as ev
 
-    if not candidates:
-        candidates = list(starter_pool)
+    index = _get_eligibility_index(controller, ev.STARTER_EVENT_POOL)
+    candidates = index.candidates(controller)
 
     rng().shuffle(candidates)
 
+    telemetry = getattr(controller, "event_telemetry", None)
+    sampled = telemetry is not None and telemetry.should_sample()
+    rejected = index.rejection_reasons(controller, candidates) if sampled else None
+
     # 非后续事件门：优先排除最近出现过的类型
     recent = set(getattr(controller, "recent_event_classes", []))
     fresh = [c for c in candidates if c.__name__ not in recent]
     if fresh:
+        if sampled:
+            for event_cls in candidates:
+                if event_cls.__name__ in recent:
+                    rejected[event_cls.__name__] = REJECT_RECENT
         candidates = fresh
 
-    candidate_weights = [_build_event_weight(controller, event_cls) for event_cls in candidates]
+    candidate_weights = [
+        _apply_event_weight_terms(index.trigger_probability(event_cls, controller), index.weight_terms(event_cls))
+        for event_cls in candidates
+    ]
     event_cls = _weighted_pick(candidates, candidate_weights)
     if event_cls is None:
         event_cls = rng().choice(candidates)
+    if sampled:
+        telemetry.record_draw(
+            getattr(controller, "round_count", 0), candidates, candidate_weights, event_cls, rejected
+        )
     _mark_event_triggered(controller, event_cls)
     return event_cls(controller)
 
@@ -284,3 +252,6 @@ LONG_EVENT_CLASSES = (
 
 for _event_cls in LONG_EVENT_CLASSES:
     _event_cls.ONLY_TRIGGER_ONCE = True
+
+# ONLY_TRIGGER_ONCE 已定稿：导入期预编译随机事件池的元数据，各局的资格索引直接复用
+prewarm_event_metadata(STARTER_EVENT_POOL, LONG_EVENT_STARTER_CLASSES, PREFERRED_LONG_EVENT_STARTERS)
@@ -15,31 +15,30 @@ from models.story_gates import (
     PRE_FINAL_DISPATCH_ORDER,
     PRE_FINAL_GATE_STORY_CONFIG,
 )
-from models.events.base import Event, EventChoice
+from models.events.base import ChoiceSpec, Event, EventSpec
+from models.events.registry import story_event
 from models.events._pkg import rng, mk_random_item, mk_reward_item
 
 class DreamWellEvent(Event):
     """长链3：梦井回声"""
     TRIGGER_BASE_PROBABILITY = 0.06
-
-    @classmethod
-    def is_trigger_condition_met(cls, controller):
-        return cls.is_unlocked(controller, min_round=16, min_stage=2)
+    MIN_TRIGGER_ROUND = 16
+    MIN_TRIGGER_STAGE = 2
 
     @classmethod
     def get_trigger_probability(cls, controller):
         moral = abs(getattr(getattr(controller, "story", None), "moral_score", 0))
         return min(0.18, cls.TRIGGER_BASE_PROBABILITY + min(0.12, moral / 500))
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "梦境井"
-        self.description = "梦境井的水面映出的不是你的脸，而是历代梦境的谢幕回放。传闻井水会让你看到过去的梦：喝下它看到过去的梦，封住它，或把回放折价卖给无法进入梦境的人。你得现在决定要把哪条线继续下去。"
-        self.choices = [
-            EventChoice("喝下井水，读取梦境回放", self.drink_dream),
-            EventChoice("封住井口，拒绝回放", self.seal_well),
-            EventChoice("把回放卖掉变现", self.sell_dream),
-        ]
+    SPEC = EventSpec(
+        title="梦境井",
+        description="梦境井的水面映出的不是你的脸，而是历代梦境的谢幕回放。传闻井水会让你看到过去的梦：喝下它看到过去的梦，封住它，或把回放折价卖给无法进入梦境的人。你得现在决定要把哪条线继续下去。",
+        choices=(
+            ChoiceSpec("喝下井水，读取梦境回放", "drink_dream"),
+            ChoiceSpec("封住井口，拒绝回放", "seal_well"),
+            ChoiceSpec("把回放卖掉变现", "sell_dream"),
+        ),
+    )
 
     def drink_dream(self):
         self.register_story_choice(
@@ -210,6 +209,7 @@ class DreamWellEvent(Event):
         ]
 
 
+@story_event("echo_court_event")
 class EchoCourtEvent(Event):
     """梦井链中继：根据庭审抉择改写宝物门。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -218,15 +218,15 @@ class EchoCourtEvent(Event):
     def is_trigger_condition_met(cls, controller):
         return False
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "回声法庭"
-        self.description = "你与梦境井相关的互动已被回声法庭正式立案。法庭认定你既是当事人也是收益者，要求你立刻表态并承担后果：支付赎回梦境的费用、补缴拖欠的回放罚款，或公开宣布继续交易。"
-        self.choices = [
-            EventChoice("赎回回放梦境", self.redeem_dream),
-            EventChoice("上缴回放罚款", self.pay_dream_tax),
-            EventChoice("继续倒卖回放", self.keep_trading),
-        ]
+    SPEC = EventSpec(
+        title="回声法庭",
+        description="你与梦境井相关的互动已被回声法庭正式立案。法庭认定你既是当事人也是收益者，要求你立刻表态并承担后果：支付赎回梦境的费用、补缴拖欠的回放罚款，或公开宣布继续交易。",
+        choices=(
+            ChoiceSpec("赎回回放梦境", "redeem_dream"),
+            ChoiceSpec("上缴回放罚款", "pay_dream_tax"),
+            ChoiceSpec("继续倒卖回放", "keep_trading"),
+        ),
+    )
 
     def redeem_dream(self):
         round_count = max(0, int(getattr(self.controller, "round_count", 0)))
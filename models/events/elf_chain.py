@@ -1,4 +1,6 @@
 """见 models.events 包说明。"""
+from functools import partial
+
 from models.status import StatusName
 from models.story_flags import (
     ELF_GRUDGE_CAMP_MERCENARY,
@@ -25,6 +27,7 @@ from models.story_gates import (
     PRE_FINAL_GATE_STORY_CONFIG,
 )
 from models.events.base import Event, EventChoice
+from models.events.registry import story_event
 from models.events._pkg import rng, mk_random_item, mk_reward_item
 
 ELF_CHAIN_EVENT_ORDER = [
@@ -41,43 +44,31 @@ ELF_CHAIN_EVENT_ORDER = [
 
 
 def _get_elf_chain_state(controller):
+    """飞贼链状态记录（story.elf，见 models.story_chains）；无剧情系统时返回 None。"""
     story = getattr(controller, "story", None)
-    if story is None:
-        return None
-    if not hasattr(story, "elf_relation"):
-        story.elf_relation = 0
-    if not hasattr(story, "elf_chain_started"):
-        story.elf_chain_started = False
-    if not hasattr(story, "elf_middle_queue"):
-        story.elf_middle_queue = []
-    if not hasattr(story, "elf_chain_ended"):
-        story.elf_chain_ended = False
-    if not hasattr(story, "elf_key_obtained"):
-        story.elf_key_obtained = False
-    return story
+    return story.elf if story is not None else None
 
 
 def _record_elf_grudge(controller, flag: str) -> None:
     """记录玩家在飞贼支线上的具体选择，供终局清算战台词引用。"""
-    story = _get_elf_chain_state(controller)
-    if story is not None and hasattr(story, "choice_flags"):
+    story = getattr(controller, "story", None)
+    if story is not None:
         story.choice_flags.add(flag)
 
 
 def _adjust_elf_relation(controller, delta):
-    story = _get_elf_chain_state(controller)
-    if story is None:
+    elf = _get_elf_chain_state(controller)
+    if elf is None:
         return 0
-    story.elf_relation = max(-6, min(6, int(story.elf_relation) + int(delta)))
-    return story.elf_relation
+    return elf.adjust_relation(delta)
 
 
 def _set_elf_key_obtained(controller, obtained):
-    story = _get_elf_chain_state(controller)
+    story = getattr(controller, "story", None)
     if story is None:
         return None
     value = bool(obtained)
-    story.elf_key_obtained = value
+    story.elf.key_obtained = value
     if value:
         story.story_tags.add("elf_key_obtained")
     else:
@@ -118,28 +109,29 @@ def _elf_grant_dynamic_boon(controller):
 
 
 def _schedule_next_elf_event(controller, completed_key):
-    story = _get_elf_chain_state(controller)
+    story = getattr(controller, "story", None)
     if story is None:
         return
+    elf = story.elf
 
-    if completed_key == "elf_shadow_mark_event" and not story.elf_middle_queue:
-        story.elf_middle_queue = [
+    if completed_key == "elf_shadow_mark_event" and not elf.middle_queue:
+        elf.middle_queue = [
             "elf_rooftop_duel_event",
             "elf_fake_map_event",
             "elf_monster_stage_event",
         ]
-        rng().shuffle(story.elf_middle_queue)
+        rng().shuffle(elf.middle_queue)
 
     if completed_key == "elf_intro":
         next_key = "elf_shadow_mark_event"
     elif completed_key == "elf_shadow_mark_event":
-        next_key = story.elf_middle_queue.pop(0)
+        next_key = elf.middle_queue.pop(0)
     elif completed_key in {
         "elf_rooftop_duel_event",
         "elf_fake_map_event",
         "elf_monster_stage_event",
     }:
-        next_key = story.elf_middle_queue.pop(0) if story.elf_middle_queue else "elf_night_camp_event"
+        next_key = elf.middle_queue.pop(0) if elf.middle_queue else "elf_night_camp_event"
     else:
         try:
             idx = ELF_CHAIN_EVENT_ORDER.index(completed_key)
@@ -174,12 +166,9 @@ class ElfThiefIntroEvent(Event):
 
     @classmethod
     def is_trigger_condition_met(cls, controller):
-        story = _get_elf_chain_state(controller)
-        if story is not None:
-            if bool(getattr(story, "elf_chain_started", False)):
-                return False
-            if bool(getattr(story, "elf_chain_ended", False)):
-                return False
+        elf = _get_elf_chain_state(controller)
+        if elf is not None and (elf.started or elf.ended):
+            return False
         return super().is_trigger_condition_met(controller)
 
     def __init__(self, controller):
@@ -198,11 +187,11 @@ class ElfThiefIntroEvent(Event):
         ]
 
     def _start_chain(self):
-        story = _get_elf_chain_state(self.controller)
-        if story is None or story.elf_chain_started:
+        story = getattr(self.controller, "story", None)
+        if story is None or story.elf.started:
             return
-        story.elf_chain_started = True
-        if not getattr(story, "elf_chain_ended", False):
+        story.elf.started = True
+        if not story.elf.ended:
             story.story_tags.add("elf_met")
             _register_elf_side_events(self.controller)
         _schedule_next_elf_event(self.controller, "elf_intro")
@@ -236,6 +225,7 @@ class ElfThiefIntroEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_shadow_mark_event")
 class ElfShadowMarkEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
@@ -278,6 +268,7 @@ class ElfShadowMarkEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_rooftop_duel_event")
 class ElfRooftopDuelEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
@@ -318,6 +309,7 @@ class ElfRooftopDuelEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_fake_map_event")
 class ElfFakeMapEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
@@ -357,6 +349,7 @@ class ElfFakeMapEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_monster_stage_event")
 class ElfMonsterStageEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
@@ -396,6 +389,7 @@ class ElfMonsterStageEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_night_camp_event")
 class ElfNightCampEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
@@ -439,6 +433,7 @@ class ElfNightCampEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_trap_rescue_event")
 class ElfTrapRescueEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
@@ -454,7 +449,8 @@ class ElfTrapRescueEvent(Event):
         ]
 
     def _rescue_outcome(self):
-        rel = getattr(_get_elf_chain_state(self.controller), "elf_relation", 0)
+        elf = _get_elf_chain_state(self.controller)
+        rel = elf.relation if elf is not None else 0
         if rel >= 2:
             heal = _elf_ratio(self.get_player(), 0.16, "hp")
             self.get_player().hp = self.get_player().hp + heal
@@ -490,6 +486,7 @@ class ElfTrapRescueEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_hunter_gate_event")
 class ElfHunterGateEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
@@ -554,6 +551,7 @@ class ElfHunterGateEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_final_heist_event")
 class ElfFinalHeistEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
@@ -601,11 +599,13 @@ class ElfFinalHeistEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_epilogue_event")
 class ElfEpilogueEvent(Event):
     def __init__(self, controller):
         super().__init__(controller)
         self.title = "银羽余响"
-        self.rel = getattr(_get_elf_chain_state(controller), "elf_relation", 0)
+        elf = _get_elf_chain_state(controller)
+        self.rel = elf.relation if elf is not None else 0
         if self.rel >= 2:
             self.description = (
                 "门后她倚在一扇暗门旁，把一把旧钥匙稳稳递到你手里："
@@ -639,14 +639,14 @@ class ElfEpilogueEvent(Event):
             ]
 
     def _mark_elf_global_outcome(self, outcome_key, extra_tags=None):
-        story = _get_elf_chain_state(self.controller)
+        story = getattr(self.controller, "story", None)
         if story is None:
             return None
-        story.elf_chain_ended = True
+        story.elf.ended = True
         story.story_tags.add("elf_chain_ended")
         story.story_tags.add(f"elf_outcome:{outcome_key}")
         story.choice_flags.add(f"elf_outcome_{outcome_key}")
-        story.elf_final_outcome = outcome_key
+        story.elf.final_outcome = outcome_key
         if extra_tags:
             for tag in extra_tags:
                 story.story_tags.add(tag)
@@ -657,7 +657,7 @@ class ElfEpilogueEvent(Event):
             "alliance",
             extra_tags={"ending_hook:elf_alliance", "ending_hook:ally_network"},
         )
-        rel = getattr(story, "elf_relation", 0) if story else self.rel
+        rel = story.elf.relation if story else self.rel
         _set_elf_key_obtained(self.controller, rel >= 2)
         boon_text = _elf_grant_dynamic_boon(self.controller)
         extra_heal = _elf_ratio(self.get_player(), 0.08 if rel >= 2 else 0.05, "hp")
@@ -676,7 +676,7 @@ class ElfEpilogueEvent(Event):
             "neutral",
             extra_tags={"ending_hook:elf_neutral", "ending_hook:lone_path"},
         )
-        rel = getattr(story, "elf_relation", 0) if story else self.rel
+        rel = story.elf.relation if story else self.rel
         _set_elf_key_obtained(self.controller, rel >= 2)
         gain = _elf_ratio(self.get_player(), 0.12 if rel >= 0 else 0.08, "gold")
         self.get_player().gold += gain
@@ -695,7 +695,7 @@ class ElfEpilogueEvent(Event):
             extra_tags={"ending_hook:elf_hostile", "ending_hook:hunted"},
         )
         _record_elf_grudge(self.controller, ELF_GRUDGE_EPILOGUE_BURNED)
-        rel = getattr(story, "elf_relation", 0) if story else self.rel
+        rel = story.elf.relation if story else self.rel
         _set_elf_key_obtained(self.controller, False)
         dmg = _elf_ratio(self.get_player(), 0.12 if rel > -2 else 0.16, "hp")
         self.get_player().take_damage(dmg)
@@ -715,7 +715,7 @@ class ElfEpilogueEvent(Event):
 
 def _register_elf_side_events(controller):
     """精灵飞贼支线：已遇见她且未终局时，登记怪物门/商店门内随机触发的独立事件（各仅一次）。"""
-    story = _get_elf_chain_state(controller)
+    story = getattr(controller, "story", None)
     if story is None or "elf_met" not in story.story_tags:
         return
     # 怪物门：标记为银羽与利爪（保持怪物门，进门后打怪或逃跑，根据结果不同提示）
@@ -786,6 +786,7 @@ def _register_elf_side_events(controller):
     )
 
 
+@story_event("elf_side_monster_event")
 class ElfSideMonsterEvent(Event):
     """支线：怪物门内发现飞贼在打怪，与主链独立，仅触发一次。"""
 
@@ -827,6 +828,7 @@ class ElfSideMonsterEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_side_merchant_disguised_event")
 class ElfSideMerchantDisguisedEvent(Event):
     """支线：商店门内未认出她，门样式与购买流程像商店，实为她伪装，仅触发一次。"""
 
@@ -847,7 +849,8 @@ class ElfSideMerchantDisguisedEvent(Event):
         ]
 
     def _make_buy(self, index):
-        return lambda idx=index: self._do_buy(idx)
+        # partial 而非闭包：事件状态需可 pickle（分支探索器分叉游戏状态）
+        return partial(self._do_buy, index)
 
     def _do_buy(self, index):
         if index < 0 or index >= len(self._items):
@@ -863,6 +866,7 @@ class ElfSideMerchantDisguisedEvent(Event):
         return "Event Completed"
 
 
+@story_event("elf_side_merchant_event")
 class ElfSideMerchantEvent(Event):
     """支线：商店门内认出她，直接揭穿/对话，与主链独立，仅触发一次。"""
 
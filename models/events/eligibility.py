@@ -0,0 +1,351 @@
+"""随机事件门的资格索引：按回合窗口与阶段阈值预先划分 STARTER_EVENT_POOL，随触发计数增量维护可用性与权重系数。
+
+- 只靠 MIN_TRIGGER_ROUND / MIN_TRIGGER_STAGE / MAX_TRIGGER_ROUND 判定的事件为「静态」事件：其资格只取决于
+  (回合区间, 阶段区间)，同一区间内的候选计划只计算一次。
+- 覆写了 is_trigger_condition_met（依赖剧情状态，如精灵飞贼、黑暗木偶起始）的事件为「动态」事件，每次仍实时判定。
+- 单次事件是否已用尽、权重系数（首发加成 / 偏好倍率 / 重复衰减）由 EventTriggerCounts 记录的变动名单增量更新。
+"""
+from bisect import bisect_right
+
+from models.events.base import Event
+from models.events.telemetry import REJECT_CONDITION, REJECT_EXHAUSTED, REJECT_LONG_STARTER_GATE
+
+# 决定静态事件资格的类方法；任一被子类覆写（或被 patch）即视为动态事件
+_BASE_CONDITION_METHODS = ("is_trigger_condition_met", "is_unlocked", "get_progress_stage", "_is_within_round_window")
+
+
+def _is_positive(value):
+    try:
+        return int(value) > 0
+    except (TypeError, ValueError):
+        return False
+
+
+class EventTriggerCounts(dict):
+    """事件触发计数（事件类名 -> 次数）：记录自上次同步以来变动过的事件名，供资格索引增量更新。
+
+    presence_version 在任一事件「是否已触发」（计数是否大于 0）发生变化时推进，
+    无论经由哪条写入路径（直接赋值、del、pop、clear 等）；剧情系统据此作废订阅事件计数的终局门条件缓存。
+    """
+
+    __slots__ = ("_dirty", "_presence_version")
+
+    def __init__(self, counts=()):
+        super().__init__(counts)
+        self._dirty = set(self)
+        self._presence_version = 0
+
+    def __reduce__(self):
+        # 反序列化后全部视为变动，索引整体重新同步
+        return (type(self), (dict(self),))
+
+    @property
+    def presence_version(self):
+        return self._presence_version
+
+    def _note_presence(self, before, after):
+        if before != after:
+            self._presence_version += 1
+
+    def __setitem__(self, key, value):
+        before = _is_positive(self.get(key, 0))
+        super().__setitem__(key, value)
+        self._dirty.add(key)
+        self._note_presence(before, _is_positive(value))
+
+    def __delitem__(self, key):
+        before = _is_positive(self[key])
+        super().__delitem__(key)
+        self._dirty.add(key)
+        self._note_presence(before, False)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._dirty.add(key)
+            self._note_presence(_is_positive(self[key]), False)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._dirty.add(key)
+        self._note_presence(_is_positive(value), False)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._dirty.add(key)
+            self._note_presence(False, _is_positive(default))
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        changed = any(_is_positive(self.get(key, 0)) != _is_positive(value) for key, value in items.items())
+        super().update(items)
+        self._dirty.update(items)
+        self._note_presence(False, changed)
+
+    def clear(self):
+        self._dirty.update(self)
+        self._note_presence(False, any(_is_positive(value) for value in self.values()))
+        super().clear()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def drain_changes(self):
+        """取出并清空变动名单。"""
+        changed = self._dirty
+        self._dirty = set()
+        return changed
+
+
+def _overrides(event_cls, name):
+    func = getattr(getattr(event_cls, name), "__func__", None)
+    return func is not Event.__dict__[name].__func__
+
+
+def _uses_base_condition(event_cls):
+    return not any(_overrides(event_cls, name) for name in _BASE_CONDITION_METHODS)
+
+
+def _condition_signature(pool):
+    """事件类上 is_trigger_condition_met / get_trigger_probability 的直接绑定；被 patch 时变化，索引据此重建。"""
+    return tuple(
+        (vars(event_cls).get("is_trigger_condition_met"), vars(event_cls).get("get_trigger_probability"))
+        for event_cls in pool
+    )
+
+
+def _clamp_probability(value):
+    try:
+        return max(0.0, min(1.0, float(value)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class EventMeta:
+    """事件类的抽取元数据：把分散在类属性 / 覆写方法 / 长线集合上的信息编译成一条定长记录。"""
+
+    __slots__ = (
+        "event_cls",
+        "name",
+        "min_round",
+        "min_stage",
+        "max_round",
+        "base_probability",
+        "once_only",
+        "long_starter",
+        "preferred",
+        "custom_probability",
+        "custom_condition",
+    )
+
+    def __init__(self, event_cls, long_starter=False, preferred=False):
+        max_round = getattr(event_cls, "MAX_TRIGGER_ROUND", None)
+        self.event_cls = event_cls
+        self.name = event_cls.__name__
+        self.min_round = max(0, int(getattr(event_cls, "MIN_TRIGGER_ROUND", 0) or 0))
+        self.min_stage = max(0, int(getattr(event_cls, "MIN_TRIGGER_STAGE", 0) or 0))
+        self.max_round = None if max_round is None else int(max_round)
+        self.base_probability = _clamp_probability(getattr(event_cls, "TRIGGER_BASE_PROBABILITY", 0.0))
+        self.once_only = bool(getattr(event_cls, "ONLY_TRIGGER_ONCE", False))
+        self.long_starter = bool(long_starter)
+        self.preferred = bool(preferred)
+        # 覆写了 get_trigger_probability 的事件每次抽取仍需实时计算基础概率
+        self.custom_probability = _overrides(event_cls, "get_trigger_probability")
+        self.custom_condition = not _uses_base_condition(event_cls)
+
+    def trigger_probability(self, controller):
+        if self.custom_probability:
+            return _clamp_probability(self.event_cls.get_trigger_probability(controller))
+        return self.base_probability
+
+
+_META_CACHE = {}
+_META_ATTRS = ("MIN_TRIGGER_ROUND", "MIN_TRIGGER_STAGE", "MAX_TRIGGER_ROUND", "TRIGGER_BASE_PROBABILITY", "ONLY_TRIGGER_ONCE")
+
+
+def _meta_key(event_cls, long_starter, preferred):
+    return (
+        event_cls,
+        long_starter,
+        preferred,
+        _condition_signature((event_cls,)),
+        tuple(getattr(event_cls, attr, None) for attr in _META_ATTRS),
+    )
+
+
+def get_event_meta(event_cls, long_starters=(), preferred=()):
+    """取事件类的元数据记录；类属性或方法绑定变化（含 patch）后自动重新编译。"""
+    long_starter = event_cls in long_starters
+    is_preferred = event_cls in preferred
+    key = _meta_key(event_cls, long_starter, is_preferred)
+    meta = _META_CACHE.get(key)
+    if meta is None:
+        meta = _META_CACHE[key] = EventMeta(event_cls, long_starter, is_preferred)
+    return meta
+
+
+def prewarm_event_metadata(event_classes, long_starters=(), preferred=()):
+    """导入期预先编译一批事件类的元数据，首次抽取时不再逐类读取属性链。"""
+    return {event_cls: get_event_meta(event_cls, long_starters, preferred) for event_cls in event_classes}
+
+
+class EventEligibilityIndex:
+    """单局的随机事件门资格索引，挂在 controller.event_eligibility_index 上。
+
+    candidates() 与逐类判定的回退梯度一致：
+    条件满足且可用 -> 可用 -> 长线起始未被回合封锁 -> 整个池子；列表保持事件池顺序。
+    """
+
+    def __init__(self, pool, counts, long_starter_classes, long_starter_earliest_round, weight_terms, preferred_classes=()):
+        self.pool = tuple(pool)
+        self.counts = counts
+        self.signature = _condition_signature(self.pool)
+        self._long_starters = frozenset(long_starter_classes)
+        self._long_starter_earliest_round = int(long_starter_earliest_round)
+        self._weight_terms_for = weight_terms
+        self._by_name = {event_cls.__name__: event_cls for event_cls in self.pool}
+        self.meta = prewarm_event_metadata(self.pool, self._long_starters, frozenset(preferred_classes))
+
+        self._static = {}
+        round_breaks = {self._long_starter_earliest_round}
+        stage_breaks = set()
+        for event_cls in self.pool:
+            meta = self.meta[event_cls]
+            if meta.custom_condition:
+                continue
+            self._static[event_cls] = meta
+            round_breaks.add(meta.min_round)
+            if meta.max_round is not None:
+                round_breaks.add(meta.max_round + 1)
+            if meta.min_stage > 0:
+                stage_breaks.add(meta.min_stage)
+        self._round_breaks = tuple(sorted(round_breaks))
+        self._stage_breaks = tuple(sorted(stage_breaks))
+        self._plans = {}
+
+        self._exhausted = set()
+        self._weight_terms = {}
+        for event_cls in self.pool:
+            self._refresh(event_cls)
+        counts.drain_changes()
+
+    def __getstate__(self):
+        # classmethod 对象不可 pickle；签名在反序列化时按当前事件类重新取
+        state = dict(self.__dict__)
+        del state["signature"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.signature = _condition_signature(self.pool)
+
+    def is_current(self, pool, counts):
+        return (
+            counts is self.counts
+            and len(pool) == len(self.pool)
+            and all(a is b for a, b in zip(pool, self.pool))
+            and _condition_signature(self.pool) == self.signature
+        )
+
+    # ---- 计数同步 ----
+
+    def _refresh(self, event_cls):
+        count = int(self.counts.get(event_cls.__name__, 0))
+        if self.meta[event_cls].once_only and count > 0:
+            self._exhausted.add(event_cls)
+        else:
+            self._exhausted.discard(event_cls)
+        self._weight_terms[event_cls] = self._weight_terms_for(event_cls, count)
+
+    def sync(self):
+        for name in self.counts.drain_changes():
+            event_cls = self._by_name.get(name)
+            if event_cls is not None:
+                self._refresh(event_cls)
+
+    # ---- 候选计划 ----
+
+    def _plan_for(self, round_count, controller):
+        round_band = bisect_right(self._round_breaks, round_count)
+        stage_band = 0
+        if self._stage_breaks:
+            stage_band = bisect_right(self._stage_breaks, Event.get_progress_stage(controller))
+        key = (round_band, stage_band)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = self._build_plan(round_band, stage_band)
+        return plan
+
+    def _build_plan(self, round_band, stage_band):
+        # 阈值都落在区间端点上，取区间下界作代表即可
+        rep_round = self._round_breaks[round_band - 1] if round_band > 0 else 0
+        rep_stage = self._stage_breaks[stage_band - 1] if stage_band > 0 else 0
+        long_blocked = rep_round < self._long_starter_earliest_round
+        long_ok = tuple(
+            event_cls for event_cls in self.pool if not (long_blocked and self.meta[event_cls].long_starter)
+        )
+        primary = []
+        for event_cls in long_ok:
+            meta = self._static.get(event_cls)
+            if meta is None:
+                primary.append((event_cls, True))
+                continue
+            if (
+                rep_round >= meta.min_round
+                and rep_stage >= meta.min_stage
+                and (meta.max_round is None or rep_round <= meta.max_round)
+            ):
+                primary.append((event_cls, False))
+        return tuple(primary), long_ok
+
+    def candidates(self, controller):
+        self.sync()
+        round_count = max(0, int(getattr(controller, "round_count", 0)))
+        primary, long_ok = self._plan_for(round_count, controller)
+        exhausted = self._exhausted
+        candidates = [
+            event_cls
+            for event_cls, dynamic in primary
+            if (not dynamic or event_cls.is_trigger_condition_met(controller)) and event_cls not in exhausted
+        ]
+        if not candidates:
+            candidates = [event_cls for event_cls in long_ok if event_cls not in exhausted]
+        if not candidates:
+            candidates = list(long_ok)
+        if not candidates:
+            candidates = list(self.pool)
+        return candidates
+
+    def rejection_reasons(self, controller, candidates):
+        """池中未进入 candidates 的事件各自被排除的原因（供事件遥测使用）。"""
+        included = set(candidates)
+        round_count = max(0, int(getattr(controller, "round_count", 0)))
+        long_blocked = round_count < self._long_starter_earliest_round
+        reasons = {}
+        for event_cls in self.pool:
+            if event_cls in included:
+                continue
+            if event_cls in self._exhausted:
+                reason = REJECT_EXHAUSTED
+            elif long_blocked and self.meta[event_cls].long_starter:
+                reason = REJECT_LONG_STARTER_GATE
+            else:
+                reason = REJECT_CONDITION
+            reasons[event_cls.__name__] = reason
+        return reasons
+
+    def trigger_probability(self, event_cls, controller):
+        """夹到 [0, 1] 的基础触发概率；未覆写 get_trigger_probability 的事件直接取编译好的常量。"""
+        meta = self.meta.get(event_cls)
+        if meta is None:
+            return _clamp_probability(event_cls.get_trigger_probability(controller))
+        return meta.trigger_probability(controller)
+
+    def weight_terms(self, event_cls):
+        terms = self._weight_terms.get(event_cls)
+        if terms is None:
+            terms = self._weight_terms_for(event_cls, int(self.counts.get(event_cls.__name__, 0)))
+        return terms
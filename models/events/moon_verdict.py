@@ -15,30 +15,29 @@ from models.story_gates import (
     PRE_FINAL_DISPATCH_ORDER,
     PRE_FINAL_GATE_STORY_CONFIG,
 )
-from models.events.base import Event, EventChoice
+from models.events.base import ChoiceSpec, Event, EventSpec
+from models.events.registry import story_event
 from models.events._pkg import rng, mk_random_item, mk_reward_item
 
 class MoonBountyEvent(Event):
     """长链1：月蚀通缉令"""
     TRIGGER_BASE_PROBABILITY = 0.07
+    MIN_TRIGGER_ROUND = 12
+    MIN_TRIGGER_STAGE = 1
 
-    @classmethod
-    def is_trigger_condition_met(cls, controller):
-        return cls.is_unlocked(controller, min_round=12, min_stage=1)
-
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "月蚀通缉令"
-        self.description = (
+    SPEC = EventSpec(
+        title="月蚀通缉令",
+        description=(
             "剧场走廊的墙上贴着一张会发光的通缉令，落款是安保回收系统："
             "'月蚀前带回命运乐谱大盗，生死不论；命运乐章必须追回。' "
             "但角落里有被反复涂抹的批注：'目标身份待复核'。"
-        )
-        self.choices = [
-            EventChoice("接单追猎，准备当场拿下「命运乐谱大盗」", self.accept_contract),
-            EventChoice("撕毁通缉令并暗中护送目标", self.protect_target),
-            EventChoice("两边伪造线索，等他们互咬后再收网", self.double_cross),
-        ]
+        ),
+        choices=(
+            ChoiceSpec("接单追猎，准备当场拿下「命运乐谱大盗」", "accept_contract"),
+            ChoiceSpec("撕毁通缉令并暗中护送目标", "protect_target"),
+            ChoiceSpec("两边伪造线索，等他们互咬后再收网", "double_cross"),
+        ),
+    )
 
     def accept_contract(self):
         self.register_story_choice(
@@ -189,6 +188,7 @@ class MoonBountyEvent(Event):
         ]
 
 
+@story_event("moon_verdict_event")
 class MoonVerdictEvent(Event):
     """月蚀链中继：决定宝物门与后续余波。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -197,27 +197,30 @@ class MoonVerdictEvent(Event):
     def is_trigger_condition_met(cls, controller):
         return False
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "月蚀审判"
-        self.description = (
+    SPEC = EventSpec(
+        title="月蚀审判",
+        description=(
             "你一路追着月蚀通缉链来到剧场安保的审判席。书记官推来三份结案文书——"
             "每一份都关乎命运剧本回收案的最终定论，要你签名。"
-        )
+        ),
+        choices=(
+            ChoiceSpec("按规矩结案", "file_clean"),
+            ChoiceSpec("销毁证物", "burn_records"),
+            ChoiceSpec("反向勒索审判庭", "extort_court"),
+        ),
+    )
+
+    def __init__(self, controller):
+        super().__init__(controller)
         diary_prelude = self._compose_diary_prelude()
         if diary_prelude:
             self.description = f"{self.description} {diary_prelude}"
-        self.choices = [
-            EventChoice("按规矩结案", self.file_clean),
-            EventChoice("销毁证物", self.burn_records),
-            EventChoice("反向勒索审判庭", self.extort_court),
-        ]
 
     def _compose_diary_prelude(self):
         story = getattr(self.controller, "story", None)
         if not story or "moon_bounty_diary_obtained" not in getattr(story, "story_tags", set()):
             return ""
-        source = getattr(story, "moon_bounty_diary_source", "")
+        source = story.moon.diary_source
         if source == "thief_body":
             return "你把战后搜出的旧日记本放在证物盘里：里面只记着一个父亲寻找走失女儿的日期与路线。"
         if source == "thief_testimony":
@@ -228,7 +231,7 @@ class MoonVerdictEvent(Event):
         story = getattr(self.controller, "story", None)
         if not story or "moon_bounty_diary_obtained" not in getattr(story, "story_tags", set()):
             return
-        source = getattr(story, "moon_bounty_diary_source", "")
+        source = story.moon.diary_source
         if source == "thief_body":
             self.add_message("你递上日记本。主审官快速翻阅后皱眉：'这只是一位父亲寻找女儿的私人记录。'")
         elif source == "thief_testimony":
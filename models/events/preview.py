@@ -0,0 +1,258 @@
+"""事件选项预演（dry-run）：在不改动对局的前提下查看某个选项会造成的效果。
+
+预演时先对控制器可达的游戏对象做一层「浅日志」（各对象的属性字典 + 其中内置容器的内容），
+照常执行选项处理方法，把金币 / 生命 / 攻击 / 物品 / 状态 / 剧情 flag / 后续影响 / 消息等差异记入 EffectLog，
+再按日志原地回滚；全局随机源的状态同样保存并恢复，预演不会消耗正式对局的随机数。
+相比整体 deepcopy 控制器，只复制容器外壳，对象本身保持原身份，剧情系统、场景等交叉引用无需重建。
+"""
+import random
+from dataclasses import dataclass, field
+from functools import lru_cache
+from enum import Enum
+from types import FunctionType, MethodType, ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+_ATOMIC_TYPES = (str, bytes, int, float, complex, bool, type(None), range, frozenset, tuple)
+_SKIP_TYPES = (type, ModuleType, FunctionType, MethodType, Enum)
+_CONTAINER_DEPTH = 4
+
+
+@dataclass
+class EffectLog:
+    """单个选项的预演结果：各项均为相对选项执行前的变化量。"""
+
+    event: str
+    choice_index: int
+    choice_text: str
+    result: Any = None
+    gold: int = 0
+    hp: int = 0
+    atk: int = 0
+    moral: int = 0
+    items_gained: List[str] = field(default_factory=list)
+    items_lost: List[str] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    statuses_removed: List[str] = field(default_factory=list)
+    flags_set: List[str] = field(default_factory=list)
+    flags_cleared: List[str] = field(default_factory=list)
+    tags_set: List[str] = field(default_factory=list)
+    consequences: List[str] = field(default_factory=list)
+    messages: List[str] = field(default_factory=list)
+    scene: Optional[str] = None
+    monster: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in vars(self).items()}
+
+
+class _SavedContainer:
+    __slots__ = ("obj", "contents")
+
+    def __init__(self, obj, contents):
+        self.obj = obj
+        self.contents = contents
+
+
+def _capture_value(value, depth=0):
+    if depth >= _CONTAINER_DEPTH:
+        return value
+    if isinstance(value, dict):
+        return _SavedContainer(value, [(k, _capture_value(v, depth + 1)) for k, v in value.items()])
+    if isinstance(value, list):
+        return _SavedContainer(value, [_capture_value(v, depth + 1) for v in value])
+    if isinstance(value, set):
+        return _SavedContainer(value, list(value))
+    return value
+
+
+def _restore_value(saved):
+    if not isinstance(saved, _SavedContainer):
+        return saved
+    obj = saved.obj
+    if isinstance(obj, dict):
+        items = [(k, _restore_value(v)) for k, v in saved.contents]
+        if len(obj) != len(items) or any(k not in obj or obj[k] is not v for k, v in items):
+            obj.clear()
+            obj.update(items)
+    elif isinstance(obj, list):
+        items = [_restore_value(v) for v in saved.contents]
+        if len(obj) != len(items) or any(a is not b for a, b in zip(obj, items)):
+            obj[:] = items
+    elif obj != set(saved.contents):
+        # StoryFlagSet 的 clear/update 会推进 flag_version；随后所属对象的属性回滚会把版本号一并复原
+        obj.clear()
+        obj.update(saved.contents)
+    return obj
+
+
+@lru_cache(maxsize=None)
+def _slot_names(cls):
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        names.extend((slots,) if isinstance(slots, str) else slots)
+    return tuple(name for name in names if name not in ("__dict__", "__weakref__"))
+
+
+def _is_game_object(value):
+    if isinstance(value, _ATOMIC_TYPES) or isinstance(value, _SKIP_TYPES):
+        return False
+    # __slots__ 对象（链状态记录、怪物等）与普通对象一样记录属性
+    return hasattr(value, "__dict__") or bool(_slot_names(type(value)))
+
+
+def _object_attrs(obj):
+    attrs = {name: getattr(obj, name) for name in _slot_names(type(obj)) if hasattr(obj, name)}
+    if hasattr(obj, "__dict__"):
+        attrs.update(vars(obj))
+    return attrs
+
+
+def _restore_object_attrs(obj, attrs):
+    slots = _slot_names(type(obj))
+    # 绕过对象自身的 __setattr__，避免回滚时再次推进所属对象的版本号
+    for name in slots:
+        if name in attrs:
+            object.__setattr__(obj, name, attrs[name])
+        elif hasattr(obj, name):
+            # 预演期间才写入的可选 slot（如门的 story_forced_event_key）回到未设置
+            object.__delattr__(obj, name)
+    if hasattr(obj, "__dict__"):
+        current = vars(obj)
+        current.clear()
+        current.update((name, value) for name, value in attrs.items() if name not in slots)
+
+
+def _iter_children(value, depth=0):
+    if depth >= _CONTAINER_DEPTH:
+        return
+    if isinstance(value, dict):
+        for child in value.values():
+            yield from _iter_children(child, depth + 1)
+    elif isinstance(value, (list, set, tuple)):
+        for child in value:
+            yield from _iter_children(child, depth + 1)
+    elif _is_game_object(value):
+        yield value
+
+
+class StateJournal:
+    """从若干根对象出发，记录可达游戏对象的属性与容器内容，rollback() 原地复原。"""
+
+    def __init__(self, *roots):
+        self._saved: List[Tuple[Any, Dict[str, Any]]] = []
+        seen = set()
+        stack = [root for root in roots if root is not None]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            attrs = _object_attrs(obj)
+            self._saved.append((obj, {name: _capture_value(value) for name, value in attrs.items()}))
+            for value in attrs.values():
+                stack.extend(child for child in _iter_children(value) if id(child) not in seen)
+        self._random_state = random.getstate()
+
+    def rollback(self):
+        # 先原地复原容器内容，再整体换回属性字典（版本号、缓存等标量随之复原）
+        restored = [(obj, {name: _restore_value(value) for name, value in attrs.items()}) for obj, attrs in self._saved]
+        for obj, attrs in restored:
+            _restore_object_attrs(obj, attrs)
+        random.setstate(self._random_state)
+
+
+def _inventory_items(player):
+    inventory = getattr(player, "inventory", None) or {}
+    return [item for items in inventory.values() for item in items]
+
+
+def _status_durations(player):
+    return {
+        getattr(status_enum, "name", str(status_enum)): getattr(status, "duration", 0)
+        for status_enum, status in (getattr(player, "statuses", None) or {}).items()
+    }
+
+
+def _scene_name(controller):
+    manager = getattr(controller, "scene_manager", None)
+    if manager is None or manager.current_scene is None:
+        return None
+    for name, scene in manager.scene_dict.items():
+        if scene is manager.current_scene:
+            return name
+    return type(manager.current_scene).__name__
+
+
+class _Before:
+    """选项执行前的可观测数值，用于与执行后对比。"""
+
+    def __init__(self, controller):
+        player = controller.player
+        story = getattr(controller, "story", None)
+        self.gold = int(getattr(player, "gold", 0))
+        self.hp = int(getattr(player, "hp", 0))
+        self.atk = int(getattr(player, "_atk", 0))
+        self.items = _inventory_items(player)
+        self.statuses = _status_durations(player)
+        self.flags = set(getattr(story, "choice_flags", ()))
+        self.tags = set(getattr(story, "story_tags", ()))
+        self.moral = int(getattr(story, "moral_score", 0))
+        self.pending = set(getattr(story, "pending_consequences", {}))
+        self.message_count = len(controller.messages)
+        self.scene = _scene_name(controller)
+        self.monster = getattr(controller, "current_monster", None)
+
+
+def _collect_effects(log, before, controller):
+    player = controller.player
+    story = getattr(controller, "story", None)
+    log.gold = int(getattr(player, "gold", 0)) - before.gold
+    log.hp = int(getattr(player, "hp", 0)) - before.hp
+    log.atk = int(getattr(player, "_atk", 0)) - before.atk
+    log.moral = int(getattr(story, "moral_score", 0)) - before.moral
+
+    after_items = _inventory_items(player)
+    before_ids = {id(item) for item in before.items}
+    after_ids = {id(item) for item in after_items}
+    log.items_gained = [item.name for item in after_items if id(item) not in before_ids]
+    log.items_lost = [item.name for item in before.items if id(item) not in after_ids]
+
+    after_statuses = _status_durations(player)
+    log.statuses = {
+        name: duration for name, duration in after_statuses.items() if before.statuses.get(name) != duration
+    }
+    log.statuses_removed = sorted(set(before.statuses) - set(after_statuses))
+
+    flags = set(getattr(story, "choice_flags", ()))
+    log.flags_set = sorted(flags - before.flags)
+    log.flags_cleared = sorted(before.flags - flags)
+    log.tags_set = sorted(set(getattr(story, "story_tags", ())) - before.tags)
+    log.consequences = sorted(set(getattr(story, "pending_consequences", {})) - before.pending)
+    log.messages = list(controller.messages[before.message_count:])
+
+    scene = _scene_name(controller)
+    log.scene = scene if scene != before.scene else None
+    monster = getattr(controller, "current_monster", None)
+    if monster is not None and monster is not before.monster:
+        log.monster = getattr(monster, "name", type(monster).__name__)
+
+
+def preview_choice(event, index, seed=None):
+    """预演 event 的第 index 个选项，返回 EffectLog；对局与全局随机源均保持不变。
+
+    seed 不为 None 时先以其重置随机源，便于同一选项的多次预演（或不同选项之间）使用同一条随机序列。
+    """
+    controller = event.controller
+    text = event.choices[index].text if 0 <= index < len(event.choices) else ""
+    log = EffectLog(event=type(event).__name__, choice_index=index, choice_text=text)
+    journal = StateJournal(controller, event)
+    try:
+        if seed is not None:
+            random.seed(seed)
+        before = _Before(controller)
+        log.result = event.resolve_choice(index)
+        _collect_effects(log, before, controller)
+    finally:
+        journal.rollback()
+    return log
@@ -29,54 +29,48 @@ from models.story_gates import (
     PRE_FINAL_GATE_STORY_CONFIG,
 )
 from models.events.base import Event, EventChoice
+from models.events.registry import story_event
 from models.events._pkg import rng, mk_random_item, mk_reward_item
-
-PUPPET_KIND_PERSONA_NAME = "绒心"
-PUPPET_DARK_PERSONA_NAME = "裂齿"
+from models.story_chains import (
+    PUPPET_DARK_PERSONA_NAME,
+    PUPPET_DEFAULT_EVIL_VALUE,
+    PUPPET_KIND_PERSONA_NAME,
+)
 
 
 def _get_puppet_chain_state(controller):
+    """木偶链状态记录（story.puppet，见 models.story_chains）；首次取用时开始追踪邪恶值。无剧情系统时返回 None。"""
     story = getattr(controller, "story", None)
     if story is None:
         return None
-    if not hasattr(story, "puppet_evil_value"):
-        story.puppet_evil_value = 55
-    if not hasattr(story, "puppet_kind_persona_name"):
-        story.puppet_kind_persona_name = PUPPET_KIND_PERSONA_NAME
-    if not hasattr(story, "puppet_dark_persona_name"):
-        story.puppet_dark_persona_name = PUPPET_DARK_PERSONA_NAME
-    if not hasattr(story, "puppet_side_registered"):
-        story.puppet_side_registered = False
-    return story
+    puppet = story.puppet
+    if puppet.evil_value is None:
+        puppet.evil_value = PUPPET_DEFAULT_EVIL_VALUE
+    return puppet
 
 
 def _adjust_puppet_evil_value(controller, delta):
-    story = _get_puppet_chain_state(controller)
+    story = getattr(controller, "story", None)
     if story is None:
-        return 55
-    current = int(getattr(story, "puppet_evil_value", 55))
-    next_val = max(0, min(100, current + int(delta)))
-    story.puppet_evil_value = next_val
+        return PUPPET_DEFAULT_EVIL_VALUE
+    next_val = story.puppet.adjust_evil(delta)
     story.story_tags.add(f"puppet_evil_bucket:{(next_val // 10) * 10}")
     return next_val
 
 
 def _get_puppet_persona_names(controller):
-    story = _get_puppet_chain_state(controller)
-    if story is None:
+    puppet = _get_puppet_chain_state(controller)
+    if puppet is None:
         return PUPPET_KIND_PERSONA_NAME, PUPPET_DARK_PERSONA_NAME
-    return (
-        getattr(story, "puppet_kind_persona_name", PUPPET_KIND_PERSONA_NAME),
-        getattr(story, "puppet_dark_persona_name", PUPPET_DARK_PERSONA_NAME),
-    )
+    return puppet.kind_persona_name, puppet.dark_persona_name
 
 
 def build_puppet_final_boss_payload(controller, phase2_burst_heal_ratio=None, **overrides):
     """构建木偶最终 Boss 的 effect payload，供正式流程与测试 gate 共用。
     phase2_burst_heal_ratio 若传入则覆盖默认 0.42；overrides 中键值会合并进 payload。"""
-    story = _get_puppet_chain_state(controller)
+    puppet = _get_puppet_chain_state(controller)
     kind_name, dark_name = _get_puppet_persona_names(controller)
-    evil_value = int(getattr(story, "puppet_evil_value", 55)) if story is not None else 55
+    evil_value = puppet.evil() if puppet is not None else PUPPET_DEFAULT_EVIL_VALUE
     payload = {
         "boss_name": f"{dark_name}·堕暗机偶",
         "base_hp": 980,
@@ -120,7 +114,7 @@ def build_puppet_final_boss_payload(controller, phase2_burst_heal_ratio=None, **
 
 
 def _schedule_puppet_mainline_event(controller, from_stage, next_event_key, hint, message):
-    story = _get_puppet_chain_state(controller)
+    story = getattr(controller, "story", None)
     if story is None:
         return
     current_round = max(0, int(getattr(controller, "round_count", 0)))
@@ -159,12 +153,12 @@ def _emit_puppet_audio_cue(controller, cue="event"):
 
 
 def _register_puppet_side_consequences(controller):
-    story = _get_puppet_chain_state(controller)
+    story = getattr(controller, "story", None)
     if story is None:
         return
-    if bool(getattr(story, "puppet_side_registered", False)):
+    if story.puppet.side_registered:
         return
-    story.puppet_side_registered = True
+    story.puppet.side_registered = True
 
     common_required = {"puppet_arc_active"}
     common_forbidden = {"consumed:puppet_mainline_final_boss_gate"}
@@ -283,10 +277,9 @@ class PuppetAbandonmentEvent(Event):
     def is_trigger_condition_met(cls, controller):
         story = getattr(controller, "story", None)
         if story is not None:
-            outcome = str(getattr(story, "puppet_final_outcome", "")).strip()
-            if outcome in ("defeated", "escaped"):
+            if str(story.puppet.final_outcome).strip() in ("defeated", "escaped"):
                 return False
-            tags = getattr(story, "story_tags", set())
+            tags = story.story_tags
             if "ending:puppet_final_defeated" in tags or "ending:puppet_final_escape_recorded" in tags:
                 return False
         return cls.is_unlocked(controller, min_round=10, min_stage=1)
@@ -312,7 +305,7 @@ class PuppetAbandonmentEvent(Event):
         ]
 
     def _start_arc(self, route, evil_delta, moral_delta, msg):
-        story = _get_puppet_chain_state(self.controller)
+        story = getattr(self.controller, "story", None)
         if story is not None:
             story.story_tags.add("puppet_arc_active")
             story.choice_flags.add(puppet_intro_flag(route))
@@ -368,6 +361,7 @@ class PuppetAbandonmentEvent(Event):
         )
 
 
+@story_event("puppet_signal_event")
 class PuppetSignalEvent(Event):
     """支线：失真信号室（需先发生小弟战）。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -427,6 +421,7 @@ class PuppetSignalEvent(Event):
         return "Event Completed"
 
 
+@story_event("puppet_kind_echo_event")
 class PuppetKindEchoEvent(Event):
     """支线：与善良人格互动。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -484,6 +479,7 @@ class PuppetKindEchoEvent(Event):
         return "Event Completed"
 
 
+@story_event("puppet_persona_rift_event")
 class PuppetPersonaRiftEvent(Event):
     """主线二：人格裂隙（由初始事件后 20~30 回合强推）。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -559,6 +555,7 @@ class PuppetPersonaRiftEvent(Event):
         )
 
 
+@story_event("puppet_core_descent_event")
 class PuppetCoreDescentEvent(Event):
     """主线三：核心下潜（由人格裂隙后 20~30 回合强推）。"""
     TRIGGER_BASE_PROBABILITY = 0.0
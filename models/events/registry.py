@@ -0,0 +1,70 @@
+"""剧情事件注册表：事件键（门上的 forced_event_key、待触发剧情事件等）-> 事件类。
+
+- 事件类在定义处用 @story_event(key) 登记自己的键；
+- STORY_EVENT_SOURCES 声明每个键由哪个模块定义，解析到尚未导入的键时按需导入该模块（导入即完成登记），
+  因此终局剧情模块（stage_curtain 等）不必在启动时加载；
+- 解析结果常驻模块级字典，查表 O(1)，不再每次调用构造映射。
+"""
+import importlib
+
+STORY_EVENT_SOURCES = {
+    "moon_verdict_event": "models.events.moon_verdict",
+    "cog_audit_event": "models.events.clockwork",
+    "echo_court_event": "models.events.dream_echo",
+    "puppet_signal_event": "models.events.puppet_chain",
+    "puppet_kind_echo_event": "models.events.puppet_chain",
+    "puppet_persona_rift_event": "models.events.puppet_chain",
+    "puppet_core_descent_event": "models.events.puppet_chain",
+    "elf_shadow_mark_event": "models.events.elf_chain",
+    "elf_rooftop_duel_event": "models.events.elf_chain",
+    "elf_fake_map_event": "models.events.elf_chain",
+    "elf_monster_stage_event": "models.events.elf_chain",
+    "elf_night_camp_event": "models.events.elf_chain",
+    "elf_trap_rescue_event": "models.events.elf_chain",
+    "elf_hunter_gate_event": "models.events.elf_chain",
+    "elf_final_heist_event": "models.events.elf_chain",
+    "elf_epilogue_event": "models.events.elf_chain",
+    "elf_side_monster_event": "models.events.elf_chain",
+    "elf_side_merchant_disguised_event": "models.events.elf_chain",
+    "elf_side_merchant_event": "models.events.elf_chain",
+    "dream_mirror_prelude_event": "models.events.stage_curtain",
+    "ending_stage_kind_puppet_dialogue_event": "models.events.stage_curtain",
+    "stage_curtain_kind_puppet_dialogue_mid_event": "models.events.stage_curtain",
+    "ending_stage_curtain_gate_event": "models.events.stage_curtain",
+    "ending_power_curtain_direct_event": "models.events.stage_curtain",
+    "ending_power_curtain_choice_event": "models.events.stage_curtain",
+    "ending_puppet_echo_aftermath_event": "models.events.stage_curtain",
+    "ending_final_first_gate_event": "models.events.stage_curtain",
+    "ending_final_second_gate_event": "models.events.stage_curtain",
+}
+
+_STORY_EVENT_CLASSES = {}
+
+
+def story_event(key):
+    """类装饰器：把事件类登记到键 key 下，并写入 STORY_EVENT_KEY。"""
+
+    def register(event_cls):
+        existing = _STORY_EVENT_CLASSES.get(key)
+        if existing is not None and (existing.__module__, existing.__qualname__) != (
+            event_cls.__module__,
+            event_cls.__qualname__,
+        ):
+            raise ValueError(f"剧情事件键 {key!r} 已由 {existing.__qualname__} 登记，不能再登记 {event_cls.__qualname__}")
+        event_cls.STORY_EVENT_KEY = key
+        _STORY_EVENT_CLASSES[key] = event_cls
+        return event_cls
+
+    return register
+
+
+def resolve_story_event_class(key):
+    """按键取事件类；未知键返回 None。"""
+    event_cls = _STORY_EVENT_CLASSES.get(key)
+    if event_cls is None:
+        module_name = STORY_EVENT_SOURCES.get(key)
+        if module_name is None:
+            return None
+        importlib.import_module(module_name)
+        event_cls = _STORY_EVENT_CLASSES.get(key)
+    return event_cls
@@ -37,23 +37,27 @@ from models.story_gates import (
     PRE_FINAL_DISPATCH_ORDER,
     PRE_FINAL_GATE_STORY_CONFIG,
 )
-from models.events.base import Event, EventChoice
+from models.events.base import ChoiceSpec, Event, EventSpec, ScaledValue
 from models.events._pkg import rng, mk_random_item, mk_reward_item
 
 # 1. Injured Stranger
 class StrangerEvent(Event):
     TRIGGER_BASE_PROBABILITY = 0.12
 
+    SPEC = EventSpec(
+        title="受伤的陌生人",
+        description="走廊中，你看到一个满身是血的陌生人倒在路边，看起来非常虚弱。",
+        choices=(
+            ChoiceSpec("救助他 (失去{help_cost}金币)", "help_stranger"),
+            ChoiceSpec("抢劫他", "rob_stranger"),
+            ChoiceSpec("无视离开", "ignore_stranger"),
+        ),
+    )
+
     def __init__(self, controller):
         super().__init__(controller)
         self.help_cost = rng().randint(10, 15)
-        self.title = "受伤的陌生人"
-        self.description = "走廊中，你看到一个满身是血的陌生人倒在路边，看起来非常虚弱。"
-        self.choices = [
-            EventChoice(f"救助他 (失去{self.help_cost}金币)", self.help_stranger),
-            EventChoice("抢劫他", self.rob_stranger),
-            EventChoice("无视离开", self.ignore_stranger)
-        ]
+        self.choices = self.build_choices(help_cost=self.help_cost)
 
     def help_stranger(self):
         p = self.get_player()
@@ -174,18 +178,21 @@ class SmugglerEvent(Event):
         rich_bonus = 0.03 if getattr(controller.player, "gold", 0) >= 60 else 0.0
         return min(0.26, cls.TRIGGER_BASE_PROBABILITY + round_bonus + rich_bonus)
 
+    SPEC = EventSpec(
+        title="走私犯",
+        description="走廊里，一个鬼鬼祟祟的人拦住你，兜售据说能绕过安保的和货物。",
+        choices=(
+            ChoiceSpec("购买 {item_name} ({cost}G)", "buy_item"),
+            ChoiceSpec("举报他", "report_smuggler"),
+            ChoiceSpec("离开", "leave"),
+        ),
+    )
+
     def __init__(self, controller):
         super().__init__(controller)
-        self.title = "走私犯"
-        self.description = "走廊里，一个鬼鬼祟祟的人拦住你，兜售据说能绕过安保的和货物。"
         self.item = mk_random_item()
         self.cost = max(10, int(self.item.cost * 0.7)) # 30% off usually
-        
-        self.choices = [
-            EventChoice(f"购买 {self.item.name} ({self.cost}G)", self.buy_item),
-            EventChoice("举报他", self.report_smuggler),
-            EventChoice("离开", self.leave)
-        ]
+        self.choices = self.build_choices(item_name=self.item.name, cost=self.cost)
 
     def buy_item(self):
         p = self.get_player()
@@ -328,15 +335,15 @@ class AncientShrineEvent(Event):
         hp_rate = p.hp / max(100, hp_cap)
         return min(0.25, cls.TRIGGER_BASE_PROBABILITY + (0.12 if hp_rate < 0.5 else 0.0))
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "古老祭坛"
-        self.description = "侧厅深处，一座刻满神秘符文的祭坛矗立着——据说是旧时代表演的仪式台。"
-        self.choices = [
-            EventChoice("虔诚祈祷 (恢复生命)", self.pray),
-            EventChoice("破坏祭坛", self.desecrate),
-            EventChoice("仔细调查", self.inspect)
-        ]
+    SPEC = EventSpec(
+        title="古老祭坛",
+        description="侧厅深处，一座刻满神秘符文的祭坛矗立着——据说是旧时代表演的仪式台。",
+        choices=(
+            ChoiceSpec("虔诚祈祷 (恢复生命)", "pray"),
+            ChoiceSpec("破坏祭坛", "desecrate"),
+            ChoiceSpec("仔细调查", "inspect"),
+        ),
+    )
 
     def pray(self):
         p = self.get_player()
@@ -444,17 +451,19 @@ class GamblerEvent(Event):
         gold = max(0, getattr(controller.player, "gold", 0))
         return min(0.22, cls.TRIGGER_BASE_PROBABILITY + min(0.14, gold / 1000))
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "走廊赌档"
-        self.description = "走廊间隙，一个流浪赌徒在走廊拦住你：'想不想玩把大的？赌注是金币。'"
-        high_bet = self.scale_value(50, positive=False, aggressive=True)
-        low_bet = self.scale_value(10, positive=False)
-        self.choices = [
-            EventChoice(f"玩把大的 (赌{high_bet}G)", self.high_stakes),
-            EventChoice(f"小玩一把 (赌{low_bet}G)", self.low_stakes),
-            EventChoice("拒绝", self.decline)
-        ]
+    SPEC = EventSpec(
+        title="走廊赌档",
+        description="走廊间隙，一个流浪赌徒在走廊拦住你：'想不想玩把大的？赌注是金币。'",
+        choices=(
+            ChoiceSpec("玩把大的 (赌{high_bet}G)", "high_stakes"),
+            ChoiceSpec("小玩一把 (赌{low_bet}G)", "low_stakes"),
+            ChoiceSpec("拒绝", "decline"),
+        ),
+        scaled={
+            "high_bet": ScaledValue(50, positive=False, aggressive=True),
+            "low_bet": ScaledValue(10, positive=False),
+        },
+    )
 
     def high_stakes(self):
         p = self.get_player()
@@ -569,16 +578,18 @@ class LostChildEvent(Event):
     TRIGGER_BASE_PROBABILITY = 0.11
     MIN_TRIGGER_ROUND = 4
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "迷路孩童"
-        self.description = "走廊深处，一个小女孩在哭泣，看起来在迷宫般的走廊中迷路了。"
-        donation = self.scale_value(20, positive=False)
-        self.choices = [
-            EventChoice("护送回家", self.guide_home),
-            EventChoice(f"给点金币路费 ({donation}G)", self.give_gold),
-            EventChoice("无视", self.ignore)
-        ]
+    SPEC = EventSpec(
+        title="迷路孩童",
+        description="走廊深处，一个小女孩在哭泣，看起来在迷宫般的走廊中迷路了。",
+        choices=(
+            ChoiceSpec("护送回家", "guide_home"),
+            ChoiceSpec("给点金币路费 ({donation}G)", "give_gold"),
+            ChoiceSpec("无视", "ignore"),
+        ),
+        scaled={
+            "donation": ScaledValue(20, positive=False),
+        },
+    )
 
     def guide_home(self):
         self.register_story_choice(
@@ -721,15 +732,15 @@ class LostChildEvent(Event):
 class CursedChestEvent(Event):
     TRIGGER_BASE_PROBABILITY = 0.09
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "诅咒宝箱"
-        self.description = "一个散发着诡异紫光的道具箱，上面刻着警告语：'贪婪者必受惩罚'——像是过去的时代的遗留物。"
-        self.choices = [
-            EventChoice("强行打开", self.open_chest),
-            EventChoice("试图净化", self.purify),
-            EventChoice("离开", self.leave)
-        ]
+    SPEC = EventSpec(
+        title="诅咒宝箱",
+        description="一个散发着诡异紫光的道具箱，上面刻着警告语：'贪婪者必受惩罚'——像是过去的时代的遗留物。",
+        choices=(
+            ChoiceSpec("强行打开", "open_chest"),
+            ChoiceSpec("试图净化", "purify"),
+            ChoiceSpec("离开", "leave"),
+        ),
+    )
 
     def open_chest(self):
         p = self.get_player()
@@ -816,16 +827,18 @@ class WiseSageEvent(Event):
         round_count = max(0, getattr(controller, "round_count", 0))
         return min(0.2, cls.TRIGGER_BASE_PROBABILITY + min(0.11, round_count * 0.005))
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "智者"
-        self.description = "一位白胡子老者在走廊拦住了去路：'年轻的旅人，为了什么而踏上这舞台？'"
-        heal_hint = self.scale_value(50, positive=True)
-        self.choices = [
-            EventChoice("为了力量 (加攻击)", self.power),
-            EventChoice("为了财富 (加金币)", self.wealth),
-            EventChoice(f"为了生存 (恢复{heal_hint}HP)", self.health)
-        ]
+    SPEC = EventSpec(
+        title="智者",
+        description="一位白胡子老者在走廊拦住了去路：'年轻的旅人，为了什么而踏上这舞台？'",
+        choices=(
+            ChoiceSpec("为了力量 (加攻击)", "power"),
+            ChoiceSpec("为了财富 (加金币)", "wealth"),
+            ChoiceSpec("为了生存 (恢复{heal_hint}HP)", "health"),
+        ),
+        scaled={
+            "heal_hint": ScaledValue(50, positive=True),
+        },
+    )
 
     def power(self):
         p = self.get_player()
@@ -937,15 +950,15 @@ class WiseSageEvent(Event):
 class RefugeeCaravanEvent(Event):
     TRIGGER_BASE_PROBABILITY = 0.08
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "逃难队伍"
-        self.description = "你发现了一支混乱的人马似乎不是这里的人，他们似乎是偷跑进来的难民，他们请求你不要声张，最好还能赞助点食物与路费，好让他们继续隐藏在这里。"
-        self.choices = [
-            EventChoice("捐助 25G", self.donate),
-            EventChoice("索要保护费", self.extort),
-            EventChoice("假装没看见", self.walk_away),
-        ]
+    SPEC = EventSpec(
+        title="逃难队伍",
+        description="你发现了一支混乱的人马似乎不是这里的人，他们似乎是偷跑进来的难民，他们请求你不要声张，最好还能赞助点食物与路费，好让他们继续隐藏在这里。",
+        choices=(
+            ChoiceSpec("捐助 25G", "donate"),
+            ChoiceSpec("索要保护费", "extort"),
+            ChoiceSpec("假装没看见", "walk_away"),
+        ),
+    )
 
     def donate(self):
         p = self.get_player()
@@ -1055,25 +1068,22 @@ class RefugeeCaravanEvent(Event):
 
 class FallenKnightEvent(Event):
     TRIGGER_BASE_PROBABILITY = 0.08
-
-    @classmethod
-    def is_trigger_condition_met(cls, controller):
-        return cls.is_unlocked(controller, min_round=6, min_stage=0)
+    MIN_TRIGGER_ROUND = 6
 
     @classmethod
     def get_trigger_probability(cls, controller):
         round_count = getattr(controller, "round_count", 0)
         return min(0.18, cls.TRIGGER_BASE_PROBABILITY + (0.05 if round_count >= 12 else 0.0))
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "落难骑士"
-        self.description = "一名重伤的骑士倒在走廊路边，他眼神空洞，六神无主，不知道接下来该如何行动。似乎已经放弃了希望。"
-        self.choices = [
-            EventChoice("帮助骑士", self.aid_knight),
-            EventChoice("搜刮装备", self.loot_knight),
-            EventChoice("谨慎离开", self.leave),
-        ]
+    SPEC = EventSpec(
+        title="落难骑士",
+        description="一名重伤的骑士倒在走廊路边，他眼神空洞，六神无主，不知道接下来该如何行动。似乎已经放弃了希望。",
+        choices=(
+            ChoiceSpec("帮助骑士", "aid_knight"),
+            ChoiceSpec("搜刮装备", "loot_knight"),
+            ChoiceSpec("谨慎离开", "leave"),
+        ),
+    )
 
     def aid_knight(self):
         round_count = max(0, int(getattr(self.controller, "round_count", 0)))
@@ -7,7 +7,9 @@ from models.story_gates import (
     PRE_FINAL_DISPATCH_ORDER,
     PRE_FINAL_GATE_STORY_CONFIG,
 )
+from models.story_gate_graph import STORY_GATE_GRAPH
 from models.events.base import Event, EventChoice
+from models.events.registry import story_event
 from models.events._pkg import rng
 from models.events.puppet_chain import _get_puppet_persona_names
 from models.narrative.stage_curtain_epilogue import build_stage_epilogue_lines as _build_stage_epilogue_lines
@@ -128,22 +130,7 @@ def _schedule_stage_curtain_gate_event(controller):
 
 def _should_schedule_kind_puppet_dialogue(controller):
     """是否在取回剧本后插入“与善良木偶对话”事件：已拿剧本、已击败木偶终战且邪恶值偏低。"""
-    story = getattr(controller, "story", None)
-    if story is None:
-        return False
-    tags = set(getattr(story, "story_tags", set()))
-    flags = set(getattr(story, "choice_flags", set()))
-    script_recovered = "curtain_call_script_recovered" in tags or "curtain_call_script_recovered" in flags
-    if not script_recovered:
-        return False
-    puppet_defeated = "ending:puppet_final_defeated" in tags or getattr(story, "puppet_final_outcome", "") == "defeated"
-    if not puppet_defeated:
-        return False
-    try:
-        evil = max(0, min(100, int(getattr(story, "puppet_evil_value", 55))))
-    except (TypeError, ValueError):
-        evil = 55
-    return evil <= 45
+    return _declared_gate_met(controller, "stage_curtain_kind_puppet_dialogue")
 
 
 def _schedule_kind_puppet_dialogue_event(controller):
@@ -164,6 +151,14 @@ def _schedule_kind_puppet_dialogue_event(controller):
 
 
 def _collect_stage_curtain_scores(story):
+    """谢幕评分载荷（只读）。StorySystem 按 flag_version 逐局缓存，任何 flag 或剧情属性变化后自动重算。"""
+    get_cached = getattr(story, "get_versioned_cache", None)
+    if callable(get_cached):
+        return get_cached("stage_curtain_scores", _compute_stage_curtain_scores)
+    return _compute_stage_curtain_scores(story)
+
+
+def _compute_stage_curtain_scores(story):
     flags = set(getattr(story, "choice_flags", set()))
     tags = set(getattr(story, "story_tags", set()))
     order = 0
@@ -198,7 +193,7 @@ def _collect_stage_curtain_scores(story):
     elif "ending_elf_rival_parted" in flags:
         elf_rival_outcome = "parted"
 
-    diary_source = str(getattr(story, "moon_bounty_diary_source", "")).strip()
+    diary_source = str(story.moon.diary_source).strip()
     if diary_source == "thief_testimony":
         freedom += 2
         notes.append("大盗证词与旧日记互相印证，冤案被翻出。")
@@ -283,14 +278,12 @@ def _collect_stage_curtain_scores(story):
         risk += 1
         notes.append("木偶暗侧参数被你长期放大，终幕更偏强控。")
 
-    key_obtained = bool(getattr(story, "elf_key_obtained", False)) or ("elf_key_obtained" in tags)
+    key_obtained = bool(story.elf.key_obtained) or ("elf_key_obtained" in tags)
     script_recovered = "curtain_call_script_recovered" in tags or "curtain_call_script_recovered" in flags
-    puppet_outcome = str(getattr(story, "puppet_final_outcome", "")).strip()
+    puppet = story.puppet
+    puppet_outcome = str(puppet.final_outcome).strip()
     puppet_final_defeated = "ending:puppet_final_defeated" in tags or puppet_outcome == "defeated"
-    try:
-        puppet_evil_value = max(0, min(100, int(getattr(story, "puppet_evil_value", 55))))
-    except (TypeError, ValueError):
-        puppet_evil_value = 55
+    puppet_evil_value = puppet.evil()
     puppet_chain_concluded = puppet_final_defeated
     puppet_low_evil = puppet_evil_value <= 45
     puppet_kind_rescued = puppet_chain_concluded and puppet_low_evil
@@ -474,7 +467,7 @@ def run_script_vault_recovery(controller):
     if story is None:
         return
     tags = set(getattr(story, "story_tags", set()))
-    diary_source = str(getattr(story, "moon_bounty_diary_source", "")).strip()
+    diary_source = str(story.moon.diary_source).strip()
     description = (
         "你推开了那扇刻着银羽暗号的宝物门。"
         "旧钥匙刚进入锁孔，整面墙就像布景般滑开。"
@@ -514,6 +507,7 @@ def run_script_vault_recovery(controller):
         _schedule_kind_puppet_dialogue_event(controller)
 
 
+@story_event("ending_stage_kind_puppet_dialogue_event")
 class EndingStageKindPuppetDialogueEvent(Event):
     """结局门：与善良木偶对话，三选一直接进入补全/即兴/选择困难症三种结局之一。补全与即兴选项有正面效果（加血/加攻），选择困难症无效果。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -622,6 +616,7 @@ class EndingStageKindPuppetDialogueEvent(Event):
         return "Event Completed"
 
 
+@story_event("stage_curtain_kind_puppet_dialogue_mid_event")
 class StageCurtainKindPuppetDialogueMidEvent(Event):
     """舞台谢幕链：秘藏取回剧本后与善良木偶对话，仅约定谢幕方式并挂载终幕门廊，不直接触发结局。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -750,6 +745,7 @@ def _get_prelude_choice_variants(story):
     )
 
 
+@story_event("dream_mirror_prelude_event")
 class DreamMirrorPreludeEvent(Event):
     """结局前事件：在一场梦境中看到自己在镜面剧场的一次次选择（排练录像），并做与终幕相关的默想。其中两种默想会带来正面效果（加血/加攻），第三种无效果。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -820,6 +816,7 @@ class DreamMirrorPreludeEvent(Event):
         return "Event Completed"
 
 
+@story_event("ending_stage_curtain_gate_event")
 class EndingStageCurtainGateEvent(Event):
     """舞台谢幕链终局门：补全/即兴/接管三选一；若已与善良木偶约定则直接执行约定。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -950,6 +947,7 @@ class EndingStageCurtainGateEvent(Event):
         )
 
 
+@story_event("ending_power_curtain_direct_event")
 class EndingPowerCurtainDirectEvent(Event):
     """接管谢幕直通结局：飞贼未完结或关系普通/恶劣、已击败黑暗木偶、邪恶值中高时，终局门直接导向接管谢幕。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -1009,6 +1007,7 @@ class EndingPowerCurtainDirectEvent(Event):
         return "Event Completed"
 
 
+@story_event("ending_power_curtain_choice_event")
 class EndingPowerCurtainChoiceEvent(Event):
     """结局门：已拿剧本、已击败木偶、邪恶值普通或较高时出现；与「与善良木偶对话」互斥（彼为邪恶值低）。三选一：前两项均为接管谢幕、剧情文本不同，第三项为选择困难症。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -1094,6 +1093,7 @@ class EndingPowerCurtainChoiceEvent(Event):
         return "Event Completed"
 
 
+@story_event("ending_puppet_echo_aftermath_event")
 class EndingPuppetEchoAftermathEvent(Event):
     """击败木偶的回声后出现的事件门：前两选为即兴谢幕（剧情文本不同），第三选为选择困难症候群结局。"""
     TRIGGER_BASE_PROBABILITY = 0.0
@@ -1172,37 +1172,19 @@ class EndingPuppetEchoAftermathEvent(Event):
         return "Event Completed"
 
 
-def _dream_well_chain_done(story):
-    """梦境井长链是否已完结：封井/卖梦直接完结；喝下则需回声法庭任一选项。"""
-    flags = set(getattr(story, "choice_flags", set()))
-    if "dream_well_sealed" in flags or "dream_well_sold" in flags:
-        return True
-    if "dream_well_drank" in flags and (
-        "echo_court_redeemed" in flags or "echo_court_taxed" in flags or "echo_court_trading" in flags
-    ):
-        return True
-    return False
-
-
-def _mirror_theater_chain_done(story):
-    """镜面剧场长链是否已完结：英雄/恶徒/撕本任一选项。"""
-    flags = set(getattr(story, "choice_flags", set()))
-    return (
-        "mirror_played_hero" in flags
-        or "mirror_played_villain" in flags
-        or "mirror_tore_script" in flags
-    )
-
-
-def _should_trigger_dream_mirror_prelude(controller):
-    """是否挂载梦境镜面回响门：两长链皆已完结且在倒数窗口内。"""
+def _declared_gate_met(controller, gate_key):
+    """按 models.story_gates.PRE_FINAL_GATE_CONDITIONS 中声明的门条件求值（与 StorySystem 共用同一份声明）。"""
     story = getattr(controller, "story", None)
     if story is None:
         return False
-    if not _dream_well_chain_done(story):
-        return False
-    if not _mirror_theater_chain_done(story):
+    return STORY_GATE_GRAPH.gates[gate_key].is_condition_met(story, controller)
+
+
+def _should_trigger_dream_mirror_prelude(controller):
+    """是否挂载梦境镜面回响门：梦境井与镜面剧场两长链皆已完结，且门尚未挂载/结算。"""
+    if not _declared_gate_met(controller, "dream_mirror_prelude_gate"):
         return False
+    story = controller.story
     cfg = _get_pre_final_gate_config("dream_mirror_prelude_gate")
     cid = str(cfg.get("consequence_id", "ending_dream_mirror_prelude_gate"))
     if cid in getattr(story, "pending_consequences", {}) or cid in getattr(story, "consumed_consequences", set()):
@@ -1224,13 +1206,7 @@ def _schedule_dream_mirror_prelude_gate(controller, *, min_round=None, max_round
 
 def _should_trigger_elf_rival_pre_final(controller):
     """终局前插入飞贼对决：精灵线收束且关系极差时触发。"""
-    story = getattr(controller, "story", None)
-    if story is None:
-        return False
-    if not bool(getattr(story, "elf_chain_ended", False)):
-        return False
-    rel = int(getattr(story, "elf_relation", 0))
-    return rel <= -4
+    return _declared_gate_met(controller, "elf_rival_final_gate")
 
 
 def _schedule_elf_rival_final_gate(controller, *, min_round=None, max_round=None):
@@ -1249,7 +1225,7 @@ def _schedule_elf_rival_final_gate(controller, *, min_round=None, max_round=None
     consequence_id = str(cfg.get("consequence_id", "ending_elf_rival_final_gate"))
     if consequence_id in story.pending_consequences or consequence_id in getattr(story, "consumed_consequences", set()):
         return False
-    rel = int(getattr(story, "elf_relation", 0))
+    rel = story.elf.relation
     style = "vengeful" if rel <= -5 else "trickster"
     profile_extensions = []
     if "ending_hook:elf_hostile" in story.story_tags:
@@ -1274,25 +1250,14 @@ def _schedule_elf_rival_final_gate(controller, *, min_round=None, max_round=None
 
 def _should_trigger_puppet_pre_final_gate(controller):
     """木偶终战曾逃跑时，在默认终局前插入一次黑暗木偶补战。"""
-    story = getattr(controller, "story", None)
-    if story is None:
-        return False
-    tags = set(getattr(story, "story_tags", set()))
-    if "ending:default_normal_completed" in tags or "ending:stage_curtain_completed" in tags:
-        return False
-    if "ending:puppet_rematch_gate_done" in tags:
-        return False
-    if "ending:puppet_final_defeated" in tags:
+    if not _declared_gate_met(controller, "puppet_rematch_gate"):
         return False
+    story = controller.story
     cfg = _get_pre_final_gate_config("puppet_rematch_gate")
     consequence_id = str(cfg.get("consequence_id", "ending_puppet_pre_final_rematch_gate"))
     if consequence_id in getattr(story, "pending_consequences", {}):
         return False
-    if consequence_id in getattr(story, "consumed_consequences", set()):
-        return False
-    outcome = str(getattr(story, "puppet_final_outcome", "")).strip()
-    escaped = outcome == "escaped" or "ending:puppet_final_escape_recorded" in tags
-    return escaped
+    return consequence_id not in getattr(story, "consumed_consequences", set())
 
 
 def _schedule_puppet_pre_final_gate(controller, *, min_round=None, max_round=None):
@@ -1304,7 +1269,7 @@ def _schedule_puppet_pre_final_gate(controller, *, min_round=None, max_round=Non
     tags = set(getattr(story, "story_tags", set()))
     escaped_before = (
         "ending:puppet_final_escape_recorded" in tags
-        or str(getattr(story, "puppet_final_outcome", "")).strip() == "escaped"
+        or str(story.puppet.final_outcome).strip() == "escaped"
     )
     if escaped_before:
         payload = {
@@ -1352,6 +1317,7 @@ def schedule_next_pre_final_gate(
     return None
 
 
+@story_event("ending_final_first_gate_event")
 class EndingFinalFirstGateEvent(Event):
     """普通结局主线：回合 200 强制进入的第一道终局门。"""
 
@@ -1400,6 +1366,7 @@ class EndingFinalFirstGateEvent(Event):
         )
 
 
+@story_event("ending_final_second_gate_event")
 class EndingFinalSecondGateEvent(Event):
     """普通结局主线：第二道终局门，汇合到默认 Boss。"""
 
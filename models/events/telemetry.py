@@ -0,0 +1,141 @@
+"""随机事件门抽取遥测：记录每次抽取的候选集、权重、被排除原因与最终选中的事件，按回合段聚合成直方图。
+
+挂在 controller.event_telemetry 上即生效（默认 None，不记录）。sample_rate < 1 时按比例抽样记录，
+抽样用独立的随机源，开启遥测不会改变对局本身的随机序列。
+被排除原因：
+- exhausted：单次事件已触发过
+- long_starter_gate：长线起始事件未到 LONG_EVENT_STARTER_EARLIEST_ROUND
+- condition：触发条件 / 回合窗口 / 阶段门槛未满足
+- recent：最近 RECENT_EVENT_WINDOW 次事件门内出现过
+"""
+from collections import deque
+import random
+
+REJECT_EXHAUSTED = "exhausted"
+REJECT_LONG_STARTER_GATE = "long_starter_gate"
+REJECT_CONDITION = "condition"
+REJECT_RECENT = "recent"
+
+
+def _new_class_stats():
+    return {"offered": 0, "chosen": 0, "weight_sum": 0.0, "share_sum": 0.0, "rejected": {}}
+
+
+class EventTelemetry:
+    """事件抽取遥测：bands[回合段][事件类名] 累计 offered / chosen / 权重 / 各排除原因次数。"""
+
+    RECENT_DRAW_LIMIT = 50
+
+    def __init__(self, band_size=20, sample_rate=1.0, seed=None):
+        self.band_size = max(1, int(band_size))
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self._sampler = random.Random(seed)
+        self.draws_seen = 0
+        self.draws_sampled = 0
+        self.bands = {}
+        self.recent_draws = deque(maxlen=self.RECENT_DRAW_LIMIT)
+
+    def should_sample(self):
+        """每次抽取调用一次；返回本次是否记录明细。"""
+        self.draws_seen += 1
+        if self.sample_rate >= 1.0:
+            return True
+        return self._sampler.random() < self.sample_rate
+
+    def band_label(self, round_count):
+        low = (max(0, int(round_count)) // self.band_size) * self.band_size
+        return f"{low}-{low + self.band_size - 1}"
+
+    def record_draw(self, round_count, candidates, weights, chosen, rejected):
+        """candidates 与 weights 一一对应；rejected 为 {事件类名: 原因}。"""
+        self.draws_sampled += 1
+        label = self.band_label(round_count)
+        band = self.bands.setdefault(label, {"draws": 0, "classes": {}})
+        band["draws"] += 1
+        classes = band["classes"]
+        total = sum(weights)
+        for event_cls, weight in zip(candidates, weights):
+            stats = classes.setdefault(event_cls.__name__, _new_class_stats())
+            stats["offered"] += 1
+            stats["weight_sum"] += weight
+            if total > 0:
+                stats["share_sum"] += weight / total
+        chosen_name = getattr(chosen, "__name__", None)
+        if chosen_name is not None:
+            classes.setdefault(chosen_name, _new_class_stats())["chosen"] += 1
+        for name, reason in rejected.items():
+            reasons = classes.setdefault(name, _new_class_stats())["rejected"]
+            reasons[reason] = reasons.get(reason, 0) + 1
+        self.recent_draws.append(
+            {
+                "round": int(round_count),
+                "candidates": [c.__name__ for c in candidates],
+                "weights": [round(w, 4) for w in weights],
+                "chosen": chosen_name,
+                "rejected": dict(rejected),
+            }
+        )
+
+    def merge(self, other):
+        """合并另一份遥测（如多局模拟各自记录后汇总）；两者回合段宽度需一致。"""
+        if other.band_size != self.band_size:
+            raise ValueError("回合段宽度不一致，无法合并事件遥测")
+        self.draws_seen += other.draws_seen
+        self.draws_sampled += other.draws_sampled
+        for label, other_band in other.bands.items():
+            band = self.bands.setdefault(label, {"draws": 0, "classes": {}})
+            band["draws"] += other_band["draws"]
+            for name, other_stats in other_band["classes"].items():
+                stats = band["classes"].setdefault(name, _new_class_stats())
+                for key in ("offered", "chosen", "weight_sum", "share_sum"):
+                    stats[key] += other_stats[key]
+                for reason, count in other_stats["rejected"].items():
+                    stats["rejected"][reason] = stats["rejected"].get(reason, 0) + count
+        self.recent_draws.extend(other.recent_draws)
+        return self
+
+    def reset(self):
+        self.draws_seen = 0
+        self.draws_sampled = 0
+        self.bands.clear()
+        self.recent_draws.clear()
+
+    def export(self):
+        """导出为可 JSON 序列化的 dict；权重与占比给出的是被提供为候选时的平均值。"""
+        bands = {}
+        for label in sorted(self.bands, key=lambda text: int(text.split("-", 1)[0])):
+            band = self.bands[label]
+            classes = {}
+            for name in sorted(band["classes"]):
+                stats = band["classes"][name]
+                offered = stats["offered"]
+                classes[name] = {
+                    "offered": offered,
+                    "chosen": stats["chosen"],
+                    "mean_weight": round(stats["weight_sum"] / offered, 4) if offered else 0.0,
+                    "mean_share": round(stats["share_sum"] / offered, 4) if offered else 0.0,
+                    "rejected": dict(sorted(stats["rejected"].items())),
+                }
+            bands[label] = {"draws": band["draws"], "classes": classes}
+        return {
+            "band_size": self.band_size,
+            "sample_rate": self.sample_rate,
+            "draws_seen": self.draws_seen,
+            "draws_sampled": self.draws_sampled,
+            "bands": bands,
+            "recent_draws": list(self.recent_draws),
+        }
+
+    def format(self):
+        """文本版直方图，便于在终端查看。"""
+        data = self.export()
+        lines = [f"事件抽取遥测：共 {data['draws_seen']} 次抽取，记录 {data['draws_sampled']} 次（抽样率 {data['sample_rate']:.2f}）"]
+        for label, band in data["bands"].items():
+            lines.append(f"[回合 {label}] {band['draws']} 次")
+            for name, stats in sorted(band["classes"].items(), key=lambda kv: -kv[1]["chosen"]):
+                rejected = "，".join(f"{reason}×{count}" for reason, count in stats["rejected"].items()) or "-"
+                lines.append(
+                    f"  {name:<28} 选中 {stats['chosen']:>4}  候选 {stats['offered']:>4}  "
+                    f"平均权重 {stats['mean_weight']:.3f}  平均占比 {stats['mean_share']:.1%}  排除 {rejected}"
+                )
+        return "\n".join(lines)
@@ -15,31 +15,29 @@ from models.story_gates import (
     PRE_FINAL_DISPATCH_ORDER,
     PRE_FINAL_GATE_STORY_CONFIG,
 )
-from models.events.base import Event, EventChoice
+from models.events.base import ChoiceSpec, Event, EventSpec
 from models.events._pkg import rng, mk_random_item, mk_reward_item
 
 class TimePawnshopEvent(Event):
     """新事件：时间当铺"""
     TRIGGER_BASE_PROBABILITY = 0.07
-
-    @classmethod
-    def is_trigger_condition_met(cls, controller):
-        return cls.is_unlocked(controller, min_round=8, min_stage=1)
+    MIN_TRIGGER_ROUND = 8
+    MIN_TRIGGER_STAGE = 1
 
     @classmethod
     def get_trigger_probability(cls, controller):
         round_count = max(0, getattr(controller, "round_count", 0))
         return min(0.16, cls.TRIGGER_BASE_PROBABILITY + min(0.09, round_count * 0.004))
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "时光当铺"
-        self.description = "后台的巷口出现一家只在黄昏开门的当铺，掌柜说：'我们这可以抵押明天，赎回昨天——这里没有白拿的东西。'"
-        self.choices = [
-            EventChoice("抵押明天，立刻拿钱", self.pawn_tomorrow),
-            EventChoice("赎回旧债，清掉利息", self.redeem_debt),
-            EventChoice("砸碎柜台，抢走材料", self.break_hourglass),
-        ]
+    SPEC = EventSpec(
+        title="时光当铺",
+        description="后台的巷口出现一家只在黄昏开门的当铺，掌柜说：'我们这可以抵押明天，赎回昨天——这里没有白拿的东西。'",
+        choices=(
+            ChoiceSpec("抵押明天，立刻拿钱", "pawn_tomorrow"),
+            ChoiceSpec("赎回旧债，清掉利息", "redeem_debt"),
+            ChoiceSpec("砸碎柜台，抢走材料", "break_hourglass"),
+        ),
+    )
 
     def pawn_tomorrow(self):
         p = self.get_player()
@@ -179,25 +177,23 @@ class TimePawnshopEvent(Event):
 class MirrorTheaterEvent(Event):
     """新事件：镜剧场"""
     TRIGGER_BASE_PROBABILITY = 0.07
-
-    @classmethod
-    def is_trigger_condition_met(cls, controller):
-        return cls.is_unlocked(controller, min_round=10, min_stage=1)
+    MIN_TRIGGER_ROUND = 10
+    MIN_TRIGGER_STAGE = 1
 
     @classmethod
     def get_trigger_probability(cls, controller):
         moral = abs(getattr(getattr(controller, "story", None), "moral_score", 0))
         return min(0.17, cls.TRIGGER_BASE_PROBABILITY + min(0.1, moral / 600))
 
-    def __init__(self, controller):
-        super().__init__(controller)
-        self.title = "镜面剧场"
-        self.description = "四周都是镜子的假面剧场的预演厅在走廊尽头亮起。传闻镜面剧场会把过路人的抉择写进下一段命运：演得像谁，世界就按谁来回应你。导演不问姓名，只催你立刻选一张面具——英雄、恶徒，或直接撕本离场。"
-        self.choices = [
-            EventChoice("戴上英雄面具", self.play_hero),
-            EventChoice("戴上恶徒面具", self.play_villain),
-            EventChoice("撕掉剧本离场", self.tear_script),
-        ]
+    SPEC = EventSpec(
+        title="镜面剧场",
+        description="四周都是镜子的假面剧场的预演厅在走廊尽头亮起。传闻镜面剧场会把过路人的抉择写进下一段命运：演得像谁，世界就按谁来回应你。导演不问姓名，只催你立刻选一张面具——英雄、恶徒，或直接撕本离场。",
+        choices=(
+            ChoiceSpec("戴上英雄面具", "play_hero"),
+            ChoiceSpec("戴上恶徒面具", "play_villain"),
+            ChoiceSpec("撕掉剧本离场", "tear_script"),
+        ),
+    )
 
     def play_hero(self):
         p = self.get_player()
@@ -2,8 +2,10 @@
 
 import random
 from enum import Enum
+from functools import lru_cache
 from models.game_config import GameConfig
 from models.status import Status, StatusName
+from models.weighted_sampling import AliasTable
 from typing import Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -21,6 +23,9 @@ class ItemType(Enum):
 class Item:
     """物品基类：名称、类型、价格及 effect/acquire 接口。"""
 
+    # shop_category 仅商店上架的物品才有（Shop 按类别铺货时写入），未写入时读取按属性不存在处理
+    __slots__ = ("name", "item_type", "cost", "shop_category")
+
     def __init__(self, name: str, **kwargs):
         self.name = name
         self.item_type = kwargs.get('item_type')
@@ -43,6 +48,8 @@ class Item:
         raise NotImplementedError("子类必须实现acquire方法")
 
 class ConsumableItem(Item):
+    __slots__ = ()
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, item_type=ItemType.CONSUMABLE, cost=kwargs.get('cost', 0))
         
@@ -52,6 +59,8 @@ class ConsumableItem(Item):
         return False
 
 class BattleItem(Item):
+    __slots__ = ()
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, item_type=ItemType.BATTLE, cost=kwargs.get('cost', 0))
         
@@ -66,6 +75,8 @@ class BattleItem(Item):
         return True
 
 class PassiveItem(Item):
+    __slots__ = ("duration",)
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, item_type=ItemType.PASSIVE, cost=kwargs.get('cost', 0))
         self.duration = kwargs.get('duration', 0)
@@ -82,6 +93,8 @@ class PassiveItem(Item):
 
 # 治疗药水类
 class HealingPotion(ConsumableItem):
+    __slots__ = ("heal_amount",)
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.heal_amount = kwargs.get('heal_amount', 0)
@@ -137,6 +150,8 @@ class HealingPotion(ConsumableItem):
 
 # 装备类
 class Equipment(ConsumableItem):
+    __slots__ = ("atk_bonus",)
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.atk_bonus = kwargs.get('atk_bonus', 0)
@@ -148,6 +163,8 @@ class Equipment(ConsumableItem):
 
 # 减伤卷轴类
 class DamageReductionScroll(ConsumableItem):
+    __slots__ = ("duration",)
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.duration = kwargs.get('duration', random.randint(10, 15))
@@ -162,6 +179,8 @@ class DamageReductionScroll(ConsumableItem):
 
 # 攻击力增益卷轴类
 class AttackUpScroll(ConsumableItem):
+    __slots__ = ("atk_bonus", "duration")
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.atk_bonus = kwargs.get('atk_bonus', 0)
@@ -174,6 +193,8 @@ class AttackUpScroll(ConsumableItem):
 
 # 复活卷轴类
 class ReviveScroll(PassiveItem):
+    __slots__ = ()
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.duration = kwargs.get('duration', 0)
@@ -186,6 +207,8 @@ class ReviveScroll(PassiveItem):
 
 # 恢复卷轴类
 class HealingScroll(ConsumableItem):
+    __slots__ = ("duration",)
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.duration = kwargs.get('duration', random.randint(10, 15))
@@ -197,6 +220,8 @@ class HealingScroll(ConsumableItem):
 
 # 免疫卷轴类
 class ImmuneScroll(ConsumableItem):
+    __slots__ = ("duration",)
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.duration = kwargs.get('duration', 0)
@@ -208,12 +233,16 @@ class ImmuneScroll(ConsumableItem):
 
 # 战斗物品类
 class BattleItemBase(BattleItem):
+    __slots__ = ("duration",)
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.duration = kwargs.get('duration', 0)
 
 # 飞锤类
 class FlyingHammer(BattleItemBase):
+    __slots__ = ()
+
     def effect(self, **kwargs):
         player = kwargs.get('player')
         monster = kwargs.get('monster')
@@ -224,6 +253,8 @@ class FlyingHammer(BattleItemBase):
 
 # 结界类
 class Barrier(BattleItemBase):
+    __slots__ = ()
+
     def effect(self, **kwargs):
         player = kwargs.get('player')
         target = kwargs.get('target', player)  # 默认对自己生效
@@ -233,6 +264,8 @@ class Barrier(BattleItemBase):
 
 # 巨大卷轴类
 class GiantScroll(BattleItemBase):
+    __slots__ = ()
+
     def effect(self, **kwargs):
         player = kwargs.get('player')
         target = kwargs.get('target', player)  # 默认对自己生效
@@ -244,6 +277,8 @@ class GiantScroll(BattleItemBase):
 class DepositedBackpack(BattleItemBase):
     """时光当铺后续奖励：寄存的背包。"""
 
+    __slots__ = ("stored_gold", "stored_items")
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.stored_gold = max(0, int(kwargs.get('stored_gold', 0)))
@@ -267,6 +302,8 @@ class DepositedBackpack(BattleItemBase):
 
 # 金币袋子类
 class GoldBag(ConsumableItem):
+    __slots__ = ("gold_amount",)
+
     def __init__(self, name: str, **kwargs):
         super().__init__(name, cost=kwargs.get('cost', 0))
         self.gold_amount = kwargs.get('gold_amount', 0)
@@ -348,14 +385,15 @@ def _choose_equipment_name_pool(atk_bonus: int):
     return pools[closest_key]
 
 
-def _create_tiered_treasure_item(treasure_tier: int):
+def _create_tiered_treasure_item(treasure_tier: int, rng=None):
     """按宝物 tier 生成与怪物强度相关的宝物。"""
+    rng = rng or random
     tier = _normalize_treasure_tier(treasure_tier) or GameConfig.MONSTER_MIN_TIER
-    category = random.choices(["potion", "equip", "scroll"], weights=[40, 30, 30], k=1)[0]
+    category = rng.choices(["potion", "equip", "scroll"], weights=[40, 30, 30], k=1)[0]
 
     if category == "potion":
         potion_tier = min(3, max(1, tier))
-        potion_choice = random.choices(
+        potion_choice = rng.choices(
             ["小治疗药水", "中治疗药水", "大治疗药水"],
             weights=[0.5, 0.35, 0.15] if potion_tier == 1 else
                     [0.2, 0.5, 0.3] if potion_tier == 2 else
@@ -364,20 +402,20 @@ def _create_tiered_treasure_item(treasure_tier: int):
         )[0]
         heal_base = {"小治疗药水": (5, 12), "中治疗药水": (10, 22), "大治疗药水": (20, 40)}
         lo, hi = heal_base[potion_choice]
-        heal_amount = random.randint(lo + tier, hi + tier * 2)
+        heal_amount = rng.randint(lo + tier, hi + tier * 2)
         return HealingPotion(potion_choice, heal_amount=heal_amount, cost=0)
 
     if category == "equip":
         equip_boost = 2 * tier
         name_pool = _choose_equipment_name_pool(equip_boost)
         return Equipment(
-            random.choice(list(name_pool)),
+            rng.choice(list(name_pool)),
             atk_bonus=equip_boost,
             cost=equip_boost * 2,
         )
 
-    scroll_value = random.randint(tier + 5, tier * 3 + 10)
-    scroll_type = random.choice(["healing", "damage_reduction", "attack_up"])
+    scroll_value = rng.randint(tier + 5, tier * 3 + 10)
+    scroll_type = rng.choice(["healing", "damage_reduction", "attack_up"])
     if scroll_type == "healing":
         return HealingScroll("恢复卷轴", cost=scroll_value * 2, duration=scroll_value)
     if scroll_type == "damage_reduction":
@@ -385,15 +423,10 @@ def _create_tiered_treasure_item(treasure_tier: int):
     return AttackUpScroll("攻击力增益卷轴", atk_bonus=scroll_value, cost=scroll_value * 2, duration=scroll_value)
 
 
-def create_random_item(treasure_tier: Optional[int] = None):
-    """创建随机物品（支持按宝物 tier 生成关联强度掉落）。"""
-    normalized_tier = _normalize_treasure_tier(treasure_tier)
-    if normalized_tier is not None:
-        return _create_tiered_treasure_item(normalized_tier)
-
-    # 兼容旧逻辑：未指定宝物 tier 时沿用原随机池。
+@lru_cache(maxsize=None)
+def _untiered_item_table():
+    """未指定宝物 tier 时的固定掉落池 (Class, Params, Weight)；小钱袋金额在抽中时再掷。"""
     item_types = [
-        # (Class, Params, Weight)
         (HealingPotion, {"name": "小治疗药水", "heal_amount": 10, "cost": 4}, 20),
         (HealingPotion, {"name": "中治疗药水", "heal_amount": 20, "cost": 8}, 15),
         (HealingPotion, {"name": "大治疗药水", "heal_amount": 30, "cost": 12}, 10),
@@ -407,21 +440,30 @@ def create_random_item(treasure_tier: Optional[int] = None):
         (FlyingHammer, {"name": "飞锤", "cost": 25}, 5),
         (Barrier, {"name": "结界", "duration": 3, "cost": 30}, 5),
         (GiantScroll, {"name": "巨大卷轴", "duration": 3, "cost": 40}, 5),
-        (GoldBag, {"name": "小钱袋", "gold_amount": random.randint(10, 50), "cost": 0}, 10)
+        (GoldBag, {"name": "小钱袋", "cost": 0}, 10),
     ]
-    
-    # 根据权重随机选择
-    total_weight = sum(item[2] for item in item_types)
-    r = random.uniform(0, total_weight)
-    upto = 0
-    for item_class, params, weight in item_types:
-        if upto + weight >= r:
-            params = dict(params or {})
-            name_pool = params.pop("name_pool", None)
-            if item_class is Equipment and name_pool and "name" not in params:
-                params["name"] = random.choice(list(name_pool))
-            return item_class(**params)
-        upto += weight
-    
-    # Fallback
-    return item_types[0][0](**item_types[0][1])
+    return AliasTable(
+        [(item_class, params) for item_class, params, _ in item_types],
+        [weight for _, _, weight in item_types],
+    )
+
+
+def create_random_item(treasure_tier: Optional[int] = None, rng=None):
+    """创建随机物品（支持按宝物 tier 生成关联强度掉落）。
+
+    rng 为随机源（random.Random 实例），省略时使用全局随机源。
+    """
+    rng = rng or random
+    normalized_tier = _normalize_treasure_tier(treasure_tier)
+    if normalized_tier is not None:
+        return _create_tiered_treasure_item(normalized_tier, rng=rng)
+
+    # 兼容旧逻辑：未指定宝物 tier 时沿用原随机池（别名表按权重 O(1) 抽取）。
+    item_class, params = _untiered_item_table().sample(rng)
+    params = dict(params)
+    if item_class is GoldBag:
+        params["gold_amount"] = rng.randint(10, 50)
+    name_pool = params.pop("name_pool", None)
+    if item_class is Equipment and name_pool and "name" not in params:
+        params["name"] = rng.choice(list(name_pool))
+    return item_class(**params)
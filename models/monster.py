@@ -1,12 +1,19 @@
-"""怪物定义：类型与 tier、生成、战力估算与战斗相关逻辑。"""
+"""怪物定义：类型与 tier、生成、战力估算与战斗相关逻辑。
 
+物种的静态数据（名称、基础属性、贴图分组、提示与台词池）在 import 时编译成不可变的 MonsterPrototype，
+Monster 实例用 __slots__ 只保存可变的战斗状态与原型引用；剧情临时挂载的 story_* 等属性落在按需创建的 __dict__ 中。
+"""
+
+from dataclasses import dataclass
 from models.items import create_random_item, GoldBag
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 from models.game_config import GameConfig
-from models.status import Status, StatusName
+from models.status import Status, StatusDict, StatusName
+from models.weighted_sampling import AliasTable
 if TYPE_CHECKING:
     from models.player import Player
 
+from functools import lru_cache
 import random
 
 
@@ -51,8 +58,60 @@ def estimate_player_power(player=None, current_round=0):
     # 主要依据回合推进；玩家属性仅提供轻微修正
     return float(base_atk * 0.15 + hp * 0.08 + min(gold, 400) * 0.02 + round_score)
 
+def _infer_sprite_key(name: str) -> str:
+    """根据名称推断怪物贴图分组。"""
+    name = name or ""
+    if "银羽飞贼·莱希娅" in name:
+        return "monster_elf_rival"
+    if any(k in name for k in ["龙", "蛇", "凤凰", "雷鸟"]):
+        return "monster_dragon"
+    if any(k in name for k in ["鬼", "幽灵", "冥界", "死亡骑士", "吸血鬼"]):
+        return "monster_undead"
+    if any(k in name for k in ["土匪", "刺客", "骑士", "法师", "蜥蜴人", "半人马"]):
+        return "monster_humanoid"
+    if any(k in name for k in ["狼", "犬", "蜘蛛", "蝎子", "鸟妖", "克拉肯", "利维坦"]):
+        return "monster_beast"
+    if any(k in name for k in ["树人", "天使", "神官", "守护者", "泰坦"]):
+        return "monster_mythic"
+    if any(k in name for k in ["史莱姆", "食人花", "地穴"]):
+        return "monster_spirit"
+    return "monster_default"
+
+
+@dataclass(frozen=True, slots=True)
+class MonsterPrototype:
+    """物种原型（享元）：同名怪物共用。base_hp / base_atk 仅对 MONSTER_TYPES 内的物种有意义。
+
+    fixed_type_hint 非 None 时直接使用（测试怪物），否则从 type_hints 中随机抽取。
+    """
+
+    name: str
+    sprite_key: str
+    type_hints: Tuple[str, ...]
+    entrance_quotes: Tuple[str, ...] = ()
+    death_quotes: Tuple[str, ...] = ()
+    base_hp: Optional[int] = None
+    base_atk: Optional[int] = None
+    fixed_type_hint: Optional[str] = None
+
+
 class Monster:
-    """怪物实体：名称、血量、攻击、tier、掉落与战斗行为。"""
+    """怪物实体：名称、血量、攻击、tier、掉落与战斗行为。掉落在首次读取 loot 时才生成。"""
+
+    __slots__ = (
+        "name",
+        "hp",
+        "atk",
+        "tier",
+        "statuses",
+        "_loot",
+        "_loot_seed",
+        "effect_probability",
+        "tier_hint",
+        "type_hint",
+        "prototype",
+        "__dict__",
+    )
     MONSTER_TYPES = {
         1: [  # 初级怪物
             ("小哥布林", 15, 3),      # 弱小但数量多的生物
@@ -264,72 +323,71 @@ class Monster:
     }
 
     def __init__(self, name=None, hp=None, atk=None, tier=1, effect_probability=None):
+        # 随机数的消耗顺序：物种 -> 掉落种子 -> 等级提示 -> 类型提示
         if name is None or hp is None or atk is None:
             # 随机选择对应等级的怪物类型
-            monster_type = random.choice(self.MONSTER_TYPES[tier])
-            self.name = monster_type[0]
-            self.hp = monster_type[1]
-            self.atk = monster_type[2]
+            prototype = random.choice(MONSTER_PROTOTYPES_BY_TIER[tier])
+            self.name = prototype.name
+            self.hp = prototype.base_hp
+            self.atk = prototype.base_atk
         else:
+            prototype = monster_prototype(name)
             self.name = name
             self.hp = hp
             self.atk = atk
+        self.prototype = prototype
         self.tier = tier
-        self.sprite_key = self._infer_sprite_key()
-        self.statuses = {}  # 使用状态系统来管理怪物的状态效果
-        self.loot = self._generate_loot()  # 生成掉落物品
-        
-        # 设置效果概率
-        self.effect_probability = effect_probability
-        if self.effect_probability is None:
-            # 根据怪物等级设置默认概率
-            self.effect_probability = 0.1  # 基础概率10%
-            if self.tier >= 2:
-                self.effect_probability += 0.1  # Tier 2怪物增加10%概率
-            if self.tier >= 3:
-                self.effect_probability += 0.1  # Tier 3怪物再增加10%概率
-            if self.tier >= 4:
-                self.effect_probability += 0.1  # Tier 4怪物再增加10%概率
-        
+        self.statuses = StatusDict()  # 使用状态系统来管理怪物的状态效果
+        # 掉落在首次读取时才生成：构造时只从全局随机源取一个种子，生成时用它单独播种
+        self._loot = None
+        self._loot_seed = random.getrandbits(64)
+
+        # 未指定时按等级取默认效果概率
+        self.effect_probability = (
+            _default_effect_probability(tier) if effect_probability is None else effect_probability
+        )
+
         # 生成怪物提示
-        self.tier_hint = random.choice(self.MONSTER_TIER_HINTS[self.tier])  # 等级提示
-        # 如果是测试怪物，使用默认提示
-        if self.name.startswith("测试怪物"):
-            self.type_hint = "未知声响"
-        else:
-            hints = self.MONSTER_TYPE_HINTS.get(self.name, ["未知声响"])
-            self.type_hint = random.choice(hints) if isinstance(hints, list) else "未知声响"
-
-    def _infer_sprite_key(self) -> str:
-        """根据名称推断怪物贴图分组。"""
-        name = self.name or ""
-        if "银羽飞贼·莱希娅" in name:
-            return "monster_elf_rival"
-        if any(k in name for k in ["龙", "蛇", "凤凰", "雷鸟"]):
-            return "monster_dragon"
-        if any(k in name for k in ["鬼", "幽灵", "冥界", "死亡骑士", "吸血鬼"]):
-            return "monster_undead"
-        if any(k in name for k in ["土匪", "刺客", "骑士", "法师", "蜥蜴人", "半人马"]):
-            return "monster_humanoid"
-        if any(k in name for k in ["狼", "犬", "蜘蛛", "蝎子", "鸟妖", "克拉肯", "利维坦"]):
-            return "monster_beast"
-        if any(k in name for k in ["树人", "天使", "神官", "守护者", "泰坦"]):
-            return "monster_mythic"
-        if any(k in name for k in ["史莱姆", "食人花", "地穴"]):
-            return "monster_spirit"
-        return "monster_default"
-
-    def _generate_loot(self):
+        self.tier_hint = random.choice(_TIER_HINT_POOLS[tier])  # 等级提示
+        fixed_hint = prototype.fixed_type_hint
+        self.type_hint = fixed_hint if fixed_hint is not None else random.choice(prototype.type_hints)
+
+    @property
+    def sprite_key(self) -> str:
+        """贴图分组：取构造时的物种原型（改名不影响贴图）。"""
+        return self.prototype.sprite_key
+
+    @property
+    def loot(self):
+        """掉落物品列表：首次访问时按构造时的种子生成，之后固定不变。"""
+        loot = self._loot
+        if loot is None:
+            loot = self._loot = self._generate_seeded_loot()
+        return loot
+
+    @loot.setter
+    def loot(self, value):
+        self._loot = value
+
+    def _generate_seeded_loot(self):
+        """用掉落种子播种的私有随机源生成掉落。
+
+        掉落只取决于种子，与何时首次访问无关；不读写全局随机源，多线程服务下也不会回卷其他请求的随机序列。
+        """
+        return self._generate_loot(random.Random(self._loot_seed))
+
+    def _generate_loot(self, rng=None):
         """生成怪物的掉落物品"""
+        rng = rng or random
         loot = []
         
         # 基础金币掉落，随怪物等级提升
-        base_gold = random.randint(5, 15) * self.tier
+        base_gold = rng.randint(5, 15) * self.tier
         gold_bag = GoldBag(f"{base_gold}金币", gold_amount=base_gold)
         loot.append(gold_bag)
         
         # 额外宝物统一走 create_random_item，并将怪物 tier 传入以关联宝物强度
-        treasure_item = create_random_item(treasure_tier=self.tier)
+        treasure_item = create_random_item(treasure_tier=self.tier, rng=rng)
         if treasure_item is not None:
             loot.append(treasure_item)
         
@@ -492,21 +550,28 @@ class Monster:
         """获取怪物的提示信息"""
         return [self.tier_hint, self.type_hint]
 
+    def _quote_prototype(self) -> Optional[MonsterPrototype]:
+        # 台词按当前名称查（剧情可能在战斗中改名）；只有登记过台词的物种才有
+        prototype = self.prototype
+        if prototype.name == self.name:
+            return prototype
+        return _PROTOTYPES_BY_NAME.get(self.name)
+
     def get_entrance_quote(self) -> Optional[str]:
         """获取怪物出场台词，无则返回 None。"""
-        quotes = self.MONSTER_QUOTES.get(self.name, {})
-        lines = quotes.get("entrance", [])
+        prototype = self._quote_prototype()
+        lines = prototype.entrance_quotes if prototype is not None else ()
         if not lines:
             return None
-        return random.choice(lines) if isinstance(lines, list) else lines
+        return random.choice(lines)
 
     def get_death_quote(self) -> Optional[str]:
         """获取怪物死亡台词，无则返回 None。"""
-        quotes = self.MONSTER_QUOTES.get(self.name, {})
-        lines = quotes.get("death", [])
+        prototype = self._quote_prototype()
+        lines = prototype.death_quotes if prototype is not None else ()
         if not lines:
             return None
-        return random.choice(lines) if isinstance(lines, list) else lines
+        return random.choice(lines)
 
     @staticmethod
     def get_random_item():
@@ -539,27 +604,69 @@ class Monster:
 
     def battle_status_duration_pass(self) -> None:
         """处理战斗回合的状态持续时间"""
-        expired = []
-        for st in list(self.statuses):
-            if st not in self.statuses:
-                continue
-            if self.statuses[st].duration_pass():
-                expired.append(st)
-        
-        for st in expired:
-            if st in self.statuses:
-                del self.statuses[st]
+        self.statuses.tick(list(self.statuses))
 
     def clear_battle_status(self) -> None:
         """清除所有战斗状态"""
-        expired = []
-        for status_name, status in self.statuses.items():
-            if status.is_battle_only:
-                expired.append(status_name)
-        
-        # 移除战斗状态
-        for status_name in expired:
-            del self.statuses[status_name]
+        self.statuses.clear_battle()
+
+def _default_effect_probability(tier):
+    """根据怪物等级设置默认效果概率（逐级累加，与原逐项累加的浮点结果一致）。"""
+    probability = _DEFAULT_EFFECT_PROBABILITY.get(tier)
+    if probability is None:
+        probability = 0.1  # 基础概率10%
+        if tier >= 2:
+            probability += 0.1  # Tier 2怪物增加10%概率
+        if tier >= 3:
+            probability += 0.1  # Tier 3怪物再增加10%概率
+        if tier >= 4:
+            probability += 0.1  # Tier 4怪物再增加10%概率
+        _DEFAULT_EFFECT_PROBABILITY[tier] = probability
+    return probability
+
+
+_DEFAULT_EFFECT_PROBABILITY: Dict[int, float] = {}
+
+
+def _build_species_prototype(name, base_hp=None, base_atk=None):
+    quotes = Monster.MONSTER_QUOTES.get(name, {})
+    return MonsterPrototype(
+        name=name,
+        sprite_key=_infer_sprite_key(name),
+        type_hints=tuple(Monster.MONSTER_TYPE_HINTS.get(name, ["未知声响"])),
+        entrance_quotes=tuple(quotes.get("entrance", ())),
+        death_quotes=tuple(quotes.get("death", ())),
+        base_hp=base_hp,
+        base_atk=base_atk,
+        fixed_type_hint="未知声响" if name.startswith("测试怪物") else None,
+    )
+
+
+# 物种原型表：import 时构建一次；按 tier 的顺序与 MONSTER_TYPES 一致，random.choice 的结果不变
+MONSTER_PROTOTYPES_BY_TIER: Dict[int, Tuple[MonsterPrototype, ...]] = {
+    tier: tuple(_build_species_prototype(name, hp, atk) for name, hp, atk in species)
+    for tier, species in Monster.MONSTER_TYPES.items()
+}
+_PROTOTYPES_BY_NAME: Dict[str, MonsterPrototype] = {
+    prototype.name: prototype for prototypes in MONSTER_PROTOTYPES_BY_TIER.values() for prototype in prototypes
+}
+_TIER_HINT_POOLS: Dict[int, Tuple[str, ...]] = {
+    tier: tuple(hints) for tier, hints in Monster.MONSTER_TIER_HINTS.items()
+}
+
+
+@lru_cache(maxsize=256)
+def _custom_prototype(name):
+    return _build_species_prototype(name)
+
+
+def monster_prototype(name):
+    """按名称取物种原型；剧情 Boss 等自定义名称按需构建并缓存。"""
+    prototype = _PROTOTYPES_BY_NAME.get(name)
+    if prototype is None:
+        prototype = _custom_prototype(name)
+    return prototype
+
 
 def _get_round_limited_max_tier(current_round):
     """根据回合数给出基础怪物等级上限。"""
@@ -578,31 +685,56 @@ def _get_round_limited_max_tier(current_round):
     return 6  # 60回合后可能出现所有怪物
 
 
-def _roll_tier(max_tier, current_round, power_score):
-    """按权重抽取怪物等级，后期更偏向高 tier。"""
-    if max_tier <= 1:
-        return 1
+def _tier_weight_key(max_tier, current_round, power_score):
+    """tier 权重只随几个回合 / 强度阈值跳变：同一档内共用一张别名表。"""
+    if current_round is None:
+        return (max_tier, False, False, False)
+    return (
+        max_tier,
+        current_round >= 20,
+        current_round >= 45,
+        current_round >= 60 and power_score >= 140,
+    )
 
+
+def _tier_weights(max_tier, late_round, endgame_round, strong_player):
+    """tier 1..max_tier 的抽取权重（批量生成工具按同一公式预先建表）。"""
     weights = []
     for tier in range(1, max_tier + 1):
         # 同阶段下低 tier 更常见；后期再逐步提高高 tier 出场率
         base_weight = float((max_tier - tier + 1) * 1.2)
-        if current_round is not None and current_round >= 20 and tier >= max_tier - 1:
+        if late_round and tier >= max_tier - 1:
             base_weight += 0.8
-        if current_round is not None and current_round >= 45 and tier == max_tier:
+        if endgame_round and tier == max_tier:
             base_weight += 1.4
-        if current_round is not None and current_round >= 60 and power_score >= 140 and tier == max_tier:
+        if strong_player and tier == max_tier:
             base_weight += 0.8
         weights.append(max(0.1, base_weight))
+    return weights
+
 
-    total = sum(weights)
-    roll = random.uniform(0, total)
-    acc = 0.0
-    for tier, weight in enumerate(weights, start=1):
-        acc += weight
-        if roll <= acc:
-            return tier
-    return max_tier
+@lru_cache(maxsize=None)
+def _tier_alias_table(max_tier, late_round, endgame_round, strong_player):
+    weights = _tier_weights(max_tier, late_round, endgame_round, strong_player)
+    return AliasTable(range(1, max_tier + 1), weights)
+
+
+def _roll_tier(max_tier, current_round, power_score):
+    """按权重抽取怪物等级，后期更偏向高 tier。"""
+    if max_tier <= 1:
+        return 1
+    table = _tier_alias_table(*_tier_weight_key(max_tier, current_round, power_score))
+    return table.sample(random)
+
+
+# 玩家强度缩放的门槛与上限（monster_batch 的向量化版本共用）
+MATCH_SCALING_MIN_ROUND = 40
+MATCH_PRESSURE_DIVISOR = 400.0
+MATCH_HP_SCALE_CAP = 4.65
+MATCH_ATK_SCALE_CAP = 2.45
+MATCH_HP_BONUS_MAX = 200
+MATCH_ATK_BONUS_MAX = 50
+MATCH_EFFECT_PROBABILITY_CAP = 0.75
 
 
 def _apply_player_match_scaling(monster, player, current_round, power_score):
@@ -617,20 +749,20 @@ def _apply_player_match_scaling(monster, player, current_round, power_score):
         return
 
     round_count = max(0, int(current_round or 0))
-    if round_count < 40:
+    if round_count < MATCH_SCALING_MIN_ROUND:
         # 玩家属性带来的额外怪物强化仅在 40 回合后启用
         return
 
     # 压力值：玩家越强 => power_score 越高 => pressure 越大 => 怪物属性越容易被放大
-    pressure = power_score / 400.0
+    pressure = power_score / MATCH_PRESSURE_DIVISOR
 
     # 乘法缩放上限：避免怪物 hp/atk 被无限放大
-    hp_scale = min(4.65, random.uniform(1.0, 1.0 + pressure))
-    atk_scale = min(2.45, random.uniform(1.0, 1.0 + pressure))
+    hp_scale = min(MATCH_HP_SCALE_CAP, random.uniform(1.0, 1.0 + pressure))
+    atk_scale = min(MATCH_ATK_SCALE_CAP, random.uniform(1.0, 1.0 + pressure))
 
     # 额外的加法偏移：让高强度下的差异更明显（并带随机）
-    scaled_hp = int(monster.hp * hp_scale + random.randint(0, 200) * pressure)
-    scaled_atk = int(monster.atk * atk_scale + random.randint(0, 50) * pressure)
+    scaled_hp = int(monster.hp * hp_scale + random.randint(0, MATCH_HP_BONUS_MAX) * pressure)
+    scaled_atk = int(monster.atk * atk_scale + random.randint(0, MATCH_ATK_BONUS_MAX) * pressure)
 
     # 保底：不会比原始 hp/atk 更低
     monster.hp = max(monster.hp, scaled_hp)
@@ -638,12 +770,12 @@ def _apply_player_match_scaling(monster, player, current_round, power_score):
 
     # 状态/特效出现概率同步上调，但有上限
     monster.effect_probability = min(
-        0.75, monster.effect_probability + pressure * 0.4
+        MATCH_EFFECT_PROBABILITY_CAP, monster.effect_probability + pressure * 0.4
     )
 
 
-def get_random_monster(max_tier=None, current_round=None, effect_probability=None, player=None, unlocked_tier=None):
-    """根据回合和已解锁 tier 生成随机怪物。"""
+def _resolve_monster_tier(max_tier, current_round, player, unlocked_tier):
+    """按回合上限、已解锁 tier 与玩家强度抽取怪物 tier，返回 (tier, power_score)。"""
     round_limited = _get_round_limited_max_tier(current_round)
     hard_cap = GameConfig.MONSTER_MAX_TIER
     if max_tier is None:
@@ -660,6 +792,12 @@ def get_random_monster(max_tier=None, current_round=None, effect_probability=Non
     max_tier = max(GameConfig.MONSTER_MIN_TIER, max_tier)
 
     tier = _roll_tier(max_tier=max_tier, current_round=current_round, power_score=power_score)
+    return tier, power_score
+
+
+def get_random_monster(max_tier=None, current_round=None, effect_probability=None, player=None, unlocked_tier=None):
+    """根据回合和已解锁 tier 生成随机怪物。"""
+    tier, power_score = _resolve_monster_tier(max_tier, current_round, player, unlocked_tier)
     monster = Monster(tier=tier, effect_probability=effect_probability)
     _apply_player_match_scaling(
         monster=monster,
@@ -668,3 +806,18 @@ def get_random_monster(max_tier=None, current_round=None, effect_probability=Non
         power_score=power_score,
     )
     return monster
+
+
+def sample_monster_hints(max_tier=None, current_round=None, player=None, unlocked_tier=None):
+    """只抽取一只随机怪物的 (等级提示, 类型提示)，不构造 Monster，也不生成掉落。
+
+    tier 与物种的抽取方式与 get_random_monster 相同，提示的分布一致；
+    掉落与玩家强度缩放不影响提示，这里直接跳过（因此消耗的随机数更少）。供非怪物门的伪装提示使用。
+    """
+    tier, _ = _resolve_monster_tier(max_tier, current_round, player, unlocked_tier)
+    prototype = random.choice(MONSTER_PROTOTYPES_BY_TIER[tier])
+    tier_hint = random.choice(_TIER_HINT_POOLS[tier])
+    type_hint = prototype.fixed_type_hint
+    if type_hint is None:
+        type_hint = random.choice(prototype.type_hints)
+    return tier_hint, type_hint
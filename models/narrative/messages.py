@@ -0,0 +1,130 @@
+"""日志消息模型：消息可以是普通字符串，也可以是「模板 + 参数」的 LazyText，在客户端读取日志时才渲染成文本。
+
+- LazyText：template 为 str.format 模板或渲染函数；首次 str() / 读取时渲染并缓存结果。
+- MessageLog：GameController.messages 的容器。追加时与上一条去重：两条 LazyText 比较模板与参数（不渲染），
+  LazyText 与普通字符串混合时比较渲染后的文本；条目读取后仍保留为 LazyText（文本缓存在其内部），去重结果与是否读取过无关。
+  索引 / 迭代 / 切片时才渲染；silent=True 时直接丢弃新消息（只计数），供批量模拟跳过全部文案拼接。
+"""
+from collections.abc import MutableSequence
+
+
+class LazyText:
+    """延迟渲染的文本：LazyText("你受到 {dmg} 点伤害。", dmg=12)。"""
+
+    __slots__ = ("template", "args", "_text")
+
+    def __init__(self, template, **args):
+        self.template = template
+        self.args = args
+        self._text = None
+
+    def render(self):
+        text = self._text
+        if text is None:
+            if callable(self.template):
+                text = self.template(**self.args)
+            else:
+                text = self.template.format(**self.args)
+            self._text = text = str(text)
+        return text
+
+    def __str__(self):
+        return self.render()
+
+    def __format__(self, spec):
+        return format(self.render(), spec)
+
+    def __repr__(self):
+        return f"LazyText({self.template!r}, **{self.args!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, LazyText):
+            return self.template == other.template and self.args == other.args
+        if isinstance(other, str):
+            return self.render() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.render())
+
+    def __contains__(self, item):
+        return item in self.render()
+
+    def __bool__(self):
+        return bool(self.render())
+
+    def __getstate__(self):
+        return (self.template, self.args, self._text)
+
+    def __setstate__(self, state):
+        self.template, self.args, self._text = state
+
+
+def render_text(value):
+    """把字符串或 LazyText 统一渲染为 str。"""
+    return value.render() if isinstance(value, LazyText) else value
+
+
+def _same_entry(a, b):
+    # 同为 LazyText：比较模板与参数，不为去重而渲染；与普通字符串混合时按渲染后的文本比较
+    if type(a) is type(b):
+        return a == b
+    return render_text(a) == render_text(b)
+
+
+class MessageLog(MutableSequence):
+    """按需渲染的消息列表；对外表现为字符串序列。"""
+
+    def __init__(self, entries=(), silent=False):
+        self._entries = list(entries)
+        self.silent = bool(silent)
+        self.suppressed = 0
+
+    def add(self, message):
+        """追加一条消息（与上一条相同则跳过）；静默模式下只计数。"""
+        if self.silent:
+            self.suppressed += 1
+            return
+        entries = self._entries
+        if entries and _same_entry(entries[-1], message):
+            return
+        entries.append(message)
+
+    def _render_at(self, index):
+        # 不原地替换为 str：条目类型保持不变，后续去重不受是否读取过影响（LazyText 自身缓存渲染结果）
+        return render_text(self._entries[index])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._render_at(i) for i in range(*index.indices(len(self._entries)))]
+        return self._render_at(index)
+
+    def __setitem__(self, index, value):
+        self._entries[index] = value
+
+    def __delitem__(self, index):
+        del self._entries[index]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        for index in range(len(self._entries)):
+            yield self._render_at(index)
+
+    def insert(self, index, value):
+        self._entries.insert(index, value)
+
+    def clear(self):
+        self._entries.clear()
+
+    def copy(self):
+        return list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, (MessageLog, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"MessageLog({self._entries!r})"
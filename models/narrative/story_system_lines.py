@@ -47,3 +47,78 @@ MSG_PUPPET_PHASE2_THEME = "失真童谣被重低音撕开，完全体战斗主
 
 def format_puppet_phase2_entrance(old_name: str, new_name: str, burst_heal: int, atk: int) -> str:
     return f"{old_name}核心炸裂，{new_name}爆发登场！恢复 {burst_heal} 点生命，攻击抬升至 {atk}。"
+
+
+# 后果触发时的默认提示（payload 未给出 log_trigger / message 时）：先按后果 ID，再按来源 flag
+TRIGGER_MESSAGE_BY_CONSEQUENCE = {
+    "knight_aid_traitor_revenge": "你脑中闪过那名被你救下的骑士，空气里多了一股熟悉的杀意。",
+    "smuggler_report_gang_revenge": "你想起那次举报，巷道深处传来追兵踩碎砂石的声音。",
+    "lost_child_village_gift": "你忽然听见远处有人喊你的名字，像是旧日恩情追上了你。",
+}
+TRIGGER_MESSAGE_BY_SOURCE = {
+    "knight_aided": "你曾经的善举在此刻回响。",
+    "smuggler_bought_goods": "黑市里那笔交易并没有真正结束。",
+    "smuggler_reported": "你以为早已翻篇的旧账，忽然被人重新翻开。",
+    "lost_child_guided_home": "那次送孩子回家的路，似乎把命运也悄悄改了道。",
+}
+
+# 后果生效后的结果日志模板（{detail} 为具体数值描述）；空串表示不记日志
+EFFECT_RESULT_BY_CONSEQUENCE = {
+    "knight_aid_traitor_revenge": "因为你之前救了骑士，现在骑士的死对头{detail}来追杀你了。",
+}
+EFFECT_RESULT_TEMPLATES = {
+    "black_market_discount": "你刚踏进店门，掌柜就改了价签：{detail}。",
+    "black_market_markup": "掌柜瞥了你一眼，慢慢把价签往上拨：{detail}。",
+    "revenge_ambush": "旧怨落地成刀，眼前局势骤变：{detail}。",
+    "guard_reward": "你收下了这份迟来的回报：{detail}。",
+    "villagers_gift": "门后没有杀意，只有一份留给你的心意：{detail}。",
+    "shrine_blessing": "那点神性余辉在关键时刻护住了你：{detail}。",
+    "shrine_curse": "你听见耳边低语，诅咒果然还是追了上来：{detail}。",
+    "atk_training": "旧经历在手中成了新招：{detail}。",
+    "lose_gold": "这笔旧账终究要还：{detail}。",
+    "force_story_event": "",
+    "stage_curtain_script_vault": "",
+    "treasure_marked_item": "宝物门里的陈设明显被提前动过手脚：{detail}。",
+    "treasure_vanish": "你只摸到一层冷灰，值钱的东西全没了：{detail}。",
+    "default_final_boss": "终局门后的影子拍着手站起来了：{detail}。",
+}
+EFFECT_RESULT_DEFAULT = "命运的回声改写了这一刻：{detail}。"
+
+
+def render_effect_values(message, parts):
+    """正文后追加「（本次变化：a，b）」；没有有效数值时原样返回正文。"""
+    detail_parts = [p.strip() for p in parts if isinstance(p, str) and p.strip()]
+    if not detail_parts:
+        return message
+    detail_text = "，".join(detail_parts)
+    base = (message or "").strip()
+    if not base:
+        return f"（本次变化：{detail_text}）"
+    return f"{base}（本次变化：{detail_text}）"
+
+
+def render_effect_message(message, fallback, parts, values, format_message=False):
+    """效果日志的延迟渲染：message 为 payload 指定的正文（为空时按 values 渲染 fallback 模板），parts 为按 values 渲染的数值模板。
+
+    format_message=True 时 payload 正文也按 values 填充占位符（填充失败保留原文）。
+    """
+    if not message:
+        message = fallback.format(**values)
+    elif format_message:
+        try:
+            message = message.format(**values)
+        except (KeyError, IndexError, ValueError):
+            pass
+    return render_effect_values(message, [part.format(**values) for part in parts])
+
+
+def describe_reward(reward):
+    """奖励字典的简短描述，如「50G, 飞锤x1」；为空时为「无」。"""
+    parts = []
+    for key, amount in reward.items():
+        if key == "gold":
+            parts.append(f"{amount}G")
+        else:
+            name = getattr(key, "name", "未知道具")
+            parts.append(f"{name}x{amount}")
+    return ", ".join(parts) if parts else "无"
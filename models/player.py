@@ -1,10 +1,22 @@
+from typing import Any, NamedTuple, Optional
+
 from models.door import Door
 from models.monster import Monster, get_random_monster
-from .status import Status, StatusName
+from .status import Status, StatusDict, StatusName
 from .game_config import GameConfig
 from models.items import ItemType, ReviveScroll, FlyingHammer, GiantScroll, Barrier
 import random
 
+
+class CombatStats(NamedTuple):
+    """由基础攻击与当前状态推出的战斗属性，按需计算一次后缓存在 Player 上。"""
+
+    atk: int  # 有效攻击力（基础 + 状态修正，至少为 1）
+    damage_multiplier: Any  # ATK_MULTIPLIER 倍数，无该状态时为 1
+    damage_reduction: Optional[float]  # 受伤比例（DAMAGE_REDUCTION 的值），无该状态时为 None
+    escape_chance: float  # 逃跑成功率
+
+
 class Player:
     def __init__(self, controller):
         """初始化玩家"""
@@ -13,21 +25,75 @@ class Player:
         self.reset()
 
     @property
-    def atk(self):
-        """获取当前攻击力（基础 + 状态修正）"""
+    def _atk(self):
+        """基础攻击力；写入时作废派生战斗属性缓存"""
+        return self._base_atk
+
+    @_atk.setter
+    def _atk(self, value):
+        self._base_atk = value
+        self._combat_stats = None
+
+    @property
+    def statuses(self) -> StatusDict:
+        return self._statuses
+
+    @statuses.setter
+    def statuses(self, value):
+        # 整体替换时包装成 StatusDict，之后的增删与状态数值变化都会作废缓存
+        self._statuses = StatusDict(value, owner=self)
+        self._combat_stats = None
+
+    def invalidate_combat_stats(self) -> None:
+        self._combat_stats = None
+
+    @property
+    def combat_stats(self) -> CombatStats:
+        """派生战斗属性；基础攻击、状态增删或状态持续时间 / 数值变化后重新计算"""
+        stats = self._combat_stats
+        if stats is None:
+            stats = self._combat_stats = self._compute_combat_stats()
+        return stats
+
+    def _compute_combat_stats(self) -> CombatStats:
         total_atk = self._atk
-        
+
         # 1. 加法修正
         if self.has_status(StatusName.ATK_UP):
             total_atk += self.statuses[StatusName.ATK_UP].value
         if self.has_status(StatusName.WEAK):
             total_atk -= 2 # 虚弱固定减2
-            
+
         # 2. 乘法修正
+        multiplier = 1
         if self.has_status(StatusName.ATK_MULTIPLIER):
-            total_atk *= self.statuses[StatusName.ATK_MULTIPLIER].value
-            
-        return max(1, int(total_atk))
+            multiplier = self.statuses[StatusName.ATK_MULTIPLIER].value
+            total_atk *= multiplier
+
+        reduction = None
+        if self.has_status(StatusName.DAMAGE_REDUCTION):
+            # 减伤比例 (默认 0.7 即减免 30%，如果是减伤卷轴可能是 0.25)
+            reduction = self.statuses[StatusName.DAMAGE_REDUCTION].value
+
+        escape_chance = 0.3  # 基础30%概率
+        if self.has_status(StatusName.WEAK):
+            escape_chance -= 0.1  # 虚弱状态降低10%概率
+        if self.has_status(StatusName.POISON):
+            escape_chance -= 0.1  # 中毒状态降低10%概率
+        if self.has_status(StatusName.STUN):
+            escape_chance -= 1  # 晕眩状态降低100%概率
+
+        return CombatStats(
+            atk=max(1, int(total_atk)),
+            damage_multiplier=multiplier,
+            damage_reduction=reduction,
+            escape_chance=escape_chance,
+        )
+
+    @property
+    def atk(self):
+        """获取当前攻击力（基础 + 状态修正）"""
+        return self.combat_stats.atk
 
     @atk.setter
     def atk(self, value):
@@ -55,9 +121,8 @@ class Player:
     def take_damage(self, damage: int):
         """受到伤害"""
         # 检查是否有减伤效果
-        if self.has_status(StatusName.DAMAGE_REDUCTION):
-            # 获取减伤比例 (默认 0.7 即减免 30%，如果是减伤卷轴可能是 0.25)
-            reduction = self.statuses[StatusName.DAMAGE_REDUCTION].value
+        reduction = self.combat_stats.damage_reduction
+        if reduction is not None:
             damage = max(1, int(damage * reduction))
             self.controller.add_message(f"减伤效果触发，受到伤害减至 {int(reduction * 100)}%!")
             
@@ -137,14 +202,8 @@ class Player:
     def try_escape(self, monster):
         """尝试逃跑"""
         # 计算逃跑概率
-        escape_chance = 0.3  # 基础30%概率
-        if self.has_status(StatusName.WEAK):
-            escape_chance -= 0.1  # 虚弱状态降低10%概率
-        if self.has_status(StatusName.POISON):
-            escape_chance -= 0.1  # 中毒状态降低10%概率
-        if self.has_status(StatusName.STUN):
-            escape_chance -= 1  # 晕眩状态降低100%概率
-            
+        escape_chance = self.combat_stats.escape_chance
+
         # 尝试逃跑
         if random.random() < escape_chance:
             self.controller.add_message("你成功逃脱了!")
@@ -155,56 +214,28 @@ class Player:
 
     def adventure_status_duration_pass(self) -> None:
         """处理冒险回合的状态持续时间"""
-        expired = []
+        keys = self.statuses.adventure_keys()
         current_round = getattr(self.controller, "round_count", None)
-        for st in list(self.statuses):
-            if st not in self.statuses:
-                continue
-            if not self.statuses[st].is_battle_only:
-                if (
-                    st == StatusName.WEAK
-                    and isinstance(current_round, int)
-                    and getattr(self, "_weak_ticked_in_battle_round", None) == current_round
-                ):
-                    continue
-                if self.statuses[st].duration_pass():
-                    expired.append(st)
-        
-        for st in expired:
-            if st in self.statuses:
-                del self.statuses[st]
+        if (
+            isinstance(current_round, int)
+            and getattr(self, "_weak_ticked_in_battle_round", None) == current_round
+            and StatusName.WEAK in keys
+        ):
+            # 本回合虚弱已在战斗回合衰减过
+            keys.remove(StatusName.WEAK)
+        self.statuses.tick(keys)
 
     def battle_status_duration_pass(self) -> None:
         """处理战斗回合的状态持续时间"""
-        expired = []
-        weak_processed = False
         current_round = getattr(self.controller, "round_count", None)
-        for st in list(self.statuses):
-            if st not in self.statuses:
-                continue
-            # 虚弱可由机关/剧情在非战斗场景施加，但在战斗回合同样需要正常衰减
-            if self.statuses[st].is_battle_only or st == StatusName.WEAK:
-                if st == StatusName.WEAK:
-                    weak_processed = True
-                if self.statuses[st].duration_pass():
-                    expired.append(st)
-        if weak_processed and isinstance(current_round, int):
+        # 虚弱可由机关/剧情在非战斗场景施加，但在战斗回合同样需要正常衰减
+        ticked = self.statuses.tick(self.statuses.battle_keys(StatusName.WEAK))
+        if StatusName.WEAK in ticked and isinstance(current_round, int):
             self._weak_ticked_in_battle_round = current_round
-        
-        for st in expired:
-            if st in self.statuses:
-                del self.statuses[st]
 
     def clear_battle_status(self) -> None:
         """清除所有战斗状态"""
-        expired = []
-        for status_name, status in self.statuses.items():
-            if status.is_battle_only:
-                expired.append(status_name)
-        
-        # 移除战斗状态
-        for status_name in expired:
-            del self.statuses[status_name]
+        self.statuses.clear_battle()
 
     def get_status_desc(self):
         """获取状态描述"""
@@ -1,11 +1,145 @@
-"""商店逻辑：商品生成、价格浮动与购买。"""
+"""商店逻辑：商品生成、价格浮动与购买。
+
+商品池在导入时编译成目录：基础价、池内权重、类别（按首次出现顺序）与各类别的下标。
+目标价位只取 5~200 的整数，综合得分（价位靠近程度 × 池内权重）按目标价位逐行预先算好，
+刷新商品时直接取一行，分类抽取与补齐都在下标上进行；抽取顺序与权重和逐项计算时完全相同。
+"""
+
+from bisect import bisect
+from itertools import accumulate
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 from models.items import ItemType
 from models import items
 from models.game_config import GameConfig
+from models.weighted_sampling import weighted_sample_without_replacement
 import math
 import random
 
+# 商店商品池：与 create_random_item() 的格式保持一致
+# (Class, Params, Weight)
+# 说明：
+# - Params 里的 cost 作为“基础价”，随后会应用 SHOP_PRICE_MULTIPLIER 浮动
+# - 用 shop_category 用于“尽量多类别”上架策略
+SHOP_ITEM_POOL = (
+    (items.HealingPotion, {"name": "小治疗药水", "heal_amount": 10, "cost": 10, "shop_category": "potion"}, 20),
+    (items.HealingPotion, {"name": "中治疗药水", "heal_amount": 20, "cost": 30, "shop_category": "potion"}, 15),
+    (items.HealingPotion, {"name": "大治疗药水", "heal_amount": 30, "cost": 50, "shop_category": "potion"}, 10),
+    (items.HealingPotion, {"name": "超级治疗药水", "heal_amount": 50, "cost": 80, "shop_category": "potion"}, 10),
+    (items.HealingPotion, {"name": "顶级治疗药水", "heal_amount": 80, "cost": 200, "shop_category": "potion"}, 5),
+    (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[2], "atk_bonus": 2, "cost": 5, "shop_category": "equipment"}, 18),
+    (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[5], "atk_bonus": 5, "cost": 15, "shop_category": "equipment"}, 14),
+    (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[10], "atk_bonus": 10, "cost": 30, "shop_category": "equipment"}, 10),
+    (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[30], "atk_bonus": 30, "cost": 100, "shop_category": "equipment"}, 6),
+    (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[50], "atk_bonus": 50, "cost": 200, "shop_category": "equipment"}, 3),
+    (items.DamageReductionScroll, {"name": "减伤卷轴", "duration": 3, "cost": 40, "shop_category": "scroll"}, 12),
+    (items.AttackUpScroll, {"name": "攻击力提升卷轴", "atk_bonus": 5, "duration": 5, "cost": 25, "shop_category": "scroll"}, 10),
+    (items.ReviveScroll, {"name": "复活卷轴", "duration": 1, "cost": 40, "shop_category": "scroll"}, 6),
+    (items.HealingScroll, {"name": "恢复卷轴", "duration": 5, "cost": 25, "shop_category": "scroll"}, 10),
+    (items.ImmuneScroll, {"name": "免疫卷轴", "duration": 3, "cost": 30, "shop_category": "scroll"}, 8),
+    (items.FlyingHammer, {"name": "飞锤", "duration": 3, "cost": 25, "shop_category": "battle"}, 7),
+    (items.Barrier, {"name": "结界", "duration": 3, "cost": 30, "shop_category": "battle"}, 6),
+    (items.GiantScroll, {"name": "巨大卷轴", "duration": 3, "cost": 35, "shop_category": "battle"}, 5),
+)
+
+# 目标价位 = 玩家金币的一半，夹在该区间内
+MIN_TARGET_COST = 5
+MAX_TARGET_COST = 200
+
+
+class ShopEntry(NamedTuple):
+    """编译后的商品条目：构造参数已去掉 cost / shop_category / name_pool。"""
+
+    item_class: type
+    params: Dict[str, Any]
+    base_cost: int
+    weight: float
+    category: str
+    name_pool: Optional[Tuple[str, ...]]
+
+
+class ShopScoreRow(NamedTuple):
+    """某个目标价位下的得分：逐条目得分、各类别权重（类别内最高分）与类别内累计权重。"""
+
+    scores: Tuple[float, ...]
+    category_weights: Tuple[float, ...]
+    category_cum_weights: Tuple[Tuple[float, ...], ...]
+
+
+def _base_cost(params) -> int:
+    try:
+        return int(params.get("cost", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _pool_weight(base_weight) -> float:
+    try:
+        return float(base_weight)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def _compile_entry(item_class, base_params, base_weight) -> ShopEntry:
+    params = dict(base_params or {})
+    params.pop("cost", None)
+    category = params.pop("shop_category", "misc")
+    name_pool = params.pop("name_pool", None)
+    return ShopEntry(
+        item_class=item_class,
+        params=params,
+        base_cost=_base_cost(base_params or {}),
+        weight=_pool_weight(base_weight),
+        category=category,
+        name_pool=tuple(name_pool) if name_pool else None,
+    )
+
+
+def score_weight(entry: ShopEntry, target_cost: int) -> float:
+    """综合“目标价位靠近程度”与“池内权重”。"""
+    if entry.base_cost <= 0 or target_cost <= 0:
+        closeness = 0.1
+    else:
+        ratio = entry.base_cost / target_cost
+        closeness = max(0.1, 1.0 / max(0.1, abs(math.log(ratio))))
+    # 兼顾旧逻辑（偏向目标价位）与显式权重（稀有度）
+    return max(0.0, entry.weight) * closeness
+
+
+SHOP_ENTRIES: Tuple[ShopEntry, ...] = tuple(_compile_entry(*entry) for entry in SHOP_ITEM_POOL)
+
+
+def _group_categories(entries) -> Tuple[Tuple[str, ...], Tuple[Tuple[int, ...], ...]]:
+    groups: Dict[str, List[int]] = {}
+    for index, entry in enumerate(entries):
+        groups.setdefault(entry.category, []).append(index)
+    return tuple(groups), tuple(tuple(indices) for indices in groups.values())
+
+
+SHOP_CATEGORIES, SHOP_CATEGORY_INDICES = _group_categories(SHOP_ENTRIES)
+
+
+def _build_score_row(target_cost: int) -> ShopScoreRow:
+    scores = tuple(score_weight(entry, target_cost) for entry in SHOP_ENTRIES)
+    return ShopScoreRow(
+        scores=scores,
+        category_weights=tuple(max(scores[i] for i in indices) for indices in SHOP_CATEGORY_INDICES),
+        category_cum_weights=tuple(
+            tuple(accumulate(scores[i] for i in indices)) for indices in SHOP_CATEGORY_INDICES
+        ),
+    )
+
+
+# _SCORE_ROWS[target_cost - MIN_TARGET_COST]
+_SCORE_ROWS: Tuple[ShopScoreRow, ...] = tuple(
+    _build_score_row(target_cost) for target_cost in range(MIN_TARGET_COST, MAX_TARGET_COST + 1)
+)
+
+
+def shop_target_cost(gold) -> int:
+    """根据玩家资金水平计算目标价位：有钱时偏向高价，没钱时偏向低价。"""
+    return max(MIN_TARGET_COST, min(MAX_TARGET_COST, int(gold * 0.5)))
+
 
 class Shop:
     """商店：根据玩家资金生成若干商品，支持购买与价格修正。"""
@@ -22,125 +156,52 @@ class Shop:
 
     @staticmethod
     def _weighted_unique_choices(candidates, weights, count):
-        """按权重无放回抽样，返回不重复结果。"""
-        remaining_candidates = list(candidates)
-        remaining_weights = list(weights)
-        selected = []
-        for _ in range(min(count, len(remaining_candidates))):
-            picked = random.choices(remaining_candidates, weights=remaining_weights, k=1)[0]
-            idx = remaining_candidates.index(picked)
-            selected.append(remaining_candidates.pop(idx))
-            remaining_weights.pop(idx)
-        return selected
+        """按权重无放回抽样，返回不重复结果（树状数组：抽中项权重置零，不再逐轮重建列表）。"""
+        return weighted_sample_without_replacement(candidates, weights, count, rng=random)
 
     def generate_items(self):
         """生成商店物品"""
         self.shop_items = []
-        
-        # 商店商品池：与 create_random_item() 的格式保持一致
-        # (Class, Params, Weight)
-        # 说明：
-        # - Params 里的 cost 作为“基础价”，随后会应用 SHOP_PRICE_MULTIPLIER 浮动
-        # - 用 shop_category 用于“尽量多类别”上架策略
-        item_types = [
-            (items.HealingPotion, {"name": "小治疗药水", "heal_amount": 10, "cost": 10, "shop_category": "potion"}, 20),
-            (items.HealingPotion, {"name": "中治疗药水", "heal_amount": 20, "cost": 30, "shop_category": "potion"}, 15),
-            (items.HealingPotion, {"name": "大治疗药水", "heal_amount": 30, "cost": 50, "shop_category": "potion"}, 10),
-            (items.HealingPotion, {"name": "超级治疗药水", "heal_amount": 50, "cost": 80, "shop_category": "potion"}, 10),
-            (items.HealingPotion, {"name": "顶级治疗药水", "heal_amount": 80, "cost": 200, "shop_category": "potion"}, 5),
-            (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[2], "atk_bonus": 2, "cost": 5, "shop_category": "equipment"}, 18),
-            (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[5], "atk_bonus": 5, "cost": 15, "shop_category": "equipment"}, 14),
-            (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[10], "atk_bonus": 10, "cost": 30, "shop_category": "equipment"}, 10),
-            (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[30], "atk_bonus": 30, "cost": 100, "shop_category": "equipment"}, 6),
-            (items.Equipment, {"name_pool": GameConfig.EQUIPMENT_NAME_POOLS[50], "atk_bonus": 50, "cost": 200, "shop_category": "equipment"}, 3),
-            (items.DamageReductionScroll, {"name": "减伤卷轴", "duration": 3, "cost": 40, "shop_category": "scroll"}, 12),
-            (items.AttackUpScroll, {"name": "攻击力提升卷轴", "atk_bonus": 5, "duration": 5, "cost": 25, "shop_category": "scroll"}, 10),
-            (items.ReviveScroll, {"name": "复活卷轴", "duration": 1, "cost": 40, "shop_category": "scroll"}, 6),
-            (items.HealingScroll, {"name": "恢复卷轴", "duration": 5, "cost": 25, "shop_category": "scroll"}, 10),
-            (items.ImmuneScroll, {"name": "免疫卷轴", "duration": 3, "cost": 30, "shop_category": "scroll"}, 8),
-            (items.FlyingHammer, {"name": "飞锤", "duration": 3, "cost": 25, "shop_category": "battle"}, 7),
-            (items.Barrier, {"name": "结界", "duration": 3, "cost": 30, "shop_category": "battle"}, 6),
-            (items.GiantScroll, {"name": "巨大卷轴", "duration": 3, "cost": 35, "shop_category": "battle"}, 5),
-        ]
-        # 根据玩家资金水平计算目标价位：有钱时偏向高价，没钱时偏向低价
-        target_cost = max(5, min(200, int(self.player.gold * 0.5)))
-        def _get_base_cost(entry) -> int:
-            _, params, _ = entry
-            try:
-                return int(params.get("cost", 0))
-            except (TypeError, ValueError):
-                return 0
-
-        def score_weight(entry) -> float:
-            """综合“目标价位靠近程度”与“池内权重”。"""
-            _, params, base_weight = entry
-            base_cost = _get_base_cost(entry)
-            if base_cost <= 0 or target_cost <= 0:
-                closeness = 0.1
-            else:
-                ratio = base_cost / target_cost
-                closeness = max(0.1, 1.0 / max(0.1, abs(math.log(ratio))))
-            try:
-                w = float(base_weight)
-            except (TypeError, ValueError):
-                w = 1.0
-            # 兼顾旧逻辑（偏向目标价位）与显式权重（稀有度）
-            return max(0.0, w) * closeness
+        row = _SCORE_ROWS[shop_target_cost(self.player.gold) - MIN_TARGET_COST]
 
         # 先尽量保证“多类别”：每个选中类别先拿一件，再按权重补齐
-        categories = {}
-        for entry in item_types:
-            _, params, _ = entry
-            category = params.get("shop_category", "misc")
-            categories.setdefault(category, []).append(entry)
-
-        target_category_count = min(self.SHOP_ITEM_COUNT, len(categories))
-        selected_data = []
+        target_category_count = min(self.SHOP_ITEM_COUNT, len(SHOP_CATEGORIES))
+        selected = []
 
         if target_category_count > 0:
-            category_names = list(categories.keys())
-            category_weights = [
-                max(score_weight(candidate) for candidate in categories[name])
-                for name in category_names
-            ]
             selected_categories = self._weighted_unique_choices(
-                category_names,
-                category_weights,
+                range(len(SHOP_CATEGORIES)),
+                row.category_weights,
                 target_category_count
             )
-            for category_name in selected_categories:
-                category_candidates = categories[category_name]
-                candidate_weights = [score_weight(candidate) for candidate in category_candidates]
-                selected_data.append(
-                    random.choices(category_candidates, weights=candidate_weights, k=1)[0]
-                )
-
-        remaining = [entry for entry in item_types if entry not in selected_data]
-        remaining_count = self.SHOP_ITEM_COUNT - len(selected_data)
-        if remaining_count > 0 and remaining:
-            remaining_weights = [score_weight(entry) for entry in remaining]
-            selected_data.extend(
-                self._weighted_unique_choices(remaining, remaining_weights, remaining_count)
-            )
+            for category in selected_categories:
+                # 与 random.choices(candidates, weights=..., k=1) 取同一项、消耗同一个随机数
+                cum_weights = row.category_cum_weights[category]
+                position = bisect(cum_weights, random.random() * cum_weights[-1], 0, len(cum_weights) - 1)
+                selected.append(SHOP_CATEGORY_INDICES[category][position])
 
-        random.shuffle(selected_data)
-        for entry in selected_data:
-            item_class, base_params, _ = entry
-            params = dict(base_params or {})
+        remaining_count = self.SHOP_ITEM_COUNT - len(selected)
+        if remaining_count > 0:
+            chosen = set(selected)
+            remaining = [index for index in range(len(SHOP_ENTRIES)) if index not in chosen]
+            if remaining:
+                selected.extend(
+                    self._weighted_unique_choices(
+                        remaining, [row.scores[index] for index in remaining], remaining_count
+                    )
+                )
 
-            base_cost = _get_base_cost(entry)
+        random.shuffle(selected)
+        for index in selected:
+            entry = SHOP_ENTRIES[index]
+            params = dict(entry.params)
             # 计算实际价格（有浮动）
-            cost = int(base_cost * random.uniform(*self.SHOP_PRICE_MULTIPLIER))
-            params["cost"] = cost
-
-            item_category = params.pop("shop_category", "misc")
-
-            name_pool = params.pop("name_pool", None)
-            if item_class is items.Equipment and name_pool and "name" not in params:
-                params["name"] = random.choice(list(name_pool))
+            params["cost"] = int(entry.base_cost * random.uniform(*self.SHOP_PRICE_MULTIPLIER))
+            if entry.item_class is items.Equipment and entry.name_pool and "name" not in params:
+                params["name"] = random.choice(entry.name_pool)
 
-            item = item_class(**params)
-            item.shop_category = item_category
+            item = entry.item_class(**params)
+            item.shop_category = entry.category
             self.shop_items.append(item)
         if len(self.shop_items) < self.SHOP_ITEM_COUNT:
             self.shop_items = [
@@ -1,6 +1,6 @@
 import random
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from models.game_config import GameConfig
 
@@ -46,8 +46,159 @@ class StatusName(Enum):
             StatusName.FIELD_POISON: FieldPoisonStatus
         }.get(self)(**kwargs)
 
+# 影响持有者派生战斗属性（有效攻击、减伤比例、逃跑概率）的字段
+_COMBAT_FIELDS = frozenset(("duration", "value"))
+
+
+class StatusDict(dict):
+    """玩家与怪物共用的状态表。
+
+    - 另按「战斗回合 / 冒险回合」两类维护有序索引（顺序与状态表一致），回合推进只遍历对应一类，
+      战斗结束清理战斗状态时也不必扫描整张表；
+    - 增删条目时通知所属对象作废派生战斗属性缓存，并把它登记为其中各状态的持有者，
+      使状态的持续时间 / 数值变化同样触发失效（怪物没有派生属性缓存，不设所属对象）。
+    """
+
+    __slots__ = ("_owner", "_battle", "_adventure")
+
+    def __init__(self, statuses: Any = (), owner: Any = None):
+        super().__init__(statuses)
+        self._owner = owner
+        self._reindex()
+        for status in self.values():
+            _bind_holder(status, owner)
+
+    def __reduce__(self):
+        # 默认的 dict 子类反序列化会先写回条目、后恢复 slot，索引无从维护；改为按内容重建
+        return (type(self), (dict(self), self._owner))
+
+    def _reindex(self) -> None:
+        self._battle = {}
+        self._adventure = {}
+        for key, status in self.items():
+            self._index_of(status)[key] = None
+
+    def _index_of(self, status: Any) -> Dict[Any, None]:
+        return self._battle if getattr(status, "is_battle_only", False) else self._adventure
+
+    def _touch(self) -> None:
+        owner = self._owner
+        if owner is not None:
+            owner.invalidate_combat_stats()
+
+    def __setitem__(self, key, status) -> None:
+        index = self._index_of(status)
+        moved = key in self and key not in index
+        previous = self.get(key)
+        super().__setitem__(key, status)
+        if previous is not status:
+            _unbind_holder(previous, self._owner)
+        if moved:
+            # 同一键换成了另一类状态：按状态表顺序重建，保持两类索引与表内顺序一致
+            self._reindex()
+        else:
+            index[key] = None
+        _bind_holder(status, self._owner)
+        self._touch()
+
+    def __delitem__(self, key) -> None:
+        _unbind_holder(self[key], self._owner)
+        super().__delitem__(key)
+        self._battle.pop(key, None)
+        self._adventure.pop(key, None)
+        self._touch()
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        status = self[key]
+        del self[key]
+        return status
+
+    def popitem(self):
+        key, status = super().popitem()
+        _unbind_holder(status, self._owner)
+        self._battle.pop(key, None)
+        self._adventure.pop(key, None)
+        self._touch()
+        return key, status
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs) -> None:
+        for key, status in dict(*args, **kwargs).items():
+            self[key] = status
+
+    def clear(self) -> None:
+        if self:
+            for status in self.values():
+                _unbind_holder(status, self._owner)
+            super().clear()
+            self._battle.clear()
+            self._adventure.clear()
+            self._touch()
+
+    def battle_keys(self, *extra: Any) -> List[Any]:
+        """战斗回合要推进的状态键；extra 为同样在战斗回合推进的非战斗状态，按状态表顺序并入。"""
+        if not any(key in self._adventure for key in extra):
+            return list(self._battle)
+        return [key for key in self if key in self._battle or key in extra]
+
+    def adventure_keys(self) -> List[Any]:
+        """冒险回合要推进的状态键（非战斗状态），按状态表顺序。"""
+        return list(self._adventure)
+
+    def tick(self, keys: Iterable[Any]) -> List[Any]:
+        """按 keys 的顺序调用各状态的 duration_pass，移除到期的状态；返回实际推进过的键。
+
+        推进过程中状态可能被增删（中毒致死触发复活会清除战斗状态），已不在表中的键直接跳过。
+        """
+        ticked = []
+        expired = []
+        for key in keys:
+            status = self.get(key)
+            if status is None:
+                continue
+            ticked.append(key)
+            if status.duration_pass():
+                expired.append(key)
+        for key in expired:
+            if key in self:
+                del self[key]
+        return ticked
+
+    def clear_battle(self) -> None:
+        """移除所有战斗状态（经由 __delitem__，被移除的状态同时解除持有者登记）。"""
+        for key in list(self._battle):
+            del self[key]
+
+
+def _bind_holder(status: Any, owner: Any) -> None:
+    if owner is not None and isinstance(status, Status):
+        object.__setattr__(status, "_holder", owner)
+
+
+def _unbind_holder(status: Any, owner: Any) -> None:
+    # 移出状态表后不再影响原持有者：预演日志等仍引用它时，改写不会再作废玩家的派生属性缓存
+    if owner is not None and isinstance(status, Status) and getattr(status, "_holder", None) is owner:
+        object.__setattr__(status, "_holder", None)
+
+
 class Status:
     """状态效果基类"""
+
+    __slots__ = ("name", "enum", "duration", "is_battle_only", "description", "target", "_holder")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name in _COMBAT_FIELDS:
+            holder = getattr(self, "_holder", None)
+            if holder is not None:
+                holder.invalidate_combat_stats()
+
     def __init__(self, **kwargs):
         self.name = kwargs.get("name", "未知状态")
         self.enum = StatusName(self.name)  # 直接设置 enum 属性
@@ -91,6 +242,9 @@ class Status:
 
 class WeakStatus(Status):
     """虚弱状态"""
+
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(
             name=StatusName.WEAK,
@@ -126,6 +280,9 @@ class WeakStatus(Status):
 
 class PoisonStatus(Status):
     """中毒状态"""
+
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(
             name=StatusName.POISON,
@@ -153,6 +310,9 @@ class PoisonStatus(Status):
 
 class StunStatus(Status):
     """晕眩状态"""
+
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(
             name=StatusName.STUN,
@@ -173,6 +333,9 @@ class StunStatus(Status):
 
 class AtkMultiplierStatus(Status):
     """攻击力翻倍状态"""
+
+    __slots__ = ("value",)
+
     def __init__(self, **kwargs):
         self.value = kwargs.get("value", 2)
         if self.value <= 0:
@@ -207,6 +370,9 @@ class AtkMultiplierStatus(Status):
 
 class BarrierStatus(Status):
     """结界状态"""
+
+    __slots__ = ("trigger_count",)
+
     def __init__(self, **kwargs):
         super().__init__(
             name=StatusName.BARRIER,
@@ -245,6 +411,9 @@ class BarrierStatus(Status):
 
 class AtkUpStatus(Status):
     """攻击力提升状态"""
+
+    __slots__ = ("value",)
+
     def __init__(self, **kwargs):
         self.value = kwargs.get("value", 2)
         if self.value <= 0:
@@ -279,6 +448,9 @@ class AtkUpStatus(Status):
 
 class DamageReductionStatus(Status):
     """伤害减免状态"""
+
+    __slots__ = ("value",)
+
     def __init__(self, **kwargs):
         super().__init__(
             name=StatusName.DAMAGE_REDUCTION,
@@ -302,6 +474,9 @@ class DamageReductionStatus(Status):
 
 class HealingScrollStatus(Status):
     """恢复卷轴状态"""
+
+    __slots__ = ("value",)
+
     def __init__(self, **kwargs):
         super().__init__(
             name=StatusName.HEALING_SCROLL,
@@ -339,6 +514,9 @@ class HealingScrollStatus(Status):
 
 class ImmuneStatus(Status):
     """免疫状态"""
+
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(
             name=StatusName.IMMUNE,
@@ -359,6 +537,9 @@ class ImmuneStatus(Status):
 
 class FieldPoisonStatus(Status):
     """野外中毒状态 (非战斗回合扣血)"""
+
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(
             name=StatusName.FIELD_POISON,
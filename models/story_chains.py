@@ -0,0 +1,155 @@
+"""长线剧情链的逐局状态记录（飞贼 / 木偶 / 月蚀）。
+
+每条链一个 ``__slots__`` 记录，由 ``StorySystem`` 持有（``story.elf`` / ``story.puppet`` / ``story.moon``），
+随 StorySystem 一起 pickle，也会被事件预演的状态日志记录与回滚。
+字段赋值会推进所属 StorySystem 的 flag_version，并按旧属性名（如 ``elf_relation``）上报终局门前置输入位，
+与此前直接在 StorySystem 上 setattr 的失效语义一致。
+
+旧属性名（``story.elf_relation``、``story.puppet_evil_value`` 等）仍作为 StorySystem 的属性保留，
+读写都落到对应记录上，见 ``CHAIN_ATTR_ALIASES``；终局门条件表按旧名引用这些输入。
+
+发条 / 梦境 / 假面剧场三条链除 choice flag 外没有额外状态，不单独建记录。
+"""
+from typing import Any, Dict, Tuple
+
+from models.story_gate_graph import STORY_GATE_GRAPH
+
+PUPPET_DEFAULT_EVIL_VALUE = 55
+PUPPET_KIND_PERSONA_NAME = "绒心"
+PUPPET_DARK_PERSONA_NAME = "裂齿"
+
+
+class ChainState:
+    """链状态记录基类：子类在 FIELDS 中按 (字段名, 旧属性名, 默认值) 声明字段。"""
+
+    __slots__ = ("_owner",)
+    FIELDS: Tuple[Tuple[str, str, Any], ...] = ()
+    # 字段名 -> 终局门前置输入位（按旧属性名查 STORY_GATE_GRAPH.attr_bits）
+    _GATE_BITS: Dict[str, int] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._GATE_BITS = {name: STORY_GATE_GRAPH.attr_bits.get(legacy, 0) for name, legacy, _ in cls.FIELDS}
+
+    def __init__(self, owner: Any = None):
+        object.__setattr__(self, "_owner", owner)
+        for name, _, default in self.FIELDS:
+            object.__setattr__(self, name, list(default) if isinstance(default, list) else default)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        owner = self._owner
+        if owner is not None:
+            owner.bump_flag_version(self._GATE_BITS.get(name, 0))
+
+    def __getstate__(self):
+        return (self._owner, {name: getattr(self, name) for name, _, _ in self.FIELDS})
+
+    def __setstate__(self, state):
+        owner, values = state
+        object.__setattr__(self, "_owner", owner)
+        for name, _, default in self.FIELDS:
+            object.__setattr__(self, name, values.get(name, default))
+
+    def as_dict(self) -> Dict[str, Any]:
+        """按旧属性名导出，便于调试与对比。"""
+        return {legacy: getattr(self, name) for name, legacy, _ in self.FIELDS}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name, _, _ in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+class ElfChainState(ChainState):
+    """银羽飞贼链：关系值（-6~6）、起止状态、中段事件队列、钥匙与终局结果。"""
+
+    __slots__ = ("relation", "started", "ended", "middle_queue", "key_obtained", "final_outcome")
+    FIELDS = (
+        ("relation", "elf_relation", 0),
+        ("started", "elf_chain_started", False),
+        ("ended", "elf_chain_ended", False),
+        ("middle_queue", "elf_middle_queue", []),
+        ("key_obtained", "elf_key_obtained", False),
+        ("final_outcome", "elf_final_outcome", ""),
+    )
+
+    def adjust_relation(self, delta: int) -> int:
+        self.relation = max(-6, min(6, int(self.relation) + int(delta)))
+        return self.relation
+
+
+class PuppetChainState(ChainState):
+    """木偶链：邪恶值（0~100，未开始追踪时为 None）、人格名、支线登记、终战结果与巡游状态。"""
+
+    __slots__ = (
+        "evil_value",
+        "kind_persona_name",
+        "dark_persona_name",
+        "side_registered",
+        "final_outcome",
+        "patrol_state",
+        "patrol_note",
+    )
+    FIELDS = (
+        ("evil_value", "puppet_evil_value", None),
+        ("kind_persona_name", "puppet_kind_persona_name", PUPPET_KIND_PERSONA_NAME),
+        ("dark_persona_name", "puppet_dark_persona_name", PUPPET_DARK_PERSONA_NAME),
+        ("side_registered", "puppet_side_registered", False),
+        ("final_outcome", "puppet_final_outcome", ""),
+        ("patrol_state", "puppet_patrol_state", ""),
+        ("patrol_note", "puppet_patrol_note", ""),
+    )
+
+    def evil(self) -> int:
+        """夹取到 0~100 的邪恶值；尚未追踪或非法时取默认 55。"""
+        try:
+            value = int(self.evil_value if self.evil_value is not None else PUPPET_DEFAULT_EVIL_VALUE)
+        except (TypeError, ValueError):
+            return PUPPET_DEFAULT_EVIL_VALUE
+        return max(0, min(100, value))
+
+    def adjust_evil(self, delta: int) -> int:
+        self.evil_value = max(0, min(100, self.evil() + int(delta)))
+        return self.evil_value
+
+
+class MoonChainState(ChainState):
+    """月蚀悬赏链：中继战斗取得的旧日记来源。"""
+
+    __slots__ = ("diary_source",)
+    FIELDS = (("diary_source", "moon_bounty_diary_source", ""),)
+
+
+CHAIN_STATE_CLASSES: Dict[str, type] = {
+    "elf": ElfChainState,
+    "puppet": PuppetChainState,
+    "moon": MoonChainState,
+}
+
+# 旧属性名 -> (StorySystem 上的记录名, 记录字段名)
+CHAIN_ATTR_ALIASES: Dict[str, Tuple[str, str]] = {
+    legacy: (chain, name)
+    for chain, state_cls in CHAIN_STATE_CLASSES.items()
+    for name, legacy, _ in state_cls.FIELDS
+}
+
+
+def _alias_property(legacy: str, chain: str, name: str) -> property:
+    def getter(story):
+        value = getattr(getattr(story, chain), name)
+        if value is None:
+            # 未追踪的可选字段表现为「属性不存在」，保持 getattr(story, 旧名, 默认值) 的回退语义
+            raise AttributeError(legacy)
+        return value
+
+    def setter(story, value):
+        setattr(getattr(story, chain), name, value)
+
+    return property(getter, setter, doc=f"兼容旧属性名：story.{chain}.{name}")
+
+
+def install_chain_aliases(story_cls: type) -> type:
+    """在 StorySystem 类上挂载旧属性名的读写代理。"""
+    for legacy, (chain, name) in CHAIN_ATTR_ALIASES.items():
+        setattr(story_cls, legacy, _alias_property(legacy, chain, name))
+    return story_cls
@@ -0,0 +1,471 @@
+"""终局门依赖图：import 时把 ``story_gates.PRE_FINAL_GATE_CONDITIONS`` 编译为显式图。
+
+- 静态分析：按条件的析取范式检查矛盾（必需/禁止同一原子、数值区间为空）、
+  无人产出也未在 ``models.story_flags`` 登记的原子、上游不可达的 followup 门，以及门之间的硬依赖环。
+- 运行时：为每个门预计算前置输入位掩码（``input_mask``），门据此订阅 flag / tag / 剧情属性 / 事件计数；
+  ``StorySystem`` 在这些输入变化时只作废订阅了它们的门的条件缓存，调度函数只重算被作废的门。
+
+``python -m models.story_gate_graph`` 打印分析报告。
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+import models.story_flags as story_flags
+import models.story_gates as story_gates
+
+GATE_PHASES = ("pre_ending", "ending", "followup")
+ATOM_KINDS = ("tag", "flag", "attr", "counter")
+
+_COMPARE_OPS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+_NEGATED_OPS = {"<": ">=", "<=": ">", ">": "<=", ">=": "<", "==": "!=", "!=": "=="}
+
+
+@dataclass(frozen=True)
+class CompiledGate:
+    """单个终局门的编译结果。"""
+
+    gate_key: str
+    consequence_id: str
+    phase: str
+    condition: Any
+    inputs: FrozenSet[str]
+    input_mask: int
+    produces: FrozenSet[str]
+    followups: Tuple[str, ...]
+    parents: Tuple[str, ...]
+
+    def is_condition_met(self, story: Any, controller: Any = None) -> bool:
+        """按声明条件求值（不含 pending/consumed 检查）；无条件的 followup 门恒为 True。"""
+        if self.condition is None:
+            return True
+        return evaluate_condition(self.condition, story, controller)
+
+
+@dataclass(frozen=True)
+class StoryGateGraph:
+    """编译后的终局门图：门记录、输入位分配、边与静态分析结果。"""
+
+    gates: Dict[str, CompiledGate]
+    input_bits: Dict[str, int]
+    flag_bits: Dict[str, int]
+    tag_bits: Dict[str, int]
+    attr_bits: Dict[str, int]
+    counter_bits: Dict[str, int]
+    # 全部事件计数输入位（计数表整体替换时据此作废）
+    counter_mask: int
+    all_inputs_mask: int
+    edges: Tuple[Tuple[str, str, str], ...]
+    unreachable: Dict[str, str]
+    cycles: Tuple[Tuple[str, ...], ...]
+
+    def mask_for(self, gate_keys: Iterable[str]) -> int:
+        mask = 0
+        for gate_key in gate_keys:
+            gate = self.gates.get(gate_key)
+            mask |= gate.input_mask if gate is not None else self.all_inputs_mask
+        return mask
+
+
+# ---------------------------------------------------------------------------
+# 条件求值
+# ---------------------------------------------------------------------------
+
+
+def _metric_value(story: Any, attr_name: str, domain: Optional[Mapping]) -> Any:
+    default = domain.get("default") if domain else None
+    value = getattr(story, attr_name, default)
+    if domain and "range" in domain:
+        low, high = domain["range"]
+        try:
+            return max(low, min(high, int(value)))
+        except (TypeError, ValueError):
+            return default
+    if domain and "values" in domain:
+        return str(value if value is not None else "").strip()
+    return value
+
+
+def evaluate_condition(condition: Any, story: Any, controller: Any = None) -> bool:
+    """对声明式条件求值；与 StorySystem / models.events 中的谓词语义一致。"""
+    if isinstance(condition, str):
+        kind, _, name = condition.partition(":")
+        if kind == "tag":
+            return name in getattr(story, "story_tags", ())
+        if kind == "flag":
+            return name in getattr(story, "choice_flags", ())
+        if kind == "attr":
+            return bool(getattr(story, name, False))
+        if kind == "counter":
+            owner = controller if controller is not None else getattr(story, "controller", None)
+            counts = getattr(owner, "event_trigger_counts", None) or {}
+            return int(counts.get(name, 0)) > 0
+        raise ValueError(f"unknown gate atom: {condition!r}")
+    head = condition[0]
+    if head == "all":
+        return all(evaluate_condition(c, story, controller) for c in condition[1])
+    if head == "any":
+        return any(evaluate_condition(c, story, controller) for c in condition[1])
+    if head == "not":
+        return not evaluate_condition(condition[1], story, controller)
+    if head == "cmp":
+        _, attr_name, op, value = condition
+        domain = story_gates.GATE_METRIC_DOMAINS.get(attr_name)
+        return bool(_COMPARE_OPS[op](_metric_value(story, attr_name, domain), value))
+    raise ValueError(f"unknown gate condition node: {condition!r}")
+
+
+def describe_condition(condition: Any) -> str:
+    """把声明式条件渲染成简短文本（调度轨迹用）。"""
+    if isinstance(condition, str):
+        return condition
+    head = condition[0]
+    if head == "all":
+        return "(" + " 且 ".join(describe_condition(c) for c in condition[1]) + ")"
+    if head == "any":
+        return "(" + " 或 ".join(describe_condition(c) for c in condition[1]) + ")"
+    if head == "not":
+        return "非 " + describe_condition(condition[1])
+    _, attr_name, op, value = condition
+    return f"{attr_name} {op} {value!r}"
+
+
+def explain_condition(condition: Any, story: Any, controller: Any = None) -> List[str]:
+    """列出当前状态下未满足的子句；条件成立时返回空列表。"""
+    if evaluate_condition(condition, story, controller):
+        return []
+    if isinstance(condition, str):
+        return [f"缺少 {condition}"]
+    head = condition[0]
+    if head == "all":
+        unmet: List[str] = []
+        for child in condition[1]:
+            unmet.extend(explain_condition(child, story, controller))
+        return unmet
+    if head == "not":
+        return [f"不得满足 {describe_condition(condition[1])}"]
+    if head == "cmp":
+        attr_name = condition[1]
+        current = _metric_value(story, attr_name, story_gates.GATE_METRIC_DOMAINS.get(attr_name))
+        return [f"{describe_condition(condition)}（当前 {current!r}）"]
+    return [f"需满足其一 {describe_condition(condition)}"]
+
+
+# ---------------------------------------------------------------------------
+# 编译：输入收集、析取范式与可满足性
+# ---------------------------------------------------------------------------
+
+
+def _validate_condition(condition: Any, gate_key: str) -> None:
+    if isinstance(condition, str):
+        kind, sep, name = condition.partition(":")
+        if not sep or kind not in ATOM_KINDS or not name:
+            raise ValueError(f"{gate_key}: invalid atom {condition!r}")
+        return
+    if not isinstance(condition, tuple) or not condition:
+        raise ValueError(f"{gate_key}: invalid condition {condition!r}")
+    head = condition[0]
+    if head in ("all", "any"):
+        for child in condition[1]:
+            _validate_condition(child, gate_key)
+    elif head == "not":
+        _validate_condition(condition[1], gate_key)
+    elif head == "cmp":
+        if len(condition) != 4 or condition[2] not in _COMPARE_OPS:
+            raise ValueError(f"{gate_key}: invalid comparison {condition!r}")
+    else:
+        raise ValueError(f"{gate_key}: unknown condition node {head!r}")
+
+
+def _collect_inputs(condition: Any, out: set) -> None:
+    if condition is None:
+        return
+    if isinstance(condition, str):
+        out.add(condition)
+        return
+    head = condition[0]
+    if head in ("all", "any"):
+        for child in condition[1]:
+            _collect_inputs(child, out)
+    elif head == "not":
+        _collect_inputs(condition[1], out)
+    elif head == "cmp":
+        out.add(f"attr:{condition[1]}")
+
+
+def _to_dnf(condition: Any, negate: bool = False) -> List[Tuple]:
+    """转为析取范式：返回合取项列表，每项为文字元组 ("atom", 原子, 是否为正) / ("cmp", 属性, 运算符, 值)。"""
+    if isinstance(condition, str):
+        return [(("atom", condition, not negate),)]
+    head = condition[0]
+    if head == "not":
+        return _to_dnf(condition[1], not negate)
+    if head == "cmp":
+        _, attr_name, op, value = condition
+        return [(("cmp", attr_name, _NEGATED_OPS[op] if negate else op, value),)]
+    children = [_to_dnf(child, negate) for child in condition[1]]
+    conjunctive = (head == "all") != negate
+    if conjunctive:
+        terms: List[Tuple] = [()]
+        for child_terms in children:
+            terms = [left + right for left, right in product(terms, child_terms)]
+        return terms
+    return [term for child_terms in children for term in child_terms]
+
+
+def _metric_candidates(attr_name: str, values: Iterable[Any], domains: Mapping[str, Mapping]) -> List[Any]:
+    domain = domains.get(attr_name) or {}
+    if "values" in domain:
+        return list(dict.fromkeys(tuple(domain["values"]) + tuple(values)))
+    candidates = set()
+    if "default" in domain:
+        candidates.add(domain["default"])
+    for value in values:
+        candidates.update((value - 1, value, value + 1))
+    if "range" in domain:
+        low, high = domain["range"]
+        candidates.update((low, high))
+        candidates = {c for c in candidates if low <= c <= high}
+    return sorted(candidates)
+
+
+def _term_conflict(term: Tuple, unavailable: FrozenSet[str], domains: Mapping[str, Mapping]) -> Optional[str]:
+    """合取项不可满足时返回原因，否则返回 None。"""
+    positive = {lit[1] for lit in term if lit[0] == "atom" and lit[2]}
+    negative = {lit[1] for lit in term if lit[0] == "atom" and not lit[2]}
+    both = sorted(positive & negative)
+    if both:
+        return f"同时要求并禁止 {both[0]}"
+    missing = sorted(positive & unavailable)
+    if missing:
+        return f"依赖无法产生的 {missing[0]}"
+    comparisons: Dict[str, List[Tuple[str, Any]]] = {}
+    for lit in term:
+        if lit[0] == "cmp":
+            comparisons.setdefault(lit[1], []).append((lit[2], lit[3]))
+    for attr_name, checks in comparisons.items():
+        candidates = _metric_candidates(attr_name, (value for _, value in checks), domains)
+        if not any(all(_COMPARE_OPS[op](c, value) for op, value in checks) for c in candidates):
+            desc = " 且 ".join(f"{attr_name} {op} {value!r}" for op, value in checks)
+            return f"取值域内无解：{desc}"
+    return None
+
+
+def _unsatisfiable_reason(
+    dnf: List[Tuple], unavailable: FrozenSet[str], domains: Mapping[str, Mapping]
+) -> Optional[str]:
+    reasons = []
+    for term in dnf:
+        reason = _term_conflict(term, unavailable, domains)
+        if reason is None:
+            return None
+        reasons.append(reason)
+    return reasons[0] if len(set(reasons)) == 1 else "所有分支均不可满足：" + "；".join(dict.fromkeys(reasons))
+
+
+def _positive_atoms(dnf: List[Tuple]) -> FrozenSet[str]:
+    return frozenset(lit[1] for term in dnf for lit in term if lit[0] == "atom" and lit[2])
+
+
+def _strongly_connected(nodes: Iterable[str], adjacency: Mapping[str, Iterable[str]]) -> List[List[str]]:
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: set = set()
+    components: List[List[str]] = []
+
+    def visit(node: str) -> None:
+        index[node] = low[node] = len(index)
+        stack.append(node)
+        on_stack.add(node)
+        for nxt in adjacency.get(node, ()):
+            if nxt not in index:
+                visit(nxt)
+                low[node] = min(low[node], low[nxt])
+            elif nxt in on_stack:
+                low[node] = min(low[node], index[nxt])
+        if low[node] == index[node]:
+            component = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component.append(member)
+                if member == node:
+                    break
+            components.append(component)
+
+    for node in nodes:
+        if node not in index:
+            visit(node)
+    return components
+
+
+def compile_gate_graph(
+    conditions: Optional[Mapping[str, Mapping]] = None,
+    gate_config: Optional[Mapping[str, Mapping]] = None,
+    registered_atoms: Optional[Iterable[str]] = None,
+    metric_domains: Optional[Mapping[str, Mapping]] = None,
+) -> StoryGateGraph:
+    """编译门条件表；声明本身有误（未知门键、非法原子）直接抛 ValueError，不可达与环写入结果供报告。"""
+    conditions = story_gates.PRE_FINAL_GATE_CONDITIONS if conditions is None else conditions
+    gate_config = story_gates.PRE_FINAL_GATE_STORY_CONFIG if gate_config is None else gate_config
+    domains = story_gates.GATE_METRIC_DOMAINS if metric_domains is None else metric_domains
+    if registered_atoms is None:
+        registered_atoms = story_flags.frozen_choice_values(vars(story_flags))
+    registered = frozenset(registered_atoms)
+
+    missing = sorted(set(gate_config) - set(conditions))
+    if missing:
+        raise ValueError(f"gates without condition spec: {missing}")
+    for gate_key, spec in conditions.items():
+        if gate_key not in gate_config:
+            raise ValueError(f"condition spec for unknown gate: {gate_key}")
+        if spec.get("phase") not in GATE_PHASES:
+            raise ValueError(f"{gate_key}: invalid phase {spec.get('phase')!r}")
+        if spec.get("condition") is not None:
+            _validate_condition(spec["condition"], gate_key)
+        for atom in spec.get("produces", ()):
+            _validate_condition(atom, gate_key)
+        for followup in spec.get("followups", ()):
+            if followup not in conditions:
+                raise ValueError(f"{gate_key}: unknown followup gate {followup!r}")
+
+    def is_external(atom: str) -> bool:
+        kind, _, name = atom.partition(":")
+        return kind in ("attr", "counter") or name in registered
+
+    gate_inputs: Dict[str, FrozenSet[str]] = {}
+    for gate_key, spec in conditions.items():
+        found: set = set()
+        _collect_inputs(spec.get("condition"), found)
+        gate_inputs[gate_key] = frozenset(found)
+    all_inputs = sorted(set().union(*gate_inputs.values()))
+    input_bits = {atom: 1 << i for i, atom in enumerate(all_inputs)}
+    bits_by_kind: Dict[str, Dict[str, int]] = {kind: {} for kind in ATOM_KINDS}
+    for atom, bit in input_bits.items():
+        kind, _, name = atom.partition(":")
+        bits_by_kind[kind][name] = bit
+
+    parents: Dict[str, List[str]] = {gate_key: [] for gate_key in conditions}
+    for gate_key, spec in conditions.items():
+        for followup in spec.get("followups", ()):
+            parents[followup].append(gate_key)
+    producers: Dict[str, List[str]] = {}
+    for gate_key, spec in conditions.items():
+        for atom in spec.get("produces", ()):
+            producers.setdefault(atom, []).append(gate_key)
+
+    dnfs = {
+        gate_key: _to_dnf(spec["condition"]) if spec.get("condition") is not None else [()]
+        for gate_key, spec in conditions.items()
+    }
+
+    edges: List[Tuple[str, str, str]] = []
+    hard_deps: Dict[str, set] = {gate_key: set() for gate_key in conditions}
+    for gate_key, spec in conditions.items():
+        for followup in spec.get("followups", ()):
+            edges.append((gate_key, followup, "followup"))
+        for atom in sorted(_positive_atoms(dnfs[gate_key])):
+            for producer in producers.get(atom, ()):
+                edges.append((producer, gate_key, atom))
+                if not is_external(atom):
+                    hard_deps[producer].add(gate_key)
+
+    # 可达性不动点：外部可产生的原子 + 已可达门的产出
+    producible = set()
+    reachable: set = set()
+    reasons: Dict[str, str] = {}
+    changed = True
+    while changed:
+        changed = False
+        for gate_key, spec in conditions.items():
+            if gate_key in reachable:
+                continue
+            if spec["phase"] == "followup" and not any(p in reachable for p in parents[gate_key]):
+                reasons[gate_key] = "无可达的上游门挂载它" if parents[gate_key] else "没有任何门挂载它"
+                continue
+            needed = _positive_atoms(dnfs[gate_key])
+            unavailable = frozenset(a for a in needed if not is_external(a) and a not in producible)
+            reason = _unsatisfiable_reason(dnfs[gate_key], unavailable, domains)
+            if reason is not None:
+                reasons[gate_key] = reason
+                continue
+            reachable.add(gate_key)
+            reasons.pop(gate_key, None)
+            producible.update(spec.get("produces", ()))
+            changed = True
+
+    cycles = tuple(
+        tuple(sorted(component))
+        for component in _strongly_connected(conditions, hard_deps)
+        if len(component) > 1 or component[0] in hard_deps[component[0]]
+    )
+
+    gates = {}
+    for gate_key, spec in conditions.items():
+        mask = 0
+        for atom in gate_inputs[gate_key]:
+            mask |= input_bits[atom]
+        gates[gate_key] = CompiledGate(
+            gate_key=gate_key,
+            consequence_id=str(gate_config[gate_key].get("consequence_id", "")),
+            phase=spec["phase"],
+            condition=spec.get("condition"),
+            inputs=gate_inputs[gate_key],
+            input_mask=mask,
+            produces=frozenset(spec.get("produces", ())),
+            followups=tuple(spec.get("followups", ())),
+            parents=tuple(parents[gate_key]),
+        )
+
+    return StoryGateGraph(
+        gates=gates,
+        input_bits=input_bits,
+        flag_bits=bits_by_kind["flag"],
+        tag_bits=bits_by_kind["tag"],
+        attr_bits=bits_by_kind["attr"],
+        counter_bits=bits_by_kind["counter"],
+        counter_mask=sum(bits_by_kind["counter"].values()),
+        all_inputs_mask=(1 << len(all_inputs)) - 1,
+        edges=tuple(edges),
+        unreachable={k: reasons[k] for k in conditions if k not in reachable},
+        cycles=cycles,
+    )
+
+
+def format_report(graph: StoryGateGraph) -> str:
+    """人类可读的分析报告：门、前置输入、followup 边、不可达门与依赖环。"""
+    lines = [f"终局门 {len(graph.gates)} 个，前置输入 {len(graph.input_bits)} 项"]
+    for gate in graph.gates.values():
+        lines.append(f"- {gate.gate_key} [{gate.phase}] inputs={len(gate.inputs)}")
+        if gate.followups:
+            lines.append(f"    followups: {', '.join(gate.followups)}")
+    if graph.unreachable:
+        lines.append("不可达门：")
+        lines.extend(f"  {key}: {reason}" for key, reason in graph.unreachable.items())
+    else:
+        lines.append("不可达门：无")
+    if graph.cycles:
+        lines.append("依赖环：")
+        lines.extend("  " + " -> ".join(cycle) for cycle in graph.cycles)
+    else:
+        lines.append("依赖环：无")
+    return "\n".join(lines)
+
+
+STORY_GATE_GRAPH = compile_gate_graph()
+
+
+if __name__ == "__main__":
+    print(format_report(STORY_GATE_GRAPH))
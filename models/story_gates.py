@@ -240,3 +240,194 @@ STAGE_CURTAIN_KIND_PUPPET_DIALOGUE_CONSEQUENCE_ID = _gate_consequence_id(
 )
 DEFAULT_SECOND_GATE_CONSEQUENCE_ID = _gate_consequence_id("default_second_gate_event")
 DEFAULT_FINAL_BOSS_CONSEQUENCE_ID = _gate_consequence_id("default_final_boss_gate")
+
+
+# ---------------------------------------------------------------------------
+# 门条件声明：供 models.story_gate_graph 在 import 时编译为依赖图与前置掩码
+# ---------------------------------------------------------------------------
+# 条件为嵌套元组：原子写作 "tag:<story_tag>" / "flag:<choice_flag>" / "attr:<属性名>"（真值）/
+# "counter:<事件类名>"（controller.event_trigger_counts > 0）；比较写作 compare(属性名, 运算符, 值)。
+# 本表同时是运行时判定的唯一来源：StorySystem / models.events 的门谓词都经 models.story_gate_graph.evaluate_condition 对本表求值。
+
+
+def all_of(*conditions):
+    return ("all", tuple(conditions))
+
+
+def any_of(*conditions):
+    return ("any", tuple(conditions))
+
+
+def not_(condition):
+    return ("not", condition)
+
+
+def compare(attr_name: str, op: str, value):
+    return ("cmp", attr_name, op, value)
+
+
+# 数值/枚举型剧情属性的取值域与默认值（与各 _adjust_* 的夹取范围一致）
+GATE_METRIC_DOMAINS: Dict[str, Dict] = {
+    "elf_relation": {"default": 0, "range": (-6, 6)},
+    "puppet_evil_value": {"default": 55, "range": (0, 100)},
+    "puppet_final_outcome": {"default": "", "values": ("", "defeated", "escaped")},
+}
+
+# 长线起始事件名单：models.events.LONG_EVENT_STARTER_CLASSES 按此从随机事件池取类（story_gates 在编译期使用，不能反向 import 事件包）
+LONG_STORY_STARTER_EVENT_NAMES: Tuple[str, ...] = (
+    "TimePawnshopEvent",
+    "MirrorTheaterEvent",
+    "MoonBountyEvent",
+    "ClockworkBazaarEvent",
+    "DreamWellEvent",
+    "PuppetAbandonmentEvent",
+    "ElfThiefIntroEvent",
+)
+
+_ENDING_COMPLETED = any_of("tag:ending:default_normal_completed", "tag:ending:stage_curtain_completed")
+_ELF_KEY_OBTAINED = any_of("attr:elf_key_obtained", "tag:elf_key_obtained")
+_SCRIPT_AND_PUPPET_DEFEATED = all_of("tag:curtain_call_script_recovered", "tag:ending:puppet_final_defeated")
+_POWER_CURTAIN_READY = all_of(_SCRIPT_AND_PUPPET_DEFEATED, compare("puppet_evil_value", ">", 45))
+LONG_STORY_BRANCH_STARTED = any_of(
+    "attr:elf_chain_started",
+    "tag:puppet_arc_active",
+    *(f"counter:{name}" for name in LONG_STORY_STARTER_EVENT_NAMES),
+)
+
+# phase：pre_ending = 倒数窗口（185 回合起）复查；ending = 第 200 回合结局事件；
+#        followup = 仅由其他门结算后挂载（followups 指向它），condition 为挂载时的额外守卫。
+# produces：结算后写入的原子；followups：结算后可能挂载的门（均为一次性门，互指不构成死锁）。
+PRE_FINAL_GATE_CONDITIONS: Dict[str, Dict] = {
+    "round200_stage_preface": {
+        "phase": "pre_ending",
+        "condition": all_of(
+            not_(_ENDING_COMPLETED),
+            not_("tag:curtain_call_script_recovered"),
+            _ELF_KEY_OBTAINED,
+            "attr:elf_chain_ended",
+            "tag:ending:puppet_final_defeated",
+        ),
+        "produces": (
+            "tag:curtain_call_script_recovered",
+            "flag:curtain_call_script_recovered",
+            "flag:curtain_script_secured",
+            "tag:curtain_call_truth_revealed",
+        ),
+        "followups": ("stage_curtain_kind_puppet_dialogue",),
+    },
+    "puppet_rematch_gate": {
+        "phase": "pre_ending",
+        "condition": all_of(
+            not_(_ENDING_COMPLETED),
+            not_("tag:ending:puppet_rematch_gate_done"),
+            not_("tag:ending:puppet_final_defeated"),
+            any_of(compare("puppet_final_outcome", "==", "escaped"), "tag:ending:puppet_final_escape_recorded"),
+        ),
+        "produces": ("tag:ending:puppet_rematch_gate_pending",),
+        "followups": ("elf_rival_final_gate", "dream_mirror_prelude_gate"),
+    },
+    "elf_rival_final_gate": {
+        "phase": "pre_ending",
+        "condition": all_of("attr:elf_chain_ended", compare("elf_relation", "<=", -4)),
+        "produces": (
+            "tag:ending:elf_rival_final_gate_done",
+            "tag:ending:elf_rival_final_victory",
+            "tag:ending:elf_rival_parted",
+        ),
+        "followups": ("puppet_rematch_gate", "dream_mirror_prelude_gate"),
+    },
+    "dream_mirror_prelude_gate": {
+        "phase": "pre_ending",
+        "condition": all_of(
+            any_of(
+                "flag:dream_well_sealed",
+                "flag:dream_well_sold",
+                all_of(
+                    "flag:dream_well_drank",
+                    any_of("flag:echo_court_redeemed", "flag:echo_court_taxed", "flag:echo_court_trading"),
+                ),
+            ),
+            any_of("flag:mirror_played_hero", "flag:mirror_played_villain", "flag:mirror_tore_script"),
+        ),
+        "produces": ("flag:curtain_prelude_order", "flag:curtain_prelude_freedom", "flag:curtain_prelude_power"),
+        "followups": (),
+    },
+    "puppet_echo_final_gate": {
+        "phase": "ending",
+        "condition": all_of(
+            "tag:ending:puppet_final_defeated",
+            not_(_ELF_KEY_OBTAINED),
+            compare("elf_relation", "<", 2),
+        ),
+        "produces": ("tag:ending:puppet_echo_final_done",),
+        "followups": ("round200_default_first_gate",),
+    },
+    "kind_puppet_dialogue_round200": {
+        "phase": "ending",
+        "condition": all_of(_SCRIPT_AND_PUPPET_DEFEATED, compare("puppet_evil_value", "<=", 45)),
+        "produces": (
+            "tag:ending:stage_curtain_completed",
+            "flag:ending_stage_gate_order",
+            "flag:ending_stage_gate_freedom",
+            "flag:ending_stage_gate_default",
+        ),
+        "followups": ("round200_default_first_gate",),
+    },
+    "power_curtain_dialogue_round200": {
+        "phase": "ending",
+        "condition": _POWER_CURTAIN_READY,
+        "produces": (
+            "tag:ending:stage_curtain_completed",
+            "flag:ending_power_curtain_choice",
+            "flag:ending_power_curtain_choice_default",
+        ),
+        "followups": ("round200_default_first_gate",),
+    },
+    "round200_default_first_gate": {
+        "phase": "ending",
+        "condition": all_of(
+            not_(_ENDING_COMPLETED),
+            not_(_POWER_CURTAIN_READY),
+            not_(LONG_STORY_BRANCH_STARTED),
+        ),
+        "produces": (
+            "flag:ending_default_first_gate_hasty",
+            "flag:ending_default_first_gate_hesitate",
+            "flag:ending_default_first_gate_whatever",
+        ),
+        "followups": ("default_second_gate_event",),
+    },
+    "stage_curtain_kind_puppet_dialogue": {
+        "phase": "followup",
+        "condition": all_of(
+            any_of("tag:curtain_call_script_recovered", "flag:curtain_call_script_recovered"),
+            any_of("tag:ending:puppet_final_defeated", compare("puppet_final_outcome", "==", "defeated")),
+            compare("puppet_evil_value", "<=", 45),
+        ),
+        "produces": (
+            "flag:ending_stage_gate_order",
+            "flag:ending_stage_gate_freedom",
+            "flag:ending_stage_gate_default",
+        ),
+        "followups": ("stage_curtain_gate_event", "round200_default_first_gate"),
+    },
+    "stage_curtain_gate_event": {
+        "phase": "followup",
+        "produces": ("tag:ending:stage_curtain_completed",),
+        "followups": (),
+    },
+    "default_second_gate_event": {
+        "phase": "followup",
+        "produces": (
+            "flag:ending_default_second_gate_left",
+            "flag:ending_default_second_gate_middle",
+            "flag:ending_default_second_gate_right",
+        ),
+        "followups": ("default_final_boss_gate",),
+    },
+    "default_final_boss_gate": {
+        "phase": "followup",
+        "produces": ("tag:ending:default_normal_completed",),
+        "followups": (),
+    },
+}
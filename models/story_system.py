@@ -16,13 +16,24 @@ from models.items import (
     create_random_item,
 )
 import models.story_gates as story_gates
+from models.story_gate_graph import STORY_GATE_GRAPH, evaluate_condition, explain_condition
+from models.weighted_sampling import CumulativeTable
 from models.narrative.elf_rival_grudge import (
     collect_elf_rival_grudge_barks,
     elf_rival_grudge_fillers,
 )
 from models.narrative import revenge_hunters as narrative_revenge
 from models.narrative import story_system_lines as narrative_lines
+from models.narrative.messages import LazyText
 from models.status import StatusName
+from models.story_chains import (
+    CHAIN_ATTR_ALIASES,
+    CHAIN_STATE_CLASSES,
+    ElfChainState,
+    MoonChainState,
+    PuppetChainState,
+    install_chain_aliases,
+)
 
 PRE_FINAL_GATE_STORY_CONFIG = story_gates.PRE_FINAL_GATE_STORY_CONFIG
 ALL_PRE_FINAL_DOOR_TYPES = story_gates.ALL_PRE_FINAL_DOOR_TYPES
@@ -84,6 +95,97 @@ class PendingConsequence:
         return self._flags_match(story_flags)
 
 
+class StoryFlagSet(set):
+    """剧情 flag 集合：实际发生增删时推进所属 StorySystem 的 flag_version，供派生结果缓存失效；
+    若变动的 flag 是终局门的前置输入，同时上报其输入位（见 models.story_gate_graph）。"""
+
+    __slots__ = ("_owner", "_input_bits")
+
+    def __init__(self, iterable: Iterable[str] = (), owner: Any = None, input_bits: Optional[Dict[str, int]] = None):
+        super().__init__(iterable)
+        self._owner = owner
+        self._input_bits = input_bits or {}
+
+    def _touch(self, item: Optional[str] = None) -> None:
+        owner = self._owner
+        if owner is not None:
+            owner.bump_flag_version(self._input_bits.get(item, 0))
+
+    def _touch_changed(self, before: Set[str]) -> None:
+        changed = before.symmetric_difference(self)
+        if not changed:
+            return
+        bits = self._input_bits
+        gate_bits = 0
+        for item in changed:
+            gate_bits |= bits.get(item, 0)
+        owner = self._owner
+        if owner is not None:
+            owner.bump_flag_version(gate_bits)
+
+    def add(self, item: str) -> None:
+        if item not in self:
+            super().add(item)
+            self._touch(item)
+
+    def discard(self, item: str) -> None:
+        if item in self:
+            super().discard(item)
+            self._touch(item)
+
+    def remove(self, item: str) -> None:
+        super().remove(item)
+        self._touch(item)
+
+    def pop(self) -> str:
+        item = super().pop()
+        self._touch(item)
+        return item
+
+    def clear(self) -> None:
+        if self:
+            before = set(self)
+            super().clear()
+            self._touch_changed(before)
+
+    def update(self, *others: Iterable[str]) -> None:
+        before = set(self)
+        super().update(*others)
+        self._touch_changed(before)
+
+    def difference_update(self, *others: Iterable[str]) -> None:
+        before = set(self)
+        super().difference_update(*others)
+        self._touch_changed(before)
+
+    def intersection_update(self, *others: Iterable[str]) -> None:
+        before = set(self)
+        super().intersection_update(*others)
+        self._touch_changed(before)
+
+    def symmetric_difference_update(self, other: Iterable[str]) -> None:
+        before = set(self)
+        super().symmetric_difference_update(other)
+        self._touch_changed(before)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+
+@install_chain_aliases
 class StorySystem:
     """记录历史选择、道德值与后续影响。"""
 
@@ -119,14 +221,136 @@ class StorySystem:
     LOW_MORAL_MONSTERS = {"土匪", "狼人", "食人魔", "冥界使者", "暗影刺客"}
     REVENGE_HUNTER_PROFILES = narrative_revenge.REVENGE_HUNTER_PROFILES
 
+    # 赋值时不推进 flag_version 的属性（版本号、缓存本身与非剧情状态）
+    UNVERSIONED_ATTRS = frozenset(
+        {
+            "flag_version",
+            "_versioned_cache",
+            "_gate_condition_cache",
+            "_gate_counts_stamp",
+            "gate_trace",
+            "pre_final_last_check_round",
+            "controller",
+            "effect_handlers",
+        }
+    )
+    GATE_TRACE_LIMIT = 200
+
     def __init__(self, controller: Any):
+        self.flag_version = 0
+        self._versioned_cache: Dict[str, Tuple[int, Any]] = {}
+        # 终局门条件结果缓存：门按 STORY_GATE_GRAPH 的 input_mask 订阅前置输入，输入变化时仅作废相关门
+        self._gate_condition_cache: Dict[str, bool] = {}
+        # 上次同步时的 (事件计数表, presence_version)：计数表被替换、读档或有事件「是否已触发」变化时作废计数类门
+        self._gate_counts_stamp: Optional[Tuple[Any, Any]] = None
+        # 调试用调度轨迹（enable_gate_trace 开启）；None 时不记录
+        self.gate_trace: Optional[List[Dict[str, Any]]] = None
         self.controller = controller
         self.moral_score = 0
-        self.choice_flags: Set[str] = set()
-        self.story_tags: Set[str] = set()
+        self.choice_flags: Set[str] = StoryFlagSet(owner=self, input_bits=STORY_GATE_GRAPH.flag_bits)
+        self.story_tags: Set[str] = StoryFlagSet(owner=self, input_bits=STORY_GATE_GRAPH.tag_bits)
         self.pending_consequences: Dict[str, PendingConsequence] = {}
         self.consumed_consequences: Set[str] = set()
         self.effect_handlers: Dict[str, Callable[[PendingConsequence, Any], Tuple[bool, Any]]] = {}
+        # 长线剧情链状态记录（见 models.story_chains）；旧属性名 elf_relation 等为其读写代理
+        self.elf = ElfChainState(self)
+        self.puppet = PuppetChainState(self)
+        self.moon = MoonChainState(self)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # flag 集合整体替换时仍需保持可追踪；其余剧情属性赋值同样推进版本。
+        # 链状态的旧属性名（elf_relation、puppet_evil_value 等）写入对应记录，由记录推进版本。
+        if name in ("choice_flags", "story_tags"):
+            bits = STORY_GATE_GRAPH.flag_bits if name == "choice_flags" else STORY_GATE_GRAPH.tag_bits
+            if not isinstance(value, StoryFlagSet):
+                value = StoryFlagSet(value or (), owner=self, input_bits=bits)
+            object.__setattr__(self, name, value)
+            self.bump_flag_version(STORY_GATE_GRAPH.all_inputs_mask)
+            return
+        object.__setattr__(self, name, value)
+        if name in CHAIN_ATTR_ALIASES:
+            return
+        if name in CHAIN_STATE_CLASSES:
+            self.bump_flag_version(STORY_GATE_GRAPH.all_inputs_mask)
+            return
+        if name not in self.UNVERSIONED_ATTRS:
+            self.bump_flag_version(STORY_GATE_GRAPH.attr_bits.get(name, 0))
+
+    def bump_flag_version(self, gate_input_bits: int = 0) -> None:
+        """剧情状态发生变化：推进版本号，使按版本缓存的派生结果失效；gate_input_bits 为受影响的终局门前置输入位。"""
+        object.__setattr__(self, "flag_version", self.flag_version + 1)
+        if gate_input_bits:
+            self._invalidate_gate_inputs(gate_input_bits)
+
+    def _invalidate_gate_inputs(self, gate_input_bits: int) -> None:
+        """作废订阅了这些输入位的终局门条件缓存。"""
+        cache = self._gate_condition_cache
+        if not cache:
+            return
+        gates = STORY_GATE_GRAPH.gates
+        for gate_key in [k for k in cache if gates[k].input_mask & gate_input_bits]:
+            del cache[gate_key]
+
+    def _sync_gate_counter_inputs(self) -> None:
+        """事件计数表与上次同步时不同（整体替换、读档恢复，或任一事件「是否已触发」发生变化）时，作废订阅事件计数的终局门。
+
+        计数表的任何写入路径（含直接赋值、del、pop）都会推进 presence_version；不是 EventTriggerCounts 的普通 dict 无法追踪，每次都重新求值。
+        """
+        counts = getattr(self.controller, "event_trigger_counts", None)
+        version = getattr(counts, "presence_version", None)
+        stamp = self._gate_counts_stamp
+        if version is not None and stamp is not None and stamp[0] is counts and stamp[1] == version:
+            return
+        object.__setattr__(self, "_gate_counts_stamp", (counts, version))
+        self._invalidate_gate_inputs(STORY_GATE_GRAPH.counter_mask)
+
+    def _gate_condition(self, gate_key: str, evaluator: Callable[[], bool]) -> bool:
+        """终局门条件：输入未变化时复用上次结果，否则调用 evaluator 重新求值并缓存。"""
+        self._sync_gate_counter_inputs()
+        cache = self._gate_condition_cache
+        met = cache.get(gate_key)
+        if met is None:
+            met = bool(evaluator())
+            if gate_key in STORY_GATE_GRAPH.gates:
+                cache[gate_key] = met
+        return met
+
+    def enable_gate_trace(self, enabled: bool = True) -> None:
+        """开启/关闭终局门调度轨迹；开启后每次判定记录一条 {round, gate, scheduled, reason}。"""
+        self.gate_trace = [] if enabled else None
+
+    def _trace_gate(self, gate_key: str, scheduled: bool, reason: str) -> None:
+        trace = self.gate_trace
+        if trace is None:
+            return
+        trace.append(
+            {
+                "round": int(getattr(self.controller, "round_count", 0)),
+                "gate": gate_key,
+                "scheduled": scheduled,
+                "reason": reason,
+            }
+        )
+        if len(trace) > self.GATE_TRACE_LIMIT:
+            del trace[: len(trace) - self.GATE_TRACE_LIMIT]
+
+    def _trace_unmet_gate(self, gate_key: str) -> None:
+        """条件未满足：按声明条件列出未满足的子句。"""
+        if self.gate_trace is None:
+            return
+        gate = STORY_GATE_GRAPH.gates.get(gate_key)
+        unmet = explain_condition(gate.condition, self) if gate is not None and gate.condition is not None else []
+        self._trace_gate(gate_key, False, "条件未满足：" + ("；".join(unmet) or "(由事件谓词判定)"))
+
+    def get_versioned_cache(self, cache_key: str, builder: Callable[["StorySystem"], Any]) -> Any:
+        """按 flag_version 缓存 builder(self) 的结果；flag 或剧情属性变化后自动重算。返回值应视为只读。"""
+        version = self.flag_version
+        entry = self._versioned_cache.get(cache_key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = builder(self)
+        self._versioned_cache[cache_key] = (version, value)
+        return value
 
     def _get_progress_stage(self) -> int:
         """按回合与玩家基础攻击估算后续影响强度阶段。"""
@@ -258,32 +482,12 @@ class StorySystem:
         return True
 
     def _has_started_long_story_branch(self) -> bool:
-        """判断是否已开启任意长线分支，用于 200 回合默认结局分流。"""
-        if bool(getattr(self, "elf_chain_started", False)):
-            return True
-        if "puppet_arc_active" in self.story_tags:
-            return True
+        """判断是否已开启任意长线分支，用于 200 回合默认结局分流（条件见 story_gates.LONG_STORY_BRANCH_STARTED）。"""
+        return evaluate_condition(story_gates.LONG_STORY_BRANCH_STARTED, self, self.controller)
 
-        event_counts = getattr(self.controller, "event_trigger_counts", {}) or {}
-        if not isinstance(event_counts, dict) or not event_counts:
-            return False
-        try:
-            from models.events import LONG_EVENT_STARTER_CLASSES
-            starter_names = {event_cls.__name__ for event_cls in LONG_EVENT_STARTER_CLASSES}
-        except Exception:
-            starter_names = {
-                "TimePawnshopEvent",
-                "MirrorTheaterEvent",
-                "MoonBountyEvent",
-                "ClockworkBazaarEvent",
-                "DreamWellEvent",
-                "PuppetAbandonmentEvent",
-                "ElfThiefIntroEvent",
-            }
-        for event_name in starter_names:
-            if int(event_counts.get(event_name, 0)) > 0:
-                return True
-        return False
+    def _declared_gate_met(self, gate_key: str) -> bool:
+        """按 story_gates.PRE_FINAL_GATE_CONDITIONS 中声明的条件求值；门谓词与依赖图共用这一份声明。"""
+        return STORY_GATE_GRAPH.gates[gate_key].is_condition_met(self, self.controller)
 
     # 银羽秘藏（补全谢幕前置）仅当飞贼线收束、有钥匙、击败木偶终战且邪恶值偏低（善良人格主导）时挂载
     PUPPET_LOW_EVIL_FOR_CURTAIN = 45
@@ -296,63 +500,25 @@ class StorySystem:
         """是否满足接管谢幕直通条件：飞贼事件未完结，或完结但关系为普通/恶劣；已击败黑暗木偶；邪恶值中高。（保留供兼容，决策树首分支已改为木偶回声门。）"""
         if "ending:puppet_final_defeated" not in self.story_tags:
             return False
-        try:
-            evil = max(0, min(100, int(getattr(self, "puppet_evil_value", 55))))
-        except (TypeError, ValueError):
-            evil = 55
-        if evil <= self.PUPPET_HIGH_EVIL_FOR_POWER_DIRECT:
+        if self.puppet.evil() <= self.PUPPET_HIGH_EVIL_FOR_POWER_DIRECT:
             return False
-        if not bool(getattr(self, "elf_chain_ended", False)):
+        if not self.elf.ended:
             return True
-        rel = int(getattr(self, "elf_relation", 0))
-        return rel < self.ELF_RELATION_FRIENDLY_THRESHOLD
+        return self.elf.relation < self.ELF_RELATION_FRIENDLY_THRESHOLD
 
     def _is_puppet_echo_gate_ready(self) -> bool:
         """已击败木偶、未拿飞贼钥匙、与飞贼关系普通或不好时，第 200 回合挂载木偶回声怪物门；击败后即兴谢幕。"""
-        if "ending:puppet_final_defeated" not in self.story_tags:
-            return False
-        key_obtained = bool(getattr(self, "elf_key_obtained", False)) or ("elf_key_obtained" in self.story_tags)
-        if key_obtained:
-            return False
-        rel = int(getattr(self, "elf_relation", 0))
-        return rel < self.ELF_RELATION_FRIENDLY_THRESHOLD
+        return self._declared_gate_met("puppet_echo_final_gate")
 
     def _is_kind_puppet_dialogue_ready(self) -> bool:
         """满足「从飞贼宝藏取回剧本、击败木偶最终 Boss、木偶邪恶值较低」时，第 200 回合可挂载与善良木偶对话结局门。与「邪恶值普通或较高」的接管选择门互斥（本项要求 evil ≤ 45）。"""
-        if "curtain_call_script_recovered" not in self.story_tags:
-            return False
-        if "ending:puppet_final_defeated" not in self.story_tags:
-            return False
-        evil = max(0, min(100, int(getattr(self, "puppet_evil_value", 55))))
-        return evil <= self.PUPPET_LOW_EVIL_FOR_CURTAIN
+        return self._declared_gate_met("kind_puppet_dialogue_round200")
 
     def _is_pre_ending_gate_condition_met(self, gate_key: str) -> bool:
         """结局前阻塞事件：按 gate_key 检查前置条件是否满足（仅条件，不包含是否已在 pending/consumed）。"""
-        if gate_key == "round200_stage_preface":
-            if not self._is_stage_curtain_route_ready():
-                return False
-            if "ending:default_normal_completed" in self.story_tags or "ending:stage_curtain_completed" in self.story_tags:
-                return False
-            return True
-        if gate_key == "puppet_rematch_gate":
-            try:
-                from models.events import _should_trigger_puppet_pre_final_gate
-                return bool(_should_trigger_puppet_pre_final_gate(self.controller))
-            except Exception:
-                return False
-        if gate_key == "elf_rival_final_gate":
-            try:
-                from models.events import _should_trigger_elf_rival_pre_final
-                return bool(_should_trigger_elf_rival_pre_final(self.controller))
-            except Exception:
-                return False
-        if gate_key == "dream_mirror_prelude_gate":
-            try:
-                from models.events import _should_trigger_dream_mirror_prelude
-                return bool(_should_trigger_dream_mirror_prelude(self.controller))
-            except Exception:
-                return False
-        return False
+        if gate_key not in self.PRE_FINAL_BLOCKING_GATE_KEYS:
+            return False
+        return self._declared_gate_met(gate_key)
 
     def _is_ending_event_gate(self, gate_key: str) -> bool:
         """是否为结局事件（木偶回声、善良木偶对话、默认第一门、接管谢幕）；此类事件仅到结局回合（第 200 回合）才可挂载/触发。"""
@@ -360,12 +526,7 @@ class StorySystem:
 
     def _is_power_curtain_dialogue_ready(self) -> bool:
         """满足「已拿剧本、已击败木偶、邪恶值普通或较高（> 45）」时，第 200 回合可挂载接管谢幕选择门。与善良木偶对话门互斥（本项要求 evil > 45）。"""
-        if "curtain_call_script_recovered" not in self.story_tags:
-            return False
-        if "ending:puppet_final_defeated" not in self.story_tags:
-            return False
-        evil = max(0, min(100, int(getattr(self, "puppet_evil_value", 55))))
-        return evil > self.PUPPET_HIGH_EVIL_FOR_POWER_DIRECT
+        return self._declared_gate_met("power_curtain_dialogue_round200")
 
     def _build_puppet_echo_lines(self, high_evil: bool = False) -> list:
         """根据玩家在假面剧场、命运乐谱大盗、飞贼、梦境井、发条等事件中的选择，生成木偶回声战每回合的提及台词；high_evil 时用嘲讽语气，否则陈述。"""
@@ -421,10 +582,9 @@ class StorySystem:
         """
         if "curtain_call_script_recovered" in self.story_tags:
             return False
-        key_obtained = bool(getattr(self, "elf_key_obtained", False)) or ("elf_key_obtained" in self.story_tags)
-        if not key_obtained:
+        if not (self.elf.key_obtained or "elf_key_obtained" in self.story_tags):
             return False
-        if not bool(getattr(self, "elf_chain_ended", False)):
+        if not self.elf.ended:
             return False
         if "ending:puppet_final_defeated" not in self.story_tags:
             return False
@@ -435,15 +595,29 @@ class StorySystem:
         现由 ensure_all_pre_ending_blocking_considered 统一调度，本方法保留供单测或兼容调用。"""
         return self._register_single_pre_ending_gate("round200_stage_preface") is not None
 
+    def _gate_consequence_state(self, consequence_id: str) -> Optional[str]:
+        """门的 consequence 已挂载/已结算时返回原因，否则返回 None。"""
+        if not consequence_id:
+            return "未配置 consequence_id"
+        if consequence_id in self.pending_consequences:
+            return "已挂载，等待触发"
+        if consequence_id in self.consumed_consequences:
+            return "已结算"
+        return None
+
     def _register_single_pre_ending_gate(self, gate_key: str) -> Optional[str]:
-        """为单个结局前 gate_key 检查条件并注册 consequence；成功返回 gate_key，否则返回 None。"""
+        """为单个结局前 gate_key 检查条件并注册 consequence；成功返回 gate_key，否则返回 None。
+        条件结果按前置输入缓存，仅在其订阅的 flag / 属性变化后重新求值。"""
         cfg = PRE_FINAL_GATE_STORY_CONFIG.get(gate_key, {})
         if not cfg:
             return None
         consequence_id = str(cfg.get("consequence_id", ""))
-        if not consequence_id or consequence_id in self.pending_consequences or consequence_id in self.consumed_consequences:
+        state = self._gate_consequence_state(consequence_id)
+        if state is not None:
+            self._trace_gate(gate_key, False, state)
             return None
-        if not self._is_pre_ending_gate_condition_met(gate_key):
+        if not self._gate_condition(gate_key, lambda: self._is_pre_ending_gate_condition_met(gate_key)):
+            self._trace_unmet_gate(gate_key)
             return None
         current_round = max(0, int(getattr(self.controller, "round_count", 0)))
         ending_round = int(self.DEFAULT_ENDING_FORCE_ROUND)
@@ -466,9 +640,11 @@ class StorySystem:
             payload=dict(payload) if isinstance(payload, dict) else {},
         )
         if not registered:
+            self._trace_gate(gate_key, False, "register_consequence 未接受")
             return None
         if gate_key == "round200_stage_preface":
             self.story_tags.add("ending:stage_curtain_scheduled")
+        self._trace_gate(gate_key, True, "条件满足，已加入结局前阻塞")
         return gate_key
 
     def ensure_all_pre_ending_blocking_considered(self) -> Tuple[bool, List[str]]:
@@ -479,8 +655,10 @@ class StorySystem:
         ending_round = int(self.DEFAULT_ENDING_FORCE_ROUND)
         window_start = max(0, ending_round - int(self.PRE_FINAL_WINDOW_START_OFFSET))
         if current_round < window_start:
+            self._trace_gate("*", False, f"回合 {current_round} 未到倒数窗口（{window_start}）")
             return False, []
         if "ending:default_normal_completed" in self.story_tags or "ending:stage_curtain_completed" in self.story_tags:
+            self._trace_gate("*", False, "结局已完成")
             return False, []
         registered_keys = []
         for gate_key in self.PRE_FINAL_BLOCKING_GATE_KEYS:
@@ -567,6 +745,9 @@ class StorySystem:
             window_start=window_start,
             ending_round=ending_round,
         ):
+            self._trace_gate(
+                "*", False, f"非复查回合（上次复查 {getattr(self, 'pre_final_last_check_round', None)}）"
+            )
             return False
 
         scheduled_any, _ = self.ensure_all_pre_ending_blocking_considered()
@@ -580,14 +761,19 @@ class StorySystem:
         current_round = max(0, int(getattr(self.controller, "round_count", 0)))
         if current_round < self.DEFAULT_ENDING_FORCE_ROUND:
             return False
-        for gate_key in ("puppet_echo_final_gate", "kind_puppet_dialogue_round200"):
-            if gate_key == "puppet_echo_final_gate" and not self._is_puppet_echo_gate_ready():
-                continue
-            if gate_key == "kind_puppet_dialogue_round200" and not self._is_kind_puppet_dialogue_ready():
+        readiness = {
+            "puppet_echo_final_gate": self._is_puppet_echo_gate_ready,
+            "kind_puppet_dialogue_round200": self._is_kind_puppet_dialogue_ready,
+        }
+        for gate_key, is_ready in readiness.items():
+            if not self._gate_condition(gate_key, is_ready):
+                self._trace_unmet_gate(gate_key)
                 continue
             cfg = PRE_FINAL_GATE_STORY_CONFIG.get(gate_key, {})
             consequence_id = str(cfg.get("consequence_id", ""))
-            if not consequence_id or consequence_id in self.pending_consequences or consequence_id in self.consumed_consequences:
+            state = self._gate_consequence_state(consequence_id)
+            if state is not None:
+                self._trace_gate(gate_key, False, state)
                 continue
             door_type = str(cfg.get("force_door_type", "EVENT"))
             payload = cfg.get("payload", {})
@@ -605,9 +791,15 @@ class StorySystem:
                 payload=dict(payload) if isinstance(payload, dict) else {},
             )
             if registered:
+                self._trace_gate(gate_key, True, "条件满足，已挂载结局事件")
                 return True
+            self._trace_gate(gate_key, False, "register_consequence 未接受")
         return False
 
+    def _is_default_first_gate_ready(self) -> bool:
+        """默认第一门：结局未完成、接管谢幕条件不成立且尚未开启任何长线分支。"""
+        return self._declared_gate_met("round200_default_first_gate")
+
     def ensure_default_normal_ending_schedule(self) -> bool:
         """结局阻塞全部清空后，在第 200 回合挂载结局事件：默认第一门（选择困难症候群）或接管谢幕。木偶回声、善良木偶对话属结局前阻塞，须先清空。"""
         pre_scheduled = self.ensure_pre_final_event_schedule()
@@ -623,15 +815,18 @@ class StorySystem:
         if current_round < self.DEFAULT_ENDING_FORCE_ROUND:
             return False
         # 结局事件（仅两种）：接管谢幕（有剧本+邪恶值高）或 默认第一门
-        if self._is_power_curtain_dialogue_ready():
+        if self._gate_condition("power_curtain_dialogue_round200", self._is_power_curtain_dialogue_ready):
             gate_key = "power_curtain_dialogue_round200"
-        else:
-            if self._has_started_long_story_branch():
-                return False
+        elif self._gate_condition("round200_default_first_gate", self._is_default_first_gate_ready):
             gate_key = "round200_default_first_gate"
+        else:
+            self._trace_unmet_gate("round200_default_first_gate")
+            return False
         cfg = PRE_FINAL_GATE_STORY_CONFIG.get(gate_key, {})
         consequence_id = str(cfg.get("consequence_id", "ending_default_force_gate_round_200"))
-        if consequence_id in self.pending_consequences or consequence_id in self.consumed_consequences:
+        state = self._gate_consequence_state(consequence_id)
+        if state is not None:
+            self._trace_gate(gate_key, False, state)
             return False
         payload = cfg.get("payload", {})
         registered = self.register_consequence(
@@ -649,6 +844,9 @@ class StorySystem:
         )
         if registered:
             self.story_tags.add("ending:default_normal_scheduled")
+            self._trace_gate(gate_key, True, "结局阻塞已清空，已挂载结局事件")
+        else:
+            self._trace_gate(gate_key, False, "register_consequence 未接受")
         return registered
 
     def apply_pre_enter_checks(self, door: Any, choice_round: Optional[int] = None) -> Any:
@@ -760,19 +958,10 @@ class StorySystem:
             if c.effect_key == "force_story_event":
                 w *= GameConfig.FORCE_STORY_EVENT_WEIGHT_BONUS
             weights.append(w)
-        total = sum(weights)
-        if total <= 0:
+        table = CumulativeTable(candidates, weights)
+        if table.total <= 0:
             return door
-        roll = random.uniform(0, total)
-        acc = 0.0
-        chosen = None
-        for c, w in zip(candidates, weights):
-            acc += w
-            if roll <= acc:
-                chosen = c
-                break
-        if chosen is None:
-            chosen = candidates[-1]
+        chosen = table.pick(random.uniform(0, table.total))
         return self._apply_chosen_consequence(chosen=chosen, door=door, fallback_door=door, forced=False)
 
     def _is_in_pre_final_countdown_window(self, round_count: int) -> bool:
@@ -850,9 +1039,7 @@ class StorySystem:
             return
         if delta == 0:
             return
-        current = int(getattr(self, "puppet_evil_value", 55))
-        next_val = max(0, min(100, current + delta))
-        self.puppet_evil_value = next_val
+        next_val = self.puppet.adjust_evil(delta)
         self.story_tags.add(f"puppet_evil_bucket:{(next_val // 10) * 10}")
 
     def _consume_consequence(self, consequence: PendingConsequence) -> None:
@@ -909,7 +1096,7 @@ class StorySystem:
         self.story_tags.add("ending:puppet_echo_final_done")
         self.controller.add_message(narrative_lines.MSG_PUPPET_ECHO_SHATTERED)
         self.controller.add_message(narrative_lines.MSG_PUPPET_ECHO_NO_KEY_SCRIPT)
-        setattr(self.controller, "pending_post_battle_event_key", "ending_puppet_echo_aftermath_event")
+        self.controller.pending_post_battle_event_key = "ending_puppet_echo_aftermath_event"
 
     def _resolve_elf_rival_final_victory(self, monster: Any) -> None:
         """终局前击败飞贼：给出少量终局提示。"""
@@ -918,7 +1105,7 @@ class StorySystem:
         self.story_tags.add("ending:elf_rival_final_victory")
         self.story_tags.add("ending:elf_rival_final_gate_done")
         self.choice_flags.add("ending_elf_rival_final_victory")
-        self.elf_final_outcome = "rival_defeated"
+        self.elf.final_outcome = "rival_defeated"
         self.controller.add_message(narrative_lines.MSG_ELF_RIVAL_VICTORY)
         hint = str(getattr(monster, "story_elf_rival_hint", "")).strip()
         if hint:
@@ -934,7 +1121,7 @@ class StorySystem:
         self.story_tags.add("ending:elf_rival_parted")
         self.story_tags.add("ending:elf_rival_final_gate_done")
         self.choice_flags.add("ending_elf_rival_parted")
-        self.elf_final_outcome = "rival_parted"
+        self.elf.final_outcome = "rival_parted"
         self.controller.add_message(narrative_lines.MSG_ELF_RIVAL_PARTED)
         self._schedule_next_pre_final_gate(after_battle=True, defeated=False)
 
@@ -955,16 +1142,16 @@ class StorySystem:
         self.story_tags.add("moon_bounty_diary_obtained")
         if isinstance(diary_source, str) and diary_source.strip():
             self.story_tags.add(f"moon_bounty_diary_source:{diary_source.strip()}")
-            self.moon_bounty_diary_source = diary_source.strip()
+            self.moon.diary_source = diary_source.strip()
         if isinstance(route, str) and route.strip():
             self.story_tags.add(f"moon_bounty_route:{route.strip()}")
 
     def _resolve_puppet_final_outcome(self) -> None:
-        evil = max(0, min(100, int(getattr(self, "puppet_evil_value", 55))))
+        evil = self.puppet.evil()
         player = getattr(self.controller, "player", None)
         if player is None:
             return
-        self.puppet_final_outcome = "defeated"
+        self.puppet.final_outcome = "defeated"
         self.story_tags.add("ending:puppet_final_defeated")
         low_flags = {"puppet_intro_hide", "puppet_signal_soft", "puppet_kind_echo_trust", "puppet_rift_kind", "puppet_descent_patch"}
         high_flags = {"puppet_intro_blackout", "puppet_intro_decoy", "puppet_signal_resell", "puppet_kind_echo_exploit", "puppet_rift_dark", "puppet_descent_dark_feed", "puppet_descent_cut_emotion"}
@@ -1045,9 +1232,10 @@ class StorySystem:
             return
         self.story_tags.add("ending:puppet_final_escape_recorded")
         self.choice_flags.add("puppet_final_escape")
-        self.puppet_final_outcome = "escaped"
-        self.puppet_patrol_state = "active"
-        self.puppet_patrol_note = "木偶仍在走廊中来回游荡"
+        puppet = self.puppet
+        puppet.final_outcome = "escaped"
+        puppet.patrol_state = "active"
+        puppet.patrol_note = "木偶仍在走廊中来回游荡"
         escape_text = narrative_lines.PUPPET_FINAL_ESCAPE_BODY
         self.controller.add_message(narrative_lines.MSG_PUPPET_FINAL_ESCAPE_FLIGHT)
         self.controller.add_message(escape_text)
@@ -1080,9 +1268,10 @@ class StorySystem:
     def _build_final_ending_meta(self) -> Dict[str, Any]:
         """聚合可交给最终结局展示层的剧情参数。"""
         final_meta: Dict[str, Any] = {}
-        outcome = str(getattr(self, "puppet_final_outcome", "")).strip()
-        patrol_state = str(getattr(self, "puppet_patrol_state", "")).strip()
-        patrol_note = str(getattr(self, "puppet_patrol_note", "")).strip()
+        puppet = self.puppet
+        outcome = str(puppet.final_outcome).strip()
+        patrol_state = str(puppet.patrol_state).strip()
+        patrol_note = str(puppet.patrol_note).strip()
         if outcome:
             final_meta["puppet_final_outcome"] = outcome
         if patrol_state:
@@ -1116,10 +1305,10 @@ class StorySystem:
             return
         if defeated:
             self.controller.add_message(narrative_lines.MSG_ELF_SIDE_ALLY_WIN)
-            self.elf_relation = max(-6, min(6, int(getattr(self, "elf_relation", 0)) + 1))
+            self.elf.adjust_relation(1)
         else:
             self.controller.add_message(narrative_lines.MSG_ELF_SIDE_FLEE)
-            self.elf_relation = max(-6, min(6, int(getattr(self, "elf_relation", 0)) - 1))
+            self.elf.adjust_relation(-1)
 
     def _trigger_moral_influence(self, door: Any) -> Any:
         monster = getattr(door, "monster", None)
@@ -1239,18 +1428,16 @@ class StorySystem:
                 include_item=payload.get("include_item", True),
                 hint=payload.get("hint", "旧事回响"),
             )
-            reward_desc = self._describe_reward(reward_door)
+            reward_text = self._lazy_reward_text(reward_door)
             self.controller.add_message(
                 self._append_effect_values(
-                    self._resolve_message(
-                        payload,
-                        "message",
-                        "你过往的行为被人记住了，对方直接把宝物交给了你。",
-                    ),
-                    f"获得 {reward_desc}",
+                    payload,
+                    "你过往的行为被人记住了，对方直接把宝物交给了你。",
+                    "获得 {reward}",
+                    reward=reward_text,
                 )
             )
-            self._log_effect_result(consequence, f"谢礼是 {reward_desc}")
+            self._log_effect_result(consequence, "谢礼是 {reward}", reward=reward_text)
             return True, reward_door
 
         if effect == "puppet_side_minion":
@@ -1385,34 +1572,34 @@ class StorySystem:
                 old_hp, old_atk = monster.hp, monster.atk
                 monster.hp = max(1, int(monster.hp * hp_ratio))
                 monster.atk = max(1, int(monster.atk * atk_ratio))
+                values = dict(name=monster.name, old_hp=old_hp, hp=monster.hp, old_atk=old_atk, atk=monster.atk)
                 self.controller.add_message(
                     self._append_effect_values(
-                        self._resolve_message(payload, "message", "旧怨者设下伏击，怪物获得强化。"),
-                        f"{monster.name} 生命 {old_hp}->{monster.hp}",
-                        f"攻击 {old_atk}->{monster.atk}",
+                        payload,
+                        "旧怨者设下伏击，怪物获得强化。",
+                        "{name} 生命 {old_hp}->{hp}",
+                        "攻击 {old_atk}->{atk}",
+                        **values,
                     )
                 )
-                self._log_effect_result(
-                    consequence,
-                    f"{monster.name} 的气势暴涨，生命 {old_hp}->{monster.hp}，攻击 {old_atk}->{monster.atk}",
-                )
+                self._log_effect_result(consequence, "{name} 的气势暴涨，生命 {old_hp}->{hp}，攻击 {old_atk}->{atk}", **values)
                 return True, door
             dmg = payload.get("damage", random.randint(5, 12))
             dmg = self._scale_amount(dmg, positive=False, aggressive=True)
             old_hp = self.controller.player.hp
             self.controller.player.take_damage(dmg)
             actual_loss = max(0, old_hp - self.controller.player.hp)
+            values = dict(dmg=dmg, old_hp=old_hp, hp=self.controller.player.hp, loss=actual_loss)
             self.controller.add_message(
                 self._append_effect_values(
-                    self._resolve_message(payload, "message", f"你遭到报复，受到 {dmg} 点伤害。"),
-                    f"生命 {old_hp}->{self.controller.player.hp}",
-                    f"实际损失 {actual_loss}",
+                    payload,
+                    "你遭到报复，受到 {dmg} 点伤害。",
+                    "生命 {old_hp}->{hp}",
+                    "实际损失 {loss}",
+                    **values,
                 )
             )
-            self._log_effect_result(
-                consequence,
-                f"你在伏击里失去 {dmg} 点生命（{old_hp}->{self.controller.player.hp}）",
-            )
+            self._log_effect_result(consequence, "你在伏击里失去 {dmg} 点生命（{old_hp}->{hp}）", **values)
             return True, door
 
         if effect == "guard_reward":
@@ -1426,23 +1613,26 @@ class StorySystem:
             healed = 0
             if heal > 0:
                 healed = self.controller.player.heal(heal)
-            message = self._resolve_message(payload, "message", f"守卫感谢你的协助，奖励了你 {gold} 金币。")
-            if isinstance(message, str):
-                try:
-                    message = message.format(gold=gold, heal=heal, healed=healed)
-                except (KeyError, IndexError, ValueError):
-                    pass
+            values = dict(
+                gold=gold,
+                heal=heal,
+                healed=healed,
+                old_gold=old_gold,
+                new_gold=self.controller.player.gold,
+                old_hp=old_hp,
+                hp=self.controller.player.hp,
+            )
             self.controller.add_message(
                 self._append_effect_values(
-                    message,
-                    f"金币 {old_gold}->{self.controller.player.gold}",
-                    f"生命 {old_hp}->{self.controller.player.hp}",
+                    payload,
+                    "守卫感谢你的协助，奖励了你 {gold} 金币。",
+                    "金币 {old_gold}->{new_gold}",
+                    "生命 {old_hp}->{hp}",
+                    format_message=True,
+                    **values,
                 )
             )
-            self._log_effect_result(
-                consequence,
-                f"你的状态发生变化：金币 {old_gold}->{self.controller.player.gold}，生命 {old_hp}->{self.controller.player.hp}",
-            )
+            self._log_effect_result(consequence, "你的状态发生变化：金币 {old_gold}->{new_gold}，生命 {old_hp}->{hp}", **values)
             return True, door
 
         if effect == "black_market_discount":
@@ -1457,18 +1647,13 @@ class StorySystem:
                 return False, door
             self._queue_shop_ratio(shop_targets, ratio)
             self._apply_shop_ratio(shop_targets, ratio)
-            ratio_text = f"当前商品按约 {max(1, int(ratio * 100))}% 结算"
+            percent = max(1, int(ratio * 100))
             self.controller.add_message(
                 self._append_effect_values(
-                    self._resolve_message(
-                        payload,
-                        "message",
-                        f"商人认出你是熟客同路人，{ratio_text}。",
-                    ),
-                    ratio_text,
+                    payload, "商人认出你是熟客同路人，当前商品按约 {percent}% 结算。", "当前商品按约 {percent}% 结算", percent=percent
                 )
             )
-            self._log_effect_result(consequence, ratio_text)
+            self._log_effect_result(consequence, "当前商品按约 {percent}% 结算", percent=percent)
             return True, door
 
         if effect == "black_market_markup":
@@ -1483,27 +1668,22 @@ class StorySystem:
                 return False, door
             self._queue_shop_ratio(shop_targets, ratio)
             self._apply_shop_ratio(shop_targets, ratio)
-            ratio_text = f"当前商品按约 {max(1, int(ratio * 100))}% 上浮"
+            percent = max(1, int(ratio * 100))
             self.controller.add_message(
                 self._append_effect_values(
-                    self._resolve_message(
-                        payload,
-                        "message",
-                        f"商人认出你惹过他们的人，{ratio_text}。",
-                    ),
-                    ratio_text,
+                    payload, "商人认出你惹过他们的人，当前商品按约 {percent}% 上浮。", "当前商品按约 {percent}% 上浮", percent=percent
                 )
             )
-            self._log_effect_result(consequence, ratio_text)
+            self._log_effect_result(consequence, "当前商品按约 {percent}% 上浮", percent=percent)
             return True, door
 
         if effect == "shrine_blessing":
             if getattr(getattr(door, "enum", None), "name", "") == "TRAP":
                 reward_door = self._make_reward_door(gold=random.randint(25, 65), include_item=False, hint="神佑余辉")
+                reward_text = self._lazy_reward_text(reward_door)
                 self.controller.add_message(
                     self._append_effect_values(
-                        self._resolve_message(payload, "message", "圣坛余辉保护了你，陷阱化作馈赠。"),
-                        f"获得 {self._describe_reward(reward_door)}",
+                        payload, "圣坛余辉保护了你，陷阱化作馈赠。", "获得 {reward}", reward=reward_text
                     )
                 )
                 self._attach_door_extension(
@@ -1515,25 +1695,19 @@ class StorySystem:
                     },
                     apply_on_attach=False,
                 )
-                self._log_effect_result(
-                    consequence,
-                    f"险境被改写成馈赠：{self._describe_reward(reward_door)}",
-                )
+                self._log_effect_result(consequence, "险境被改写成馈赠：{reward}", reward=reward_text)
                 return True, door
             monster = getattr(door, "monster", None)
             if monster:
                 old_atk = monster.atk
                 monster.atk = max(1, int(monster.atk * 0.82))
+                values = dict(name=monster.name, old_atk=old_atk, atk=monster.atk)
                 self.controller.add_message(
                     self._append_effect_values(
-                        self._resolve_message(payload, "message", "你受到神佑，敌人的攻势被压制。"),
-                        f"{monster.name} 攻击 {old_atk}->{monster.atk}",
+                        payload, "你受到神佑，敌人的攻势被压制。", "{name} 攻击 {old_atk}->{atk}", **values
                     )
                 )
-                self._log_effect_result(
-                    consequence,
-                    f"{monster.name} 的攻击被压制（{old_atk}->{monster.atk}）",
-                )
+                self._log_effect_result(consequence, "{name} 的攻击被压制（{old_atk}->{atk}）", **values)
                 return True, door
             return False, door
 
@@ -1546,11 +1720,10 @@ class StorySystem:
             )
             self.controller.add_message(
                 self._append_effect_values(
-                    self._resolve_message(payload, "message", f"诅咒追上了你，陷入虚弱 {duration} 回合。"),
-                    f"虚弱持续 {duration} 回合",
+                    payload, "诅咒追上了你，陷入虚弱 {duration} 回合。", "虚弱持续 {duration} 回合", duration=duration
                 )
             )
-            self._log_effect_result(consequence, f"你陷入虚弱，持续 {duration} 回合")
+            self._log_effect_result(consequence, "你陷入虚弱，持续 {duration} 回合", duration=duration)
             return True, door
 
         if effect == "atk_training":
@@ -1559,17 +1732,17 @@ class StorySystem:
                 delta += 1
             old_atk = self.controller.player._atk
             self.controller.player.change_base_atk(delta)
+            values = dict(old_atk=old_atk, atk=self.controller.player._atk, delta=delta)
             self.controller.add_message(
                 self._append_effect_values(
-                    self._resolve_message(payload, "message", "这段经历让你学会了更狠的出手方式。"),
-                    f"基础攻击 {old_atk}->{self.controller.player._atk}",
-                    f"本次提升 {delta}",
+                    payload,
+                    "这段经历让你学会了更狠的出手方式。",
+                    "基础攻击 {old_atk}->{atk}",
+                    "本次提升 {delta}",
+                    **values,
                 )
             )
-            self._log_effect_result(
-                consequence,
-                f"你的基础攻击提升了（{old_atk}->{self.controller.player._atk}）",
-            )
+            self._log_effect_result(consequence, "你的基础攻击提升了（{old_atk}->{atk}）", **values)
             return True, door
 
         if effect == "lose_gold":
@@ -1577,17 +1750,17 @@ class StorySystem:
             lost = min(self.controller.player.gold, payload.get("amount", random.randint(15, 45)))
             lost = min(self.controller.player.gold, self._scale_amount(lost, positive=False))
             self.controller.player.gold -= lost
+            values = dict(lost=lost, old_gold=old_gold, gold=self.controller.player.gold)
             self.controller.add_message(
                 self._append_effect_values(
-                    self._resolve_message(payload, "message", f"旧账找上门来，你被迫赔了 {lost} 金币。"),
-                    f"金币 {old_gold}->{self.controller.player.gold}",
-                    f"本次损失 {lost}",
+                    payload,
+                    "旧账找上门来，你被迫赔了 {lost} 金币。",
+                    "金币 {old_gold}->{gold}",
+                    "本次损失 {lost}",
+                    **values,
                 )
             )
-            self._log_effect_result(
-                consequence,
-                f"你付出了代价，金币 {old_gold}->{self.controller.player.gold}",
-            )
+            self._log_effect_result(consequence, "你付出了代价，金币 {old_gold}->{gold}", **values)
             return True, door
 
         if effect == "force_story_event":
@@ -1767,7 +1940,7 @@ class StorySystem:
             door_type = getattr(getattr(door, "enum", None), "name", "")
             door_is_monster = door_type == "MONSTER"
             player = getattr(self.controller, "player", None)
-            relation = int(payload.get("relation", getattr(self, "elf_relation", -4)))
+            relation = int(payload.get("relation", self.elf.relation))
             style = str(payload.get("style", "trickster")).strip().lower()
             extensions = payload.get("extensions", [])
             if not isinstance(extensions, list):
@@ -1895,8 +2068,7 @@ class StorySystem:
                 tier=max(3, int(payload.get("tier", 4))),
                 effect_probability=0.0,
             )
-            evil = max(0, min(100, int(getattr(self, "puppet_evil_value", 55))))
-            high_evil = evil > self.PUPPET_HIGH_EVIL_FOR_POWER_DIRECT
+            high_evil = self.puppet.evil() > self.PUPPET_HIGH_EVIL_FOR_POWER_DIRECT
             echo_lines = self._build_puppet_echo_lines(high_evil=high_evil)
             if not echo_lines:
                 echo_lines = ["回声在走廊里重复着你曾走过的路。"] if not high_evil else ["「呵……你做过的事，我可都记得。」"]
@@ -2004,7 +2176,7 @@ class StorySystem:
             dark_flags = set(raw_dark_flags or default_dark_flags)
             kind_score = sum(1 for f in kind_flags if f in story_flags)
             dark_score = sum(1 for f in dark_flags if f in story_flags)
-            stored_evil = getattr(self, "puppet_evil_value", None)
+            stored_evil = self.puppet.evil_value
             try:
                 stored_evil = int(stored_evil) if stored_evil is not None else None
             except (TypeError, ValueError):
@@ -2182,15 +2354,16 @@ class StorySystem:
                 c.player_peak_hp = 800
             if hasattr(c, "player_peak_atk"):
                 c.player_peak_atk = 200
-        self.elf_chain_started = True
-        self.elf_chain_ended = True
-        self.elf_relation = 4
-        self.elf_key_obtained = True
+        elf = self.elf
+        elf.started = True
+        elf.ended = True
+        elf.relation = 4
+        elf.key_obtained = True
         self.story_tags.add("elf_chain_ended")
         self.story_tags.add("elf_key_obtained")
         self.story_tags.add("ending:puppet_final_defeated")
-        self.puppet_final_outcome = "defeated"
-        self.puppet_evil_value = 30
+        self.puppet.final_outcome = "defeated"
+        self.puppet.evil_value = 30
         # 不设置 curtain_call_script_recovered，满足 _is_stage_curtain_route_ready() 中「未取回剧本」条件，185 回合才能挂载银羽秘藏
         # 只清空另外三种结局前倒数事件，不消费银羽秘藏，让 185 回合时由调度把银羽秘藏加入 pending、选宝物门触发
         for cid in (
@@ -2216,9 +2389,10 @@ class StorySystem:
                 c.player_peak_hp = 800
             if hasattr(c, "player_peak_atk"):
                 c.player_peak_atk = 200
-        self.elf_chain_ended = True
-        self.elf_relation = -5
-        self.elf_key_obtained = False
+        elf = self.elf
+        elf.ended = True
+        elf.relation = -5
+        elf.key_obtained = False
         self.story_tags.add("elf_chain_ended")
         self.story_tags.add("elf_outcome:hostile")
         self.story_tags.add("ending_hook:elf_hostile")
@@ -2227,7 +2401,7 @@ class StorySystem:
         self.story_tags.discard("puppet_arc_active")
         self.story_tags.discard("ending:puppet_final_escape_recorded")
         self.story_tags.add("ending:puppet_final_defeated")
-        self.puppet_evil_value = 55
+        self.puppet.evil_value = 55
 
     def setup_test_gate_stage_curtain_power(self) -> None:
         """测试用：将控制器与剧情状态设为「接管谢幕」结局门更容易就绪的前置（不挂载门，仅改状态）。
@@ -2247,9 +2421,10 @@ class StorySystem:
             if hasattr(c, "player_peak_atk"):
                 c.player_peak_atk = 200
 
-        self.elf_chain_ended = True
-        self.elf_relation = 4
-        self.elf_key_obtained = True
+        elf = self.elf
+        elf.ended = True
+        elf.relation = 4
+        elf.key_obtained = True
         self.story_tags.add("elf_chain_ended")
         self.story_tags.add("elf_key_obtained")
         self.story_tags.discard("elf_outcome:hostile")
@@ -2261,7 +2436,7 @@ class StorySystem:
         self.story_tags.discard("puppet_arc_active")
         self.story_tags.discard("ending:puppet_final_escape_recorded")
         self.story_tags.add("ending:puppet_final_defeated")
-        self.puppet_evil_value = 55
+        self.puppet.evil_value = 55
 
     def _build_puppet_battle_state(
         self,
@@ -2676,8 +2851,12 @@ class StorySystem:
         )
 
         self.controller.add_message(
-            narrative_lines.format_puppet_phase2_entrance(
-                old_name, monster.name, burst_heal, int(monster.atk)
+            LazyText(
+                narrative_lines.format_puppet_phase2_entrance,
+                old_name=old_name,
+                new_name=monster.name,
+                burst_heal=burst_heal,
+                atk=int(monster.atk),
             )
         )
         self.controller.add_message(narrative_lines.MSG_PUPPET_PHASE2_THEME)
@@ -2925,15 +3104,16 @@ class StorySystem:
             return damage
         return damage
 
-    def handle_battle_extension_post_player_attack(self, extension: Dict[str, Any], target: Any) -> None:
-        """统一扩展后处理入口。"""
+    def handle_battle_extension_post_player_attack(self, extension: Dict[str, Any], target: Any) -> bool:
+        """统一扩展后处理入口；返回本次是否触发了阶段切换或反制。"""
         if not isinstance(extension, dict):
-            return
+            return False
         ext_type = extension.get("extension_type")
         if ext_type == "puppet_dark_boss":
-            self._try_trigger_puppet_phase_two(extension=extension, target=target)
+            return self._try_trigger_puppet_phase_two(extension=extension, target=target)
         if ext_type == "elf_rival_final_boss":
-            self._try_trigger_elf_rival_counter(extension=extension, target=target)
+            return self._try_trigger_elf_rival_counter(extension=extension, target=target)
+        return False
 
     # 兼容旧接口：若调用方仍直接走 StorySystem，则透传到当前战斗扩展。
     def apply_puppet_combat_modifiers(self, trigger: str, attacker: Any, defender: Any, damage: int) -> int:
@@ -3021,24 +3201,24 @@ class StorySystem:
             counts["monster_attack"] = idx + 1
         return adjusted
 
-    def _try_trigger_elf_rival_counter(self, extension: Dict[str, Any], target: Any) -> None:
-        """玩家攻击后判定银羽的扰敌技。"""
+    def _try_trigger_elf_rival_counter(self, extension: Dict[str, Any], target: Any) -> bool:
+        """玩家攻击后判定银羽的扰敌技；施放时返回 True。"""
         if not target or not bool(getattr(target, "story_elf_rival_final_boss", False)):
-            return
+            return False
         state = extension.get("state")
         if not isinstance(state, dict):
-            return
+            return False
         runtime = state.setdefault("runtime", {})
         counts = runtime.setdefault("trigger_counts", {})
         idx = int(counts.get("post_player_attack", 0))
         turn_cfg = state.get("debuff_turns", [])
         if idx >= len(turn_cfg):
-            return
+            return False
         duration = max(1, int(turn_cfg[idx]))
         mode = str(state.get("debuff_mode", "weak")).strip().lower()
         player = getattr(self.controller, "player", None)
         if player is None:
-            return
+            return False
         effect = StatusName.POISON if mode == "poison" else StatusName.WEAK
         player.apply_status(effect.create_instance(duration=duration, target=player))
         self._elf_rival_speak_next_grudge(state, runtime)
@@ -3049,6 +3229,7 @@ class StorySystem:
         label = "中毒" if effect == StatusName.POISON else "虚弱"
         self.controller.add_message(f"你的节奏被打断，获得{label}（{duration}回合）。")
         counts["post_player_attack"] = idx + 1
+        return True
 
     def _queue_chain_followups(self, consequence: PendingConsequence) -> None:
         """链式扩展端口：某个后续触发后再挂新的后续影响。"""
@@ -3074,15 +3255,21 @@ class StorySystem:
             return random.choice(valid) if valid else fallback
         return msg if isinstance(msg, str) and msg.strip() else fallback
 
-    def _append_effect_values(self, message: str, *parts: str) -> str:
-        detail_parts = [p.strip() for p in parts if isinstance(p, str) and p.strip()]
-        if not detail_parts:
-            return message
-        detail_text = "，".join(detail_parts)
-        base = (message or "").strip()
-        if not base:
-            return f"（本次变化：{detail_text}）"
-        return f"{base}（本次变化：{detail_text}）"
+    def _append_effect_values(
+        self, payload: Dict[str, Any], fallback: str, *parts: str, format_message: bool = False, **values: Any
+    ) -> LazyText:
+        """正文 + 「本次变化」数值；返回 LazyText，日志被读取时才按 values 渲染 fallback / parts 模板。
+
+        payload["message"] 在此立即选定：列表文案会消耗随机数，不能随日志是否被读取而变化。
+        """
+        return LazyText(
+            narrative_lines.render_effect_message,
+            message=self._resolve_message(payload, "message", ""),
+            fallback=fallback,
+            parts=parts,
+            values=values,
+            format_message=format_message,
+        )
 
     def _make_reward_door(self, gold: int, include_item: bool, hint: str = "") -> Any:
         from models.door import DoorEnum
@@ -3102,79 +3289,26 @@ class StorySystem:
             custom = self._resolve_message(consequence.payload, "message", "")
         if custom:
             return custom
+        by_consequence = narrative_lines.TRIGGER_MESSAGE_BY_CONSEQUENCE.get(consequence.consequence_id)
+        if by_consequence:
+            return by_consequence
+        return narrative_lines.TRIGGER_MESSAGE_BY_SOURCE.get(consequence.source_flag, "")
 
-        by_consequence = {
-            "knight_aid_traitor_revenge": "你脑中闪过那名被你救下的骑士，空气里多了一股熟悉的杀意。",
-            "smuggler_report_gang_revenge": "你想起那次举报，巷道深处传来追兵踩碎砂石的声音。",
-            "lost_child_village_gift": "你忽然听见远处有人喊你的名字，像是旧日恩情追上了你。",
-        }
-        if consequence.consequence_id in by_consequence:
-            return by_consequence[consequence.consequence_id]
-
-        by_source = {
-            "knight_aided": "你曾经的善举在此刻回响。",
-            "smuggler_bought_goods": "黑市里那笔交易并没有真正结束。",
-            "smuggler_reported": "你以为早已翻篇的旧账，忽然被人重新翻开。",
-            "lost_child_guided_home": "那次送孩子回家的路，似乎把命运也悄悄改了道。",
-        }
-        if consequence.source_flag in by_source:
-            return by_source[consequence.source_flag]
-
-        return ""
-
-    def _log_effect_result(self, consequence: PendingConsequence, detail: str) -> None:
+    def _log_effect_result(self, consequence: PendingConsequence, detail: str, **values: Any) -> None:
+        """按 consequence 的结果模板记一条日志；给出 values 时 detail 视为模板，与结果模板一起延迟渲染。"""
         # 若 payload 有 log_trigger 或 message（已用于触发文案），此处不再重复
         if self._resolve_message(consequence.payload, "log_trigger", "") or self._resolve_message(consequence.payload, "message", ""):
             return
 
-        cid = consequence.consequence_id
-        effect = consequence.effect_key
-
-        if cid == "knight_aid_traitor_revenge":
-            self.controller.add_message(f"因为你之前救了骑士，现在骑士的死对头{detail}来追杀你了。")
-            return
-        if effect == "black_market_discount":
-            self.controller.add_message(f"你刚踏进店门，掌柜就改了价签：{detail}。")
-            return
-        if effect == "black_market_markup":
-            self.controller.add_message(f"掌柜瞥了你一眼，慢慢把价签往上拨：{detail}。")
-            return
-        if effect == "revenge_ambush":
-            self.controller.add_message(f"旧怨落地成刀，眼前局势骤变：{detail}。")
-            return
-        if effect == "guard_reward":
-            self.controller.add_message(f"你收下了这份迟来的回报：{detail}。")
-            return
-        if effect == "villagers_gift":
-            self.controller.add_message(f"门后没有杀意，只有一份留给你的心意：{detail}。")
-            return
-        if effect == "shrine_blessing":
-            self.controller.add_message(f"那点神性余辉在关键时刻护住了你：{detail}。")
-            return
-        if effect == "shrine_curse":
-            self.controller.add_message(f"你听见耳边低语，诅咒果然还是追了上来：{detail}。")
-            return
-        if effect == "atk_training":
-            self.controller.add_message(f"旧经历在手中成了新招：{detail}。")
-            return
-        if effect == "lose_gold":
-            self.controller.add_message(f"这笔旧账终究要还：{detail}。")
-            return
-        if effect == "force_story_event":
-            return
-        if effect == "stage_curtain_script_vault":
-            return
-        if effect == "treasure_marked_item":
-            self.controller.add_message(f"宝物门里的陈设明显被提前动过手脚：{detail}。")
-            return
-        if effect == "treasure_vanish":
-            self.controller.add_message(f"你只摸到一层冷灰，值钱的东西全没了：{detail}。")
-            return
-        if effect == "default_final_boss":
-            self.controller.add_message(f"终局门后的影子拍着手站起来了：{detail}。")
-            return
-
-        self.controller.add_message(f"命运的回声改写了这一刻：{detail}。")
+        template = narrative_lines.EFFECT_RESULT_BY_CONSEQUENCE.get(consequence.consequence_id)
+        if template is None:
+            template = narrative_lines.EFFECT_RESULT_TEMPLATES.get(
+                consequence.effect_key, narrative_lines.EFFECT_RESULT_DEFAULT
+            )
+        if template:
+            if values:
+                detail = LazyText(detail, **values)
+            self.controller.add_message(LazyText(template, detail=detail))
 
     def _create_story_item(self, item_key: Any):
         if not isinstance(item_key, str):
@@ -3199,15 +3333,11 @@ class StorySystem:
         return factory() if factory else None
 
     def _describe_reward(self, reward_door: Any) -> str:
-        reward = getattr(reward_door, "reward", {})
-        parts = []
-        for key, amount in reward.items():
-            if key == "gold":
-                parts.append(f"{amount}G")
-            else:
-                name = getattr(key, "name", "未知道具")
-                parts.append(f"{name}x{amount}")
-        return ", ".join(parts) if parts else "无"
+        return narrative_lines.describe_reward(getattr(reward_door, "reward", {}))
+
+    def _lazy_reward_text(self, reward_door: Any) -> LazyText:
+        """奖励描述的 LazyText：复制当前奖励字典，日志被读取时才拼接。"""
+        return LazyText(narrative_lines.describe_reward, reward=dict(getattr(reward_door, "reward", {})))
 
     # 追猎怪物池：按回合区间划分，每档内随机选择
     HUNTER_POOL = [
@@ -0,0 +1,184 @@
+"""加权抽样工具：事件池、怪物 tier、剧情后果、商店与掉落共用的权重构造与抽取。
+
+- CumulativeTable：一次性的动态权重（每次抽取前权重都会变，如剧情后果、事件门候选）。
+  只负责累计与二分定位，掷骰由调用方按各自习惯完成（random.uniform(0, total) / random.random() * total），
+  与原先手写的「累加到 roll <= acc 为止」循环选出同一项。
+- AliasTable：静态分布（固定掉落池、给定回合段的 tier 权重），Vose 别名法，建表 O(n)，每次抽取 O(1)。
+- FenwickSampler：权重会按小增量改动的分布（无放回抽样时把抽中项置零），更新与抽取均 O(log n)。
+"""
+from bisect import bisect_left
+import random
+
+
+def _safe_weights(weights):
+    safe = []
+    for weight in weights:
+        try:
+            safe.append(max(0.0, float(weight)))
+        except (TypeError, ValueError):
+            safe.append(0.0)
+    return safe
+
+
+class CumulativeTable:
+    """累计权重表：pick(roll) 返回第一个累计权重 >= roll 的项（roll 取 [0, total]）。"""
+
+    __slots__ = ("items", "cumulative", "total")
+
+    def __init__(self, items, weights):
+        self.items = list(items)
+        cumulative = []
+        acc = 0.0
+        for weight in _safe_weights(weights):
+            acc += weight
+            cumulative.append(acc)
+        self.cumulative = cumulative
+        self.total = acc
+
+    def pick(self, roll):
+        if not self.items:
+            return None
+        index = bisect_left(self.cumulative, roll)
+        if index >= len(self.items):
+            return self.items[-1]
+        return self.items[index]
+
+
+class AliasTable:
+    """Vose 别名表：按权重 O(1) 抽取；权重全为 0 时退化为均匀抽取。"""
+
+    __slots__ = ("items", "_prob", "_alias")
+
+    def __init__(self, items, weights):
+        self.items = tuple(items)
+        n = len(self.items)
+        if n == 0:
+            raise ValueError("AliasTable 需要至少一个候选项")
+        weights = _safe_weights(weights)
+        if len(weights) != n:
+            raise ValueError("候选项与权重数量不一致")
+        total = sum(weights)
+        if total <= 0:
+            weights = [1.0] * n
+            total = float(n)
+
+        scaled = [w * n / total for w in weights]
+        prob = [0.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] = (scaled[g] + scaled[s]) - 1.0
+            (small if scaled[g] < 1.0 else large).append(g)
+        # 浮点误差剩下的列概率视为 1
+        for i in large + small:
+            prob[i] = 1.0
+        self._prob = tuple(prob)
+        self._alias = tuple(alias)
+
+    def sample(self, rng=None):
+        """用一次 rng.random() 同时决定列与硬币。"""
+        u = (rng or random).random() * len(self.items)
+        column = int(u)
+        if column >= len(self.items):
+            column = len(self.items) - 1
+        if u - column < self._prob[column]:
+            return self.items[column]
+        return self.items[self._alias[column]]
+
+    def probabilities(self):
+        """各项被抽中的概率（按 items 顺序），用于校验与调试。"""
+        n = len(self.items)
+        result = [0.0] * n
+        for column in range(n):
+            result[column] += self._prob[column] / n
+            result[self._alias[column]] += (1.0 - self._prob[column]) / n
+        return result
+
+
+class FenwickSampler:
+    """树状数组加权抽样：set_weight 增量更新，find(roll) 返回第一个前缀和 > roll 的下标（同 random.choices）。"""
+
+    __slots__ = ("_tree", "_weights")
+
+    def __init__(self, weights):
+        self._weights = _safe_weights(weights)
+        n = len(self._weights)
+        tree = [0.0] * (n + 1)
+        for i, weight in enumerate(self._weights, start=1):
+            tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def __len__(self):
+        return len(self._weights)
+
+    @property
+    def total(self):
+        total = 0.0
+        i = len(self._weights)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def weight(self, index):
+        return self._weights[index]
+
+    def set_weight(self, index, weight):
+        weight = _safe_weights([weight])[0]
+        delta = weight - self._weights[index]
+        if not delta:
+            return
+        self._weights[index] = weight
+        i = index + 1
+        n = len(self._weights)
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def find(self, roll):
+        n = len(self._weights)
+        pos = 0
+        step = 1 << n.bit_length()
+        remaining = roll
+        while step:
+            nxt = pos + step
+            if nxt <= n and self._tree[nxt] <= remaining:
+                pos = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+        if pos >= n:
+            # 浮点误差落在末尾：取最后一个非零权重
+            pos = n - 1
+            while pos > 0 and self._weights[pos] <= 0:
+                pos -= 1
+        return pos
+
+    def sample(self, rng=None):
+        return self.find((rng or random).random() * self.total)
+
+
+def weighted_sample_without_replacement(items, weights, count, rng=None):
+    """按权重无放回抽取 count 个不重复项；剩余权重全为 0 时改为在剩余项中均匀抽取。"""
+    items = list(items)
+    rng = rng or random
+    sampler = FenwickSampler(weights)
+    selected = []
+    remaining = list(range(len(items)))
+    for _ in range(min(count, len(items))):
+        total = sampler.total
+        if total > 0:
+            index = sampler.find(rng.random() * total)
+        else:
+            index = rng.choice(remaining)
+        remaining.remove(index)
+        sampler.set_weight(index, 0.0)
+        selected.append(items[index])
+    return selected
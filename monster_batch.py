@@ -0,0 +1,237 @@
+# monster_batch.py
+"""批量怪物生成：get_random_monster 的 NumPy 向量化版本，供平衡性扫描与模拟工具一次生成成百万只怪物。
+
+给定回合、玩家属性与已解锁 tier 的数组（或标量，按广播规则对齐），一次返回 tier、物种下标、
+缩放后的 HP / ATK 与效果概率数组。公式与逐只生成完全一致：
+- tier 上限：回合上限（_get_round_limited_max_tier）、已解锁 tier 与 max_tier 三者取小；
+- tier 权重：直接用 models.monster._tier_weights 为全部 (上限, 回合档, 强度档) 组合预先建表；
+- 战力：estimate_player_power 的同一加权公式；
+- 玩家强度缩放：40 回合门槛、4.65 / 2.45 倍率上限、0.75 效果概率上限，见 _apply_player_match_scaling。
+随机数来自独立的 numpy Generator，与对局的全局随机源无关；单只结果与逐只生成不逐位相同，分布一致。
+
+用法：python monster_batch.py --spawns 1000000 --rounds 0 200 --atk 60 --hp 400 --gold 200
+"""
+import argparse
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from models.game_config import GameConfig
+from models.monster import (
+    MATCH_ATK_BONUS_MAX,
+    MATCH_ATK_SCALE_CAP,
+    MATCH_EFFECT_PROBABILITY_CAP,
+    MATCH_HP_BONUS_MAX,
+    MATCH_HP_SCALE_CAP,
+    MATCH_PRESSURE_DIVISOR,
+    MATCH_SCALING_MIN_ROUND,
+    Monster,
+    _default_effect_probability,
+    _tier_weights,
+)
+
+# _get_round_limited_max_tier 的分段：round <= 8 -> 1，<= 18 -> 2，……，> 60 -> 6
+ROUND_TIER_LIMITS = np.array([8, 18, 30, 45, 60])
+
+_MIN_TIER = GameConfig.MONSTER_MIN_TIER
+_MAX_TIER = GameConfig.MONSTER_MAX_TIER
+
+
+def _build_tier_cdf() -> np.ndarray:
+    """cdf[max_tier, late, endgame, strong, tier - 1]：各组合下的 tier 累计概率。"""
+    cdf = np.ones((_MAX_TIER + 1, 2, 2, 2, _MAX_TIER), dtype=np.float64)
+    for max_tier in range(1, _MAX_TIER + 1):
+        for late in (0, 1):
+            for endgame in (0, 1):
+                for strong in (0, 1):
+                    weights = np.zeros(_MAX_TIER)
+                    if max_tier <= 1:
+                        weights[0] = 1.0  # _roll_tier 在上限为 1 时直接返回 1
+                    else:
+                        weights[:max_tier] = _tier_weights(max_tier, bool(late), bool(endgame), bool(strong))
+                    cdf[max_tier, late, endgame, strong] = np.cumsum(weights) / weights.sum()
+    return cdf
+
+
+def _build_species_tables():
+    width = max(len(species) for species in Monster.MONSTER_TYPES.values())
+    counts = np.zeros(_MAX_TIER + 1, dtype=np.int64)
+    base_hp = np.zeros((_MAX_TIER + 1, width), dtype=np.int64)
+    base_atk = np.zeros((_MAX_TIER + 1, width), dtype=np.int64)
+    names = {}
+    for tier, species in Monster.MONSTER_TYPES.items():
+        counts[tier] = len(species)
+        names[tier] = [name for name, _, _ in species]
+        for index, (_, hp, atk) in enumerate(species):
+            base_hp[tier, index] = hp
+            base_atk[tier, index] = atk
+    return counts, base_hp, base_atk, names
+
+
+TIER_CDF = _build_tier_cdf()
+SPECIES_COUNTS, BASE_HP, BASE_ATK, SPECIES_NAMES = _build_species_tables()
+DEFAULT_EFFECT_PROBABILITY = np.array(
+    [0.0] + [_default_effect_probability(tier) for tier in range(1, _MAX_TIER + 1)]
+)
+
+
+@dataclass
+class MonsterBatch:
+    """批量生成结果：各数组长度相同，第 i 项对应第 i 只怪物。"""
+
+    tier: np.ndarray
+    species: np.ndarray
+    hp: np.ndarray
+    atk: np.ndarray
+    effect_probability: np.ndarray
+    power_score: np.ndarray
+    elapsed: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.tier)
+
+    def names(self) -> List[str]:
+        """物种名称列表（逐项查表，仅用于抽查或小批量）。"""
+        return [SPECIES_NAMES[t][s] for t, s in zip(self.tier.tolist(), self.species.tolist())]
+
+    def tier_share(self) -> np.ndarray:
+        """share[t - 1]：tier t 的占比。"""
+        counts = np.bincount(self.tier, minlength=_MAX_TIER + 1)[1:]
+        return counts / float(max(1, len(self)))
+
+
+def round_limited_max_tier(rounds) -> np.ndarray:
+    """_get_round_limited_max_tier 的数组版（回合数不接受 None）。"""
+    return np.searchsorted(ROUND_TIER_LIMITS, np.asarray(rounds), side="left") + 1
+
+
+def estimate_power(rounds, atk=None, hp=None, gold=None) -> np.ndarray:
+    """estimate_player_power 的数组版；atk 为 None 表示没有玩家，只计回合分。"""
+    round_score = np.maximum(0, np.asarray(rounds, dtype=np.int64)) * 2
+    if atk is None:
+        return round_score.astype(np.float64)
+    hp = np.maximum(0, np.asarray(0 if hp is None else hp))
+    gold = np.maximum(0, np.asarray(0 if gold is None else gold))
+    return np.asarray(atk) * 0.15 + hp * 0.08 + np.minimum(gold, 400) * 0.02 + round_score
+
+
+def _clamp_tier(value, default) -> np.ndarray:
+    if value is None:
+        return np.asarray(default)
+    return np.clip(np.asarray(value, dtype=np.int64), _MIN_TIER, _MAX_TIER)
+
+
+def generate_monsters(
+    rounds,
+    player_atk=None,
+    player_hp=None,
+    player_gold=None,
+    unlocked_tier=None,
+    max_tier=None,
+    effect_probability=None,
+    seed: Optional[int] = None,
+) -> MonsterBatch:
+    """按 get_random_monster 的规则批量生成怪物。
+
+    rounds / player_* / unlocked_tier / max_tier / effect_probability 可为标量或数组，按 NumPy 广播对齐；
+    player_atk 为 None 时视为没有玩家（不计玩家战力，也不做强度缩放）。
+    """
+    started = time.perf_counter()
+    has_player = player_atk is not None
+    rounds = np.asarray(rounds, dtype=np.int64)
+    power = estimate_power(rounds, player_atk, player_hp, player_gold)
+    cap = np.minimum(_clamp_tier(max_tier, _MAX_TIER), round_limited_max_tier(rounds))
+    cap = np.minimum(cap, _clamp_tier(unlocked_tier, _MAX_TIER))
+    rounds, power, cap = np.broadcast_arrays(rounds, power, np.maximum(_MIN_TIER, cap))
+    n = rounds.size
+    rounds, power, cap = rounds.ravel(), power.ravel(), cap.ravel()
+    rng = np.random.default_rng(seed)
+
+    # tier：按 (上限, 回合档, 强度档) 取累计概率，逆变换抽样
+    late = (rounds >= 20).astype(int)
+    endgame = (rounds >= 45).astype(int)
+    strong = ((rounds >= 60) & (power >= 140)).astype(int)
+    cdf = TIER_CDF[cap, late, endgame, strong]
+    tier = (cdf <= rng.random(n)[:, None]).sum(axis=1) + 1
+    tier = np.minimum(tier, cap)
+
+    # 物种：该 tier 内等概率
+    species = (rng.random(n) * SPECIES_COUNTS[tier]).astype(np.int64)
+    hp = BASE_HP[tier, species]
+    atk = BASE_ATK[tier, species]
+    if effect_probability is None:
+        effect = DEFAULT_EFFECT_PROBABILITY[tier]
+    else:
+        effect = np.broadcast_to(np.asarray(effect_probability, dtype=np.float64), (n,)).copy()
+
+    if has_player:
+        scaled = np.flatnonzero(np.maximum(0, rounds) >= MATCH_SCALING_MIN_ROUND)
+        pressure = power[scaled] / MATCH_PRESSURE_DIVISOR
+        m = len(scaled)
+        hp_scale = np.minimum(MATCH_HP_SCALE_CAP, rng.uniform(1.0, 1.0 + pressure, m))
+        atk_scale = np.minimum(MATCH_ATK_SCALE_CAP, rng.uniform(1.0, 1.0 + pressure, m))
+        scaled_hp = np.trunc(hp[scaled] * hp_scale + rng.integers(0, MATCH_HP_BONUS_MAX + 1, m) * pressure)
+        scaled_atk = np.trunc(atk[scaled] * atk_scale + rng.integers(0, MATCH_ATK_BONUS_MAX + 1, m) * pressure)
+        hp[scaled] = np.maximum(hp[scaled], scaled_hp.astype(np.int64))
+        atk[scaled] = np.maximum(atk[scaled], scaled_atk.astype(np.int64))
+        effect[scaled] = np.minimum(MATCH_EFFECT_PROBABILITY_CAP, effect[scaled] + pressure * 0.4)
+
+    return MonsterBatch(
+        tier=tier,
+        species=species,
+        hp=hp,
+        atk=atk,
+        effect_probability=effect,
+        power_score=power,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def format_sweep(batch: MonsterBatch, rounds: np.ndarray, band_size: int = 20) -> str:
+    """按回合段汇总 tier 占比与平均 HP / ATK / 效果概率。"""
+    lines = [
+        f"{len(batch)} 只怪物，用时 {batch.elapsed:.2f}s",
+        f"{'回合段':<10}" + "".join(f"{'T' + str(t):>7}" for t in range(1, _MAX_TIER + 1)) + f"{'HP':>10}{'ATK':>8}{'效果':>8}",
+    ]
+    bands = np.maximum(0, rounds) // band_size
+    for band in np.unique(bands):
+        mask = bands == band
+        low = int(band) * band_size
+        counts = np.bincount(batch.tier[mask], minlength=_MAX_TIER + 1)[1:]
+        share = counts / float(mask.sum())
+        cells = "".join(f"{value:>7.1%}" for value in share)
+        lines.append(
+            f"{f'{low}-{low + band_size - 1}':<10}{cells}"
+            f"{batch.hp[mask].mean():>10.1f}{batch.atk[mask].mean():>8.1f}{batch.effect_probability[mask].mean():>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="批量怪物生成：按回合段汇总 tier 分布与缩放后的属性")
+    parser.add_argument("--spawns", type=int, default=1000000)
+    parser.add_argument("--rounds", type=int, nargs=2, default=[0, 200], metavar=("START", "END"))
+    parser.add_argument("--atk", type=float, default=None, help="玩家基础攻击；省略则视为无玩家")
+    parser.add_argument("--hp", type=float, default=0)
+    parser.add_argument("--gold", type=float, default=0)
+    parser.add_argument("--unlocked-tier", type=int, default=None)
+    parser.add_argument("--band-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    rounds = rng.integers(args.rounds[0], args.rounds[1], args.spawns)
+    batch = generate_monsters(
+        rounds,
+        player_atk=args.atk,
+        player_hp=args.hp,
+        player_gold=args.gold,
+        unlocked_tier=args.unlocked_tier,
+        seed=args.seed,
+    )
+    print(format_sweep(batch, rounds, band_size=args.band_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -197,6 +197,9 @@ class DoorScene(Scene):
 class BattleScene(Scene):
     """战斗场景：与当前怪物战斗（攻击/使用道具/逃跑）。"""
 
+    # 自动战斗单次请求最多推进的回合数
+    AUTO_BATTLE_TURN_CAP = 60
+
     def __init__(self, controller):
         super().__init__(controller)
         self.monster = None
@@ -242,11 +245,11 @@ class BattleScene(Scene):
                         self.controller.scene_manager.go_to("ending_summary_scene")
                         return
                     # 若设置了战后事件（如击败木偶回声后的三选一事件门），先进入事件场景
-                    pending_key = getattr(self.controller, "pending_post_battle_event_key", None)
+                    pending_key = self.controller.pending_post_battle_event_key
                     if pending_key:
                         from models.events import get_story_event_by_key
                         event = get_story_event_by_key(pending_key, self.controller)
-                        setattr(self.controller, "pending_post_battle_event_key", None)
+                        self.controller.pending_post_battle_event_key = None
                         if event is not None:
                             self.controller.current_event = event
                             if hasattr(self.controller, "clear_battle_extensions"):
@@ -283,6 +286,35 @@ class BattleScene(Scene):
             if self.controller.player.hp <= 0:
                 self.controller.scene_manager.go_to("game_over_scene")
 
+    def auto_resolve(self, max_turns=None):
+        """自动战斗：连续执行「攻击」回合（与逐次点击攻击走同一套回合逻辑）。
+
+        遇到以下情况停下：怪物被击败（victory）、玩家倒下（defeat）、战斗扩展触发阶段切换或反制（phase_change，
+        如木偶二阶段、银羽扰敌技）、达到回合上限（turn_cap）、或场景因其他原因离开战斗（left）。
+        返回 {"turns": 实际推进回合数, "reason": 停止原因}。
+        """
+        cap = self.AUTO_BATTLE_TURN_CAP if max_turns is None else max(1, int(max_turns))
+        manager = self.controller.scene_manager
+        turns = 0
+        reason = "turn_cap"
+        while turns < cap:
+            if manager.current_scene is not self or self.monster is None:
+                reason = "left"
+                break
+            triggers_before = self.controller.battle_extension_triggers
+            self.handle_choice(0)
+            turns += 1
+            if self.monster.hp <= 0:
+                reason = "victory"
+                break
+            if self.controller.player.hp <= 0 or manager.current_scene is not self:
+                reason = "defeat" if self.controller.player.hp <= 0 else "left"
+                break
+            if self.controller.battle_extension_triggers != triggers_before:
+                reason = "phase_change"
+                break
+        return {"turns": turns, "reason": reason}
+
     def do_use_item(self, p):
         """处理使用道具的逻辑"""
         # 检查是否有可用的战斗物品
@@ -5,15 +5,18 @@ from flask_session import Session
 import random, string, os, time, threading
 import sys
 from models.door import Door
+from models.events.eligibility import EventTriggerCounts
+from models.events.telemetry import EventTelemetry
 from models.monster import Monster, get_random_monster
 from models.player import Player
 from models.status import Status
 from models.shop import Shop
 from models.story_system import StorySystem
 from scenes import Scene, DoorScene, BattleScene, ShopScene, UseItemScene, EndingRollScene, GameOverScene, SceneManager
-from ending_roll import build_ending_roll_lines
+from ending_roll import build_ending_roll_payload
 from models.game_config import GameConfig
 from models.items import ReviveScroll, FlyingHammer, GiantScroll, Barrier
+from models.narrative.messages import LazyText, MessageLog
 
 # -------------------------------
 # 1) Flask 应用初始化
@@ -40,6 +43,17 @@ for arg in sys.argv[1:]:
         TEST_GATE = "stage_curtain_power"
         break
 
+# 事件抽取遥测：启动时通过 --event-telemetry[=抽样率] 开启，所有对局共用一份聚合数据，经 /eventTelemetry 导出
+EVENT_TELEMETRY = None
+for arg in sys.argv[1:]:
+    if arg == "--event-telemetry" or arg.startswith("--event-telemetry="):
+        rate = arg.partition("=")[2].strip()
+        try:
+            EVENT_TELEMETRY = EventTelemetry(sample_rate=float(rate) if rate else 1.0)
+        except ValueError:
+            EVENT_TELEMETRY = EventTelemetry()
+        break
+
 # -------------------------------
 # 2) 控制器及辅助类
 # -------------------------------
@@ -50,6 +64,10 @@ class GameController:
 
     def __init__(self):
         self.game_config = GameConfig()
+        # 事件抽取遥测不随 reset_game 清空，便于跨局累计
+        self.event_telemetry = EVENT_TELEMETRY
+        # 静默模式：不保存任何日志（批量模拟用），见 set_silent_messages
+        self.silent_messages = False
         
         # Initialize game state
         self.reset_game()
@@ -58,12 +76,16 @@ class GameController:
         """重置游戏状态"""
         self.current_monster = None
         self.current_battle_extensions = []
+        self.battle_extension_triggers = 0  # 战斗扩展阶段切换 / 反制的累计次数（自动战斗据此停下）
         self.current_event = None
+        self.pending_post_battle_event_key = None  # 战斗收尾后直接进入的剧情事件键（如木偶回声后的事件门）
         self.game_clear_info = None
+        self.ending_roll_payload = None  # 通关时生成的结局滚动字幕缓存（lines + 预序列化 json）
         self.round_count = 0
-        self.messages = []
+        self.messages = MessageLog(silent=self.silent_messages)
         self.recent_event_classes = []  # 最近触发的事件类名，用于非后续事件门去重
-        self.event_trigger_counts = {}  # 事件触发计数，用于权重衰减与单次事件控制
+        self.event_trigger_counts = EventTriggerCounts()  # 事件触发计数，用于权重衰减与单次事件控制
+        self.event_eligibility_index = None  # 随机事件门资格索引，首次抽事件时按本局计数表建立
         self.door_visit_counts = {"trap": 0, "reward": 0, "monster": 0, "shop": 0, "event": 0}
         self.monsters_defeated = 0
         self.player = Player(self)
@@ -106,14 +128,23 @@ class GameController:
             self.add_message("【测试模式】木偶回声门路线：回合 190，HP 800 / ATK 200，飞贼敌对无钥匙且关系 -5（可触发清算战），木偶已击败+高邪恶值；第 200 回合将挂载木偶回声门。")
 
     def add_message(self, msg):
-        """添加消息到消息列表（同一条连续日志仅保留一份）。"""
-        if isinstance(msg, str):
-            if not self.messages or self.messages[-1] != msg:
-                self.messages.append(msg)
+        """添加消息到消息列表（同一条连续日志仅保留一份）；LazyText 在日志被读取时才渲染。"""
+        messages = self.messages
+        if messages.silent:
+            # 静默模式：不做类型检查与去重，直接计数丢弃
+            messages.suppressed += len(msg) if isinstance(msg, list) else 1
+            return
+        if isinstance(msg, (str, LazyText)):
+            messages.add(msg)
         elif isinstance(msg, list):
             for item in msg:
-                if isinstance(item, str) and (not self.messages or self.messages[-1] != item):
-                    self.messages.append(item)
+                if isinstance(item, (str, LazyText)):
+                    messages.add(item)
+
+    def set_silent_messages(self, silent=True):
+        """开关静默模式：开启后新日志直接丢弃、不做任何渲染，适合无人查看日志的批量模拟。"""
+        self.silent_messages = bool(silent)
+        self.messages.silent = self.silent_messages
 
     def clear_messages(self):
         """清空消息列表"""
@@ -143,7 +174,7 @@ class GameController:
         return adjusted
 
     def on_player_attack_resolved(self, target):
-        """玩家攻击后执行扩展后处理（例如阶段切换）。"""
+        """玩家攻击后执行扩展后处理（例如阶段切换）；有扩展触发时累加 battle_extension_triggers。"""
         extensions = getattr(self, "current_battle_extensions", []) or []
         if not extensions:
             return
@@ -151,7 +182,8 @@ class GameController:
         if story is None or not hasattr(story, "handle_battle_extension_post_player_attack"):
             return
         for ext in extensions:
-            story.handle_battle_extension_post_player_attack(extension=ext, target=target)
+            if story.handle_battle_extension_post_player_attack(extension=ext, target=target):
+                self.battle_extension_triggers += 1
 
     def record_door_visit(self, door_enum_value: str) -> None:
         """记录一次门类型访问，用于结局统计。"""
@@ -173,8 +205,19 @@ class GameController:
             "ending_description": str(ending_description or ""),
             "ending_meta": extra_meta,
         }
+        # 结局已固定：滚动字幕只在此生成一次，之后 getState 轮询直接复用
+        self.ending_roll_payload = build_ending_roll_payload(self)
         self.scene_manager.go_to("ending_summary_scene")
 
+    def get_ending_roll_payload(self):
+        """返回结局滚动字幕（lines + 预序列化 json）；通关时已生成则直接复用。"""
+        payload = getattr(self, "ending_roll_payload", None)
+        if payload is None:
+            payload = build_ending_roll_payload(self)
+            if getattr(self, "game_clear_info", None):
+                self.ending_roll_payload = payload
+        return payload
+
     def update_player_power_peaks(self):
         """记录玩家历史最高生命与攻击，用于 tier 解锁判定。"""
         self.player_peak_hp = max(self.player_peak_hp, self.player.hp)
@@ -257,6 +300,13 @@ def get_game():
 
 games_store = {}
 
+
+def _jsonify_with_fragment(state, key, json_fragment):
+    """序列化 state 并把已序列化好的 JSON 片段原样拼接为 key 字段，避免重复编码不变的大块数据。"""
+    body = app.json.dumps(state)
+    body = f"{body[:-1]},{app.json.dumps(key)}:{json_fragment}}}"
+    return app.response_class(f"{body}\n", mimetype=app.json.mimetype)
+
 @app.route("/")
 def index():
     """渲染游戏主页面。"""
@@ -324,8 +374,9 @@ def get_state():
                 "title": str(clear_info.get("ending_title", "")).strip(),
                 "description": str(clear_info.get("ending_description", "")).strip(),
             }
+        ending_roll_json = None
         if scn and scn.enum and scn.enum.name == "ENDING_ROLL":
-            state["ending_roll_lines"] = build_ending_roll_lines(g)
+            ending_roll_json = g.get_ending_roll_payload()["json"]
         if scn and scn.enum and scn.enum.name == "GAME_OVER":
             state["game_clear"] = bool(getattr(g, "game_clear_info", None))
 
@@ -335,7 +386,9 @@ def get_state():
             # 只有在消息成功发送到前端后才清空
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 g.clear_messages()
-        
+
+        if ending_roll_json is not None:
+            return _jsonify_with_fragment(state, "ending_roll_lines", ending_roll_json)
         return jsonify(state)
     except Exception as e:
         import traceback
@@ -373,6 +426,38 @@ def button_action():
         "log": "\n".join(current_messages) if current_messages else ""
     })
 
+@app.route("/autoBattle", methods=["POST"])
+def auto_battle():
+    """一键自动战斗：服务端连续执行攻击回合，返回停止原因与整段战斗日志。"""
+    g = get_game()
+    scn = g.scene_manager.current_scene
+    if not isinstance(scn, BattleScene):
+        return jsonify({"status": "error", "outcome": None, "log": "当前不在战斗中"}), 400
+    data = request.json or {}
+    try:
+        max_turns = int(data.get("max_turns", BattleScene.AUTO_BATTLE_TURN_CAP))
+    except (TypeError, ValueError):
+        max_turns = BattleScene.AUTO_BATTLE_TURN_CAP
+    max_turns = max(1, min(BattleScene.AUTO_BATTLE_TURN_CAP, max_turns))
+
+    outcome = scn.auto_resolve(max_turns=max_turns)
+
+    current_messages = g.messages.copy()
+    g.clear_messages()
+
+    return jsonify({
+        "status": "success",
+        "outcome": outcome,
+        "log": "\n".join(current_messages) if current_messages else ""
+    })
+
+@app.route("/eventTelemetry")
+def event_telemetry():
+    """导出事件抽取遥测（需以 --event-telemetry 启动）。"""
+    if EVENT_TELEMETRY is None:
+        return jsonify({"error": "事件遥测未开启"}), 404
+    return jsonify(EVENT_TELEMETRY.export())
+
 @app.route("/exitGame", methods=["POST"])
 def exit_game():
     """清除当前会话并关闭服务器进程（开发时慎用）。"""
@@ -302,6 +302,37 @@ async function buttonAction(index) {
   }
 }
 
+async function autoBattle() {
+  // 服务端连续攻击直到分出胜负 / 阶段切换 / 回合上限，一次请求带回整段日志
+  if (actionInProgress) return;
+  actionInProgress = true;
+  SoundSystem.playPlayerAttack();
+  const buttonArea = document.getElementById("buttons");
+  if (buttonArea) buttonArea.style.pointerEvents = "none";
+
+  try {
+    const data = await requestJsonWithRetry("/autoBattle", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({})
+    }, {
+      timeoutMs: REQUEST_TIMEOUT_MS,
+      maxAttempts: 1,
+      context: "自动战斗"
+    });
+    if (data.log) {
+      addLog(data.log);
+    }
+    await getStateAndRender();
+  } catch (err) {
+    console.error("Auto battle error:", err);
+    await catchupStateSync();
+  } finally {
+    actionInProgress = false;
+    if (buttonArea) buttonArea.style.pointerEvents = "auto";
+  }
+}
+
 async function startOver() {
   try {
     const data = await requestJsonWithRetry("/startOver", { method: "POST" }, {
@@ -547,6 +578,13 @@ function renderState(state) {
       btn.onclick = () => buttonAction(idx);
       buttonArea.appendChild(btn);
     });
+    if (sceneInfo.type === "BATTLE") {
+      const autoBtn = document.createElement("button");
+      autoBtn.className = "main-btn";
+      autoBtn.textContent = "自动战斗";
+      autoBtn.onclick = () => autoBattle();
+      buttonArea.appendChild(autoBtn);
+    }
   }
 
   renderSceneEmoji(sceneEmojiDiv, emoji, emojiMarkup);
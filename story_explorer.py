@@ -0,0 +1,402 @@
+# story_explorer.py
+"""剧情分支覆盖探索器：在事件选项与剧情战斗处分叉游戏状态，枚举各选择路径可达的结局。
+
+- 分叉点：EventScene 中有两个及以上选项的事件；带剧情标记的怪物战（击败 / 逃跑）。
+- 分叉点之间由自动驾驶推进：随机选门、买东西、普通战斗一路攻击；默认开启战斗托底（保底 HP/ATK），
+  探索的是剧情分支而不是数值平衡。
+- 同一分叉点上剧情指纹（choice_flags、story_tags、剧情标量属性、pending/consumed 后果）相同的状态只展开一次；
+  beam_width 限制每层保留的状态数，优先保留带来新 flag 的分支。
+- 状态以 pickle 字节在进程池中分发；每条路径用「种子 + 选择路径」重新播种，结果可复现。
+
+用法：python story_explorer.py --seeds 0 1 --beam 48 --depth 40 --workers 4
+"""
+import argparse
+import os
+import pickle
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+from models.story_chains import CHAIN_STATE_CLASSES
+
+ENDING_GAME_OVER = "game_over"
+ENDING_ROUND_LIMIT = "round_limit"
+ENDING_STALLED = "stalled"
+
+# 带这些属性的怪物参与剧情结算（resolve_battle_consequence），击败与逃跑走不同分支
+STORY_BATTLE_ATTRS = (
+    "story_consequence_id",
+    "story_default_final_boss",
+    "story_puppet_final_boss",
+    "story_puppet_echo_final_boss",
+    "story_elf_rival_final_boss",
+    "story_pre_final_dispatch",
+)
+
+
+@dataclass(frozen=True)
+class ExploreOptions:
+    """探索参数；随任务一起发往工作进程。"""
+
+    seed: int = 0
+    max_rounds: int = 240
+    max_steps_per_segment: int = 5000
+    battle_turn_limit: int = 80
+    assist_hp: int = 800  # 每步把玩家 HP 托底到该值；0 关闭
+    assist_atk: int = 200
+    fork_story_battles: bool = True
+
+
+@dataclass
+class ForkNode:
+    """停在分叉点上的游戏状态。"""
+
+    path: Tuple[str, ...]
+    state: bytes
+    fingerprint: Tuple
+    decisions: Tuple[str, ...]
+    flags: FrozenSet[str]
+    round_count: int
+
+
+@dataclass
+class PathOutcome:
+    """一条选择路径的终点。"""
+
+    path: Tuple[str, ...]
+    ending_key: str
+    round_count: int
+
+
+@dataclass
+class ExplorationReport:
+    """探索结果：每条路径到达的结局与统计。"""
+
+    outcomes: List[PathOutcome] = field(default_factory=list)
+    expanded: int = 0
+    deduplicated: int = 0
+    truncated: int = 0
+    depth_reached: int = 0
+    elapsed: float = 0.0
+    workers: int = 1
+
+    @property
+    def ending_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for outcome in self.outcomes:
+            counts[outcome.ending_key] = counts.get(outcome.ending_key, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def paths_for(self, ending_key: str) -> List[Tuple[str, ...]]:
+        return [o.path for o in self.outcomes if o.ending_key == ending_key]
+
+    def format(self, max_paths_per_ending: int = 3) -> str:
+        lines = [
+            f"展开分叉点 {self.expanded} 个，去重 {self.deduplicated}，beam 截断 {self.truncated}，"
+            f"最深 {self.depth_reached} 层，用时 {self.elapsed:.2f}s（{self.workers} 进程）"
+        ]
+        for ending_key, count in self.ending_counts.items():
+            lines.append(f"- {ending_key}: {count} 条路径")
+            for path in self.paths_for(ending_key)[:max_paths_per_ending]:
+                lines.append("    " + (" > ".join(path) or "(无分叉)"))
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# 状态指纹
+# ---------------------------------------------------------------------------
+
+
+def story_fingerprint(controller: Any, decisions: Sequence[str] = ()) -> Tuple:
+    """规范化剧情指纹：flag/tag 排序、剧情标量属性、pending/consumed 后果及当前分叉点；与插入顺序无关。"""
+    story = controller.story
+    skipped = getattr(story, "UNVERSIONED_ATTRS", frozenset())
+    scalars = [
+        (name, value)
+        for name, value in vars(story).items()
+        if not name.startswith("_")
+        and name not in skipped
+        and isinstance(value, (bool, int, float, str, type(None)))
+    ]
+    # 长线链状态记录（story.elf / story.puppet / story.moon）按旧属性名展开；队列保持顺序
+    for chain in CHAIN_STATE_CLASSES:
+        record = getattr(story, chain, None)
+        if record is not None:
+            scalars.extend(
+                (name, tuple(value) if isinstance(value, list) else value) for name, value in record.as_dict().items()
+            )
+    scalars = tuple(sorted(scalars, key=lambda item: item[0]))
+    return (
+        tuple(sorted(story.choice_flags)),
+        tuple(sorted(story.story_tags)),
+        scalars,
+        tuple(sorted(story.pending_consequences)),
+        tuple(sorted(story.consumed_consequences)),
+        tuple(decisions),
+    )
+
+
+# ---------------------------------------------------------------------------
+# 状态快照：控制器 + 影响随机序列的模块级状态
+# ---------------------------------------------------------------------------
+
+
+def _capture_state(controller: Any, last_hints: Optional[Dict] = None) -> bytes:
+    """门提示轮换记忆（models.door._LAST_HINT_BY_KEY）是进程级的，会改变后续随机抽取，需随状态一起分叉。
+    last_hints 为 None 时取当前进程的记忆。"""
+    from models import door
+
+    hints = dict(door._LAST_HINT_BY_KEY) if last_hints is None else dict(last_hints)
+    return pickle.dumps((controller, hints))
+
+
+def _restore_state(state: bytes) -> Any:
+    from models import door
+
+    controller, last_hints = pickle.loads(state)
+    door._LAST_HINT_BY_KEY.clear()
+    door._LAST_HINT_BY_KEY.update(last_hints)
+    return controller
+
+
+# ---------------------------------------------------------------------------
+# 自动驾驶与分叉
+# ---------------------------------------------------------------------------
+
+
+def _scene_name(controller: Any) -> str:
+    scene = controller.scene_manager.current_scene
+    return type(scene).__name__ if scene is not None else ""
+
+
+def _assist(controller: Any, options: ExploreOptions) -> None:
+    player = controller.player
+    if options.assist_hp and player.hp < options.assist_hp:
+        player.hp = options.assist_hp
+    if options.assist_atk and player._atk < options.assist_atk:
+        player._atk = options.assist_atk
+
+
+def _is_story_battle(monster: Any) -> bool:
+    return monster is not None and any(getattr(monster, attr, None) for attr in STORY_BATTLE_ATTRS)
+
+
+def _pending_decisions(controller: Any, options: ExploreOptions) -> Tuple[str, ...]:
+    """当前是否停在分叉点：返回各分支标签，否则返回空元组。"""
+    scene_name = _scene_name(controller)
+    if scene_name == "EventScene":
+        event = controller.current_event
+        choices = list(getattr(event, "choices", None) or [])
+        if len(choices) >= 2:
+            event_name = type(event).__name__
+            return tuple(f"{event_name}#{i}" for i in range(len(choices)))
+    elif scene_name == "BattleScene" and options.fork_story_battles:
+        monster = controller.current_monster
+        if _is_story_battle(monster):
+            name = getattr(monster, "name", "?")
+            return (f"{name}:defeat", f"{name}:escape")
+    return ()
+
+
+def _terminal_ending(controller: Any, options: ExploreOptions) -> Optional[str]:
+    info = getattr(controller, "game_clear_info", None)
+    if info:
+        return str(info.get("ending_key", "unknown"))
+    if _scene_name(controller) == "GameOverScene" or controller.player.hp <= 0:
+        return ENDING_GAME_OVER
+    if controller.round_count >= options.max_rounds:
+        return ENDING_ROUND_LIMIT
+    return None
+
+
+def _run_battle(controller: Any, options: ExploreOptions, escape: bool = False) -> None:
+    """一直打到离开战斗场景；逃跑分支反复尝试逃跑，回合用尽后改为攻击。"""
+    for turn in range(options.battle_turn_limit * 2):
+        if _scene_name(controller) != "BattleScene" or _terminal_ending(controller, options):
+            return
+        _assist(controller, options)
+        wants_escape = escape and turn < options.battle_turn_limit
+        controller.scene_manager.current_scene.handle_choice(2 if wants_escape else 0)
+        controller.messages.clear()
+
+
+def _step(controller: Any, options: ExploreOptions) -> None:
+    """非分叉点上的一步自动操作。"""
+    scene = controller.scene_manager.current_scene
+    scene_name = type(scene).__name__
+    if scene_name == "DoorScene":
+        scene.handle_choice(random.randrange(max(1, len(scene.doors))))
+    elif scene_name == "BattleScene":
+        _run_battle(controller, options)
+    elif scene_name == "ShopScene":
+        scene.handle_choice(random.randrange(3))
+    elif scene_name == "UseItemScene":
+        scene.handle_choice(len(scene.active_items))
+    else:
+        scene.handle_choice(0)
+    controller.messages.clear()
+
+
+def _apply_decision(controller: Any, index: int, options: ExploreOptions) -> None:
+    scene = controller.scene_manager.current_scene
+    if type(scene).__name__ == "BattleScene":
+        _run_battle(controller, options, escape=index == 1)
+    else:
+        scene.handle_choice(index)
+    controller.messages.clear()
+
+
+def _path_seed(seed: int, path: Sequence[str]) -> str:
+    return f"{seed}/" + "/".join(path)
+
+
+def _settle(controller: Any, path: Tuple[str, ...], options: ExploreOptions) -> Union[ForkNode, PathOutcome]:
+    """自动推进到下一个分叉点或终点。"""
+    for _ in range(options.max_steps_per_segment):
+        _assist(controller, options)
+        ending = _terminal_ending(controller, options)
+        if ending is not None:
+            return PathOutcome(path=path, ending_key=ending, round_count=controller.round_count)
+        decisions = _pending_decisions(controller, options)
+        if decisions:
+            story = controller.story
+            return ForkNode(
+                path=path,
+                state=_capture_state(controller),
+                fingerprint=story_fingerprint(controller, decisions),
+                decisions=decisions,
+                flags=frozenset(story.choice_flags),
+                round_count=controller.round_count,
+            )
+        _step(controller, options)
+    return PathOutcome(path=path, ending_key=ENDING_STALLED, round_count=controller.round_count)
+
+
+def _expand_node(task: Tuple[bytes, Tuple[str, ...], Tuple[str, ...], ExploreOptions]) -> List[Union[ForkNode, PathOutcome]]:
+    """工作进程入口：对一个分叉点的每个分支各自还原状态、执行选择并推进到下一分叉点。"""
+    state, path, decisions, options = task
+    children: List[Union[ForkNode, PathOutcome]] = []
+    for index, label in enumerate(decisions):
+        controller = _restore_state(state)
+        child_path = path + (label,)
+        random.seed(_path_seed(options.seed, child_path))
+        _apply_decision(controller, index, options)
+        children.append(_settle(controller, child_path, options))
+    return children
+
+
+def _new_game(seed: int) -> Any:
+    from models import door
+    from server import GameController
+
+    door._LAST_HINT_BY_KEY.clear()
+    random.seed(_path_seed(seed, ()))
+    return GameController()
+
+
+# ---------------------------------------------------------------------------
+# 探索主循环
+# ---------------------------------------------------------------------------
+
+
+def explore(
+    seeds: Iterable[int] = (0,),
+    start: Optional[Any] = None,
+    beam_width: Optional[int] = 64,
+    max_depth: int = 60,
+    workers: Optional[int] = None,
+    options: Optional[ExploreOptions] = None,
+) -> ExplorationReport:
+    """按层展开分叉点。start 为已布置好的 GameController（如终局前的测试状态），为 None 时每个种子开一局新游戏；
+    beam_width 为 None 时不截断（穷举，仅适合从后期状态出发）；workers > 1 时用进程池并行展开。"""
+    started = time.perf_counter()
+    base_options = options or ExploreOptions()
+    workers = max(1, int(workers if workers is not None else (os.cpu_count() or 1)))
+    report = ExplorationReport(workers=workers)
+
+    frontier: List[Tuple[ForkNode, ExploreOptions]] = []
+    seen: set = set()
+    seen_flags: set = set()
+
+    def accept(node: Union[ForkNode, PathOutcome], node_options: ExploreOptions, level: List) -> None:
+        if isinstance(node, PathOutcome):
+            report.outcomes.append(node)
+            return
+        if node.fingerprint in seen:
+            report.deduplicated += 1
+            return
+        seen.add(node.fingerprint)
+        level.append((node, node_options))
+
+    for seed in seeds:
+        seed_options = ExploreOptions(**{**base_options.__dict__, "seed": seed})
+        if start is not None:
+            # 起始状态不继承本进程此前留下的提示记忆，保证同一 start 多次探索结果一致
+            controller = _restore_state(_capture_state(start, last_hints={}))
+            random.seed(_path_seed(seed, ()))
+        else:
+            controller = _new_game(seed)
+        prefix = (f"seed={seed}",)
+        accept(_settle(controller, prefix, seed_options), seed_options, frontier)
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        depth = 0
+        while frontier and depth < max_depth:
+            depth += 1
+            tasks = [(node.state, node.path, node.decisions, node_options) for node, node_options in frontier]
+            if executor is not None:
+                results = executor.map(_expand_node, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+            else:
+                results = map(_expand_node, tasks)
+            report.expanded += len(tasks)
+            next_level: List[Tuple[ForkNode, ExploreOptions]] = []
+            for (parent, parent_options), children in zip(frontier, results):
+                for child in children:
+                    accept(child, parent_options, next_level)
+            if beam_width is not None and len(next_level) > beam_width:
+                # 优先保留带来新 flag 的分支；同分按路径排序保证可复现
+                next_level.sort(key=lambda item: (-len(item[0].flags - seen_flags), item[0].path))
+                report.truncated += len(next_level) - beam_width
+                next_level = next_level[:beam_width]
+            for node, _ in next_level:
+                seen_flags.update(node.flags)
+            frontier = next_level
+            report.depth_reached = depth
+        report.truncated += len(frontier)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="剧情分支覆盖探索：枚举各选择路径可达的结局")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--beam", type=int, default=64, help="每层保留的分叉点数；0 表示不截断")
+    parser.add_argument("--depth", type=int, default=60, help="最多展开的分叉层数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument("--max-rounds", type=int, default=ExploreOptions.max_rounds)
+    parser.add_argument("--no-assist", action="store_true", help="关闭战斗托底")
+    args = parser.parse_args(argv)
+    options = ExploreOptions(
+        max_rounds=args.max_rounds,
+        assist_hp=0 if args.no_assist else ExploreOptions.assist_hp,
+        assist_atk=0 if args.no_assist else ExploreOptions.assist_atk,
+    )
+    report = explore(
+        seeds=args.seeds,
+        beam_width=args.beam or None,
+        max_depth=args.depth,
+        workers=args.workers,
+        options=options,
+    )
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
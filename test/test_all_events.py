@@ -1,4 +1,9 @@
 
+import os
+import pickle
+import random
+import subprocess
+import sys
 import unittest
 import unittest.mock
 from test.test_base import BaseTest
@@ -14,6 +19,10 @@ from models.events import (
     PuppetAbandonmentEvent, PuppetSignalEvent, PuppetKindEchoEvent, PuppetPersonaRiftEvent, PuppetCoreDescentEvent,
     get_story_event_by_key,
 )
+from models.events import dispatch as dispatch_module
+from models.events.eligibility import EventTriggerCounts, get_event_meta
+from models.events.registry import STORY_EVENT_SOURCES, resolve_story_event_class, story_event
+from models.events.telemetry import EventTelemetry
 from models.items import FlyingHammer
 
 class TestAllEvents(BaseTest):
@@ -541,3 +550,276 @@ class TestAllEvents(BaseTest):
             weight = events_module._build_event_weight(self.controller, TimePawnshopEvent)
         expected = 0.5 * events_module.LONG_EVENT_STARTER_FIRST_TIME_BONUS
         self.assertAlmostEqual(weight, expected)
+
+
+def _reference_candidates(controller):
+    """逐类判定的旧版候选梯度，用作资格索引的对照。"""
+    rc = max(0, int(controller.round_count))
+
+    def long_ok(event_cls):
+        return not (rc < events_module.LONG_EVENT_STARTER_EARLIEST_ROUND and event_cls in events_module.LONG_EVENT_STARTER_CLASSES)
+
+    def available(event_cls):
+        if not getattr(event_cls, "ONLY_TRIGGER_ONCE", False):
+            return True
+        return controller.event_trigger_counts.get(event_cls.__name__, 0) <= 0
+
+    pool = events_module.STARTER_EVENT_POOL
+    candidates = [c for c in pool if long_ok(c) and c.is_trigger_condition_met(controller) and available(c)]
+    if not candidates:
+        candidates = [c for c in pool if long_ok(c) and available(c)]
+    if not candidates:
+        candidates = [c for c in pool if long_ok(c)]
+    return candidates or list(pool)
+
+
+class TestEventEligibilityIndex(BaseTest):
+    def _randomize(self, rng):
+        controller = self.controller
+        controller.round_count = rng.choice([0, 2, 5, 6, 12, 20, 21, 30, 60, 120, 200])
+        self.player._atk = rng.randint(1, 40)
+        self.player.gold = rng.randint(0, 200)
+        for event_cls in rng.sample(events_module.STARTER_EVENT_POOL, rng.randint(0, 6)):
+            controller.event_trigger_counts[event_cls.__name__] = rng.randint(0, 2)
+        story = controller.story
+        story.elf_chain_started = rng.random() < 0.2
+        story.puppet_final_outcome = rng.choice(["", "", "defeated"])
+
+    def test_index_candidates_and_weights_match_per_class_evaluation(self):
+        rng = random.Random(31)
+        for _ in range(300):
+            self._randomize(rng)
+            index = dispatch_module._get_eligibility_index(self.controller, events_module.STARTER_EVENT_POOL)
+            candidates = index.candidates(self.controller)
+            self.assertEqual(candidates, _reference_candidates(self.controller))
+            for event_cls in candidates:
+                base = dispatch_module._clamp_probability(event_cls.get_trigger_probability(self.controller))
+                self.assertEqual(
+                    dispatch_module._apply_event_weight_terms(base, index.weight_terms(event_cls)),
+                    events_module._build_event_weight(self.controller, event_cls),
+                )
+
+    def test_plans_are_reused_within_a_round_band(self):
+        self.controller.round_count = 30
+        self.player._atk = 30
+        index = dispatch_module._get_eligibility_index(self.controller, events_module.STARTER_EVENT_POOL)
+        index.candidates(self.controller)
+        built = len(index._plans)
+        for round_count in range(30, 40):
+            self.controller.round_count = round_count
+            index.candidates(self.controller)
+        self.assertEqual(len(index._plans), built)
+        # 静态事件不再逐类估算阶段：只剩索引本身与动态事件（飞贼 / 木偶起始）各一次
+        # （只统计候选筛选；抽中的事件构造时按阶段缩放数值，不计入）
+        with unittest.mock.patch.object(
+            events_module.Event, "get_progress_stage", wraps=events_module.Event.get_progress_stage
+        ) as stage:
+            index.candidates(self.controller)
+        self.assertLessEqual(stage.call_count, 3)
+
+    def test_event_metadata_is_compiled_once_per_class(self):
+        index = dispatch_module._get_eligibility_index(self.controller, events_module.STARTER_EVENT_POOL)
+        elf = index.meta[ElfThiefIntroEvent]
+        self.assertIs(elf, get_event_meta(ElfThiefIntroEvent, dispatch_module.LONG_EVENT_STARTER_CLASSES, dispatch_module.PREFERRED_LONG_EVENT_STARTERS))
+        self.assertTrue(elf.long_starter and elf.preferred and elf.once_only and elf.custom_condition)
+        stranger = index.meta[StrangerEvent]
+        self.assertFalse(stranger.custom_probability or stranger.long_starter or stranger.once_only)
+        self.assertEqual(stranger.base_probability, StrangerEvent.TRIGGER_BASE_PROBABILITY)
+        self.assertTrue(index.meta[AncientShrineEvent].custom_probability)
+
+    def test_patched_trigger_probability_recompiles_metadata(self):
+        index = dispatch_module._get_eligibility_index(self.controller, events_module.STARTER_EVENT_POOL)
+        with unittest.mock.patch.object(StrangerEvent, "get_trigger_probability", return_value=0.7):
+            rebuilt = dispatch_module._get_eligibility_index(self.controller, events_module.STARTER_EVENT_POOL)
+            self.assertIsNot(rebuilt, index)
+            self.assertTrue(rebuilt.meta[StrangerEvent].custom_probability)
+            self.assertEqual(rebuilt.trigger_probability(StrangerEvent, self.controller), 0.7)
+        restored = dispatch_module._get_eligibility_index(self.controller, events_module.STARTER_EVENT_POOL)
+        self.assertIs(restored.meta[StrangerEvent], index.meta[StrangerEvent])
+
+    def test_direct_count_writes_update_availability(self):
+        self.controller.round_count = 40
+        self.player._atk = 30
+        index = dispatch_module._get_eligibility_index(self.controller, events_module.STARTER_EVENT_POOL)
+        self.assertIn(MoonBountyEvent, index.candidates(self.controller))
+        self.controller.event_trigger_counts["MoonBountyEvent"] = 1
+        self.assertNotIn(MoonBountyEvent, index.candidates(self.controller))
+        del self.controller.event_trigger_counts["MoonBountyEvent"]
+        self.assertIn(MoonBountyEvent, index.candidates(self.controller))
+
+    def test_counts_and_index_survive_pickle(self):
+        self.controller.round_count = 40
+        self.player._atk = 30
+        self.controller.event_trigger_counts["MoonBountyEvent"] = 1
+        dispatch_module._get_eligibility_index(self.controller, events_module.STARTER_EVENT_POOL)
+        restored = pickle.loads(pickle.dumps(self.controller))
+        restored.event_trigger_counts["MoonBountyEvent"] = 0
+        index = dispatch_module._get_eligibility_index(restored, events_module.STARTER_EVENT_POOL)
+        self.assertIn(MoonBountyEvent, index.candidates(restored))
+        self.assertEqual(index.candidates(restored), _reference_candidates(restored))
+
+    def test_plain_dict_counts_are_upgraded(self):
+        self.controller.event_trigger_counts = {"MoonBountyEvent": 1}
+        self.controller.round_count = 40
+        self.player._atk = 30
+        events_module.get_random_event(self.controller)
+        self.assertIsInstance(self.controller.event_trigger_counts, EventTriggerCounts)
+        self.assertGreaterEqual(self.controller.event_trigger_counts["MoonBountyEvent"], 1)
+
+
+class TestStoryEventRegistry(BaseTest):
+    def test_every_declared_key_resolves_to_its_registered_class(self):
+        for key, module_name in STORY_EVENT_SOURCES.items():
+            event_cls = resolve_story_event_class(key)
+            self.assertIsNotNone(event_cls, key)
+            self.assertEqual(event_cls.STORY_EVENT_KEY, key)
+            self.assertEqual(event_cls.__module__, module_name)
+        self.assertIsNone(resolve_story_event_class("no_such_event"))
+        self.assertIsNone(get_story_event_by_key("no_such_event", self.controller))
+
+    def test_registering_a_taken_key_with_another_class_fails(self):
+        with self.assertRaises(ValueError):
+            @story_event("moon_verdict_event")
+            class _Impostor(events_module.Event):
+                pass
+
+    def test_stage_curtain_module_loads_on_first_lookup(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = (
+            "import sys, models.events as ev\n"
+            "before = 'models.events.stage_curtain' in sys.modules\n"
+            "cls = ev.resolve_story_event_class('ending_final_first_gate_event')\n"
+            "print(before, cls.__name__, ev.EndingFinalFirstGateEvent is cls)\n"
+        )
+        out = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.split(), ["False", "EndingFinalFirstGateEvent", "True"])
+
+    def test_static_spec_choices_are_shared_between_instances(self):
+        first = AncientShrineEvent(self.controller)
+        second = AncientShrineEvent(self.controller)
+        self.assertIs(first.choices, second.choices)
+        self.assertEqual(first.get_choices(), ["虔诚祈祷 (恢复生命)", "破坏祭坛", "仔细调查"])
+        self.assertNotIn("choices", vars(first))
+
+    def test_parametric_spec_labels_are_formatted_per_instance(self):
+        with unittest.mock.patch("models.events.random.randint", return_value=13):
+            event = StrangerEvent(self.controller)
+        self.assertEqual(event.get_choices()[0], "救助他 (失去13金币)")
+        gambler = GamblerEvent(self.controller)
+        high_bet = gambler.scale_value(50, positive=False, aggressive=True)
+        self.assertEqual(gambler.get_choices()[0], f"玩把大的 (赌{high_bet}G)")
+        self.assertIs(GamblerEvent(self.controller).choices, gambler.choices)
+
+    def test_spec_events_survive_pickle(self):
+        self.player.gold = 100
+        event = pickle.loads(pickle.dumps(WiseSageEvent(self.controller)))
+        self.controller = event.controller
+        self.controller.current_event = event
+        event.resolve_choice(0)
+        self.assertTrue(self.controller.messages)
+
+    def test_spec_with_unknown_handler_is_rejected(self):
+        with self.assertRaises(TypeError):
+            class _BrokenEvent(events_module.Event):
+                SPEC = events_module.EventSpec(
+                    title="坏事件",
+                    description="选项指向不存在的方法。",
+                    choices=(events_module.ChoiceSpec("点我", "no_such_handler"),),
+                )
+
+    def test_preview_choice_leaves_game_untouched(self):
+        self.player.gold = 100
+        story = self.controller.story
+        event = MoonBountyEvent(self.controller)
+        snapshot = (
+            self.player.gold, self.player.hp, self.player._atk, self.player.get_inventory_size(),
+            set(story.choice_flags), set(story.pending_consequences), story.moral_score,
+            list(self.controller.messages), story.flag_version,
+        )
+        rng_state = random.getstate()
+        logs = event.preview_choices(seed=3)
+        self.assertEqual(len(logs), 3)
+        self.assertEqual(logs[2].flags_set, ["moon_bounty_double"])
+        self.assertTrue(logs[2].consequences)
+        self.assertEqual(random.getstate(), rng_state)
+        self.assertEqual(
+            snapshot,
+            (
+                self.player.gold, self.player.hp, self.player._atk, self.player.get_inventory_size(),
+                set(story.choice_flags), set(story.pending_consequences), story.moral_score,
+                list(self.controller.messages), story.flag_version,
+            ),
+        )
+
+    def test_preview_rolls_back_chain_state_records(self):
+        story = self.controller.story
+        story.elf.relation = 1
+        before = (story.elf.as_dict(), story.flag_version, dict(story.pending_consequences))
+        event = ElfThiefIntroEvent(self.controller)
+        log = event.preview_choice(2, seed=4)
+        self.assertIn("elf_grudge_intro_fake_guard", log.flags_set)
+        self.assertEqual((story.elf.as_dict(), story.flag_version, dict(story.pending_consequences)), before)
+        self.assertFalse(story.elf.started)
+
+    def test_journal_unsets_optional_slots_written_after_capture(self):
+        from models.door import DoorEnum
+        from models.events.preview import StateJournal
+
+        door = DoorEnum.EVENT.create_instance(controller=self.controller)
+        journal = StateJournal(door)
+        door.story_forced_event_key = "elf_thief_intro"
+        door.hint = "改写后的提示"
+        journal.rollback()
+        self.assertFalse(hasattr(door, "story_forced_event_key"))
+        self.assertNotEqual(door.hint, "改写后的提示")
+
+    def test_preview_matches_real_resolution_with_same_seed(self):
+        self.player.gold = 100
+        event = StrangerEvent(self.controller)
+        log = event.preview_choice(1, seed=9)
+        gold_before = self.player.gold
+        random.seed(9)
+        event.resolve_choice(1)
+        self.assertEqual(self.player.gold - gold_before, log.gold)
+        self.assertIn("stranger_robbed", self.controller.story.choice_flags)
+        self.assertEqual(log.flags_set, ["stranger_robbed"])
+        self.assertEqual(log.moral, -10)
+        self.assertEqual(log.messages, self.controller.messages[-len(log.messages):])
+
+    def test_event_telemetry_records_candidates_weights_and_rejections(self):
+        telemetry = EventTelemetry(band_size=10)
+        self.controller.event_telemetry = telemetry
+        self.controller.round_count = 5
+        self.controller.recent_event_classes = ["StrangerEvent"]
+        self.controller.event_trigger_counts["MoonBountyEvent"] = 1
+        event = events_module.get_random_event(self.controller)
+
+        draw = telemetry.recent_draws[-1]
+        self.assertEqual(draw["chosen"], type(event).__name__)
+        self.assertEqual(len(draw["candidates"]), len(draw["weights"]))
+        self.assertEqual(draw["rejected"]["StrangerEvent"], "recent")
+        self.assertEqual(draw["rejected"]["MoonBountyEvent"], "exhausted")
+        self.assertEqual(draw["rejected"]["ElfThiefIntroEvent"], "long_starter_gate")
+        band = telemetry.export()["bands"]["0-9"]
+        self.assertEqual(band["draws"], 1)
+        self.assertEqual(band["classes"][type(event).__name__]["chosen"], 1)
+        self.assertIn("回合 0-9", telemetry.format())
+
+    def test_sampled_event_telemetry_keeps_draw_sequence(self):
+        def draw_names(telemetry):
+            self.controller.reset_game()
+            self.controller.event_telemetry = telemetry
+            self.controller.round_count = 30
+            random.seed(21)
+            return [type(events_module.get_random_event(self.controller)).__name__ for _ in range(30)]
+
+        plain = draw_names(None)
+        telemetry = EventTelemetry(sample_rate=0.3, seed=4)
+        self.assertEqual(draw_names(telemetry), plain)
+        self.assertEqual(telemetry.draws_seen, 30)
+        self.assertLess(telemetry.draws_sampled, 30)
+
+        merged = EventTelemetry(sample_rate=0.3).merge(telemetry).merge(telemetry)
+        self.assertEqual(merged.draws_sampled, telemetry.draws_sampled * 2)
+        with self.assertRaises(ValueError):
+            EventTelemetry(band_size=5).merge(telemetry)
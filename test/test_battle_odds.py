@@ -0,0 +1,77 @@
+"""
+战斗结果估算测试：精确解与手算 / 蒙特卡洛一致，并与真实 BattleScene 逐回合对战的统计相符。
+"""
+import random
+import unittest
+
+from battle_odds import BattleSetup, estimate_battle
+from models.items import ItemType
+from models.monster import Monster
+from models.status import StatusName
+from server import GameController
+
+
+class TestBattleOdds(unittest.TestCase):
+    def test_exact_matches_hand_computed_fight(self):
+        # 玩家每次打 4 或 5：10 血怪物两刀毙命的概率 1/4，否则三刀；怪物每次打 2 或 3
+        setup = BattleSetup(player_hp=50, player_atk=5, monster_hp=10, monster_atk=3)
+        estimate = estimate_battle(setup=setup, method="exact")
+        self.assertAlmostEqual(estimate.win_probability, 1.0)
+        self.assertAlmostEqual(estimate.expected_turns, 2.75)
+        self.assertAlmostEqual(sum(estimate.hp_loss.values()), 1.0)
+        self.assertEqual(min(estimate.hp_loss), 2)
+        self.assertEqual(max(estimate.hp_loss), 6)
+
+        stunned = estimate_battle(setup=BattleSetup(player_hp=50, player_atk=5, monster_hp=10, monster_atk=3, monster_stun=3))
+        self.assertEqual(stunned.hp_loss, {0: 1.0})
+
+    def test_monte_carlo_agrees_with_exact(self):
+        setup = BattleSetup(
+            player_hp=60, player_atk=9, monster_hp=70, monster_atk=10, effect_probability=0.35, barrier_hits=0, revives=1, revive_hp=30
+        )
+        exact = estimate_battle(setup=setup, method="exact")
+        sampled = estimate_battle(setup=setup, method="monte_carlo", trials=40000, seed=3)
+        self.assertAlmostEqual(exact.win_probability + exact.loss_probability + exact.unresolved_probability, 1.0)
+        self.assertAlmostEqual(sampled.win_probability, exact.win_probability, delta=0.015)
+        self.assertAlmostEqual(sampled.expected_turns, exact.expected_turns, delta=0.1)
+        self.assertAlmostEqual(sampled.expected_hp_loss, exact.expected_hp_loss, delta=1.0)
+        with self.assertRaises(ValueError):
+            estimate_battle(setup=setup, method="dp")
+
+    def test_estimate_matches_battle_scene(self):
+        def prepare(controller):
+            player = controller.player
+            player.hp, player._atk = 70, 8
+            player.inventory[ItemType.PASSIVE] = []
+            player.apply_status(StatusName.BARRIER.create_instance(duration=1, target=player))
+            player.apply_status(StatusName.POISON.create_instance(duration=1, target=player))
+            monster = Monster("测试怪物", 60, 9, tier=2, effect_probability=0.4)
+            monster.loot = []
+            return monster
+
+        controller = GameController()
+        estimate = estimate_battle(controller.player, prepare(controller), method="exact")
+        self.assertEqual(estimate.method, "exact")
+
+        state = random.getstate()
+        wins = turns = 0
+        fights = 600
+        try:
+            random.seed(2024)
+            for _ in range(fights):
+                controller = GameController()
+                controller.current_monster = monster = prepare(controller)
+                controller.scene_manager.go_to("battle_scene")
+                scene = controller.scene_manager.current_scene
+                while controller.scene_manager.current_scene is scene:
+                    scene.handle_choice(0)
+                    turns += 1
+                wins += monster.hp <= 0
+        finally:
+            random.setstate(state)
+        self.assertAlmostEqual(wins / fights, estimate.win_probability, delta=0.06)
+        self.assertAlmostEqual(turns / fights, estimate.expected_turns, delta=0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+事件门出现概率分析测试：批量模拟的单次抽取分布与 get_random_event 的权重一致，曲线满足长线门槛与单调性。
+"""
+import unittest
+
+import numpy as np
+
+import models.events as events_module
+from event_odds import PlayerProfile, simulate_event_odds
+from models.events import dispatch as dispatch_module
+from server import GameController
+
+
+class TestEventOdds(unittest.TestCase):
+    def test_single_draw_matches_dispatcher_weights(self):
+        round_count = 30
+        controller = GameController()
+        PlayerProfile().apply(controller, round_count)
+        index = dispatch_module._get_eligibility_index(controller, events_module.STARTER_EVENT_POOL)
+        candidates = index.candidates(controller)
+        weights = {
+            cls.__name__: dispatch_module._apply_event_weight_terms(
+                index.trigger_probability(cls, controller), index.weight_terms(cls)
+            )
+            for cls in candidates
+        }
+        total = sum(weights.values())
+
+        report = simulate_event_odds(games=40000, start_round=round_count, rounds=round_count + 1, event_door_rate=1.0, seed=5)
+        for name in report.event_names:
+            expected = weights.get(name, 0.0) / total
+            self.assertAlmostEqual(report.probability_by(name, round_count), expected, delta=0.01, msg=name)
+
+    def test_curves_respect_long_starter_gate_and_are_monotonic(self):
+        report = simulate_event_odds(games=2000, rounds=120, seed=1)
+        earliest = events_module.LONG_EVENT_STARTER_EARLIEST_ROUND
+        for cls in events_module.LONG_EVENT_STARTER_CLASSES:
+            self.assertEqual(report.probability_by(cls.__name__, earliest - 1), 0.0)
+            self.assertGreater(report.probability_by(cls.__name__, 119), 0.0)
+        self.assertTrue(np.all(np.diff(report.curves, axis=0) >= 0))
+        self.assertTrue(np.all((report.curves >= 0) & (report.curves <= 1)))
+        for cls in events_module.LONG_EVENT_STARTER_CLASSES:
+            self.assertLessEqual(report.expected_counts[report.event_names.index(cls.__name__)], 1.0)
+        self.assertIn("ElfThiefIntroEvent", report.format())
+
+    def test_same_seed_is_reproducible(self):
+        first = simulate_event_odds(games=500, rounds=60, seed=7)
+        second = simulate_event_odds(games=500, rounds=60, seed=7)
+        np.testing.assert_array_equal(first.curves, second.curves)
+        with self.assertRaises(ValueError):
+            simulate_event_odds(games=10, rounds=60, event_door_rate=[0.5] * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
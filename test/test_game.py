@@ -24,6 +24,39 @@ class TestGameStability(BaseTest):
         self.assertEqual(self.controller.messages.count("重复日志"), 1)
         self.assertEqual(self.controller.messages.count("另一条"), 1)
 
+    def test_silent_messages_skip_logging(self):
+        """静默模式下日志被丢弃，重置游戏后模式保持。"""
+        self.controller.set_silent_messages(True)
+        self.controller.add_message("不会被记录")
+        self.controller.reset_game()
+        self.controller.add_message(["也不会"])
+        self.assertEqual(len(self.controller.messages), 0)
+        self.controller.set_silent_messages(False)
+        self.controller.add_message("恢复记录")
+        self.assertEqual(self.controller.messages[-1], "恢复记录")
+
+    def test_silent_messages_skip_effect_rendering(self):
+        """静默模式下剧情效果日志不渲染任何文案。"""
+        from unittest.mock import patch
+        from models.story_system import PendingConsequence
+
+        consequence = PendingConsequence(consequence_id="test_lose_gold", source_flag="f", effect_key="lose_gold")
+        self.controller.player.gold = 50
+        self.controller.clear_messages()
+        self.controller.set_silent_messages(True)
+        with patch("models.narrative.story_system_lines.render_effect_message") as render, patch(
+            "models.narrative.story_system_lines.describe_reward"
+        ) as describe:
+            self.controller.story._apply_effect(consequence, None)
+            self.controller.story._apply_effect(
+                PendingConsequence(consequence_id="test_gift", source_flag="f", effect_key="villagers_gift"), None
+            )
+        self.controller.set_silent_messages(False)
+        self.assertLess(self.controller.player.gold, 50)
+        render.assert_not_called()
+        describe.assert_not_called()
+        self.assertEqual(len(self.controller.messages), 0)
+
     def test_random_button_clicks(self):
         """
         随机点击测试 (Fuzz Testing)
@@ -0,0 +1,52 @@
+"""
+对局内存基准测试：状态 / 物品 / 门实例不带 __dict__，剧情挂载的可选属性可写可读，基准跑完不影响全局随机源。
+"""
+import pickle
+import random
+import unittest
+
+from memory_bench import _build_samples, measure_live_games
+from models.door import DoorEnum
+from server import GameController
+
+
+class TestMemoryBench(unittest.TestCase):
+    def setUp(self):
+        self.controller = GameController()
+
+    def test_sample_objects_are_slotted(self):
+        samples = _build_samples(self.controller)
+        for name, objects in samples.items():
+            for obj in objects:
+                self.assertFalse(hasattr(obj, "__dict__"), f"{name}: {type(obj).__name__}")
+        restored = pickle.loads(pickle.dumps(samples))
+        self.assertEqual(
+            [type(obj) for obj in restored["Door"]],
+            [type(obj) for obj in samples["Door"]],
+        )
+
+    def test_optional_story_slots(self):
+        event_door = DoorEnum.EVENT.create_instance(controller=self.controller)
+        reward_door = DoorEnum.REWARD.create_instance(controller=self.controller)
+        self.assertIsNone(getattr(event_door, "story_forced_event_key", None))
+        self.assertFalse(getattr(reward_door, "elf_side_reward", False))
+        event_door.story_forced_event_key = "elf_thief_intro"
+        reward_door.elf_side_reward = True
+        self.assertEqual(event_door.story_forced_event_key, "elf_thief_intro")
+        self.assertTrue(reward_door.elf_side_reward)
+        with self.assertRaises(AttributeError):
+            event_door.unknown_story_attr = 1
+
+    def test_measure_live_games_restores_random_state(self):
+        random.seed(5)
+        state = random.getstate()
+        report = measure_live_games(games=2, clicks=30, seed=1)
+        self.assertEqual(random.getstate(), state)
+        self.assertGreater(report.bytes_per_game, 0)
+        self.assertEqual(set(report.objects), {"Status", "Item", "Door"})
+        self.assertGreater(report.construct_bytes["Door"], 0)
+        self.assertIn("每局占用", report.format())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,10 @@
 from test.test_base import BaseTest
 from models.items import ItemType
 from models import items
-from models.monster import Monster, get_random_monster, estimate_player_power
+from models.monster import Monster, get_random_monster, estimate_player_power, sample_monster_hints
 from types import SimpleNamespace
-from unittest.mock import patch
+from unittest.mock import ANY, patch
+import pickle
 import random
 
 class TestMonsterSystem(BaseTest):
@@ -36,12 +37,14 @@ class TestMonsterSystem(BaseTest):
         fixed_item = items.Barrier("结界", duration=2, cost=0)
         with patch("models.monster.create_random_item", return_value=fixed_item) as mock_create:
             monster = Monster("测试怪物", 10, 5, tier=4)
+            mock_create.assert_not_called()
+            loot = monster.loot
 
-        mock_create.assert_called_once_with(treasure_tier=4)
-        self.assertIsInstance(monster.loot[0], items.GoldBag)
-        self.assertGreaterEqual(monster.loot[0].gold_amount, 20)
-        self.assertLessEqual(monster.loot[0].gold_amount, 60)
-        self.assertIs(monster.loot[1], fixed_item)
+        mock_create.assert_called_once_with(treasure_tier=4, rng=ANY)
+        self.assertIsInstance(loot[0], items.GoldBag)
+        self.assertGreaterEqual(loot[0].gold_amount, 20)
+        self.assertLessEqual(loot[0].gold_amount, 60)
+        self.assertIs(loot[1], fixed_item)
 
     def test_loot_application(self):
         """测试掉落应用"""
@@ -152,3 +155,65 @@ class TestMonsterSystem(BaseTest):
             any("选择困难症候群" in m and "测试嘲讽" in m for m in self.controller.messages),
             self.controller.messages,
         )
+
+    def test_monsters_share_species_prototypes(self):
+        """同名怪物共用物种原型；实例只有 __slots__ 字段，剧情属性按需落在 __dict__，改名后台词按新名称取。"""
+        random.seed(7)
+        first, second = Monster("吸血鬼", 10, 2, tier=3), Monster("吸血鬼", 30, 4, tier=3)
+        self.assertIs(first.prototype, second.prototype)
+        self.assertEqual(first.sprite_key, "monster_undead")
+        self.assertIn(first.type_hint, Monster.MONSTER_TYPE_HINTS["吸血鬼"])
+        self.assertEqual(vars(first), {})
+        self.assertIs(Monster("剧情Boss", 10, 2, tier=4).prototype, Monster("剧情Boss", 20, 3, tier=4).prototype)
+
+        first.story_moon_bounty_mid = True
+        first.name = "凤凰"
+        self.assertEqual(first.sprite_key, "monster_undead")
+        self.assertIn(first.get_death_quote(), Monster.MONSTER_QUOTES["凤凰"]["death"])
+        restored = pickle.loads(pickle.dumps(first))
+        self.assertEqual((restored.name, restored.hp, restored.prototype), (first.name, first.hp, first.prototype))
+        self.assertTrue(restored.story_moon_bounty_mid)
+
+    def test_hint_sampler_matches_random_monster_draws(self):
+        """伪装提示采样与 get_random_monster 抽到同一 tier 与物种，且不构造怪物。"""
+        player = SimpleNamespace(_atk=120, hp=900, gold=300)
+        for seed in range(40):
+            random.seed(seed)
+            monster = get_random_monster(current_round=75, player=player, unlocked_tier=5)
+            random.seed(seed)
+            with patch("models.monster.Monster", side_effect=AssertionError("不应构造怪物")):
+                tier_hint, type_hint = sample_monster_hints(current_round=75, player=player, unlocked_tier=5)
+            self.assertIn(tier_hint, Monster.MONSTER_TIER_HINTS[monster.tier])
+            self.assertIn(type_hint, Monster.MONSTER_TYPE_HINTS[monster.name])
+
+    def test_loot_is_generated_lazily_from_stored_seed(self):
+        """掉落首次读取时才生成，结果只取决于构造时的种子，且生成不消耗对局随机序列。"""
+        def describe(loot):
+            return [(type(item).__name__, item.name) for item in loot]
+
+        random.seed(99)
+        eager = Monster(tier=3)
+        eager_loot = describe(eager.loot)
+        after_eager = random.random()
+
+        random.seed(99)
+        lazy = Monster(tier=3)
+        self.assertIsNone(lazy._loot)
+        self.assertEqual(random.random(), after_eager)
+        random.random()
+        self.assertEqual(describe(lazy.loot), eager_loot)
+        self.assertIs(lazy.get_loot(), lazy.loot)
+
+    def test_loot_generation_does_not_touch_global_random(self):
+        """掉落由私有随机源生成：不读写全局随机源，同一种子得到同样的掉落。"""
+        def describe(loot):
+            return [(type(item).__name__, item.name) for item in loot]
+
+        first = Monster(tier=4)
+        second = Monster(tier=4)
+        second._loot_seed = first._loot_seed
+        state = random.getstate()
+        with patch("random.seed", side_effect=AssertionError("不应重新播种全局随机源")):
+            first_loot = describe(first.loot)
+        self.assertEqual(random.getstate(), state)
+        self.assertEqual(describe(second.loot), first_loot)
@@ -0,0 +1,77 @@
+"""
+批量怪物生成测试：数组版公式与逐只生成一致，tier 分布与别名表一致，缩放分布与上限与 get_random_monster 相符。
+"""
+import random
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from models.monster import (
+    Monster,
+    _get_round_limited_max_tier,
+    _tier_alias_table,
+    _tier_weight_key,
+    estimate_player_power,
+    get_random_monster,
+)
+from monster_batch import BASE_ATK, BASE_HP, estimate_power, generate_monsters, round_limited_max_tier
+
+
+def _alias_pmf(table):
+    n = len(table.items)
+    pmf = np.array(table._prob) / n
+    for column, target in enumerate(table._alias):
+        pmf[target] += (1.0 - table._prob[column]) / n
+    return pmf
+
+
+class TestMonsterBatch(unittest.TestCase):
+    def test_round_cap_and_power_match_scalar_formulas(self):
+        rounds = np.arange(-3, 130)
+        expected = [_get_round_limited_max_tier(int(r)) for r in rounds]
+        np.testing.assert_array_equal(round_limited_max_tier(rounds), expected)
+        player = SimpleNamespace(_atk=73, hp=512, gold=650)
+        expected_power = [estimate_player_power(player, int(r)) for r in rounds]
+        np.testing.assert_array_equal(estimate_power(rounds, 73, 512, 650), expected_power)
+        np.testing.assert_array_equal(estimate_power(rounds), [estimate_player_power(None, int(r)) for r in rounds])
+
+    def test_tier_distribution_matches_alias_tables(self):
+        for round_count, atk, unlocked in ((12, 20, 6), (33, 40, 6), (70, 200, 6), (70, 5, 4)):
+            batch = generate_monsters(
+                np.full(200000, round_count), player_atk=atk, player_hp=300, player_gold=100, unlocked_tier=unlocked, seed=round_count
+            )
+            max_tier = min(_get_round_limited_max_tier(round_count), unlocked)
+            power = estimate_player_power(SimpleNamespace(_atk=atk, hp=300, gold=100), round_count)
+            pmf = _alias_pmf(_tier_alias_table(*_tier_weight_key(max_tier, round_count, power)))
+            np.testing.assert_allclose(batch.tier_share()[:max_tier], pmf, atol=0.006, err_msg=str(round_count))
+            self.assertTrue(np.all(batch.tier <= max_tier))
+        for tier, name in zip(batch.tier[:200].tolist(), batch.names()[:200]):
+            self.assertIn(name, [species for species, _, _ in Monster.MONSTER_TYPES[tier]])
+
+    def test_player_match_scaling_matches_scalar_generation(self):
+        early = generate_monsters(np.full(5000, 39), player_atk=400, player_hp=3000, player_gold=900, seed=1)
+        np.testing.assert_array_equal(early.hp, BASE_HP[early.tier, early.species])
+        np.testing.assert_array_equal(early.atk, BASE_ATK[early.tier, early.species])
+
+        round_count, player = 90, SimpleNamespace(_atk=150, hp=1200, gold=500)
+        batch = generate_monsters(np.full(100000, round_count), player_atk=150, player_hp=1200, player_gold=500, seed=3)
+        pressure = estimate_player_power(player, round_count) / 400.0
+        base_hp, base_atk = BASE_HP[batch.tier, batch.species], BASE_ATK[batch.tier, batch.species]
+        self.assertTrue(np.all((batch.hp >= base_hp) & (batch.hp <= base_hp * 4.65 + 200 * pressure)))
+        self.assertTrue(np.all((batch.atk >= base_atk) & (batch.atk <= base_atk * 2.45 + 50 * pressure)))
+        self.assertTrue(np.all(batch.effect_probability <= 0.75))
+
+        state = random.getstate()
+        try:
+            random.seed(11)
+            scalar = [get_random_monster(current_round=round_count, player=player) for _ in range(20000)]
+        finally:
+            random.setstate(state)
+        for attr, values in (("hp", batch.hp), ("atk", batch.atk), ("effect_probability", batch.effect_probability)):
+            expected = np.mean([getattr(m, attr) for m in scalar])
+            self.assertAlmostEqual(values.mean() / expected, 1.0, delta=0.03, msg=attr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 """models.narrative：飞贼仇句、复仇门配置与 story_system 叙事常量一致性。"""
 
+import pickle
 import unittest
 
 from models.narrative import elf_rival_grudge, revenge_hunters, story_system_lines
+from models.narrative.messages import LazyText, MessageLog
 from models.narrative.stage_curtain_epilogue import build_stage_epilogue_lines
 
 
@@ -40,6 +42,82 @@ class TestNarrative(unittest.TestCase):
         )
         self.assertTrue(any("银羽飞贼" in ln for ln in lines))
 
+    def test_lazy_text_renders_once_on_read(self):
+        calls = []
+
+        def render(**kwargs):
+            calls.append(kwargs)
+            return story_system_lines.format_puppet_phase2_entrance(**kwargs)
+
+        log = MessageLog()
+        log.add(LazyText(render, old_name="A", new_name="B", burst_heal=10, atk=20))
+        log.add(LazyText("旧怨落地成刀：{detail}。", detail="x"))
+        log.add(LazyText("旧怨落地成刀：{detail}。", detail="x"))
+        self.assertEqual(len(log), 2)
+        self.assertEqual(calls, [])
+        self.assertIn("爆发登场", "\n".join(log))
+        self.assertEqual(log[-1], "旧怨落地成刀：x。")
+        list(log)
+        self.assertEqual(len(calls), 1)
+
+    def test_effect_values_render_matches_plain_text(self):
+        text = LazyText(story_system_lines.render_effect_values, message=" 正文 ", parts=("生命 1->2", "", "攻击 3"))
+        self.assertEqual(str(text), "正文（本次变化：生命 1->2，攻击 3）")
+        self.assertEqual(str(LazyText(story_system_lines.render_effect_values, message="正文", parts=())), "正文")
+
+    def test_effect_message_templates_render_on_read(self):
+        values = {"dmg": 3, "old_hp": 10, "hp": 7}
+        text = LazyText(
+            story_system_lines.render_effect_message,
+            message="",
+            fallback="受到 {dmg} 点伤害。",
+            parts=("生命 {old_hp}->{hp}",),
+            values=values,
+        )
+        self.assertEqual(str(text), "受到 3 点伤害。（本次变化：生命 10->7）")
+        custom = dict(message="自定义 {dmg}", fallback="", parts=(), values=values)
+        self.assertEqual(story_system_lines.render_effect_message(**custom), "自定义 {dmg}")
+        self.assertEqual(story_system_lines.render_effect_message(format_message=True, **custom), "自定义 3")
+
+    def test_lazy_and_plain_duplicates_dedupe_regardless_of_reads(self):
+        """LazyText 后接相同文本的普通字符串（及反过来）应去重，且与中途是否读取过日志无关。"""
+        for read_between in (False, True):
+            log = MessageLog()
+            log.add(LazyText("你受到 {dmg} 点伤害。", dmg=3))
+            if read_between:
+                list(log)
+            log.add("你受到 3 点伤害。")
+            log.add(LazyText("你受到 {dmg} 点伤害。", dmg=3))
+            log.add("你受到 3 点伤害。")
+            log.add(LazyText("你受到 {dmg} 点伤害。", dmg=3))
+            self.assertEqual(list(log), ["你受到 3 点伤害。"], read_between)
+
+    def test_identical_lazy_entries_dedupe_without_rendering(self):
+        calls = []
+
+        def render(n):
+            calls.append(n)
+            return f"第 {n} 条"
+
+        log = MessageLog()
+        log.add(LazyText(render, n=1))
+        log.add(LazyText(render, n=1))
+        self.assertEqual(calls, [])
+        self.assertEqual(list(log), ["第 1 条"])
+
+    def test_silent_log_drops_messages(self):
+        log = MessageLog(silent=True)
+        log.add("一条")
+        log.add(LazyText("{x}", x=1))
+        self.assertEqual(len(log), 0)
+        self.assertEqual(log.suppressed, 2)
+
+    def test_message_log_pickles_with_pending_entries(self):
+        log = MessageLog(["已渲染"])
+        log.add(LazyText(story_system_lines.render_effect_values, message="正文", parts=("数值",)))
+        restored = pickle.loads(pickle.dumps(log))
+        self.assertEqual(restored, ["已渲染", "正文（本次变化：数值）"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -69,4 +69,50 @@ class TestPlayerSystem(BaseTest):
         
         # 移除物品
         self.player.remove_item(item)
-        self.assertEqual(self.player.get_inventory_size(), size)
\ No newline at end of file
+        self.assertEqual(self.player.get_inventory_size(), size)
+
+    def test_combat_stats_cache_follows_status_changes(self):
+        """派生战斗属性缓存：基础攻击、状态增删、持续时间与数值变化后立即反映"""
+        self.player._atk = 10
+        self.assertEqual(self.player.atk, 10)
+        self.assertAlmostEqual(self.player.combat_stats.escape_chance, 0.3)
+
+        self.player.apply_status(StatusName.ATK_UP.create_instance(value=3, duration=2, target=self.player))
+        self.assertEqual(self.player.atk, 13)
+        self.player.statuses[StatusName.ATK_UP].value = 5
+        self.assertEqual(self.player.atk, 15)
+
+        self.apply_status_to_player(StatusName.WEAK, duration=1)
+        self.assertEqual(self.player.atk, 13)
+        self.assertAlmostEqual(self.player.combat_stats.escape_chance, 0.2)
+        self.player.battle_status_duration_pass()  # 虚弱到期
+        self.assertFalse(self.player.has_status(StatusName.WEAK))
+        self.assertEqual(self.player.atk, 15)
+
+        self.player.change_base_atk(2)
+        self.assertEqual(self.player.atk, 17)
+        self.player.statuses[StatusName.ATK_UP].duration = 0
+        self.assertEqual(self.player.atk, 12)
+
+        self.player.apply_status(
+            StatusName.DAMAGE_REDUCTION.create_instance(value=0.5, duration=3, target=self.player)
+        )
+        self.assertEqual(self.player.combat_stats.damage_reduction, 0.5)
+        self.player.statuses = {}
+        self.assertIsNone(self.player.combat_stats.damage_reduction)
+        self.assertEqual(self.player.combat_stats, self.player._compute_combat_stats())
+
+    def test_removed_status_no_longer_invalidates_combat_stats(self):
+        """移出状态表的状态解除持有者登记，之后改写它不再作废派生属性缓存"""
+        self.apply_status_to_player(StatusName.POISON, duration=3)
+        self.apply_status_to_player(StatusName.WEAK, duration=3)
+        poison = self.player.statuses[StatusName.POISON]
+        weak = self.player.statuses[StatusName.WEAK]
+        self.player.clear_battle_status()
+        del self.player.statuses[StatusName.WEAK]
+        stats = self.player.combat_stats
+        poison.duration = 5
+        weak.duration = 5
+        self.assertIs(self.player.combat_stats, stats)
+        self.assertIsNone(poison._holder)
+        self.assertIsNone(weak._holder)
@@ -6,6 +6,7 @@ from models.door import DoorEnum
 from models.monster import Monster
 from models import items
 from models.game_config import GameConfig
+from models.status import StatusName
 from scenes import DoorScene, BattleScene, ShopScene, UseItemScene, GameOverScene
 from unittest import mock
 
@@ -187,6 +188,36 @@ class TestSceneSystem(BaseTest):
         self.assertEqual(getattr(self.controller.story, "puppet_patrol_state", ""), "active")
         self.assertIn("走廊中来回游荡", getattr(self.controller.story, "puppet_patrol_note", ""))
 
+    def test_auto_battle_stops_on_extension_counter_then_finishes(self):
+        """自动战斗：银羽扰敌技触发时停下，再次自动战斗打到击败为止。"""
+        self.controller.scene_manager.go_to("battle_scene")
+        monster = Monster(name="银羽飞贼·莱希娅", hp=30, atk=1, tier=4, effect_probability=0.0)
+        setattr(monster, "story_elf_rival_final_boss", True)
+        self.controller.current_monster = monster
+        self.controller.current_battle_extensions = [
+            {"extension_type": "elf_rival_final_boss", "state": {"debuff_turns": [3]}}
+        ]
+        scene = self.controller.scene_manager.current_scene
+        scene.on_enter()
+        self.player.atk = 6
+
+        self.assertEqual(scene.auto_resolve(), {"turns": 1, "reason": "phase_change"})
+        self.assertTrue(self.player.has_status(StatusName.WEAK))
+
+        outcome = scene.auto_resolve()
+        self.assertEqual(outcome["reason"], "victory")
+        self.assertLessEqual(monster.hp, 0)
+        self.assertIsInstance(self.controller.scene_manager.current_scene, DoorScene)
+        self.assertEqual(self.controller.monsters_defeated, 1)
+
+    def test_auto_battle_respects_turn_cap(self):
+        self.controller.scene_manager.go_to("battle_scene")
+        self.controller.current_monster = Monster("测试怪物", 500, 1, effect_probability=0.0)
+        scene = self.controller.scene_manager.current_scene
+        scene.on_enter()
+        self.assertEqual(scene.auto_resolve(max_turns=3), {"turns": 3, "reason": "turn_cap"})
+        self.assertIs(self.controller.scene_manager.current_scene, scene)
+
     def test_tier_unlock_check_runs_every_five_rounds(self):
         """tier 解锁检测应仅在每5回合触发，并写入日志。解锁条件：min(攻击, 生命/2) 达到对应门槛。"""
         self.controller.round_count = 4
@@ -52,6 +52,31 @@ class TestServerAPI(unittest.TestCase):
             self.assertEqual(current_scene_enum, SceneType.DOOR, 
                              f"API call failed to transition from EventScene. Current: {current_scene_enum}")
 
+    def test_auto_battle_resolves_fight_in_one_request(self):
+        """自动战斗一次请求打完整场战斗，返回停止原因与整段日志；不在战斗中时返回 400。"""
+        from server import GameController
+        from models.monster import Monster
+        with self.app as client:
+            client.get("/")
+            with client.session_transaction() as sess:
+                sess["game_id"] = "auto_battle"
+            game = GameController()
+            games_store["auto_battle"] = game
+
+            resp = client.post("/autoBattle", json={}, headers={"X-Requested-With": "XMLHttpRequest"})
+            self.assertEqual(resp.status_code, 400)
+
+            game.current_monster = Monster("测试怪物", 60, 1, effect_probability=0.0)
+            game.scene_manager.go_to("battle_scene")
+            resp = client.post("/autoBattle", json={"max_turns": "bad"}, headers={"X-Requested-With": "XMLHttpRequest"})
+            self.assertEqual(resp.status_code, 200)
+            data = resp.get_json()
+            self.assertEqual(data["outcome"]["reason"], "victory")
+            self.assertGreater(data["outcome"]["turns"], 1)
+            self.assertIn("你击败了 测试怪物", data["log"])
+            self.assertEqual(game.scene_manager.current_scene.enum, SceneType.DOOR)
+            self.assertEqual(len(game.messages), 0)
+
     def test_all_scenes_in_whitelist(self):
         """Ensure all defined scenes are handled by server.py whitelist logic"""
         from scenes import SceneType
@@ -71,3 +96,52 @@ class TestServerAPI(unittest.TestCase):
             for bad_index in [{"index": -1}, {"index": 99}, {"index": "x"}, {}]:
                 resp = client.post("/buttonAction", json=bad_index, headers={"X-Requested-With": "XMLHttpRequest"})
                 self.assertEqual(resp.status_code, 200, f"bad payload {bad_index} should not crash")
+
+    def test_ending_roll_lines_cached_after_game_clear(self):
+        """通关时生成滚动字幕，ENDING_ROLL 轮询直接复用缓存的 JSON 片段。"""
+        import unittest.mock
+        with self.app as client:
+            client.get("/")
+            with client.session_transaction() as sess:
+                sess["game_id"] = "roll_test"
+            from server import GameController
+            game = GameController()
+            games_store["roll_test"] = game
+            game.story.choice_flags.add("stranger_helped")
+            game.trigger_game_clear(
+                ending_key="default_normal",
+                ending_title="结局:迷宫出口",
+                ending_description="测试结局描述",
+            )
+            cached_lines = game.ending_roll_payload["lines"]
+            self.assertIn("你曾对受伤的陌生人伸出援手。", cached_lines)
+            game.scene_manager.current_scene.handle_choice(0)
+            self.assertEqual(game.scene_manager.current_scene.enum, SceneType.ENDING_ROLL)
+
+            with unittest.mock.patch("ending_roll.build_ending_roll_lines") as rebuild:
+                for _ in range(3):
+                    resp = client.get("/getState")
+                    self.assertEqual(resp.status_code, 200)
+                    data = resp.get_json()
+                    self.assertEqual(data["ending_roll_lines"], cached_lines)
+                    self.assertEqual(data["scene_info"]["type"], "ENDING_ROLL")
+                rebuild.assert_not_called()
+
+    def test_event_telemetry_endpoint(self):
+        import server
+        from models.events.telemetry import EventTelemetry
+
+        self.assertEqual(self.app.get('/eventTelemetry').status_code, 404)
+        telemetry = EventTelemetry()
+        original = server.EVENT_TELEMETRY
+        server.EVENT_TELEMETRY = telemetry
+        try:
+            game = server.GameController()
+            self.assertIs(game.event_telemetry, telemetry)
+            from models.events import get_random_event
+            get_random_event(game)
+            data = json.loads(self.app.get('/eventTelemetry').data)
+            self.assertEqual(data["draws_sampled"], 1)
+        finally:
+            server.EVENT_TELEMETRY = original
+
@@ -1,6 +1,17 @@
 import random
 
 from models import items
+from models.shop import (
+    MAX_TARGET_COST,
+    MIN_TARGET_COST,
+    SHOP_CATEGORIES,
+    SHOP_CATEGORY_INDICES,
+    SHOP_ENTRIES,
+    SHOP_ITEM_POOL,
+    _SCORE_ROWS,
+    score_weight,
+    shop_target_cost,
+)
 from test.test_base import BaseTest
 
 
@@ -31,3 +42,34 @@ class TestShopGeneration(BaseTest):
                     2,
                     f"金币={gold}, seed={seed} 时类别过少: {categories}"
                 )
+
+    def test_compiled_catalogue_and_score_rows(self):
+        """商品目录在导入时编译，各目标价位的得分行与逐项计算一致"""
+        self.assertEqual(len(SHOP_ENTRIES), len(SHOP_ITEM_POOL))
+        self.assertEqual(SHOP_CATEGORIES, ("potion", "equipment", "scroll", "battle"))
+        self.assertEqual(sorted(i for indices in SHOP_CATEGORY_INDICES for i in indices), list(range(len(SHOP_ENTRIES))))
+        self.assertEqual(len(_SCORE_ROWS), MAX_TARGET_COST - MIN_TARGET_COST + 1)
+        self.assertEqual(shop_target_cost(0), MIN_TARGET_COST)
+        self.assertEqual(shop_target_cost(10 ** 6), MAX_TARGET_COST)
+        for target_cost in (MIN_TARGET_COST, 37, 120, MAX_TARGET_COST):
+            row = _SCORE_ROWS[target_cost - MIN_TARGET_COST]
+            self.assertEqual(row.scores, tuple(score_weight(entry, target_cost) for entry in SHOP_ENTRIES))
+            for category, indices in enumerate(SHOP_CATEGORY_INDICES):
+                self.assertEqual(row.category_weights[category], max(row.scores[i] for i in indices))
+                self.assertAlmostEqual(row.category_cum_weights[category][-1], sum(row.scores[i] for i in indices))
+
+    def test_generated_items_carry_catalogue_category(self):
+        """上架商品带有目录里的类别，装备名取自对应名字池"""
+        shop = self.controller.current_shop
+        self.player.gold = 80
+        equipment_names = {
+            name for entry in SHOP_ENTRIES if entry.name_pool for name in entry.name_pool
+        }
+        for seed in range(20):
+            random.seed(seed)
+            shop.generate_items()
+            self.assertEqual(len(shop.shop_items), shop.SHOP_ITEM_COUNT)
+            for item in shop.shop_items:
+                self.assertEqual(item.shop_category, self._category_of(item))
+                if isinstance(item, items.Equipment):
+                    self.assertIn(item.name.replace(" (促销)", ""), equipment_names)
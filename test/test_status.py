@@ -74,3 +74,35 @@ class TestStatusSystem(BaseTest):
         poison = StatusName.POISON.create_instance(duration=3, target=self.player)
         self.player.apply_status(poison)
         self.assertFalse(self.player.has_status(StatusName.POISON))
+
+    def test_status_table_ticks_by_round_kind(self):
+        """状态表按战斗 / 冒险两类推进，顺序与状态表一致，战斗结束只清除战斗状态"""
+        player = self.player
+        for name, duration in (
+            (StatusName.POISON, 1),
+            (StatusName.WEAK, 2),
+            (StatusName.ATK_UP, 1),
+            (StatusName.STUN, 2),
+        ):
+            player.apply_status(name.create_instance(duration=duration, target=player))
+        self.assertEqual(player.statuses.battle_keys(), [StatusName.POISON, StatusName.STUN])
+        self.assertEqual(
+            player.statuses.battle_keys(StatusName.WEAK),
+            [StatusName.POISON, StatusName.WEAK, StatusName.STUN],
+        )
+        self.assertEqual(player.statuses.adventure_keys(), [StatusName.WEAK, StatusName.ATK_UP])
+
+        player.hp = 100
+        player.battle_status_duration_pass()
+        self.assertEqual(player.hp, 90)
+        self.assertNotIn(StatusName.POISON, player.statuses)
+        self.assertEqual(player.get_status_duration(StatusName.WEAK), 1)
+        self.assertEqual(player.get_status_duration(StatusName.ATK_UP), 1)
+
+        player.clear_battle_status()
+        self.assertEqual(list(player.statuses), [StatusName.WEAK, StatusName.ATK_UP])
+        self.assertEqual(player.statuses.battle_keys(), [])
+
+        self.monster.stun(1)
+        self.monster.battle_status_duration_pass()
+        self.assertFalse(self.monster.has_status(StatusName.STUN))
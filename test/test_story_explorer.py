@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+剧情分支覆盖探索器测试：从「补全谢幕」前置状态出发，验证可达结局、结果可复现与指纹规范化。
+"""
+import random
+
+from story_explorer import explore, story_fingerprint
+from test.test_base import BaseTest
+from test.test_stage_curtain_order import setup_controller_for_stage_curtain_order
+
+
+class TestStoryExplorer(BaseTest):
+    def setUp(self):
+        # 控制器初始化即会生成第一批门，先固定随机源，保证起始状态可复现
+        random.seed(0)
+        super().setUp()
+        setup_controller_for_stage_curtain_order(self.controller)
+
+    def test_reaches_both_stage_curtain_endings(self):
+        report = explore(start=self.controller, beam_width=8, max_depth=8, workers=1)
+        counts = report.ending_counts
+        self.assertIn("stage_curtain_order", counts)
+        self.assertIn("stage_curtain_freedom", counts)
+        order_paths = report.paths_for("stage_curtain_order")
+        self.assertTrue(all(path[0] == "seed=0" for path in order_paths))
+        self.assertIn("EndingStageKindPuppetDialogueEvent#0", {path[-1] for path in order_paths})
+        self.assertGreater(report.expanded, 0)
+        self.assertIn("stage_curtain_order", report.format())
+
+    def test_exploration_is_reproducible(self):
+        first = explore(start=self.controller, beam_width=8, max_depth=6, workers=1)
+        second = explore(start=self.controller, beam_width=8, max_depth=6, workers=1)
+        self.assertEqual(
+            [(o.path, o.ending_key) for o in first.outcomes],
+            [(o.path, o.ending_key) for o in second.outcomes],
+        )
+        self.assertEqual(first.expanded, second.expanded)
+
+    def test_process_pool_matches_serial_exploration(self):
+        serial = explore(start=self.controller, beam_width=4, max_depth=4, workers=1)
+        pooled = explore(start=self.controller, beam_width=4, max_depth=4, workers=2)
+        self.assertEqual(pooled.workers, 2)
+        self.assertEqual(
+            sorted((o.path, o.ending_key) for o in serial.outcomes),
+            sorted((o.path, o.ending_key) for o in pooled.outcomes),
+        )
+
+    def test_start_controller_is_not_mutated(self):
+        before = story_fingerprint(self.controller)
+        round_before = self.controller.round_count
+        explore(start=self.controller, beam_width=4, max_depth=4, workers=1)
+        self.assertEqual(story_fingerprint(self.controller), before)
+        self.assertEqual(self.controller.round_count, round_before)
+
+    def test_fingerprint_ignores_insertion_order(self):
+        story = self.controller.story
+        story.choice_flags.add("explorer_flag_a")
+        story.choice_flags.add("explorer_flag_b")
+        first = story_fingerprint(self.controller, ("X#0",))
+
+        story.choice_flags.discard("explorer_flag_a")
+        story.choice_flags.discard("explorer_flag_b")
+        story.choice_flags.add("explorer_flag_b")
+        story.choice_flags.add("explorer_flag_a")
+        self.assertEqual(story_fingerprint(self.controller, ("X#0",)), first)
+
+        story.elf_relation += 1
+        self.assertNotEqual(story_fingerprint(self.controller, ("X#0",)), first)
+        story.elf_relation -= 1
+        self.assertNotEqual(story_fingerprint(self.controller, ("X#1",)), first)
@@ -1,9 +1,57 @@
 """终局门配置单一来源：阻塞顺序、consequence 派生与 StorySystem 对齐。"""
 
+import random
 import unittest
+from unittest.mock import patch
 
 import models.story_gates as story_gates
+from models.story_gate_graph import STORY_GATE_GRAPH, compile_gate_graph
 from models.story_system import StorySystem
+from server import GameController
+
+_RANDOM_TAGS = (
+    "ending:default_normal_completed",
+    "ending:stage_curtain_completed",
+    "ending:puppet_final_defeated",
+    "ending:puppet_final_escape_recorded",
+    "ending:puppet_rematch_gate_done",
+    "curtain_call_script_recovered",
+    "elf_key_obtained",
+    "puppet_arc_active",
+)
+_RANDOM_FLAGS = (
+    "dream_well_sealed",
+    "dream_well_sold",
+    "dream_well_drank",
+    "echo_court_taxed",
+    "mirror_played_hero",
+    "mirror_tore_script",
+    "curtain_call_script_recovered",
+)
+
+
+def _randomize_story_state(story, rng):
+    """随机改动一项终局门会读取的剧情状态。"""
+    roll = rng.randrange(8)
+    if roll == 0:
+        story.story_tags.symmetric_difference_update({rng.choice(_RANDOM_TAGS)})
+    elif roll == 1:
+        story.choice_flags.symmetric_difference_update({rng.choice(_RANDOM_FLAGS)})
+    elif roll == 2:
+        story.elf_relation = rng.randint(-6, 6)
+    elif roll == 3:
+        story.puppet_evil_value = rng.choice((0, 44, 45, 46, 100))
+    elif roll == 4:
+        story.puppet_final_outcome = rng.choice(("", "defeated", "escaped"))
+    elif roll == 5:
+        story.elf_chain_ended = rng.random() < 0.5
+        story.elf_key_obtained = rng.random() < 0.5
+    elif roll == 6:
+        story.elf_chain_started = rng.random() < 0.5
+    else:
+        from models.events.dispatch import LONG_EVENT_STARTER_CLASSES, _mark_event_triggered
+
+        _mark_event_triggered(story.controller, rng.choice(sorted(LONG_EVENT_STARTER_CLASSES, key=lambda cls: cls.__name__)))
 
 
 class TestStoryGates(unittest.TestCase):
@@ -81,5 +129,203 @@ class TestStoryGates(unittest.TestCase):
         self.assertEqual(events.ELF_THIEF_NAME, story_gates.ELF_THIEF_NAME)
 
 
+class TestStoryGateGraph(unittest.TestCase):
+    def test_shipped_gate_graph_has_no_unreachable_gates_or_cycles(self):
+        self.assertEqual(set(STORY_GATE_GRAPH.gates), set(story_gates.PRE_FINAL_GATE_STORY_CONFIG))
+        self.assertEqual(STORY_GATE_GRAPH.unreachable, {})
+        self.assertEqual(STORY_GATE_GRAPH.cycles, ())
+        for gate_key in story_gates.PRE_ENDING_BLOCKING_GATE_KEYS:
+            self.assertTrue(STORY_GATE_GRAPH.gates[gate_key].input_mask)
+
+    def test_compiler_reports_contradictions_orphans_and_cycles(self):
+        config = {key: {"consequence_id": key} for key in ("a", "b", "c", "d", "e")}
+        conditions = {
+            "a": {"phase": "pre_ending", "condition": story_gates.all_of("tag:x", story_gates.not_("tag:x"))},
+            "b": {
+                "phase": "ending",
+                "condition": story_gates.all_of(
+                    story_gates.compare("elf_relation", ">", 3), story_gates.compare("elf_relation", "<", 2)
+                ),
+            },
+            "c": {"phase": "followup", "produces": ("tag:only_c",)},
+            "d": {"phase": "ending", "condition": "tag:only_e", "produces": ("tag:only_d",)},
+            "e": {"phase": "ending", "condition": "tag:only_d", "produces": ("tag:only_e",)},
+        }
+        graph = compile_gate_graph(conditions, config, registered_atoms={"x"})
+        self.assertEqual(set(graph.unreachable), {"a", "b", "c", "d", "e"})
+        self.assertIn("tag:x", graph.unreachable["a"])
+        self.assertIn("elf_relation", graph.unreachable["b"])
+        self.assertEqual(graph.cycles, (("d", "e"),))
+        with self.assertRaises(ValueError):
+            compile_gate_graph({**conditions, "a": {"phase": "pre_ending", "condition": "bogus"}}, config)
+
+    def test_long_story_starter_names_match_events(self):
+        from models.events import LONG_EVENT_STARTER_CLASSES
+
+        self.assertEqual(
+            set(story_gates.LONG_STORY_STARTER_EVENT_NAMES),
+            {cls.__name__ for cls in LONG_EVENT_STARTER_CLASSES},
+        )
+
+    def test_declared_conditions_match_runtime_predicates(self):
+        from models.events.stage_curtain import _should_schedule_kind_puppet_dialogue
+
+        controller = GameController()
+        story = controller.story
+        gates = STORY_GATE_GRAPH.gates
+        rng = random.Random(28)
+        for _ in range(400):
+            _randomize_story_state(story, rng)
+            for gate_key in story_gates.PRE_ENDING_BLOCKING_GATE_KEYS:
+                self.assertEqual(
+                    gates[gate_key].is_condition_met(story), story._is_pre_ending_gate_condition_met(gate_key), gate_key
+                )
+            self.assertEqual(gates["puppet_echo_final_gate"].is_condition_met(story), story._is_puppet_echo_gate_ready())
+            self.assertEqual(
+                gates["kind_puppet_dialogue_round200"].is_condition_met(story), story._is_kind_puppet_dialogue_ready()
+            )
+            self.assertEqual(
+                gates["power_curtain_dialogue_round200"].is_condition_met(story), story._is_power_curtain_dialogue_ready()
+            )
+            self.assertEqual(
+                gates["stage_curtain_kind_puppet_dialogue"].is_condition_met(story),
+                bool(_should_schedule_kind_puppet_dialogue(controller)),
+            )
+            default_ready = (
+                "ending:default_normal_completed" not in story.story_tags
+                and "ending:stage_curtain_completed" not in story.story_tags
+                and not story._is_power_curtain_dialogue_ready()
+                and not story._has_started_long_story_branch()
+            )
+            self.assertEqual(gates["round200_default_first_gate"].is_condition_met(story), default_ready)
+
+    def test_cached_gate_conditions_match_full_evaluation(self):
+        controller = GameController()
+        story = controller.story
+        evaluators = {
+            gate_key: (lambda key=gate_key: story._is_pre_ending_gate_condition_met(key))
+            for gate_key in story_gates.PRE_ENDING_BLOCKING_GATE_KEYS
+        }
+        evaluators.update(
+            {
+                "puppet_echo_final_gate": story._is_puppet_echo_gate_ready,
+                "kind_puppet_dialogue_round200": story._is_kind_puppet_dialogue_ready,
+                "power_curtain_dialogue_round200": story._is_power_curtain_dialogue_ready,
+                "round200_default_first_gate": story._is_default_first_gate_ready,
+            }
+        )
+        rng = random.Random(2028)
+        for _ in range(300):
+            for _ in range(rng.randint(0, 2)):
+                _randomize_story_state(story, rng)
+            for gate_key, evaluator in evaluators.items():
+                self.assertEqual(story._gate_condition(gate_key, evaluator), evaluator(), gate_key)
+
+    def test_recheck_loop_only_evaluates_gates_with_changed_inputs(self):
+        controller = GameController()
+        controller.round_count = 190
+        story = controller.story
+        calls = []
+        original = StorySystem._is_pre_ending_gate_condition_met
+
+        def counting(self_story, gate_key):
+            calls.append(gate_key)
+            return original(self_story, gate_key)
+
+        with patch.object(StorySystem, "_is_pre_ending_gate_condition_met", counting):
+            story.ensure_all_pre_ending_blocking_considered()
+            self.assertEqual(calls, list(story_gates.PRE_ENDING_BLOCKING_GATE_KEYS))
+            calls.clear()
+            story.ensure_all_pre_ending_blocking_considered()
+            self.assertEqual(calls, [])
+            story.choice_flags.add("unrelated_flag_for_gate_mask")
+            story.ensure_all_pre_ending_blocking_considered()
+            self.assertEqual(calls, [])
+            story.elf_chain_ended = True
+            story.elf_relation = -5
+            _, registered = story.ensure_all_pre_ending_blocking_considered()
+        self.assertEqual(calls, ["round200_stage_preface", "elf_rival_final_gate"])
+        self.assertEqual(registered, ["elf_rival_final_gate"])
+
+    def test_round200_checks_reuse_gate_conditions_until_inputs_change(self):
+        controller = GameController()
+        controller.round_count = 200
+        story = controller.story
+        calls = []
+        original = StorySystem._is_power_curtain_dialogue_ready
+
+        def counting(self_story):
+            calls.append(True)
+            return original(self_story)
+
+        with patch.object(StorySystem, "_is_power_curtain_dialogue_ready", counting):
+            self.assertTrue(story.ensure_default_normal_ending_schedule())
+            first_calls = len(calls)
+            for _ in range(5):
+                story.ensure_default_normal_ending_schedule()
+            self.assertEqual(len(calls), first_calls)
+            story.story_tags.add("curtain_call_script_recovered")
+            story.ensure_default_normal_ending_schedule()
+        self.assertGreater(len(calls), first_calls)
+
+    def test_first_long_starter_trigger_invalidates_default_gate_condition(self):
+        from models.events import MoonBountyEvent
+        from models.events.dispatch import _mark_event_triggered
+
+        controller = GameController()
+        story = controller.story
+        self.assertTrue(story._gate_condition("round200_default_first_gate", story._is_default_first_gate_ready))
+        _mark_event_triggered(controller, MoonBountyEvent)
+        self.assertFalse(story._gate_condition("round200_default_first_gate", story._is_default_first_gate_ready))
+
+    def test_direct_trigger_count_writes_invalidate_default_gate_condition(self):
+        """直接写 / 删计数、整体替换计数表都应让计数类终局门重新求值。"""
+        from models.events.eligibility import EventTriggerCounts
+
+        controller = GameController()
+        story = controller.story
+
+        def gate_ready():
+            return story._gate_condition("round200_default_first_gate", story._is_default_first_gate_ready)
+
+        self.assertTrue(gate_ready())
+        controller.event_trigger_counts["MoonBountyEvent"] = 1
+        self.assertFalse(gate_ready())
+        controller.event_trigger_counts["MoonBountyEvent"] = 3
+        self.assertFalse(gate_ready())
+        del controller.event_trigger_counts["MoonBountyEvent"]
+        self.assertTrue(gate_ready())
+        controller.event_trigger_counts["MoonBountyEvent"] = 1
+        self.assertFalse(gate_ready())
+        controller.event_trigger_counts.pop("MoonBountyEvent")
+        self.assertTrue(gate_ready())
+        controller.event_trigger_counts = EventTriggerCounts({"ElfThiefIntroEvent": 1})
+        self.assertFalse(gate_ready())
+        controller.event_trigger_counts = {}
+        self.assertTrue(gate_ready())
+        controller.event_trigger_counts["MoonBountyEvent"] = 1
+        self.assertFalse(gate_ready())
+
+    def test_gate_trace_explains_scheduling_decisions(self):
+        controller = GameController()
+        controller.round_count = 200
+        controller.event_trigger_counts["MoonBountyEvent"] = 1
+        story = controller.story
+        story.enable_gate_trace()
+        self.assertFalse(story.ensure_default_normal_ending_schedule())
+        reasons = {entry["gate"]: entry["reason"] for entry in story.gate_trace if not entry["scheduled"]}
+        self.assertIn("counter:MoonBountyEvent", reasons["round200_default_first_gate"])
+        self.assertIn("tag:ending:puppet_final_defeated", reasons["puppet_echo_final_gate"])
+
+        controller.round_count = 185
+        story.elf_chain_ended = True
+        story.elf_relation = -5
+        story.gate_trace.clear()
+        story.ensure_pre_final_event_schedule()
+        scheduled = [entry["gate"] for entry in story.gate_trace if entry["scheduled"]]
+        self.assertEqual(scheduled, ["elf_rival_final_gate"])
+        self.assertTrue(all(entry["round"] == 185 for entry in story.gate_trace))
+
+
 if __name__ == "__main__":
     unittest.main()
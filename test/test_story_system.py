@@ -1,3 +1,4 @@
+import pickle
 import unittest.mock
 import random
 
@@ -925,6 +926,58 @@ class TestStorySystem(BaseTest):
 
         self.assertEqual(ending_payload.get("ending_key"), "stage_curtain_freedom")
 
+    def test_stage_curtain_scores_cached_until_flag_version_changes(self):
+        """谢幕评分按 flag_version 缓存：状态不变时复用，flag 或剧情属性变化后重算。"""
+        story = self.controller.story
+        story.story_tags.add("ending:puppet_final_defeated")
+        first = _collect_stage_curtain_scores(story)
+        self.assertIs(_collect_stage_curtain_scores(story), first)
+
+        story.story_tags.add("ending:puppet_final_defeated")
+        self.assertIs(_collect_stage_curtain_scores(story), first, "重复添加已有 flag 不应使缓存失效")
+
+        story.choice_flags.add("moon_verdict_clean")
+        second = _collect_stage_curtain_scores(story)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.get("moon_verdict"), "clean")
+
+        story.puppet_evil_value = 20
+        third = _collect_stage_curtain_scores(story)
+        self.assertIsNot(third, second)
+        self.assertTrue(third.get("puppet_kind_rescued"))
+
+        story.choice_flags = {"mirror_played_villain"}
+        self.assertEqual(_collect_stage_curtain_scores(story).get("mirror_outcome"), "villain")
+        story.choice_flags.discard("mirror_played_villain")
+        self.assertEqual(_collect_stage_curtain_scores(story).get("mirror_outcome"), "")
+
+    def test_chain_state_records_back_legacy_attributes(self):
+        """链状态为 __slots__ 记录：旧属性名读写落到记录上，记录字段赋值推进版本并作废相关终局门缓存，可随剧情系统 pickle。"""
+        story = self.controller.story
+        self.assertFalse(hasattr(story.elf, "__dict__"))
+        self.assertFalse(hasattr(story, "puppet_evil_value"), "邪恶值在木偶链开始前不追踪")
+
+        story.elf_relation = 3
+        self.assertEqual(story.elf.relation, 3)
+        story.puppet.evil_value = 40
+        self.assertEqual(story.puppet_evil_value, 40)
+
+        story._gate_condition_cache["elf_rival_final_gate"] = True
+        story._gate_condition_cache["stage_curtain_kind_puppet_dialogue"] = True
+        version = story.flag_version
+        story.elf.relation = -5
+        self.assertGreater(story.flag_version, version)
+        self.assertNotIn("elf_rival_final_gate", story._gate_condition_cache)
+        self.assertIn("stage_curtain_kind_puppet_dialogue", story._gate_condition_cache)
+
+        story.elf.middle_queue = ["elf_fake_map_event"]
+        restored = pickle.loads(pickle.dumps(self.controller)).story
+        self.assertEqual(restored.elf.as_dict(), story.elf.as_dict())
+        self.assertEqual(restored.puppet_evil_value, 40)
+        version = restored.flag_version
+        restored.moon.diary_source = "thief_body"
+        self.assertGreater(restored.flag_version, version)
+
     def test_puppet_final_boss_escape_records_meta_for_later_final_ending(self):
         story = self.controller.story
         puppet_boss = Monster(name="裂齿·夜魇·堕暗机偶", hp=10, atk=2, tier=2)
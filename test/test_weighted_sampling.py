@@ -0,0 +1,116 @@
+"""
+加权抽样工具测试：别名表 / 累计表 / 树状数组与原手写累加循环的分布一致性
+"""
+from bisect import bisect_right
+import random
+import unittest
+
+from models import items
+from models.monster import _roll_tier, _tier_alias_table, _tier_weight_key
+from models.weighted_sampling import (
+    AliasTable,
+    CumulativeTable,
+    FenwickSampler,
+    weighted_sample_without_replacement,
+)
+
+
+def _legacy_pick(items_, weights, roll):
+    """原 _trigger_pending_consequence / _weighted_pick 的累加循环。"""
+    acc = 0.0
+    for item, weight in zip(items_, weights):
+        acc += weight
+        if roll <= acc:
+            return item
+    return items_[-1]
+
+
+def _legacy_tier_weights(max_tier, current_round, power_score):
+    weights = []
+    for tier in range(1, max_tier + 1):
+        base_weight = float((max_tier - tier + 1) * 1.2)
+        if current_round is not None and current_round >= 20 and tier >= max_tier - 1:
+            base_weight += 0.8
+        if current_round is not None and current_round >= 45 and tier == max_tier:
+            base_weight += 1.4
+        if current_round is not None and current_round >= 60 and power_score >= 140 and tier == max_tier:
+            base_weight += 0.8
+        weights.append(max(0.1, base_weight))
+    return weights
+
+
+class TestWeightedSampling(unittest.TestCase):
+    def test_alias_table_probabilities_match_weights(self):
+        rng = random.Random(3)
+        for _ in range(50):
+            n = rng.randint(1, 12)
+            weights = [rng.choice([0.0, rng.random() * 10]) for _ in range(n)]
+            if not any(weights):
+                weights[0] = 1.0
+            table = AliasTable(range(n), weights)
+            total = sum(weights)
+            for got, weight in zip(table.probabilities(), weights):
+                self.assertAlmostEqual(got, weight / total)
+
+    def test_alias_table_never_returns_zero_weight_items(self):
+        table = AliasTable(["a", "b", "c"], [0, 5, 0])
+        rng = random.Random(0)
+        self.assertEqual({table.sample(rng) for _ in range(200)}, {"b"})
+
+    def test_cumulative_table_matches_legacy_loop(self):
+        rng = random.Random(5)
+        for _ in range(200):
+            n = rng.randint(1, 8)
+            weights = [rng.choice([0.0, 1.0, rng.random() * 3]) for _ in range(n)]
+            table = CumulativeTable(list(range(n)), weights)
+            for roll in (0.0, table.total, rng.uniform(0, table.total)):
+                self.assertEqual(table.pick(roll), _legacy_pick(list(range(n)), weights, roll))
+
+    def test_fenwick_matches_random_choices_bisect_after_updates(self):
+        rng = random.Random(7)
+        weights = [rng.random() * 5 for _ in range(17)]
+        sampler = FenwickSampler(weights)
+        for _ in range(100):
+            index = rng.randrange(len(weights))
+            weights[index] = rng.choice([0.0, rng.random() * 5])
+            sampler.set_weight(index, weights[index])
+            cumulative = []
+            acc = 0.0
+            for weight in weights:
+                acc += weight
+                cumulative.append(acc)
+            self.assertAlmostEqual(sampler.total, acc)
+            if acc <= 0:
+                continue
+            roll = rng.random() * acc
+            self.assertEqual(sampler.find(roll), bisect_right(cumulative, roll))
+
+    def test_sample_without_replacement_is_unique_and_skips_zero_weights(self):
+        rng = random.Random(11)
+        for _ in range(100):
+            picked = weighted_sample_without_replacement("abcde", [1, 0, 2, 0, 3], 3, rng=rng)
+            self.assertEqual(sorted(picked), ["a", "c", "e"])
+        self.assertEqual(len(weighted_sample_without_replacement("ab", [0, 0], 5, rng=rng)), 2)
+
+    def test_tier_alias_tables_match_legacy_weights(self):
+        for max_tier in range(2, 7):
+            for current_round in (None, 5, 20, 45, 60, 90):
+                for power_score in (0, 139, 140, 400):
+                    table = _tier_alias_table(*_tier_weight_key(max_tier, current_round, power_score))
+                    weights = _legacy_tier_weights(max_tier, current_round, power_score)
+                    total = sum(weights)
+                    self.assertEqual(table.items, tuple(range(1, max_tier + 1)))
+                    for got, weight in zip(table.probabilities(), weights):
+                        self.assertAlmostEqual(got, weight / total)
+        self.assertEqual(_roll_tier(1, 100, 500), 1)
+
+    def test_untiered_item_pool_keeps_legacy_weights(self):
+        table = items._untiered_item_table()
+        names = [params["name"] if "name" in params else cls.__name__ for cls, params in table.items]
+        probabilities = dict(zip(names, table.probabilities()))
+        self.assertAlmostEqual(probabilities["小治疗药水"], 20 / 138)
+        self.assertAlmostEqual(probabilities["小钱袋"], 10 / 138)
+        random.seed(2)
+        bags = [item for item in (items.create_random_item() for _ in range(300)) if isinstance(item, items.GoldBag)]
+        self.assertTrue(bags)
+        self.assertTrue(all(10 <= bag.gold_amount <= 50 for bag in bags))